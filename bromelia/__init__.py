@@ -19,5 +19,32 @@ from .__version__ import __license__
 from .__version__ import __copyright__
 
 from .base import *
-from .bromelia import Bromelia
-from .setup import Diameter
\ No newline at end of file
+
+
+#: Public names provided by heavier modules, which are only imported on 
+#: first access. It keeps ``import bromelia`` cheap for tools that only 
+#: need to encode or decode Diameter messages.
+_lazy_attributes = {
+    "Bromelia": ".bromelia",
+    "Diameter": ".setup",
+}
+
+
+#: Names exported by ``from bromelia import *``, the lazy ones included.
+__all__ = [name for name in globals() if not name.startswith("_")] + \
+          list(_lazy_attributes)
+
+
+def __getattr__(name):
+    if name in _lazy_attributes:
+        from importlib import import_module
+
+        value = getattr(import_module(_lazy_attributes[name], __name__), name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_lazy_attributes))
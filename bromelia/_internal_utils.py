@@ -14,8 +14,10 @@ import ipaddress
 import logging
 import re
 import os
+import platform
+import socket
 import struct
-import yaml
+import threading
 from collections import namedtuple
 
 from .definitions import diameter_application_ids
@@ -25,6 +27,52 @@ from .exceptions import InvalidConfigKey
 from .exceptions import InvalidConfigValue
 
 
+class LazyDefault:
+    """Default argument value which is resolved only once, on first use. It 
+    is used for the local node identities (hostname, realm and IP address),
+    which would otherwise require DNS lookups while importing the library.
+
+    DiameterMessage subclasses resolve LazyDefault arguments while building
+    their DiameterAVP objects.
+    """
+    __slots__ = ("name", "func", "_value", "_lock")
+
+    _unresolved = object()
+
+    def __init__(self, name: str, func) -> None:
+        self.name = name
+        self.func = func
+        self._value = LazyDefault._unresolved
+        self._lock = threading.Lock()
+
+
+    def __repr__(self) -> str:
+        return f"<LazyDefault: {self.name}>"
+
+
+    def resolve(self):
+        if self._value is LazyDefault._unresolved:
+            with self._lock:
+                if self._value is LazyDefault._unresolved:
+                    self._value = self.func()
+        return self._value
+
+
+def resolve_default(value):
+    """Returns the resolved value of a LazyDefault object. Any other value 
+    is returned as it is.
+    """
+    if isinstance(value, LazyDefault):
+        return value.resolve()
+    return value
+
+
+DEFAULT_HOST_NAME = LazyDefault("platform.node()", platform.node)
+DEFAULT_REALM = LazyDefault("socket.getfqdn()", socket.getfqdn)
+DEFAULT_IP_ADDRESS = LazyDefault("socket.gethostbyname(platform.node())", 
+                        lambda: socket.gethostbyname(DEFAULT_HOST_NAME.resolve()))
+
+
 LocalNode = namedtuple("LocalNode", [
                                         "host_name",
                                         "realm",
@@ -46,8 +94,13 @@ Connection = namedtuple("Connection", [
                                         "local_node",
                                         "peer_node",
                                         "application_ids",
-                                        "watchdog_timeout"
-                                    ]
+                                        "watchdog_timeout",
+                                        "sctp_streams",
+                                        "sctp_stream_policy",
+                                        "tx_timeout",
+                                        "tc_timeout"
+                                    ],
+                        defaults=(1, "SESSION_ID", None, None)
 )
 config_mask = [
                 "MODE",
@@ -61,7 +114,12 @@ config_mask = [
                 "PEER_NODE_REALM",
                 "PEER_NODE_IP_ADDRESS",
                 "PEER_NODE_PORT",
-                "WATCHDOG_TIMEOUT"
+                "WATCHDOG_TIMEOUT",
+                "SCTP_STREAMS",
+                "SCTP_STREAM_POLICY",
+                "TX_TIMEOUT",
+                "TC_TIMEOUT",
+                "METRICS_PORT"
 ]
 
 
@@ -163,6 +221,15 @@ def _convert_config_to_connection_obj(config) -> Connection:
         if key not in config_mask:
             raise InvalidConfigKey(f"Invalid config key '{key}' found")
 
+    #: Optional keys, which only apply to the SCTP transport type.
+    sctp_streams = 1
+    sctp_stream_policy = "SESSION_ID"
+
+    #: Optional timer keys. Tx defaults to TX_TIMER, and there is no
+    #: reconnection unless Tc is set.
+    tx_timeout = None
+    tc_timeout = None
+
     for key, value in config.items():
         if key == "MODE":
             if value not in ["CLIENT", "SERVER"]:
@@ -173,10 +240,10 @@ def _convert_config_to_connection_obj(config) -> Connection:
             mode = value
 
         elif key == "TRANSPORT_TYPE":
-            if value not in ["TCP", "SCTP"]:
+            if value not in ["TCP", "SCTP", "LOOPBACK"]:
                 raise InvalidConfigValue("Invalid config value '{value}' "\
                                 f"found for config key '{key}'. It MUST be "\
-                                "either 'TCP' or 'SCTP'")
+                                "either 'TCP', 'SCTP' or 'LOOPBACK'")
             transport_type = value
 
         elif key == "APPLICATIONS":
@@ -247,6 +314,43 @@ def _convert_config_to_connection_obj(config) -> Connection:
 
             watchdog_timeout = value
 
+        elif key == "SCTP_STREAMS":
+            if not isinstance(value, int) or not 1 <= value <= 65535:
+                raise InvalidConfigValue(f"Invalid config value '{value}' "\
+                                         f"found for config key '{key}'. It "\
+                                         f"MUST be 'int' between 1 and 65535")
+
+            sctp_streams = value
+
+        elif key == "SCTP_STREAM_POLICY":
+            if value not in ["SESSION_ID", "APPLICATION"]:
+                raise InvalidConfigValue(f"Invalid config value '{value}' "\
+                                         f"found for config key '{key}'. It "\
+                                         f"MUST be either 'SESSION_ID' or "\
+                                         f"'APPLICATION'")
+
+            sctp_stream_policy = value
+
+        elif key in ["TX_TIMEOUT", "TC_TIMEOUT"]:
+            if value is not None and (not isinstance(value, (int, float)) or \
+                                      value <= 0):
+                raise InvalidConfigValue(f"Invalid config value '{value}' "\
+                                         f"found for config key '{key}'. It "\
+                                         f"MUST be a positive number")
+
+            if key == "TX_TIMEOUT":
+                tx_timeout = value
+            else:
+                tc_timeout = value
+
+        elif key == "METRICS_PORT":
+            #: Only used by the Worker process of the Diameter object.
+            if value is not None and (not isinstance(value, int) or \
+                                      not 0 <= value <= 65535):
+                raise InvalidConfigValue(f"Invalid config value '{value}' "\
+                                         f"found for config key '{key}'. It "\
+                                         f"MUST be 'int' between 0 and 65535")
+
     local_node = LocalNode(host_name=local_node_host_name,
                            realm=local_node_realm,
                            ip_address=local_node_ip_address,
@@ -265,11 +369,22 @@ def _convert_config_to_connection_obj(config) -> Connection:
                             application_ids=application_ids,
                             local_node=local_node,
                             peer_node=peer_node,
-                            watchdog_timeout=watchdog_timeout)
+                            watchdog_timeout=watchdog_timeout,
+                            sctp_streams=sctp_streams,
+                            sctp_stream_policy=sctp_stream_policy,
+                            tx_timeout=tx_timeout,
+                            tc_timeout=tc_timeout)
 
     return connection
 
 
+def _load_yaml(config_file):
+    #: PyYAML is only needed when loading config files, so it is imported
+    #: on first use.
+    import yaml
+    return yaml.load(config_file, Loader=yaml.FullLoader)
+
+
 def _convert_file_to_config(filepath: str = None, variables_dictionary: dict = globals()) -> list:
     if not filepath:
         filepath = os.path.join(os.getcwd(), "config.yaml")
@@ -277,7 +392,7 @@ def _convert_file_to_config(filepath: str = None, variables_dictionary: dict = g
     try:
         if os.path.exists(filepath):
             with open(filepath, "r") as config_file:
-                from_config_file = yaml.load(config_file, Loader=yaml.FullLoader)
+                from_config_file = _load_yaml(config_file)
 
     except Exception as e:
         logging.exception(f"_convert_file_to_config - exception: {e}")
@@ -311,7 +426,8 @@ def _convert_file_to_config(filepath: str = None, variables_dictionary: dict = g
                             "PEER_NODE_REALM": spec["peer"]["realm"],
                             "PEER_NODE_IP_ADDRESS": spec["peer"]["ip_address"],
                             "PEER_NODE_PORT": spec["peer"]["port"],
-                            "WATCHDOG_TIMEOUT": spec["watchdog_timeout"]
+                            "WATCHDOG_TIMEOUT": spec["watchdog_timeout"],
+                            "METRICS_PORT": spec.get("metrics_port")
         })
 
     return configs
@@ -333,7 +449,7 @@ def get_app_name(filepath: str = None) -> str:
     try:
         if os.path.exists(filepath):
             with open(filepath, "r") as config_file:
-                from_config_file = yaml.load(config_file, Loader=yaml.FullLoader)
+                from_config_file = _load_yaml(config_file)
 
     except Exception as e:
         logging.exception(f"_convert_file_to_config - exception: {e}")
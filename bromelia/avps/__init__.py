@@ -3,25 +3,83 @@
     bromelia.avps
     ~~~~~~~~~~~~~
 
-    This module contains the Diameter protocol AVP library 
+    This module contains the Diameter protocol AVP library
     that are used to create Diameter messages.
-    
+
+    The AVP modules are imported on first access to one of their names,
+    so ``from bromelia.avps import OriginHostAVP`` only imports the modules
+    looked up until it is found. ``from bromelia.avps import *`` and the
+    DiameterAVP subclasses look up of bromelia.base import all of them.
+
     :copyright: (c) 2020-present Henrique Marques Ribeiro.
     :license: MIT, see LICENSE for more details.
 """
 
-from .etsi_3gpp.ts_129_061 import *
-from .etsi_3gpp.ts_129_212 import *
-from .etsi_3gpp.ts_129_214 import *
-from .etsi_3gpp.ts_129_229 import *
-from .etsi_3gpp.ts_129_272 import *
-from .etsi_3gpp.ts_129_273 import *
-from .etsi_3gpp.ts_129_329 import *
-from .etsi_3gpp.ts_183_017 import *
-
-from .ietf.rfc4006 import *
-from .ietf.rfc4072 import *
-from .ietf.rfc5447 import *
-from .ietf.rfc6733 import *
-from .ietf.rfc7155 import *
-from .ietf.rfc8506 import *
+from importlib import import_module
+
+
+#: AVP modules, in the order they used to be star-imported. Names defined
+#: in more than one module are taken from the last one.
+_modules = (
+        ".etsi_3gpp.ts_129_061",
+        ".etsi_3gpp.ts_129_212",
+        ".etsi_3gpp.ts_129_214",
+        ".etsi_3gpp.ts_129_229",
+        ".etsi_3gpp.ts_129_272",
+        ".etsi_3gpp.ts_129_273",
+        ".etsi_3gpp.ts_129_329",
+        ".etsi_3gpp.ts_183_017",
+        ".ietf.rfc4006",
+        ".ietf.rfc4072",
+        ".ietf.rfc5447",
+        ".ietf.rfc6733",
+        ".ietf.rfc7155",
+        ".ietf.rfc7944",
+        ".ietf.rfc8506",
+)
+
+
+def _get_public_names(module) -> dict:
+    return {name: value for name, value in vars(module).items()
+                                                if not name.startswith("_")}
+
+
+def import_avp_modules() -> list:
+    """Imports every AVP module and returns their public names. It is
+    needed before going through the DiameterAVP subclasses.
+    """
+    names = dict()
+    for module_name in _modules:
+        names.update(_get_public_names(import_module(module_name, __name__)))
+
+    globals().update(names)
+    return list(names)
+
+
+def __getattr__(name):
+    if name == "__all__":
+        value = import_avp_modules()
+
+    elif name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    else:
+        for module_name in reversed(_modules):
+            module = import_module(module_name, __name__)
+            if name in vars(module) and not name.startswith("_"):
+                value = vars(module)[name]
+                break
+        else:
+            #: Subpackages are bound once their modules are imported.
+            if name in globals():
+                return globals()[name]
+
+            raise AttributeError(f"module {__name__!r} has no attribute "\
+                                 f"{name!r}")
+
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__getattr__("__all__")))
@@ -29,7 +29,7 @@ from ...base import DiameterAVP
 from ...constants.etsi_3gpp.ts_129_272 import *
 from ...exceptions import AVPAttributeValueError
 from ...types import *
-from ...utils import decode_from_tbcd, encode_to_tbcd
+from ...utils import decode_tbcd, encode_tbcd
 
 
 class StnSrAVP(DiameterAVP, OctetStringType):
@@ -52,17 +52,17 @@ class StnSrAVP(DiameterAVP, OctetStringType):
 
     def encode(self, data):
         if isinstance(data, int):
-            return bytes.fromhex(encode_to_tbcd(data))
+            return encode_tbcd(data)
 
         elif isinstance(data, str):
-            return bytes.fromhex(encode_to_tbcd(int(data)))
+            return encode_tbcd(data)
 
         elif isinstance(data, bytes):
             return data
 
 
     def decode(self):
-        return decode_from_tbcd(self.data)
+        return decode_tbcd(self.data)
 
 
 class AmbrAVP(DiameterAVP, GroupedType):
@@ -12,7 +12,7 @@
 from ...base import DiameterAVP
 from ...constants.etsi_3gpp.ts_129_329 import *
 from ...types import *
-from ...utils import decode_from_tbcd, encode_to_tbcd
+from ...utils import decode_tbcd, encode_tbcd
 
 
 class MsisdnAVP(DiameterAVP, OctetStringType):
@@ -35,14 +35,14 @@ class MsisdnAVP(DiameterAVP, OctetStringType):
 
     def encode(self, data):
         if isinstance(data, int):
-            return bytes.fromhex(encode_to_tbcd(data))
+            return encode_tbcd(data)
         
         elif isinstance(data, str):
-            return bytes.fromhex(encode_to_tbcd(int(data)))
+            return encode_tbcd(data)
 
         elif isinstance(data, bytes):
             return data
 
 
     def decode(self):
-        return decode_from_tbcd(self.data)
\ No newline at end of file
+        return decode_tbcd(self.data)
\ No newline at end of file
@@ -13,9 +13,12 @@ from __future__ import annotations
 
 import os
 import re
-from copy import deepcopy
-from typing import Any, List, Type
+import struct
+from collections import namedtuple
+from importlib import import_module
+from typing import Any, Container, List, Type
 
+from ._internal_utils import LazyDefault
 from ._internal_utils import avp_look_up
 from ._internal_utils import header_representation
 from ._internal_utils import get_avp_name_formatted
@@ -30,6 +33,111 @@ from .exceptions import DiameterMessageError
 from .utils import is_vendor_id
 
 
+def _copy_attributes(attributes: dict) -> dict:
+    """Copies the __dict__ of either a DiameterMessage object or a Grouped 
+    DiameterAVP object. Each DiameterAVP object is copied only once, so the
+    `_avps` list and the attributes named after the Diameter AVPs keep 
+    referencing the same objects in the copy.
+    """
+    copies = dict()
+
+    def copy_avp(avp):
+        _avp = copies.get(id(avp))
+        if _avp is None:
+            _avp = avp.copy()
+            copies[id(avp)] = _avp
+        return _avp
+
+    _attributes = dict()
+    for key, value in attributes.items():
+        if isinstance(value, DiameterAVP):
+            _attributes[key] = copy_avp(value)
+
+        elif isinstance(value, list):
+            _attributes[key] = [copy_avp(item) 
+                                    if isinstance(item, DiameterAVP) else item 
+                                        for item in value]
+
+        elif isinstance(value, DiameterHeader):
+            _attributes[key] = value.copy()
+
+        else:
+            _attributes[key] = value
+
+    return _attributes
+
+
+def _copy_slots(obj: Any, _obj: Any, slots: tuple) -> None:
+    for slot in slots:
+        try:
+            setattr(_obj, slot, getattr(obj, slot))
+        except AttributeError:
+            pass
+
+
+#: Diameter Header as five 32-bit words: Version and Message Length, Command 
+#: Flags and Command Code, Application-ID, Hop-by-Hop Identifier and 
+#: End-to-End Identifier.
+_header_struct = struct.Struct(">5L")
+
+#: First two words of the Diameter Header: Version and Message Length, then
+#: Command Flags and Command Code.
+_header_words_struct = struct.Struct(">2L")
+
+#: Diameter AVP Header without the optional Vendor-ID field: AVP Code, then 
+#: AVP Flags and AVP Length.
+_avp_header_struct = struct.Struct(">2L")
+_vendor_id_struct = struct.Struct(">L")
+
+
+class DiameterHeaderView(namedtuple("DiameterHeaderView", [
+                                                    "version",
+                                                    "length",
+                                                    "flags",
+                                                    "command_code",
+                                                    "application_id",
+                                                    "hop_by_hop",
+                                                    "end_to_end"
+                                                ]
+)):
+    """Read-only view of a Diameter Header with its fields in Integer format.
+    It is returned by DiameterHeader.peek() and is meant for dispatching and
+    routing decisions that do not need the DiameterHeader object itself.
+    """
+    __slots__ = ()
+
+    def is_request(self) -> bool:
+        return self.flags & 0x80 != 0
+
+    def is_proxiable(self) -> bool:
+        return self.flags & 0x40 != 0
+
+    def is_error(self) -> bool:
+        return self.flags & 0x20 != 0
+
+    def is_retransmitted(self) -> bool:
+        return self.flags & 0x10 != 0
+
+
+#: Top-level Diameter AVP found by DiameterAVP.scan(). The `offset` and 
+#: `data_length` fields locate the AVP Data in the scanned byte stream, while
+#: `length` is the AVP Length field. The `vendor_id` field is None if the 
+#: Vendor-Specific bit is not set.
+AvpView = namedtuple("AvpView", [
+                                    "code",
+                                    "flags",
+                                    "vendor_id",
+                                    "offset",
+                                    "data_length",
+                                    "length"
+                                ]
+)
+
+#: Creates a namedtuple object from a tuple of its fields, which is faster
+#: than calling its class with keyword arguments.
+_new_view = tuple.__new__
+
+
 class DiameterAvpLoader:
     """Helper class used to load all available DiameterAVP subclasses
     defined in the Bromelia library. It supports the DiameterAVP's 
@@ -47,19 +155,40 @@ class DiameterAvpLoader:
 
     def __init__(self) -> None:
         self.avps = None
+        self.grouped_avps = None
+        self.num_of_avps = 0
 
 
     def has_updated(self) -> bool:
         avps = DiameterAVP.__subclasses__()
-        if len(self.avps) == len(avps):
+        if self.num_of_avps == len(avps):
             return False
         return True
 
 
     def _get_load_avps_dictionary(self) -> dict:
+        #: AVP classes are not imported along with the bromelia package, and
+        #: bromelia.avps imports its modules on demand. They must be in place
+        #: before the first AVP look up, otherwise inbound AVPs would be 
+        #: processed as unknown ones.
+        import_module(".avps", __package__).import_avp_modules()
+
+        grouped_type = import_module(".types", __package__).GroupedType
+
         avps = DiameterAVP.__subclasses__()
+        self.num_of_avps = len(avps)
+        self.grouped_avps = set()
         loaded_avps = dict()
         for avp in avps:
+            if issubclass(avp, grouped_type) and avp.code is not None:
+                vendor_id = avp.vendor_id
+                if vendor_id is not None:
+                    vendor_id = int.from_bytes(vendor_id, byteorder="big")
+
+                self.grouped_avps.add((int.from_bytes(avp.code,
+                                                      byteorder="big"),
+                                       vendor_id))
+
             if avp.vendor_id is not None:
                 if avp.vendor_id in loaded_avps:
                     loaded_avps[avp.vendor_id].update({avp.code: avp})
@@ -74,19 +203,28 @@ class DiameterAvpLoader:
         return loaded_avps
 
 
-    def get_avp_class(self, avp: DiameterAVP) -> str:
-        if self.avps is not None:
-            if self.has_updated():
-                self.avps = self._get_load_avps_dictionary()
-        else:
+    def _refresh(self) -> None:
+        if self.avps is None or self.has_updated():
             self.avps = self._get_load_avps_dictionary()
 
+
+    def get_avp_class(self, avp: DiameterAVP) -> str:
+        self._refresh()
+
         if avp.vendor_id is not None: 
             return self.avps[avp.vendor_id][avp.code]
         
         return self.avps[VENDOR_ID_DEFAULT][avp.code]
 
 
+    def get_grouped_avps(self) -> set:
+        """Returns the (AVP Code, Vendor-ID) pairs in Integer format of the 
+        Grouped AVPs, as found in the AvpView objects of DiameterAVP.scan().
+        """
+        self._refresh()
+        return self.grouped_avps
+
+
     def get_avp_class_name(self, avp: DiameterAVP) -> str:
         try: 
             avp_name = self.get_avp_class(avp).__name__[:-3]
@@ -213,9 +351,24 @@ class DiameterAVP(object):
 
 
     def copy(self) -> Type[DiameterAVP]:
-        """Creates a deepcopy of a DiameterAVP object.
+        """Creates a copy of a DiameterAVP object. AVP header fields and data 
+        are immutable bytes, so they are shared with the copy instead of being
+        copied. Grouped DiameterAVP objects have their inner DiameterAVP 
+        objects copied as well.
         """
-        return deepcopy(self)
+        cls = self.__class__
+        avp = cls.__new__(cls)
+
+        _copy_slots(self, avp, DiameterAVP.__slots__)
+
+        attributes = getattr(self, "__dict__", None)
+        if attributes:
+            if "_avps" in attributes:
+                avp.__dict__.update(_copy_attributes(attributes))
+            else:
+                avp.__dict__.update(attributes)
+
+        return avp
 
 
     @classmethod
@@ -482,6 +635,80 @@ class DiameterAVP(object):
         return avps
 
 
+    @staticmethod
+    def scan(stream: bytes, 
+             offset: int = 0, 
+             end: int = None, 
+             codes: Container = None):
+        """Scans a byte stream which represents Diameter AVPs and yields an 
+        AvpView object for each top-level Diameter AVP found between `offset`
+        and `end`, without creating DiameterAVP objects. Grouped AVPs are not
+        scanned through. If `codes` is given, only the Diameter AVPs whose 
+        AVP Code is in it are yielded, while the others are still checked.
+
+        It raises AVPParsingError if the AVP Length fields do not fit into 
+        the byte stream.
+        """
+        if end is None:
+            end = len(stream)
+
+        unpack_header = _avp_header_struct.unpack_from
+
+        index = offset
+        while index < end:
+            if end - index < AVP_HEADER_LENGTH:
+                raise AVPParsingError("invalid bytes stream. It contains "\
+                                      "only the code and flags fields")
+
+            code, flags_length = unpack_header(stream, index)
+            length = flags_length & 0xFFFFFF
+
+            if flags_length & 0x80000000:
+                avp_header_length = AVP_HEADER_LENGTH_LONGER
+            else:
+                avp_header_length = AVP_HEADER_LENGTH
+
+            if length < avp_header_length or index + length > end:
+                raise AVPParsingError("invalid bytes stream. The length "\
+                                      "field value does not correspond to "\
+                                      "the AVP length")
+
+            if codes is None or code in codes:
+                if avp_header_length == AVP_HEADER_LENGTH_LONGER:
+                    vendor_id = _vendor_id_struct.unpack_from(stream, 
+                                                              index + 8)[0]
+                else:
+                    vendor_id = None
+
+                yield _new_view(AvpView, (code,
+                                          flags_length >> 24,
+                                          vendor_id,
+                                          index + avp_header_length,
+                                          length - avp_header_length,
+                                          length))
+
+            index += (length + 3) & ~3
+
+
+    @staticmethod
+    def check_layout(stream: bytes, offset: int = 0, end: int = None) -> None:
+        """Checks the AVP Length fields of a byte stream which represents 
+        Diameter AVPs, walking through the Grouped AVPs known by the loader
+        as well, so that byte streams which DiameterAVP.load() would refuse
+        are refused upfront. No DiameterAVP object is created along the way.
+
+        It raises AVPParsingError as DiameterAVP.scan() does.
+        """
+        grouped_avps = loader.get_grouped_avps()
+
+        pending = [(offset, end)]
+        while pending:
+            start, end = pending.pop()
+            for avp in DiameterAVP.scan(stream, start, end):
+                if (avp.code, avp.vendor_id) in grouped_avps:
+                    pending.append((avp.offset, avp.offset + avp.data_length))
+
+
     def set_vendor_id_bit(self, state: bool) -> None:
         """Set / unset the vendor id bit in DiameterAVP object.
         """
@@ -724,9 +951,15 @@ class DiameterHeader(object):
 
 
     def copy(self) -> DiameterHeader:
-        """Creates a deepcopy of a DiameterHeader object.
+        """Creates a copy of a DiameterHeader object. Its fields are immutable
+        bytes, so they are shared with the copy.
         """
-        return deepcopy(self)
+        cls = self.__class__
+        header = cls.__new__(cls)
+
+        _copy_slots(self, header, DiameterHeader.__slots__)
+
+        return header
 
 
     @property
@@ -1150,11 +1383,50 @@ class DiameterHeader(object):
         return dump
 
 
+    @staticmethod
+    def peek(stream: bytes, offset: int = 0) -> DiameterHeaderView:
+        """Reads the Diameter Header found at `offset` of a byte stream and 
+        returns a DiameterHeaderView object, without creating a 
+        DiameterHeader object.
+        """
+        if len(stream) - offset < DIAMETER_HEADER_LENGTH:
+            raise DiameterHeaderError("invalid bytes stream. It is shorter "\
+                                      "than the Diameter Header")
+
+        (version_length, 
+         flags_command_code, 
+         application_id, 
+         hop_by_hop, 
+         end_to_end) = _header_struct.unpack_from(stream, offset)
+
+        return _new_view(DiameterHeaderView, (
+                                            version_length >> 24,
+                                            version_length & 0xFFFFFF,
+                                            flags_command_code >> 24,
+                                            flags_command_code & 0xFFFFFF,
+                                            application_id,
+                                            hop_by_hop,
+                                            end_to_end))
+
+
     @classmethod
     def load(cls, stream: bytes) -> DiameterHeader:
         """Load a byte stream which represents Diameter Headers and returns a 
         list of DiameterHeader objects.
         """
+        if isinstance(stream, bytes) and len(stream) >= DIAMETER_HEADER_LENGTH:
+            #: Every field has its expected length, so the setters checks 
+            #: can be skipped.
+            header = cls.__new__(cls)
+            header._version = stream[0:1]
+            header._length = stream[1:4]
+            header._flags = stream[4:5]
+            header._command_code = stream[5:8]
+            header._application_id = stream[8:12]
+            header._hop_by_hop = stream[12:16]
+            header._end_to_end = stream[16:20]
+            return header
+
         version  = convert_to_1_byte(stream[0])
         length = stream[1:4]        
         flags = convert_to_1_byte(stream[4])
@@ -1172,6 +1444,156 @@ class DiameterHeader(object):
                    end_to_end=end_to_end)
 
     
+class DiameterMessageSchema:
+    """Compiled form of the `mandatory` and `optionals` class attributes of
+    a DiameterMessage subclass, used by its _load method.
+
+    The constructor arguments are resolved once per class in the order they
+    are defined (which is the order AVPs are appended), along with the 
+    DiameterAVP class and the DiameterMessage attribute name of each one.
+    Building a message then goes over a fixed tuple of fields instead of 
+    checking every local variable against both dictionaries, and the 
+    Diameter Message Length field is computed only once at the end.
+
+    DiameterMessageSchema class is expected to be used only inside the 
+    Bromelia library implementation.
+    """
+
+    #: Compiled DiameterMessageSchema objects by DiameterMessage subclass.
+    schemas = dict()
+
+    MANDATORY = 0
+    OPTIONAL = 1
+    CUSTOM = 2
+
+    def __init__(self, message_class: type) -> None:
+        self.message_class = message_class
+
+        mandatory = getattr(message_class, "mandatory", dict())
+        optionals = getattr(message_class, "optionals", dict())
+
+        fields = list()
+        names = set()
+        #: Named parameters of the constructor, i.e. *args and **kwargs are
+        #: left out.
+        code = message_class.__init__.__code__
+        num_of_args = code.co_argcount + code.co_kwonlyargcount
+        for avp_name in code.co_varnames[:num_of_args]:
+            if avp_name == "self":
+                continue
+
+            names.add(avp_name)
+            fields.append(self._compile_field(avp_name, mandatory, optionals))
+
+        self.fields = tuple(fields)
+        self.names = frozenset(names)
+        self.mandatory = mandatory
+        self.optionals = optionals
+
+
+    @staticmethod
+    def _compile_field(avp_name: str, mandatory: dict, optionals: dict) -> tuple:
+        if avp_name in mandatory:
+            kind = DiameterMessageSchema.MANDATORY
+            avp_class = mandatory[avp_name]
+        elif avp_name in optionals:
+            kind = DiameterMessageSchema.OPTIONAL
+            avp_class = optionals[avp_name]
+        else:
+            return (avp_name, DiameterMessageSchema.CUSTOM, None, None)
+
+        #: DiameterMessage attribute name as per the DiameterMessage.append 
+        #: method. If it cannot be resolved beforehand, the append method 
+        #: is used instead.
+        avp_key = loader._get_avp_class_name(avp_class)
+        if not avp_key or avp_key == "Unknown":
+            avp_key = None
+
+        return (avp_name, kind, avp_class, avp_key)
+
+
+    @classmethod
+    def compile(cls, message_class: type) -> DiameterMessageSchema:
+        """Returns the DiameterMessageSchema object of a given DiameterMessage
+        subclass. It is compiled on first use only.
+        """
+        schema = cls.schemas.get(message_class)
+        if schema is None:
+            schema = cls(message_class)
+            cls.schemas[message_class] = schema
+        return schema
+
+
+    def build(self, message: DiameterMessage, values: dict) -> None:
+        """Appends into a DiameterMessage object the DiameterAVP objects 
+        created from the constructor arguments found in `values`.
+        """
+        _kwargs = values.get("kwargs", None)
+        if _kwargs:
+            values.update(_kwargs)
+
+        message_dict = message.__dict__
+        avps = message._avps
+
+        for avp_name, kind, avp_class, avp_key in self.fields:
+            avp_value = values.get(avp_name)
+
+            if avp_value.__class__ is LazyDefault:
+                avp_value = avp_value.resolve()
+
+            if avp_value is None:
+                if kind == DiameterMessageSchema.MANDATORY:
+                    raise DiameterMessageError(f"missing mandatory AVP "\
+                                               f"argument avp_value: "\
+                                               f"'{avp_name}'")
+                continue
+
+            if kind == DiameterMessageSchema.CUSTOM:
+                self._append_custom_avp(message, avp_value)
+                continue
+
+            avp = avp_class(avp_value)
+
+            if avp_key is None or avp_key in message_dict:
+                message.append(avp)
+            else:
+                avps.append(avp)
+                message_dict[avp_key] = avp
+
+        #: Extra keyword arguments which are not part of the constructor 
+        #: signature.
+        if _kwargs:
+            for avp_name, avp_value in _kwargs.items():
+                if avp_name in self.names:
+                    continue
+
+                if avp_name in self.mandatory and avp_value is None:
+                    raise DiameterMessageError(f"missing mandatory AVP "\
+                                               f"argument avp_value: "\
+                                               f"'{avp_name}'")
+
+                elif avp_name in self.mandatory:
+                    message.append(self.mandatory[avp_name](avp_value))
+
+                elif avp_name in self.optionals and avp_value is not None:
+                    message.append(self.optionals[avp_name](avp_value))
+
+                elif avp_value is not None:
+                    self._append_custom_avp(message, avp_value)
+
+        message.refresh()
+
+
+    @staticmethod
+    def _append_custom_avp(message: DiameterMessage, avp: DiameterAVP) -> None:
+        if not isinstance(avp, DiameterAVP):
+            raise DiameterMessageError("non-mandatory and "\
+                                       "non-optionals AVPs should "\
+                                       "include DiameterAVP object "\
+                                       "only")
+        message.append(avp)
+
+
 class DiameterMessage:
     """Implementation of a Diameter Message. 
     
@@ -1259,10 +1681,68 @@ class DiameterMessage:
         return self.dump()
 
 
-    def copy(self) -> Type[DiameterMessage]:
-        """Creates a deepcopy of a DiameterMessage object.
+    def __getattr__(self, name: str) -> Any:
+        """Dunder method called only when an attribute is not found. For 
+        DiameterMessage objects created by copy(from_stream=True), it decodes
+        the pending byte stream into DiameterAVP objects on first access.
+        """
+        if not name.startswith("__"):
+            stream = self.__dict__.pop("_pending_stream", None)
+            if stream is not None:
+                self._load_pending_stream(stream)
+                return getattr(self, name)
+
+        raise AttributeError(f"'{self.__class__.__name__}' object has no "\
+                             f"attribute '{name}'")
+
+
+    def _decode_pending_stream(self) -> None:
+        """Decodes the pending byte stream, if any. It is called first by 
+        the methods changing the DiameterAVP objects, whose attribute names
+        depend on the ones already in place.
         """
-        return deepcopy(self)
+        stream = self.__dict__.pop("_pending_stream", None)
+        if stream is not None:
+            self._load_pending_stream(stream)
+
+
+    def _load_pending_stream(self, stream: bytes) -> None:
+        loaded = self._loaded
+
+        self._avps = list()
+        self._loaded = True
+        for avp in DiameterAVP.load(stream):
+            self.append(avp)
+        self._loaded = loaded
+
+
+    def copy(self, from_stream: bool = False) -> Type[DiameterMessage]:
+        """Creates a copy of a DiameterMessage object. 
+
+        By default, DiameterHeader and DiameterAVP objects are copied, while
+        their fields are shared since they are immutable bytes. If 
+        `from_stream` is True, the copy is created from the byte stream of 
+        the DiameterMessage object and its DiameterAVP objects are only 
+        decoded when they are accessed for the first time. Until then, the 
+        dump() method returns the original AVPs byte stream.
+        """
+        cls = self.__class__
+        msg = cls.__new__(cls)
+
+        if not from_stream:
+            msg.__dict__.update(_copy_attributes(self.__dict__))
+            return msg
+
+        stream = self.dump()
+        for key, value in self.__dict__.items():
+            if key in ("_avps", "_header") or isinstance(value, DiameterAVP):
+                continue
+            msg.__dict__[key] = value
+
+        msg._header = DiameterHeader.load(stream[:DIAMETER_HEADER_LENGTH])
+        msg._pending_stream = stream[DIAMETER_HEADER_LENGTH:]
+
+        return msg
 
 
     @classmethod
@@ -1289,6 +1769,8 @@ class DiameterMessage:
             raise DiameterMessageError(f"cannot append a data type of "\
                                        f"'{type(avp)}'")
 
+        self._decode_pending_stream()
+
         #: Get the AVP class name by calling the DiameterAvpLoader object. In
         #: case its helper method does not find any reference (in other words,
         #: it returns "Unknown"), it looks by calling another helper method as 
@@ -1365,6 +1847,8 @@ class DiameterMessage:
         """Remove a DiameterAVP object from a DiameterMessage object based on
         Diameter AVP name.
         """
+        self._decode_pending_stream()
+
         if not self.avps:
             raise DiameterMessageError("`avps` attribute is empty. There is "\
                                        "no DiameterAVP object to be removed")
@@ -1387,6 +1871,8 @@ class DiameterMessage:
         """Updates the DiameterMessage attribute which refer to a given 
         DiameterAVP object.
         """
+        self._decode_pending_stream()
+
         if not self.has_avp(old_avp_key):
             raise DiameterMessageError(f"`{old_avp_key}` key not defined")
             
@@ -1400,6 +1886,8 @@ class DiameterMessage:
         """Cleanup all the DiameterMessage attributes and its respective 
         DiameterAVP objects.
         """
+        self._decode_pending_stream()
+
         self._avps = list()
 
         #: Gets all DiameterMessage attributes based on DiameterAVP objects.
@@ -1423,66 +1911,77 @@ class DiameterMessage:
 
 
     @staticmethod
-    def load(stream: bytes) -> list:
+    def load(stream: bytes, lazy: bool = False, trusted: bool = False) -> list:
         """Load a byte stream which represents Diameter Message and returns a 
         list of DiameterMessage objects.
+
+        If `lazy` is True, only the Diameter Headers are loaded. The AVPs 
+        layout is checked, Grouped AVPs included, by check_layout(), so
+        that decoding the AVPs later on does not fail on their length
+        fields. DiameterAVP objects are only created when the
+        DiameterMessage object is accessed beyond its header, as it happens 
+        for copy(from_stream=True). If `trusted` is True as well, the AVPs
+        layout is not checked, which is meant for byte streams built from
+        messages already loaded.
         """
         msgs = []
         index = 0
 
         while index < len(stream):
+            length = DiameterHeader.peek(stream, index).length
+            if length < DIAMETER_HEADER_LENGTH:
+                raise DiameterHeaderError("invalid bytes stream. The "\
+                                          "length field value is shorter "\
+                                          "than the Diameter Header")
+
             header_stream = stream[index:index+DIAMETER_HEADER_LENGTH]
             header = DiameterHeader.load(header_stream)
 
             lower_limit = index + DIAMETER_HEADER_LENGTH
-            upper_limit = index + header.get_length()
+            upper_limit = index + length
 
             avp_stream = stream[lower_limit:upper_limit]
-            avps = DiameterAVP.load(avp_stream)
 
-            msg = DiameterMessage(header, avps, loaded=True)
-            msgs.append(msg)
-
-            index += header.get_length()
-
-        return msgs
+            if lazy:
+                if not trusted:
+                    DiameterAVP.check_layout(avp_stream)
 
+                msg = DiameterMessage.__new__(DiameterMessage)
+                msg._header = header
+                msg._loaded = False
+                msg._pending_stream = avp_stream
+            else:
+                avps = DiameterAVP.load(avp_stream)
+                msg = DiameterMessage(header, avps, loaded=True)
 
-    def _load(self, values: dict) -> None:
-        _kwargs = values.get("kwargs", None)
-        if _kwargs:
-            values.update(_kwargs)
+            msgs.append(msg)
 
-        values.pop("kwargs", None)
-        values.pop("self", None)
+            index += length
 
-        avps_info = values.items()
+        return msgs
 
-        kwargs = dict()
-        for avp_name, avp_value in avps_info:
-            if avp_name in self.mandatory and avp_value is None:
-                raise DiameterMessageError(f"missing mandatory AVP "\
-                                           f"argument avp_value: '{avp_name}'")
 
-            elif avp_name in self.mandatory and avp_value is not None:
-                _value = self.mandatory[avp_name](avp_value)
-                self.append(_value)
-            
-            elif avp_name in self.optionals and avp_value is not None:
-                _value = self.optionals[avp_name](avp_value)
-                self.append(_value)
+    @staticmethod
+    def find_avp(stream: bytes, 
+                 code: int, 
+                 vendor_id: int = None, 
+                 offset: int = 0) -> bytes:
+        """Returns the AVP Data of the first top-level Diameter AVP with the 
+        given AVP Code (and Vendor-ID, if any) of the Diameter Message found 
+        at `offset` of a byte stream. It returns None if there is no such 
+        Diameter AVP. No DiameterAVP object is created along the way.
+        """
+        end = offset + DiameterHeader.peek(stream, offset).length
 
-            elif avp_name not in self.optionals and avp_value is not None:
-                if not isinstance(avp_value, DiameterAVP):
-                    raise DiameterMessageError("non-mandatory and "\
-                                               "non-optionals AVPs should "\
-                                               "include DiameterAVP object "\
-                                               "only")
-                self.append(avp_value)
+        for avp in DiameterAVP.scan(stream, offset + DIAMETER_HEADER_LENGTH, 
+                                    min(end, len(stream))):
+            if avp.code == code and avp.vendor_id == vendor_id:
+                return bytes(stream[avp.offset:avp.offset + avp.data_length])
 
-            self.__dict__.update(kwargs)
 
-        self.header.length = self.length
+    def _load(self, values: dict) -> None:
+        values.pop("self", None)
+        DiameterMessageSchema.compile(self.__class__).build(self, values)
 
 
     @property
@@ -1531,6 +2030,7 @@ class DiameterMessage:
 
 
     def __setitem__(self, idx: int, value: DiameterAVP) -> None:
+        self._decode_pending_stream()
         self._avps[idx] = value
 
 
@@ -1554,6 +2054,8 @@ class DiameterMessage:
     def refresh(self) -> None:
         """Updates the length field of Diameter Header.
         """
+        self._decode_pending_stream()
+
         real_length = 20
         for avp in self.avps:
             real_length += len(avp)
@@ -1638,6 +2140,10 @@ class DiameterMessage:
     def dump(self) -> bytes:
         """Dump a byte stream which represents a DiameterMessage object.
         """
+        stream = self.__dict__.get("_pending_stream")
+        if stream is not None:
+            return self.header.dump() + stream
+
         dump = self.header.dump()
         for avp in self.avps:
             dump += avp.dump()
@@ -1650,6 +2156,8 @@ class DiameterMessage:
         It means the matching keys will be used to update the data of 
         DiameterAVP objects found.
         """
+        self._decode_pending_stream()
+
         if not silent_errors:
             unknown_avps = self._get_unknown_avps(avps)
             if unknown_avps:
@@ -1694,6 +2202,8 @@ class DiameterMessage:
 
 
     def update_avp(self, avp_name: str, avp_value: Any) -> None:
+        self._decode_pending_stream()
+
         avp = getattr(self, avp_name)
         index = self._lookup_avp_index(avp)
 
@@ -1728,8 +2238,8 @@ class DiameterRequest(DiameterMessage):
         <Diameter Message: Unknown [] REQ, 0 [Diameter common message], 0 AVP(s)>
     """
 
-    hop_by_hop_identifiers = list()
-    end_to_end_identifiers = list()
+    hop_by_hop_identifiers = set()
+    end_to_end_identifiers = set()
 
     def __init__(self,
                  version: Any = DIAMETER_VERSION,
@@ -1763,7 +2273,7 @@ class DiameterRequest(DiameterMessage):
         while True:
             random_identifier = os.urandom(4)
             if random_identifier not in DiameterRequest.hop_by_hop_identifiers:
-                DiameterRequest.hop_by_hop_identifiers.append(random_identifier)
+                DiameterRequest.hop_by_hop_identifiers.add(random_identifier)
                 return random_identifier
 
 
@@ -1772,7 +2282,7 @@ class DiameterRequest(DiameterMessage):
         while True:
             random_identifier = os.urandom(4)
             if random_identifier not in DiameterRequest.end_to_end_identifiers:
-                DiameterRequest.end_to_end_identifiers.append(random_identifier)
+                DiameterRequest.end_to_end_identifiers.add(random_identifier)
                 return random_identifier
 
 
@@ -1836,4 +2346,109 @@ class DiameterAnswer(DiameterMessage):
                                 "this method available for use")
 
 
+class DiameterStreamFramer:
+    """Splits a byte stream received in arbitrary chunks, as read from a TCP
+    socket, into whole Diameter Messages. Bytes of a Diameter Message not
+    fully received yet are kept until the next chunk is fed.
+
+    By default an invalid Diameter Header raises DiameterHeaderError and the
+    buffered bytes are dropped. If `resync` is True, the bytes are skipped
+    instead until a plausible Diameter Header is found, which is needed for
+    streams picked up halfway, as in packet captures. The number of bytes
+    skipped is kept in the `skipped` attribute.
+
+    :param resync: whether to skip invalid bytes instead of raising.
+    :param max_length: the largest Diameter Message length accepted while
+        resynchronizing.
+
+    Usage::
+
+        >>> from bromelia.base import DiameterStreamFramer
+        >>> framer = DiameterStreamFramer()
+        >>> framer.feed(stream[:30])
+        b''
+        >>> msgs = DiameterMessage.load(framer.feed(stream[30:]))
+    """
+    def __init__(self, resync: bool = False, max_length: int = 1 << 20) -> None:
+        self.resync = resync
+        self.max_length = max_length
+        self.buffer = b""
+        self.skipped = 0
+
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+
+    def reset(self) -> None:
+        self.buffer = b""
+
+
+    def is_plausible(self, stream: bytes, offset: int) -> bool:
+        version_length, flags_command_code = \
+                                _header_words_struct.unpack_from(stream, offset)
+        length = version_length & 0xFFFFFF
+
+        if version_length >> 24 != 1 or \
+           not DIAMETER_HEADER_LENGTH <= length <= self.max_length or \
+           length % 4 != 0 or \
+           (flags_command_code >> 24) & 0x0F != 0:
+            return False
+
+        #: The first AVP Header, when already received, must fit as well.
+        avp_offset = offset + DIAMETER_HEADER_LENGTH
+        if length > DIAMETER_HEADER_LENGTH and len(stream) >= avp_offset + 8:
+            _, flags_length = _avp_header_struct.unpack_from(stream, avp_offset)
+            avp_length = flags_length & 0xFFFFFF
+
+            return (flags_length >> 24) & 0x1F == 0 and \
+                   8 <= avp_length <= length - DIAMETER_HEADER_LENGTH
+
+        return True
+
+
+    def feed(self, data: bytes) -> bytes:
+        """Appends a chunk of bytes and returns every whole Diameter Message
+        found so far as a single byte stream, which may be empty.
+        """
+        stream = self.buffer + data if self.buffer else data
+
+        chunks = list()
+        start = index = 0
+        while len(stream) - index >= DIAMETER_HEADER_LENGTH:
+            if self.resync and not self.is_plausible(stream, index):
+                if index > start:
+                    chunks.append(stream[start:index])
+
+                #: Every Diameter Header starts with the version 1 byte.
+                next_index = stream.find(b"\x01", index + 1)
+                if next_index == -1:
+                    next_index = len(stream)
+
+                self.skipped += next_index - index
+                start = index = next_index
+                continue
+
+            length = _header_words_struct.unpack_from(stream, index)[0] & 0xFFFFFF
+            if length < DIAMETER_HEADER_LENGTH:
+                self.buffer = b""
+                raise DiameterHeaderError("invalid bytes stream. The "\
+                                          "length field value is shorter "\
+                                          "than the Diameter Header")
+
+            if len(stream) - index < length:
+                break
+
+            index += length
+
+        if index > start:
+            chunks.append(stream[start:index])
+
+        self.buffer = stream[index:]
+
+        if len(chunks) == 1:
+            return chunks[0]
+        return b"".join(chunks)
+
+
 loader = DiameterAvpLoader()
@@ -0,0 +1,389 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.batch
+    ~~~~~~~~~~~~~~
+
+    This module implements the batch encoding of Diameter Messages from a
+    template, for provisioning and test traffic made of near-identical
+    messages. A message is built once and some of its AVPs, given as AVP
+    paths, are marked as slots. Messages are then encoded from one column
+    of values per slot, such as lists or NumPy arrays of Session-Ids and
+    IMSIs, without creating any DiameterMessage or DiameterAVP object.
+
+    The template byte stream is cut into constant segments and per-row
+    fields: the AVP Data of the slots, the AVP Length fields of the slots
+    and of the Grouped AVPs enclosing them, the Message Length field and
+    the Hop-by-Hop and End-to-End Identifiers. The length and padding
+    fixups are computed column by column, and each column of 32-bit fields
+    is packed in a single array.array call, so the per-row work is reduced
+    to joining byte strings.
+
+    Usage::
+
+        >>> from bromelia.batch import BatchTemplate
+        >>> from bromelia.lib.etsi_3gpp_s6a import CLR
+        >>> template = BatchTemplate(CLR(session_id="hss.example.com;0",
+        ...                              destination_realm="example.com",
+        ...                              destination_host="mme.example.com",
+        ...                              user_name="000000000000000"),
+        ...                          {"session_id": "Session-Id",
+        ...                           "imsi": "User-Name"})
+        >>> stream = template.encode(session_id=session_ids, imsi=imsis)
+        >>> for stream in template.iter_encode(session_id=session_ids,
+        ...                                    imsi=imsis):
+        ...     transport.send(stream)
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import itertools
+import os
+import sys
+from array import array
+from collections import namedtuple
+from typing import Any, Iterator, List
+
+from .base import DiameterAVP
+from .base import DiameterMessage
+from .constants import DIAMETER_HEADER_LENGTH
+from .exceptions import DiameterAvpError
+from .exceptions import DiameterMessageError
+from .query import AvpPath
+
+
+#: AVP marked as slot in a BatchTemplate. The `header_offset` field is the
+#: offset of its AVP Header in the template byte stream, and the
+#: `group_offsets` field the ones of the Grouped AVPs enclosing it.
+Slot = namedtuple("Slot", [
+                            "name",
+                            "path",
+                            "header_offset",
+                            "data_offset",
+                            "data_length",
+                            "group_offsets"
+                        ]
+)
+
+
+#: Column names reserved for the Diameter Header Identifiers.
+HOP_BY_HOP = "hop_by_hop"
+END_TO_END = "end_to_end"
+
+#: Padding of AVP Data by its length modulo 4.
+_paddings = (b"", b"\x00\x00\x00", b"\x00\x00", b"\x00")
+
+#: array.array typecodes of Integer columns by AVP Data length, unsigned
+#: and signed.
+_int_typecodes = {
+        4: ("I", "i"),
+        8: ("Q", "q"),
+}
+
+
+def _get_padded_length(length: int) -> int:
+    return (length + 3) & ~3
+
+
+def _pack_integers(values: Any, size: int) -> List[bytes]:
+    """Packs a column of Integer values into a list of big-endian byte
+    strings of `size` bytes each, in a single array.array call.
+    """
+    unsigned, signed = _int_typecodes[size]
+    values = array(signed if min(values) < 0 else unsigned, values)
+
+    if sys.byteorder == "little":
+        values.byteswap()
+
+    packed = values.tobytes()
+    return [packed[index:index + size]
+                                for index in range(0, len(packed), size)]
+
+
+def _to_list(values: Any) -> list:
+    #: NumPy arrays are turned into lists of Python objects at once, which
+    #: is much faster than iterating over them.
+    if hasattr(values, "tolist"):
+        return values.tolist()
+
+    return list(values)
+
+
+class BatchTemplate:
+    """Wire template of a Diameter Message with AVPs marked as slots, from
+    which messages are encoded in batches.
+
+    :param message: the DiameterMessage object to be used as template.
+    :param slots: a dict mapping column names to AVP paths as accepted by
+        bromelia.query, such as "User-Name" or
+        "Subscription-Id/Subscription-Id-Data". The first AVP found is the
+        slot. Slots must not overlap, and Grouped AVP slots take their
+        AVP Data as is.
+    """
+    def __init__(self, message: DiameterMessage, slots: dict) -> None:
+        if not isinstance(message, DiameterMessage):
+            raise DiameterMessageError("invalid message. It MUST be a "\
+                                       "DiameterMessage subclass object to be "\
+                                       "used as template")
+
+        message.refresh()
+
+        self.stream = message.dump()
+        self.is_request = message.header.is_request()
+        self.slots = dict()
+
+        for name, path in slots.items():
+            if name in (HOP_BY_HOP, END_TO_END):
+                raise DiameterMessageError(f"invalid slot name '{name}'. It "\
+                                           f"is reserved for the Diameter "\
+                                           f"Header")
+
+            self.slots[name] = self._get_slot(name, path)
+
+        intervals = sorted((slot.header_offset,
+                            slot.data_offset + slot.data_length)
+                                            for slot in self.slots.values())
+
+        for (_, end), (start, _) in zip(intervals, intervals[1:]):
+            if start < end:
+                raise DiameterMessageError("invalid slots. They MUST NOT "\
+                                           "overlap")
+
+
+    def __repr__(self) -> str:
+        return f"<BatchTemplate: {len(self.stream)} bytes, "\
+               f"{len(self.slots)} slot(s)>"
+
+
+    def _get_slot(self, name: str, path: str) -> Slot:
+        start, end = DIAMETER_HEADER_LENGTH, len(self.stream)
+        header_offsets = list()
+
+        for step in AvpPath.compile(path).steps:
+            if step.code is None:
+                raise DiameterAvpError(f"invalid slot path '{path}'. "\
+                                       f"Wildcards are not supported")
+
+            found = None
+            occurrence = 0
+            for avp in DiameterAVP.scan(self.stream, start, end):
+                if avp.code != step.code or avp.vendor_id != step.vendor_id:
+                    continue
+
+                if occurrence == (step.index or 0):
+                    found = avp
+                    break
+
+                occurrence += 1
+
+            if found is None:
+                raise DiameterMessageError(f"template does not have AVP "\
+                                           f"at '{path}'")
+
+            header_offsets.append(found.offset - (found.length -
+                                                  found.data_length))
+            start, end = found.offset, found.offset + found.data_length
+
+        return Slot(name=name,
+                    path=path,
+                    header_offset=header_offsets[-1],
+                    data_offset=found.offset,
+                    data_length=found.data_length,
+                    group_offsets=tuple(header_offsets[:-1]))
+
+
+    def _get_word_column(self,
+                         offset: int,
+                         base_length: int,
+                         deltas: List[list],
+                         count: int) -> List[bytes]:
+        """Returns the 32-bit field made of the byte at `offset` followed by
+        a 24-bit length, which is `base_length` plus the sum of `deltas` in
+        each row.
+        """
+        length = base_length + (self.stream[offset] << 24)
+
+        if not deltas:
+            words = [length] * count
+        elif len(deltas) == 1:
+            words = [length + delta for delta in deltas[0]]
+        else:
+            words = [length + sum(delta) for delta in zip(*deltas)]
+
+        return _pack_integers(words, 4)
+
+
+    def _get_columns(self,
+                     columns: dict,
+                     hop_by_hop: Any,
+                     end_to_end: Any,
+                     count: int) -> tuple:
+        """Returns the number of rows and a list of (offset, end, column)
+        tuples, where each column holds the bytes replacing the template
+        byte stream between `offset` and `end`, for each row.
+        """
+        for name in columns:
+            if name not in self.slots:
+                raise DiameterMessageError(f"unknown slot '{name}'")
+
+        columns = {name: _to_list(values) for name, values in columns.items()}
+        if hop_by_hop is not None:
+            hop_by_hop = _to_list(hop_by_hop)
+        if end_to_end is not None:
+            end_to_end = _to_list(end_to_end)
+
+        counts = {len(values) for values in columns.values()}
+        counts.update(len(values) for values in (hop_by_hop, end_to_end)
+                                                        if values is not None)
+        if count is not None:
+            counts.add(count)
+
+        if len(counts) != 1:
+            raise DiameterMessageError("invalid columns. They MUST have the "\
+                                       "same number of rows")
+        count = counts.pop()
+
+        if count == 0:
+            return 0, list()
+
+        #: Requests get brand new Hop-by-Hop and End-to-End Identifiers
+        #: unless they are provided, as in MessageTemplate.create().
+        if self.is_request:
+            if hop_by_hop is None:
+                start = int.from_bytes(os.urandom(4), byteorder="big")
+                hop_by_hop = [(start + index) & 0xFFFFFFFF
+                                                    for index in range(count)]
+            if end_to_end is None:
+                start = int.from_bytes(os.urandom(4), byteorder="big")
+                end_to_end = [(start + index) & 0xFFFFFFFF
+                                                    for index in range(count)]
+
+        cuts = list()
+        if hop_by_hop is not None:
+            cuts.append((12, 16, _pack_integers(hop_by_hop, 4)))
+        if end_to_end is not None:
+            cuts.append((16, 20, _pack_integers(end_to_end, 4)))
+
+        #: Changes in the padded AVP length by slot, which are added up into
+        #: the Message Length and the AVP Length of the enclosing AVPs.
+        all_deltas = list()
+        group_deltas = dict()
+
+        for name, values in columns.items():
+            slot = self.slots[name]
+
+            if values and isinstance(values[0], str):
+                values = [value.encode("utf-8") for value in values]
+
+            elif values and isinstance(values[0], int):
+                if slot.data_length not in _int_typecodes:
+                    raise DiameterAvpError(f"invalid values for slot "\
+                                           f"'{name}'. Integer values need "\
+                                           f"a 4 or 8 bytes long AVP Data")
+                try:
+                    values = _pack_integers(values, slot.data_length)
+                except (OverflowError, TypeError) as ex:
+                    raise DiameterAvpError(f"invalid values for slot "\
+                                           f"'{name}'") from ex
+
+            lengths = [len(value) for value in values]
+            padded_length = _get_padded_length(slot.data_length)
+            deltas = [_get_padded_length(length) - padded_length
+                                                        for length in lengths]
+
+            all_deltas.append(deltas)
+            for offset in slot.group_offsets:
+                group_deltas.setdefault(offset, list()).append(deltas)
+
+            header_length = slot.data_offset - slot.header_offset
+            cuts.append((slot.header_offset + 4,
+                         slot.header_offset + 8,
+                         self._get_word_column(slot.header_offset + 4,
+                                               header_length,
+                                               [lengths],
+                                               count)))
+
+            cuts.append((slot.data_offset,
+                         slot.data_offset + padded_length,
+                         [value + _paddings[len(value) & 3]
+                                                    for value in values]))
+
+        for offset, deltas in group_deltas.items():
+            base_length = int.from_bytes(self.stream[offset + 5:offset + 8],
+                                         byteorder="big")
+            cuts.append((offset + 4,
+                         offset + 8,
+                         self._get_word_column(offset + 4,
+                                               base_length,
+                                               deltas,
+                                               count)))
+
+        cuts.append((0, 4, self._get_word_column(0,
+                                                 len(self.stream),
+                                                 all_deltas,
+                                                 count)))
+
+        cuts.sort(key=lambda cut: cut[0])
+        return count, cuts
+
+
+    def _get_parts(self,
+                   columns: dict,
+                   hop_by_hop: Any,
+                   end_to_end: Any,
+                   count: int) -> tuple:
+        """Returns the number of rows and the columns of byte strings which,
+        joined row by row, make up the messages.
+        """
+        count, cuts = self._get_columns(columns, hop_by_hop, end_to_end, count)
+
+        parts = list()
+        index = 0
+        for offset, end, column in cuts:
+            if offset > index:
+                parts.append(itertools.repeat(self.stream[index:offset], count))
+
+            parts.append(column)
+            index = end
+
+        if index < len(self.stream):
+            parts.append(itertools.repeat(self.stream[index:], count))
+
+        return count, parts
+
+
+    def encode(self,
+               hop_by_hop: Any = None,
+               end_to_end: Any = None,
+               count: int = None,
+               **columns) -> bytes:
+        """Encodes one message per row into a single byte stream, with the
+        slots set from the columns given as keyword arguments. Slots with
+        no column keep the template value.
+
+        :param hop_by_hop: a column of Hop-by-Hop Identifiers in Integer
+            format. Requests get consecutive ones from a random start if it
+            is not provided, and answers keep the template one.
+        :param end_to_end: a column of End-to-End Identifiers, as above.
+        :param count: the number of messages, which is needed only if no
+            column is provided.
+        """
+        count, parts = self._get_parts(columns, hop_by_hop, end_to_end, count)
+        if count == 0:
+            return b""
+
+        return b"".join(itertools.chain.from_iterable(zip(*parts)))
+
+
+    def iter_encode(self,
+                    hop_by_hop: Any = None,
+                    end_to_end: Any = None,
+                    count: int = None,
+                    **columns) -> Iterator[bytes]:
+        """Same as encode(), but yields a byte stream per message.
+        """
+        count, parts = self._get_parts(columns, hop_by_hop, end_to_end, count)
+        if count == 0:
+            return iter(())
+
+        return map(b"".join, zip(*parts))
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks
+    ~~~~~~~~~~~~~~~~~~~
+
+    This package contains micro benchmarks for the Bromelia library hot 
+    paths. Each module exposes a `benchmarks` list of (name, callable) 
+    tuples and can be run on its own, e.g.:
+
+        $ python -m bromelia.benchmarks.messages
+
+    Modules which need their own setup or call counts, such as the loopback
+    and import time benchmarks, expose a `run()` function instead.
+
+    The whole suite runs as below, writing the results to a JSON file and
+    comparing them against a JSON file saved by a previous run:
+
+        $ python -m bromelia.benchmarks --output results.json
+        $ python -m bromelia.benchmarks --baseline results.json
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import json
+import platform
+import time
+import timeit
+from collections import namedtuple
+from typing import Callable, Dict, List
+
+
+#: Timings are in seconds per call. The `p50` and `p99` fields are only set
+#: by run_latency_benchmark(), which times each call on its own.
+BenchmarkResult = namedtuple("BenchmarkResult", [
+                                        "name",
+                                        "number",
+                                        "best",
+                                        "mean",
+                                        "p50",
+                                        "p99"
+                                    ],
+                             defaults=(None, None)
+)
+
+
+BenchmarkComparison = namedtuple("BenchmarkComparison", [
+                                        "module",
+                                        "name",
+                                        "baseline",
+                                        "current",
+                                        "change"
+                                    ]
+)
+
+
+def run_benchmark(name: str, 
+                  func: Callable, 
+                  number: int = 1000, 
+                  repeat: int = 5) -> BenchmarkResult:
+    """Runs a callable `number` times per round for `repeat` rounds and 
+    returns the best and mean time per call, in seconds.
+    """
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    timings = [timing / number for timing in timings]
+
+    return BenchmarkResult(name=name,
+                           number=number,
+                           best=min(timings),
+                           mean=sum(timings) / len(timings))
+
+
+def get_percentile(timings: List[float], percentile: float) -> float:
+    """Returns the given percentile of a list of timings by using the
+    nearest-rank method.
+    """
+    timings = sorted(timings)
+    index = max(int(round(percentile / 100 * len(timings))) - 1, 0)
+
+    return timings[index]
+
+
+def run_latency_benchmark(name: str,
+                          func: Callable,
+                          number: int = 1000,
+                          per_call: int = 1) -> BenchmarkResult:
+    """Runs a callable `number` times, timing each call on its own, and
+    returns the best, mean, p50 and p99 time per call, in seconds. The
+    `per_call` argument is the number of operations each call stands for,
+    such as the number of requests sent in a batch.
+    """
+    timings = list()
+    for _ in range(number):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) / per_call)
+
+    return BenchmarkResult(name=name,
+                           number=number * per_call,
+                           best=min(timings),
+                           mean=sum(timings) / len(timings),
+                           p50=get_percentile(timings, 50),
+                           p99=get_percentile(timings, 99))
+
+
+def run_benchmarks(benchmarks: List[tuple],
+                   number: int = 1000,
+                   repeat: int = 5) -> List[BenchmarkResult]:
+    return [run_benchmark(name, func, number, repeat) 
+                                                for name, func in benchmarks]
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    width = max([len(result.name) for result in results] + [9])
+    has_percentiles = any([result.p50 is not None for result in results])
+
+    header = f"{'benchmark':<{width}}  {'best (us)':>12}  {'mean (us)':>12}"
+    if has_percentiles:
+        header += f"  {'p50 (us)':>12}  {'p99 (us)':>12}"
+    print(header)
+
+    for result in results:
+        line = f"{result.name:<{width}}  "\
+               f"{result.best * 1e6:>12.2f}  "\
+               f"{result.mean * 1e6:>12.2f}"
+
+        if result.p50 is not None:
+            line += f"  {result.p50 * 1e6:>12.2f}  {result.p99 * 1e6:>12.2f}"
+        print(line)
+
+
+def save_results(results: Dict[str, List[BenchmarkResult]],
+                 path: str) -> None:
+    """Writes the results of each benchmark module into a JSON file, along
+    with the interpreter and machine they were taken on.
+    """
+    from ..__version__ import __version__
+
+    data = {
+                "bromelia": __version__,
+                "python": platform.python_version(),
+                "implementation": platform.python_implementation(),
+                "machine": platform.machine(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "results": {
+                            module: [result._asdict() for result in _results]
+                                    for module, _results in results.items()
+                },
+    }
+
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+
+def load_results(path: str) -> Dict[str, List[BenchmarkResult]]:
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    return {module: [BenchmarkResult(**result) for result in results]
+                            for module, results in data["results"].items()}
+
+
+def compare_results(results: Dict[str, List[BenchmarkResult]],
+                    baseline: Dict[str, List[BenchmarkResult]]
+                    ) -> List[BenchmarkComparison]:
+    """Compares the best time per call of each benchmark found in both
+    results and baseline. The `change` field is the relative difference to
+    the baseline, so 0.1 means 10% slower.
+    """
+    comparisons = list()
+
+    for module, _results in results.items():
+        baseline_results = {result.name: result
+                                    for result in baseline.get(module, [])}
+
+        for result in _results:
+            baseline_result = baseline_results.get(result.name)
+            if baseline_result is None:
+                continue
+
+            change = (result.best - baseline_result.best) / baseline_result.best
+            comparisons.append(BenchmarkComparison(module=module,
+                                                   name=result.name,
+                                                   baseline=baseline_result.best,
+                                                   current=result.best,
+                                                   change=change))
+
+    return comparisons
+
+
+def print_comparisons(comparisons: List[BenchmarkComparison],
+                      threshold: float) -> None:
+    width = max([len(f"{comparison.module}: {comparison.name}")
+                                    for comparison in comparisons] + [9])
+
+    print(f"{'benchmark':<{width}}  {'baseline (us)':>14}  "\
+          f"{'current (us)':>14}  {'change':>8}")
+    for comparison in comparisons:
+        name = f"{comparison.module}: {comparison.name}"
+        mark = "  REGRESSION" if comparison.change > threshold else ""
+
+        print(f"{name:<{width}}  "\
+              f"{comparison.baseline * 1e6:>14.2f}  "\
+              f"{comparison.current * 1e6:>14.2f}  "\
+              f"{comparison.change * 100:>+7.1f}%{mark}")
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.__main__
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module runs the whole benchmark suite, or the given benchmark
+    modules only, e.g.:
+
+        $ python -m bromelia.benchmarks codec avps --output results.json
+        $ python -m bromelia.benchmarks --baseline results.json --threshold 10
+
+    When a baseline is given, the exit status is 1 if any benchmark got
+    slower than the baseline by more than the threshold, in percent.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import sys
+from importlib import import_module
+
+from . import compare_results
+from . import load_results
+from . import print_comparisons
+from . import print_results
+from . import run_benchmarks
+from . import save_results
+
+
+MODULES = [
+            "avps",
+            "messages",
+            "codec",
+            "decoding",
+            "queries",
+            "cloning",
+            "duplicates",
+            "scheduling",
+            "routing",
+            "sessions",
+            "tracing",
+            "recorder",
+            "batch",
+            "loopback",
+            "imports",
+]
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bromelia.benchmarks",
+                                     description="Runs the Bromelia "\
+                                                 "benchmark suite.")
+
+    parser.add_argument("modules",
+                        nargs="*",
+                        metavar="module",
+                        help=f"benchmark modules to be run, among "\
+                             f"{', '.join(MODULES)} (default: all)")
+    parser.add_argument("-n", "--number",
+                        type=int,
+                        default=1000,
+                        help="calls per round (default: 1000)")
+    parser.add_argument("-r", "--repeat",
+                        type=int,
+                        default=5,
+                        help="rounds per benchmark (default: 5)")
+    parser.add_argument("-o", "--output",
+                        help="JSON file to write the results into")
+    parser.add_argument("-b", "--baseline",
+                        help="JSON file written by a previous run to "\
+                             "compare the results against")
+    parser.add_argument("-t", "--threshold",
+                        type=float,
+                        default=10.0,
+                        help="slowdown, in percent, above which a benchmark "\
+                             "is reported as a regression (default: 10)")
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    parser = get_parser()
+    args = parser.parse_args(argv)
+
+    for name in args.modules:
+        if name not in MODULES:
+            parser.error(f"unknown benchmark module '{name}'")
+
+    results = dict()
+    for name in args.modules or MODULES:
+        module = import_module(f".{name}", __package__)
+
+        print(f"[{name}]")
+        if hasattr(module, "run"):
+            results[name] = module.run()
+        else:
+            results[name] = run_benchmarks(module.benchmarks,
+                                           number=args.number,
+                                           repeat=args.repeat)
+
+        print_results(results[name])
+        print()
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        comparisons = compare_results(results, load_results(args.baseline))
+        if comparisons:
+            print_comparisons(comparisons, args.threshold / 100)
+
+        for comparison in comparisons:
+            if comparison.change > args.threshold / 100:
+                return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.avps
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter AVP construction benchmarks, one for
+    each Diameter AVP data type as per RFC 6733 clause 4.2 and 4.3.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import datetime
+
+from ..avps import *
+from ..constants import *
+from . import print_results
+from . import run_benchmarks
+
+
+EVENT_TIMESTAMP = datetime.datetime(2021, 1, 1, 12, 0, 0)
+EXPONENT = (-2).to_bytes(4, byteorder="big", signed=True)
+
+
+def create_subscription_id():
+    SubscriptionIdAVP([
+                        SubscriptionIdTypeAVP(END_USER_E164),
+                        SubscriptionIdDataAVP("5511123456789")
+    ])
+
+
+benchmarks = [
+        ("construct OctetString AVP",
+                lambda: ChargingRuleNameAVP("rule-1")),
+        ("construct Integer32 AVP",
+                lambda: ExponentAVP(EXPONENT)),
+        ("construct Unsigned32 AVP",
+                lambda: ResultCodeAVP(DIAMETER_SUCCESS)),
+        ("construct Unsigned64 AVP",
+                lambda: CcTotalOctetsAVP(1024 ** 3)),
+        ("construct Enumerated AVP",
+                lambda: CcRequestTypeAVP(CC_REQUEST_TYPE_INITIAL_REQUEST)),
+        ("construct Address AVP",
+                lambda: HostIpAddressAVP("10.0.0.1")),
+        ("construct Time AVP",
+                lambda: EventTimestampAVP(EVENT_TIMESTAMP)),
+        ("construct UTF8String AVP",
+                lambda: SessionIdAVP("pgw.bromelia.org;1096298391;1")),
+        ("construct DiameterIdentity AVP",
+                lambda: OriginHostAVP("pgw.bromelia.org")),
+        ("construct DiameterURI AVP",
+                lambda: RedirectHostAVP("aaa://pcrf.bromelia.org:3868")),
+        ("construct Grouped AVP", create_subscription_id),
+]
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.batch
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the batch encoding benchmarks. S6a CLR requests
+    differing only in Session-Id and User-Name are encoded one by one, each
+    built through the CLR constructor, and from a BatchTemplate, into a
+    single byte stream and into a byte stream per message. Timings are per
+    message.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from typing import List
+
+from ..batch import BatchTemplate
+from ..lib.etsi_3gpp_s6a import CLR
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+
+
+BATCH_SIZE = 1000
+
+
+def create_clr(user_name: str) -> CLR:
+    return CLR(session_id="hss.bromelia.org",
+               origin_host="hss.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_host="mme.bromelia.org",
+               destination_realm="bromelia.org",
+               user_name=user_name)
+
+
+def run(number: int = 10000) -> List[BenchmarkResult]:
+    number = max(number // BATCH_SIZE, 1)
+
+    session_ids = [f"hss.bromelia.org;{index}" for index in range(BATCH_SIZE)]
+    imsis = [f"72401{index:010d}" for index in range(BATCH_SIZE)]
+
+    template = BatchTemplate(create_clr(imsis[0]), {
+                                                "session_id": "Session-Id",
+                                                "imsi": "User-Name"
+    })
+
+    def encode_one_by_one():
+        for imsi in imsis:
+            create_clr(imsi).dump()
+
+    def encode_batch():
+        template.encode(session_id=session_ids, imsi=imsis)
+
+    def iter_encode_batch():
+        for _ in template.iter_encode(session_id=session_ids, imsi=imsis):
+            pass
+
+    return [
+        run_latency_benchmark("CLR(**attrs).dump()",
+                              encode_one_by_one,
+                              number=number,
+                              per_call=BATCH_SIZE),
+        run_latency_benchmark(f"BatchTemplate.encode(), {BATCH_SIZE} rows",
+                              encode_batch,
+                              number=number * 10,
+                              per_call=BATCH_SIZE),
+        run_latency_benchmark(f"BatchTemplate.iter_encode(), {BATCH_SIZE} rows",
+                              iter_encode_batch,
+                              number=number * 10,
+                              per_call=BATCH_SIZE),
+    ]
+
+
+if __name__ == "__main__":
+    print_results(run())
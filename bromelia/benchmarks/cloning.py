@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.cloning
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the DiameterMessage copy benchmarks, comparing the
+    copy() method with copy.deepcopy on an Update-Location-Answer holding 
+    50 AVPs.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from copy import deepcopy
+
+from ..avps import *
+from ..constants import *
+from ..lib.etsi_3gpp_s6a.messages import UpdateLocationAnswer
+from . import print_results
+from . import run_benchmarks
+
+
+NUM_OF_AVPS = 50
+
+
+def create_ula():
+    ula = UpdateLocationAnswer(session_id="hss.bromelia.org;1096298391;1",
+                               origin_host="hss.bromelia.org",
+                               origin_realm="bromelia.org",
+                               ula_flags=1)
+
+    index = 0
+    while len(ula.avps) < NUM_OF_AVPS:
+        if index % 3 == 0:
+            ula.append(SupportedFeaturesAVP([
+                                        VendorIdAVP(VENDOR_ID_3GPP),
+                                        FeatureListIdAVP(index),
+                                        FeatureListAVP(134217728)
+            ]))
+        else:
+            ula.append(RouteRecordAVP(f"dra{index}.bromelia.org"))
+        index += 1
+
+    return ula
+
+
+ula = create_ula()
+
+
+def copy_ula():
+    ula.copy()
+
+
+def copy_ula_from_stream():
+    ula.copy(from_stream=True)
+
+
+def copy_ula_from_stream_and_access():
+    ula.copy(from_stream=True).session_id_avp
+
+
+def deepcopy_ula():
+    deepcopy(ula)
+
+
+benchmarks = [
+                ("deepcopy ULA (50 AVPs)", deepcopy_ula),
+                ("copy ULA (50 AVPs)", copy_ula),
+                ("copy ULA from stream (50 AVPs)", copy_ula_from_stream),
+                ("copy ULA from stream + decode (50 AVPs)", 
+                                            copy_ula_from_stream_and_access),
+]
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.codec
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter Message encoding and decoding
+    benchmarks for a representative message of each application: Gx CCR/CCA,
+    Gy CCR with Multiple-Services-Credit-Control AVPs, S6a ULR/ULA and
+    AIR/AIA and Rx AAR. It also covers DiameterMessage.load() over a byte
+    stream holding many Diameter Messages, as received from the transport
+    layer under load.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..avps import *
+from ..base import DiameterMessage
+from ..constants import *
+from ..lib.etsi_3gpp_rx.messages import AARequest as RxAAR
+from ..lib.etsi_3gpp_s6a.messages import AuthenticationInformationAnswer as AIA
+from ..lib.etsi_3gpp_s6a.messages import AuthenticationInformationRequest as AIR
+from ..lib.etsi_3gpp_s6a.messages import UpdateLocationAnswer as ULA
+from ..lib.etsi_3gpp_s6a.messages import UpdateLocationRequest as ULR
+from . import print_results
+from . import run_benchmarks
+from .messages import DESTINATION_REALM
+from .messages import SESSION_ID
+from .messages import create_gx_cca
+from .messages import create_gx_ccr_initial
+from .messages import get_subscription_id
+from .queries import create_gy_ccr_update
+
+
+MME_HOST = "mme.bromelia.org"
+HSS_HOST = "hss.bromelia.org"
+IMSI = "724051234567890"
+VISITED_PLMN_ID = bytes.fromhex("27f450")
+
+NUM_OF_VECTORS = 3
+NUM_OF_MESSAGES = 100
+
+
+def create_ulr():
+    return ULR(session_id=SESSION_ID,
+               origin_host=MME_HOST,
+               origin_realm=DESTINATION_REALM,
+               destination_realm=DESTINATION_REALM,
+               user_name=IMSI,
+               rat_type=RAT_TYPE_EUTRAN,
+               ulr_flags=3,
+               visited_plmn_id=VISITED_PLMN_ID)
+
+
+def create_ula():
+    return ULA(session_id=SESSION_ID,
+               origin_host=HSS_HOST,
+               origin_realm=DESTINATION_REALM,
+               ula_flags=1)
+
+
+def create_air():
+    return AIR(session_id=SESSION_ID,
+               origin_host=MME_HOST,
+               origin_realm=DESTINATION_REALM,
+               destination_realm=DESTINATION_REALM,
+               user_name=IMSI,
+               requested_eutran_authentication_info=[
+                                        NumberOfRequestedVectorsAVP(NUM_OF_VECTORS),
+                                        ImmediateResponsePreferredAVP(0)
+               ],
+               visited_plmn_id=VISITED_PLMN_ID)
+
+
+def create_aia():
+    vectors = [EUtranVectorAVP([
+                            ItemNumberAVP(index),
+                            RandAVP(bytes(16)),
+                            XresAVP(bytes(8)),
+                            AutnAVP(bytes(16)),
+                            KasmeAVP(bytes(32))
+               ]) for index in range(NUM_OF_VECTORS)]
+
+    return AIA(session_id=SESSION_ID,
+               origin_host=HSS_HOST,
+               origin_realm=DESTINATION_REALM,
+               result_code=DIAMETER_SUCCESS,
+               authentication_info=vectors)
+
+
+def create_rx_aar():
+    return RxAAR(session_id=SESSION_ID,
+                 origin_host="pcscf.bromelia.org",
+                 origin_realm=DESTINATION_REALM,
+                 destination_realm=DESTINATION_REALM,
+                 af_application_identifier="IMS Services",
+                 media_component_description=[
+                                        MediaComponentNumberAVP(1),
+                                        MediaTypeAVP(MEDIA_TYPE_AUDIO)
+                 ],
+                 subscription_id=get_subscription_id(),
+                 framed_ip_address="10.0.0.1")
+
+
+MESSAGES = [
+                ("Gx CCR-I", create_gx_ccr_initial),
+                ("Gx CCA", create_gx_cca),
+                ("Gy CCR-U (10 MSCCs)", create_gy_ccr_update),
+                ("S6a ULR", create_ulr),
+                ("S6a ULA", create_ula),
+                ("S6a AIR", create_air),
+                ("S6a AIA", create_aia),
+                ("Rx AAR", create_rx_aar),
+]
+
+msgs = [(name, create_message()) for name, create_message in MESSAGES]
+streams = [(name, msg.dump()) for name, msg in msgs]
+
+#: Byte stream holding NUM_OF_MESSAGES Diameter Messages of every kind above.
+multi_message_stream = b"".join([streams[index % len(streams)][1]
+                                        for index in range(NUM_OF_MESSAGES)])
+
+
+def load_multi_message_stream():
+    DiameterMessage.load(multi_message_stream)
+
+
+def load_multi_message_stream_lazy():
+    DiameterMessage.load(multi_message_stream, lazy=True)
+
+
+benchmarks = [(f"encode {name}", msg.dump) for name, msg in msgs]
+benchmarks.extend([(f"decode {name}",
+                    lambda stream=stream: DiameterMessage.load(stream))
+                                                    for name, stream in streams])
+benchmarks.extend([
+                (f"load stream of {NUM_OF_MESSAGES} messages",
+                                                    load_multi_message_stream),
+                (f"load stream of {NUM_OF_MESSAGES} messages (lazy)",
+                                                    load_multi_message_stream_lazy),
+])
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.decoding
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter Message decoding benchmarks, comparing
+    the full decoding of a Gx CCR-I byte stream with the header peek and the
+    shallow AVP scanner used for dispatching.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base import DiameterHeader
+from ..base import DiameterMessage
+from ..constants import *
+from . import print_results
+from . import run_benchmarks
+from .messages import create_gx_ccr_initial
+
+
+stream = create_gx_ccr_initial().dump()
+session_id_code = int.from_bytes(SESSION_ID_AVP_CODE, byteorder="big")
+
+
+def load_ccr():
+    DiameterMessage.load(stream)
+
+
+def load_ccr_lazy():
+    DiameterMessage.load(stream, lazy=True)
+
+
+def peek_ccr_header():
+    DiameterHeader.peek(stream)
+
+
+def find_ccr_session_id():
+    DiameterMessage.find_avp(stream, session_id_code)
+
+
+benchmarks = [
+                ("load Gx CCR-I", load_ccr),
+                ("load Gx CCR-I (lazy)", load_ccr_lazy),
+                ("peek Gx CCR-I header", peek_ccr_header),
+                ("find Gx CCR-I Session-Id", find_ccr_session_id),
+]
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.duplicates
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the duplicate request detection benchmarks. The
+    AnswerCache is filled with Gx CCA answers up to a given number of
+    entries, and then retransmitted Gx CCR-I requests are looked up, both as
+    wire bytes and as DiameterMessage objects, to time the answer replay.
+
+    The 1M entries round needs a few hundred MB of memory.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import random
+import struct
+from typing import List
+
+from ..base import DiameterMessage
+from ..cache import AnswerCache
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+from .messages import create_gx_cca
+from .messages import create_gx_ccr_initial
+
+
+CACHE_SIZES = [1000, 100000, 1000000]
+
+
+def set_end_to_end(stream: bytes, end_to_end: int) -> bytes:
+    return stream[:16] + struct.pack(">I", end_to_end) + stream[20:]
+
+
+def fill_cache(cache: AnswerCache, request: bytes, answer: bytes) -> None:
+    for end_to_end in range(cache.max_size):
+        cache.put(set_end_to_end(request, end_to_end), answer)
+
+
+def run(number: int = 1000,
+        repeat: int = 5,
+        sizes: List[int] = None) -> List[BenchmarkResult]:
+    ccr = create_gx_ccr_initial()
+    ccr.header.set_retransmitted_bit(True)
+
+    request = ccr.dump()
+    answer = create_gx_cca().dump()
+
+    results = list()
+    for size in sizes or CACHE_SIZES:
+        cache = AnswerCache(max_size=size)
+        fill_cache(cache, request, answer)
+
+        streams = [set_end_to_end(request, random.randrange(size))
+                                                    for _ in range(number)]
+        msgs = DiameterMessage.load(b"".join(streams[:100]))
+        indexes = iter(range(number * 2))
+
+        def replay_stream():
+            assert cache.get(streams[next(indexes) % number]) is not None
+
+        def replay_message():
+            assert cache.get(msgs[next(indexes) % len(msgs)]) is not None
+
+        results.append(run_latency_benchmark(f"replay from {size} entries "\
+                                             f"(wire bytes)",
+                                             replay_stream,
+                                             number=number))
+        results.append(run_latency_benchmark(f"replay from {size} entries "\
+                                             f"(DiameterMessage)",
+                                             replay_message,
+                                             number=number))
+
+        stats = cache.get_stats()
+        print(f"{size} entries: "\
+              f"{stats.memory_usage / size:.0f} bytes/entry, "\
+              f"hit rate {stats.hit_rate:.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.imports
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the import time benchmarks. Each statement runs in
+    a fresh interpreter, so the measured time includes everything pulled in
+    by the import, as it would happen in a short-lived tool or test run.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import subprocess
+import sys
+from typing import List, Tuple
+
+from . import BenchmarkResult
+from . import print_results
+from . import run_benchmarks
+
+
+STATEMENTS = [
+                ("import bromelia", "import bromelia"),
+                ("import bromelia.messages", "import bromelia.messages"),
+                ("import bromelia.lib.etsi_3gpp_gx",
+                                        "import bromelia.lib.etsi_3gpp_gx"),
+                ("from bromelia import Diameter",
+                                        "from bromelia import Diameter"),
+]
+
+
+def run_statement(statement: str) -> None:
+    subprocess.run([sys.executable, "-c", statement], check=True)
+
+
+def get_slowest_imports(statement: str,
+                        limit: int = 10) -> List[Tuple[str, int]]:
+    """Returns the modules with the highest cumulative import time, in
+    microseconds, as reported by `python -X importtime`.
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime",
+                                                            "-c", statement],
+                             stderr=subprocess.PIPE,
+                             check=True,
+                             universal_newlines=True)
+
+    imports = list()
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, module = line[12:].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+
+        imports.append((module.strip(), int(cumulative)))
+
+    return sorted(imports, key=lambda item: item[1], reverse=True)[:limit]
+
+
+benchmarks = [(name, lambda statement=statement: run_statement(statement))
+                                            for name, statement in STATEMENTS]
+
+
+def run(number: int = 1, repeat: int = 5) -> List[BenchmarkResult]:
+    return run_benchmarks(benchmarks, number=number, repeat=repeat)
+
+
+if __name__ == "__main__":
+    print_results(run())
+
+    print()
+    print("slowest imports for 'import bromelia' (cumulative, us)")
+    for module, cumulative in get_slowest_imports("import bromelia"):
+        print(f"{module:<40}  {cumulative:>10}")
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.loopback
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the request/answer benchmarks through a Diameter
+    application connected over the loopback transport to a stand-in HSS, so
+    the whole stack (encoding, Peer State Machine, transport and decoding)
+    is covered with no network involved. Each round trip is timed on its
+    own to report the p50 and p99 latency, and the pipelined benchmark keeps
+    many requests in flight to report the throughput.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from contextlib import contextmanager
+from typing import List
+
+from ..constants import *
+from ..lib.etsi_3gpp_s6a.messages import UpdateLocationRequest as ULR
+from ..setup import Diameter
+from ..testing import create_hss
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+from .codec import IMSI
+from .codec import VISITED_PLMN_ID
+
+
+HSS_PORT = 3870
+NUM_OF_REQUESTS_IN_FLIGHT = 100
+
+config = {
+            "MODE": "CLIENT",
+            "APPLICATIONS": [{
+                                "vendor_id": VENDOR_ID_3GPP,
+                                "app_id": DIAMETER_APPLICATION_S6a_S6d
+            }],
+            "TRANSPORT_TYPE": DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK,
+            "LOCAL_NODE_HOSTNAME": "mme.bromelia.org",
+            "LOCAL_NODE_REALM": "bromelia.org",
+            "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+            "LOCAL_NODE_PORT": 3868,
+            "PEER_NODE_HOSTNAME": "hss.bromelia.org",
+            "PEER_NODE_REALM": "bromelia.org",
+            "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+            "PEER_NODE_PORT": HSS_PORT,
+            "WATCHDOG_TIMEOUT": 30
+}
+
+
+def create_ulr(index: int) -> ULR:
+    return ULR(session_id=f"mme.bromelia.org;1;{index}",
+               origin_host="mme.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               user_name=IMSI,
+               ulr_flags=3,
+               visited_plmn_id=VISITED_PLMN_ID)
+
+
+@contextmanager
+def context() -> Diameter:
+    with create_hss(port=HSS_PORT):
+        app = Diameter(config=config)
+        with app.context():
+            yield app
+
+
+def run(number: int = 1000, repeat: int = 5) -> List[BenchmarkResult]:
+    ulrs = [create_ulr(index) for index in range(NUM_OF_REQUESTS_IN_FLIGHT)]
+
+    with context() as app:
+        def round_trip():
+            app.send_message(ulrs[0], avoid=False)
+
+        def pipelined():
+            app.send_messages(ulrs)
+            for _ in ulrs:
+                app.get_message()
+
+        #: Warm up the connection before any timing.
+        pipelined()
+
+        return [
+            run_latency_benchmark("S6a ULR/ULA round trip",
+                                  round_trip,
+                                  number=number),
+            run_latency_benchmark(f"S6a ULR/ULA pipelined "\
+                                  f"({NUM_OF_REQUESTS_IN_FLIGHT} in flight)",
+                                  pipelined,
+                                  number=max(number // NUM_OF_REQUESTS_IN_FLIGHT,
+                                             repeat),
+                                  per_call=NUM_OF_REQUESTS_IN_FLIGHT),
+        ]
+
+
+if __name__ == "__main__":
+    results = run()
+    print_results(results)
+
+    print()
+    print(f"throughput: {1 / results[-1].mean:.0f} requests/s")
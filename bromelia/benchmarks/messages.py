@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.messages
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter messages construction benchmarks for
+    Credit-Control messages of Gx and Gy applications.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..avps import SubscriptionIdDataAVP
+from ..avps import SubscriptionIdTypeAVP
+from ..constants import *
+from ..lib.etsi_3gpp_gx.messages import CreditControlAnswer as GxCCA
+from ..lib.etsi_3gpp_gx.messages import CreditControlRequest as GxCCR
+from ..lib.etsi_3gpp_gy.messages import CreditControlAnswer as GyCCA
+from ..lib.etsi_3gpp_gy.messages import CreditControlRequest as GyCCR
+from . import print_results
+from . import run_benchmarks
+
+
+SESSION_ID = "pgw.bromelia.org;1096298391;1"
+ORIGIN_HOST = "pgw.bromelia.org"
+ORIGIN_REALM = "bromelia.org"
+DESTINATION_HOST = "pcrf.bromelia.org"
+DESTINATION_REALM = "bromelia.org"
+MSISDN = "5511123456789"
+
+
+def get_subscription_id():
+    return [
+                SubscriptionIdTypeAVP(END_USER_E164),
+                SubscriptionIdDataAVP(MSISDN)
+    ]
+
+
+def create_gx_ccr_initial():
+    return GxCCR(session_id=SESSION_ID,
+                 origin_host=ORIGIN_HOST,
+                 origin_realm=ORIGIN_REALM,
+                 destination_realm=DESTINATION_REALM,
+                 cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+                 cc_request_number=0,
+                 subscription_id=get_subscription_id(),
+                 framed_ip_address="10.0.0.1",
+                 called_station_id="internet")
+
+
+def create_gx_ccr_update():
+    return GxCCR(session_id=SESSION_ID,
+                 origin_host=ORIGIN_HOST,
+                 origin_realm=ORIGIN_REALM,
+                 destination_realm=DESTINATION_REALM,
+                 destination_host=DESTINATION_HOST,
+                 cc_request_type=CC_REQUEST_TYPE_UPDATE_REQUEST,
+                 cc_request_number=1)
+
+
+def create_gx_cca():
+    return GxCCA(session_id=SESSION_ID,
+                 origin_host=DESTINATION_HOST,
+                 origin_realm=DESTINATION_REALM,
+                 cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+                 cc_request_number=0)
+
+
+def create_gy_ccr_initial():
+    return GyCCR(session_id=SESSION_ID,
+                 origin_host=ORIGIN_HOST,
+                 origin_realm=ORIGIN_REALM,
+                 destination_realm=DESTINATION_REALM,
+                 cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+                 cc_request_number=0,
+                 subscription_id=get_subscription_id())
+
+
+def create_gy_ccr_update():
+    return GyCCR(session_id=SESSION_ID,
+                 origin_host=ORIGIN_HOST,
+                 origin_realm=ORIGIN_REALM,
+                 destination_realm=DESTINATION_REALM,
+                 destination_host=DESTINATION_HOST,
+                 cc_request_type=CC_REQUEST_TYPE_UPDATE_REQUEST,
+                 cc_request_number=1)
+
+
+def create_gy_cca():
+    return GyCCA(session_id=SESSION_ID,
+                 origin_host=DESTINATION_HOST,
+                 origin_realm=DESTINATION_REALM,
+                 cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+                 cc_request_number=0)
+
+
+benchmarks = [
+                ("construct Gx CCR-I", create_gx_ccr_initial),
+                ("construct Gx CCR-U", create_gx_ccr_update),
+                ("construct Gx CCA", create_gx_cca),
+                ("construct Gy CCR-I", create_gy_ccr_initial),
+                ("construct Gy CCR-U", create_gy_ccr_update),
+                ("construct Gy CCA", create_gy_cca),
+]
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
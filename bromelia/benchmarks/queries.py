@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.queries
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the AVP path query benchmarks, comparing compiled
+    AvpPath queries over the wire bytes with the full decoding of a Gy CCR-U
+    holding 10 Multiple-Services-Credit-Control AVPs followed by attribute
+    traversal.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..avps import CcTotalOctetsAVP
+from ..avps import MultipleServicesCreditControlAVP
+from ..avps import RatingGroupAVP
+from ..base import DiameterAVP
+from ..base import DiameterMessage
+from ..constants import *
+from ..lib.etsi_3gpp_gy.messages import CreditControlRequest as GyCCR
+from ..query import AvpPath
+from . import print_results
+from . import run_benchmarks
+from .messages import DESTINATION_HOST
+from .messages import DESTINATION_REALM
+from .messages import ORIGIN_HOST
+from .messages import ORIGIN_REALM
+from .messages import SESSION_ID
+from .messages import get_subscription_id
+
+
+NUM_OF_MSCCS = 10
+
+#: Used-Service-Unit AVP has no DiameterAVP subclass, so it is loaded as a
+#: generic DiameterAVP object.
+USED_SERVICE_UNIT_AVP_CODE = 446
+
+SUBSCRIPTION_ID_DATA = "Subscription-Id/Subscription-Id-Data"
+CC_TOTAL_OCTETS = "Multiple-Services-Credit-Control/Used-Service-Unit/"\
+                  "CC-Total-Octets"
+
+
+def create_used_service_unit(cc_total_octets):
+    avp = DiameterAVP(code=USED_SERVICE_UNIT_AVP_CODE,
+                      data=CcTotalOctetsAVP(cc_total_octets).dump())
+    avp.set_mandatory_bit(True)
+    return avp
+
+
+def create_gy_ccr_update():
+    msccs = [MultipleServicesCreditControlAVP([
+                                    RatingGroupAVP(index),
+                                    create_used_service_unit(index * 1024)
+             ]) for index in range(NUM_OF_MSCCS)]
+
+    ccr = GyCCR(session_id=SESSION_ID,
+                origin_host=ORIGIN_HOST,
+                origin_realm=ORIGIN_REALM,
+                destination_realm=DESTINATION_REALM,
+                destination_host=DESTINATION_HOST,
+                cc_request_type=CC_REQUEST_TYPE_UPDATE_REQUEST,
+                cc_request_number=1,
+                subscription_id=get_subscription_id())
+
+    for mscc in msccs:
+        ccr.append(mscc)
+
+    return ccr
+
+
+stream = create_gy_ccr_update().dump()
+
+
+def decode_and_traverse():
+    ccr = DiameterMessage.load(stream)[0]
+
+    subscription_id_data = [avp.data 
+                                for avp in ccr.subscription_id_avp.avps
+                                    if avp.code == SUBSCRIPTION_ID_DATA_AVP_CODE]
+
+    cc_total_octets = list()
+    for mscc in ccr.avps:
+        if mscc.code != MULTIPLE_SERVICES_CREDIT_CONTROL_AVP_CODE:
+            continue
+
+        for usu in mscc.avps:
+            if usu.get_code() != USED_SERVICE_UNIT_AVP_CODE:
+                continue
+
+            cc_total_octets.extend([avp.data 
+                                    for avp in DiameterAVP.load(usu.data)
+                                        if avp.code == CC_TOTAL_OCTETS_AVP_CODE])
+
+    return subscription_id_data, cc_total_octets
+
+
+def query():
+    subscription_id_data = AvpPath.compile(SUBSCRIPTION_ID_DATA)\
+                                                        .find_all(stream)
+    cc_total_octets = AvpPath.compile(CC_TOTAL_OCTETS).find_all(stream)
+
+    return subscription_id_data, cc_total_octets
+
+
+def query_first():
+    AvpPath.compile(SUBSCRIPTION_ID_DATA).find(stream)
+
+
+benchmarks = [
+                ("decode + traverse Gy CCR-U (10 MSCCs)", decode_and_traverse),
+                ("query Gy CCR-U (10 MSCCs)", query),
+                ("query first Subscription-Id-Data", query_first),
+]
+
+
+if __name__ == "__main__":
+    assert decode_and_traverse() == query()
+    assert len(query()[1]) == NUM_OF_MSCCS
+    print_results(run_benchmarks(benchmarks))
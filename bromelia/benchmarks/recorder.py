@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.recorder
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the flight recorder benchmarks. A Gx CCR-I request
+    and its CCA answer are recorded as they would be by an association, one
+    byte stream by direction per transaction, next to the hex dump done by
+    DEBUG logging for each buffer. The share of a CPU core taken by the
+    recording at 5000 transactions per second is printed, along with the
+    time to dump a full flight recorder into a pcap file.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import os
+import tempfile
+import time
+from typing import List
+
+from ..recorder import FlightRecorder
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+from .messages import create_gx_cca
+from .messages import create_gx_ccr_initial
+
+
+TRANSACTIONS_PER_SECOND = 5000
+
+
+def run(number: int = 10000) -> List[BenchmarkResult]:
+    request = create_gx_ccr_initial().dump()
+    answer = create_gx_cca().dump()
+
+    recorder = FlightRecorder()
+
+    def record_transaction():
+        recorder.record_recv(request)
+        recorder.record_sent(answer)
+
+    def hex_dump_transaction():
+        f"Data received: {request.hex()}"
+        f"Data sent: {answer.hex()}"
+
+    results = [
+        run_latency_benchmark("record transaction",
+                              record_transaction,
+                              number=number),
+        run_latency_benchmark("hex dump transaction (DEBUG logging)",
+                              hex_dump_transaction,
+                              number=number),
+    ]
+
+    print(f"flight recorder at {TRANSACTIONS_PER_SECOND} TPS: "\
+          f"{results[0].mean * TRANSACTIONS_PER_SECOND * 100:.3f}% "\
+          f"of a CPU core")
+
+    with tempfile.TemporaryDirectory() as directory:
+        stats = recorder.get_stats()
+
+        start = time.perf_counter()
+        num_of_packets = recorder.dump(os.path.join(directory, "dump.pcap"))
+        print(f"dump of {stats.num_of_recv_entries + stats.num_of_sent_entries} "\
+              f"byte streams ({num_of_packets} packets): "\
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
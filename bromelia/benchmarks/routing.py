@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.routing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the Relay agent benchmarks. A Gx CCR-I is routed
+    by realm from a PCEF peer to a PCRF peer, and its CCA is routed back,
+    as wire bytes (Relay agent) and fully decoded and encoded again (Proxy
+    agent). The relay is also timed with a redirect to the PCRF peer cached,
+    which adds its lookup to every request. Peers are stubs that keep the last message sent to them, so the
+    timings leave out the Peer State Machine and transport threads.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..base import DiameterMessage
+from ..constants import *
+from ..redirect import RedirectIndication
+from ..routing import RelayAgent
+from ..routing import RoutingTable
+from ..routing import get_routing_avps
+from . import print_results
+from . import run_benchmarks
+from .messages import create_gx_cca
+from .messages import create_gx_ccr_initial
+
+
+class StubAssociation:
+    def __init__(self):
+        self.last_message = None
+        self.relay = True
+
+    def is_connected(self):
+        return True
+
+    def put_message_into_send_queue(self, msg):
+        self.last_message = msg
+
+
+class StubPeer:
+    def __init__(self, host_name):
+        self.host_name = host_name
+        self.association = StubAssociation()
+        self.config = {
+                "LOCAL_NODE_HOSTNAME": "dra.bromelia.org",
+                "LOCAL_NODE_REALM": "dra.bromelia.org"
+        }
+
+    def is_open(self):
+        return True
+
+
+pcef = StubPeer("pgw.bromelia.org")
+pcrf = StubPeer("pcrf.bromelia.org")
+
+table = RoutingTable()
+table.add_route("bromelia.org", [pcrf.host_name],
+                application_id=DIAMETER_APPLICATION_Gx)
+
+relay_agent = RelayAgent(table, clients=[pcef, pcrf])
+proxy_agent = RelayAgent(table,
+                         clients=[pcef, pcrf],
+                         proxy_handler=lambda msg: msg)
+
+redirect_agent = RelayAgent(table, clients=[pcef, pcrf])
+
+request = create_gx_ccr_initial().dump()
+answer = create_gx_cca().dump()
+
+redirect_agent.redirect_cache.add(
+                    RedirectIndication(hosts=(pcrf.host_name,),
+                                       usage=int.from_bytes(
+                                            REDIRECT_HOST_USAGE_ALL_SESSION,
+                                            byteorder="big"),
+                                       max_cache_time=2**32 - 1),
+                    get_routing_avps(request),
+                    DIAMETER_APPLICATION_Gx)
+
+
+def route(agent):
+    agent.handle_message(pcef, DiameterMessage.load(request, lazy=True)[0])
+
+    hop_by_hop = pcrf.association.last_message.header.hop_by_hop
+    agent.handle_message(pcrf,
+                         DiameterMessage.load(answer[:12] + hop_by_hop + \
+                                              answer[16:],
+                                              lazy=True)[0])
+
+
+def relay():
+    route(relay_agent)
+
+
+def proxy():
+    route(proxy_agent)
+
+
+def redirect():
+    route(redirect_agent)
+
+
+benchmarks = [
+                ("relay Gx CCR-I/CCA (wire bytes)", relay),
+                ("proxy Gx CCR-I/CCA (decode + encode)", proxy),
+                ("relay Gx CCR-I/CCA (cached redirect)", redirect),
+]
+
+
+if __name__ == "__main__":
+    print_results(run_benchmarks(benchmarks))
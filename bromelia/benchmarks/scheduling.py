@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.scheduling
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the send queue scheduling benchmarks. A burst of
+    Gx CCR-I requests is queued, then a DWA is queued behind it, and the
+    queue is drained by serializing each message, as the sending thread of
+    a Diameter association does. The time from the DWA being queued until
+    it is serialized is the watchdog answer latency, which is compared
+    between a FIFO queue.Queue and the PriorityMessageQueue, for the
+    nominal burst and a 10x overload one.
+
+    No socket is involved, so the timings leave out the network.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import queue
+import time
+from typing import Callable, List
+
+from ..messages import DeviceWatchdogAnswer
+from ..scheduling import PriorityMessageQueue
+from . import BenchmarkResult
+from . import get_percentile
+from . import print_results
+from .messages import create_gx_ccr_initial
+
+
+BURST_SIZE = 100
+OVERLOAD_FACTORS = [1, 10]
+
+
+def get_watchdog_latency(send_queue, burst: list, dwa) -> float:
+    for msg in burst:
+        send_queue.put(msg)
+
+    start = time.perf_counter()
+    send_queue.put(dwa)
+
+    while True:
+        msg = send_queue.get()
+        msg.dump()
+        if msg is dwa:
+            break
+
+    latency = time.perf_counter() - start
+
+    while not send_queue.empty():
+        send_queue.get().dump()
+
+    return latency
+
+
+def run_queue_benchmark(name: str,
+                        queue_class: Callable,
+                        burst: list,
+                        dwa,
+                        number: int) -> BenchmarkResult:
+    send_queue = queue_class()
+    timings = [get_watchdog_latency(send_queue, burst, dwa)
+                                                    for _ in range(number)]
+
+    return BenchmarkResult(name=name,
+                           number=number,
+                           best=min(timings),
+                           mean=sum(timings) / len(timings),
+                           p50=get_percentile(timings, 50),
+                           p99=get_percentile(timings, 99))
+
+
+def run(number: int = 200,
+        burst_size: int = BURST_SIZE,
+        factors: List[int] = None) -> List[BenchmarkResult]:
+    ccr = create_gx_ccr_initial()
+    dwa = DeviceWatchdogAnswer(origin_host="pcrf.bromelia.org",
+                               origin_realm="bromelia.org")
+
+    results = list()
+    for factor in factors or OVERLOAD_FACTORS:
+        burst = [ccr] * (burst_size * factor)
+
+        results.append(run_queue_benchmark(f"DWA latency behind "\
+                                           f"{len(burst)} CCR (FIFO)",
+                                           queue.Queue,
+                                           burst,
+                                           dwa,
+                                           number))
+        results.append(run_queue_benchmark(f"DWA latency behind "\
+                                           f"{len(burst)} CCR (priority)",
+                                           PriorityMessageQueue,
+                                           burst,
+                                           dwa,
+                                           number))
+
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.sessions
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the session store benchmarks. Gx session states are
+    set and then looked up by Session-Id in a plain dict, which is the
+    baseline, in the sharded SessionStore, with and without lifetime, and
+    in the SharedMemorySessionStore, whose states are pickled.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import random
+from typing import List
+
+from ..sessions import SessionStore
+from ..sessions import SharedMemorySessionStore
+from ..sessions import shared_memory
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+
+
+NUMBER_OF_SESSIONS = 100000
+
+
+def run(number: int = 10000,
+        num_sessions: int = NUMBER_OF_SESSIONS) -> List[BenchmarkResult]:
+    session_ids = [f"pgw.bromelia.org;{index};1".encode("utf-8")
+                                            for index in range(num_sessions)]
+    state = {"cc_request_number": 0, "rule_names": ["rule1", "rule2"]}
+
+    stores = [
+                ("dict", dict(), None),
+                ("SessionStore", SessionStore(), None),
+                ("SessionStore with lifetime", SessionStore(), 3600),
+    ]
+
+    shared_store = None
+    if shared_memory is not None:
+        shared_store = SharedMemorySessionStore(max_size=num_sessions * 2)
+        stores.append(("SharedMemorySessionStore", shared_store, None))
+
+    results = list()
+    try:
+        for name, store, lifetime in stores:
+            if isinstance(store, dict):
+                set_session = store.__setitem__
+            elif lifetime is None:
+                set_session = store.set
+            else:
+                set_session = lambda key, value: store.set(key, value, lifetime)
+
+            for session_id in session_ids:
+                set_session(session_id, state)
+
+            def set_state():
+                set_session(random.choice(session_ids), state)
+
+            def get_state():
+                store.get(random.choice(session_ids))
+
+            results.append(run_latency_benchmark(f"{name} set "\
+                                                 f"({num_sessions} sessions)",
+                                                 set_state,
+                                                 number=number))
+            results.append(run_latency_benchmark(f"{name} get "\
+                                                 f"({num_sessions} sessions)",
+                                                 get_state,
+                                                 number=number))
+
+            if not isinstance(store, dict):
+                print(f"{name}: {store.get_stats().evictions} evictions")
+                store.clear()
+
+    finally:
+        if shared_store is not None:
+            shared_store.close()
+
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.benchmarks.tracing
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the stage timing benchmarks. A Gx CCR-I request is
+    taken through every stage of the processing pipeline with tracing
+    disabled, which is the cost paid by every message by default, and with
+    tracing enabled, sampling 1 in 100 messages and every message.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from typing import List
+
+from ..tracing import STAGES
+from ..tracing import Tracer
+from ..tracing import get_trace
+from ..tracing import set_trace
+from . import BenchmarkResult
+from . import print_results
+from . import run_latency_benchmark
+from .messages import create_gx_ccr_initial
+
+
+def run(number: int = 10000) -> List[BenchmarkResult]:
+    msg = create_gx_ccr_initial()
+
+    tracers = [
+                ("disabled", Tracer()),
+                ("sampling 1 in 100", Tracer(sample_rate=100)),
+                ("sampling every message", Tracer(sample_rate=1)),
+    ]
+
+    results = list()
+    for name, tracer in tracers:
+        if name != "disabled":
+            tracer.enable()
+
+        def trace_message():
+            msg.__dict__.pop("_trace", None)
+
+            if tracer.enabled:
+                trace = tracer.start_trace()
+                if trace is not None:
+                    set_trace(msg, trace)
+
+            for stage in STAGES:
+                trace = tracer.enabled and get_trace(msg)
+                if trace:
+                    tracer.stamp(trace, stage)
+
+            if trace:
+                tracer.finish(trace, msg)
+
+        results.append(run_latency_benchmark(f"{len(STAGES)} stages, {name}",
+                                             trace_message,
+                                             number=number))
+
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -28,11 +28,27 @@ from .avps import OriginRealmAVP
 from .avps import ResultCodeAVP
 from .avps import SessionIdAVP
 from .base import DiameterAnswer
+from .base import DiameterMessage
 from .base import DiameterRequest
+from .cache import AnswerCache
 from .config import *
 from .constants import *
+from .exceptions import AVPParsingError
 from .exceptions import BromeliaException
+from .metrics import MetricsServer
+from .metrics import get_metrics_registry
+from .redirect import RedirectCache
+from .redirect import create_redirected_request
+from .redirect import get_redirect_indication
+from .routing import get_routing_avps
+from .sessions import SessionStore
 from .setup import Diameter
+from .tracing import STAGE_DISPATCH
+from .tracing import STAGE_ROUTE
+from .tracing import STAGE_THREAD
+from .tracing import get_trace
+from .tracing import get_tracer
+from .tracing import set_trace
 from .utils import is_3xxx_failure
 from .utils import is_4xxx_failure
 from .utils import is_5xxx_failure
@@ -41,6 +57,8 @@ from .utils import is_5xxx_failure
 worker_logger = logging.getLogger("Worker")
 bromelia_logger = logging.getLogger("Bromelia")
 
+tracer = get_tracer()
+
 
 def get_application_string_by_id(application_id):
     applications = [ application for application in globals().items() if "DIAMETER_APPLICATION_" in application[0] ]
@@ -72,6 +90,11 @@ def decorate_answer(answer, request):
 
 
 def make_logging(msg):
+    #: The AVPs of lazily loaded messages are decoded to be logged, so it is
+    #: only done if the debug messages are logged.
+    if not worker_logger.isEnabledFor(logging.DEBUG):
+        return
+
     if msg.has_avp("user_name"):
         worker_logger.debug(f"Message from Diameter Layer Process: "\
                             f"{application_id_look_up(msg.header.application_id)[0]}, "\
@@ -145,6 +168,7 @@ class PendingAnswer:
 class Worker(multiprocessing.Process):
     associations = dict()
     recv_queues = list()
+    workers = list()
 
 
     def __init__(self, app, manager):
@@ -164,9 +188,11 @@ class Worker(multiprocessing.Process):
         self.recv_lock = manager.Lock()
 
         self.pending_answers = dict()
+        self.metrics_server = None
 
         self.update_associations()
         self.update_recv_queues()
+        self.update_workers()
 
         self.logger.debug(f"Initializing Worker for app {app}")
 
@@ -190,6 +216,22 @@ class Worker(multiprocessing.Process):
         Worker.recv_queues.append([self.recv_queue, self.recv_lock])
 
 
+    def update_workers(self):
+        Worker.workers.append(self)
+
+
+    def is_peer(self, host_name, application_id):
+        """Checks whether the association of the Worker is with a given peer
+        and supports a given Application-Id.
+        """
+        config = self.app.config
+        if config["PEER_NODE_HOSTNAME"] != host_name:
+            return False
+
+        return any(application["app_id"] == application_id
+                                for application in config["APPLICATIONS"])
+
+
     def send_message(self, message):
         self.app.send_message(message)
         self.send_event.clear()
@@ -284,8 +326,23 @@ class Worker(multiprocessing.Process):
                 self.logger.debug("Putting into recv_queue Queue", msg)
 
 
+    def start_metrics_server(self):
+        """Serves the metrics of the Worker process on the METRICS_PORT of
+        its Diameter object, if any. Associations only count their messages
+        in the MetricsRegistry of the process they live in.
+        """
+        port = self.app.config.get("METRICS_PORT")
+        if port is None:
+            return
+
+        self.metrics_server = MetricsServer(get_metrics_registry(), port=port)
+        self.metrics_server.start()
+
+
     #: it starts under worker.start() call
     def run(self):
+        self.start_metrics_server()
+
         with self.app.context():
             try:
                 while self.app.is_open():
@@ -348,12 +405,22 @@ class Bromelia:
         self.app_name = get_app_name(self.config_file)
         self.routes = {}
         self._routes = {}
-        self.sessions = {}
+
+        #: Session states by Session-Id. It may be replaced by a
+        #: SharedMemorySessionStore to be seen by every Worker process.
+        self.sessions = SessionStore()
         self.g = Global()
+
+        #: Answers sent, replayed to retransmitted requests.
+        self.answer_cache = AnswerCache()
+
+        #: Redirect indications received in answer to send_request() calls.
+        self.redirect_cache = RedirectCache()
         self.testing_answer = None
         
         self.recv_queues = None
         self.associations = None
+        self.workers = None
 
         self.request_threshold = threading.Barrier(parties=REQUEST_THRESHOLD)
         self.request_id = 0
@@ -417,6 +484,7 @@ class Bromelia:
 
             self.recv_queues = Worker.recv_queues
             self.associations = Worker.associations
+            self.workers = Worker.workers
 
             bromelia_logger.debug(f"Loading recv_queues: {self.recv_queues}")
             bromelia_logger.debug(f"Loading associations: {self.associations}")
@@ -442,6 +510,11 @@ class Bromelia:
                 recv_lock.acquire()
                 msg = recv_queue.get()
                 recv_lock.release()
+
+                trace = tracer.enabled and get_trace(msg)
+                if trace:
+                    tracer.stamp(trace, STAGE_DISPATCH)
+
                 return msg
 
 
@@ -449,6 +522,31 @@ class Bromelia:
         return self.associations[request.header.application_id]
 
 
+    def get_worker_by_peer(self, host_name, application_id):
+        """Returns the Worker whose association is with a given peer and
+        supports a given Application-Id, or None if there is no such one.
+        """
+        for worker in self.workers or []:
+            if worker.is_peer(host_name, application_id):
+                return worker
+        return None
+
+
+    def get_worker_by_pending_answer(self, answer):
+        """Returns the Worker waiting for a given answer. Requests are sent
+        through the Worker of their Application-Id, unless they have been
+        redirected to the peer of another Worker.
+        """
+        worker = self.get_worker_by_message(answer)
+        if worker.is_pending_answer(answer):
+            return worker
+
+        for other_worker in self.workers or []:
+            if other_worker.is_pending_answer(answer):
+                return other_worker
+        return worker
+
+
     def create_message_thread(self, msg):
         if msg.header.is_request():
             self.request_id += 1
@@ -505,7 +603,11 @@ class Bromelia:
         except threading.BrokenBarrierError:
             self.answer_threshold.reset()
 
-        worker = self.get_worker_by_message(msg)
+        trace = tracer.enabled and get_trace(msg)
+        if trace:
+            tracer.stamp(trace, STAGE_THREAD)
+
+        worker = self.get_worker_by_pending_answer(msg)
 
         logging_info = setup_logging_info(worker, msg)
         bromelia_logger.debug(f"{logging_info} Check if it is an expected "\
@@ -520,6 +622,10 @@ class Bromelia:
 
             worker.remove_pending_answer(p_answer)
 
+        if trace:
+            tracer.stamp(trace, STAGE_ROUTE)
+            tracer.finish(trace, msg)
+
 
     def create_error_answer(self, request):
         application_id = request.header.application_id
@@ -550,11 +656,33 @@ class Bromelia:
         except threading.BrokenBarrierError:
             self.request_threshold.reset()
 
+        trace = tracer.enabled and get_trace(request)
+        if trace:
+            tracer.stamp(trace, STAGE_THREAD)
+
         worker = self.get_worker_by_message(request)
         callback_function = self.get_request_callback(request)
 
         logging_info = setup_logging_info(worker, request)
 
+        #: Requests with the T flag set may have been processed already, in
+        #: which case the same answer is sent again and the route is not 
+        #: run, as in Section 6.1.9 of IETF RFC 6733.
+        if request.header.is_retransmitted():
+            cached_answer = self.answer_cache.get(request)
+            if cached_answer is not None:
+                bromelia_logger.debug(f"{logging_info} Duplicate request. "\
+                                      f"Sending cached answer")
+
+                cached_answer = DiameterMessage.load(cached_answer, 
+                                                     lazy=True)[0]
+                if trace:
+                    tracer.stamp(trace, STAGE_ROUTE)
+                    set_trace(cached_answer, trace)
+
+                self.send_message(cached_answer)
+                return
+
         try:
             answer = callback_function(request)
         except Exception as e:
@@ -562,6 +690,9 @@ class Bromelia:
             bromelia_logger.exception(f"{logging_info} Error has been "\
                                       f"raised in callback_function: {e.args}")
 
+        #: The answer carries the trace of the request up to its encoding.
+        if trace:
+            tracer.stamp(trace, STAGE_ROUTE)
 
         if not isinstance(answer, DiameterAnswer):
             bromelia_logger.exception(f"{logging_info} There is no answer "\
@@ -569,23 +700,31 @@ class Bromelia:
                                       f"UNABLE_TO_COMPLY")
 
             answer = self.create_error_answer(request)
+            if trace:
+                set_trace(answer, trace)
             self.send_message(answer)
 
             raise BromeliaException("Route function must return "\
                                     "DiameterAnswer object")
 
 
-        answer = decorate_answer(answer, request)
+        #: The answer is encoded only once. It is sent as a lazy copy, whose
+        #: dump() returns the byte stream cached without encoding it again.
+        answer = decorate_answer(answer, request).copy(from_stream=True)
+        if trace:
+            set_trace(answer, trace)
+        self.answer_cache.put(request, answer.dump())
         self.send_message(answer)
 
         bromelia_logger.debug(f"{logging_info} Sending answer")
 
 
-    def send_message(self, msg, recv_answer=True):
+    def send_message(self, msg, recv_answer=True, worker=None):
         if self.associations is None:
             return self.testing_answer
-            
-        worker = self.get_worker_by_message(msg)
+
+        if worker is None:
+            worker = self.get_worker_by_message(msg)
 
         logging_info = setup_logging_info(worker, msg)
         bromelia_logger.debug(f"{logging_info} Application needs to send a "\
@@ -621,6 +760,78 @@ class Bromelia:
             return p_answer.msg
 
 
+    def send_request(self, msg, max_redirects=REDIRECT_MAXIMUM_ATTEMPTS):
+        """Sends a Diameter Request and returns its Diameter Answer, as
+        send_message() does, by following the redirect indications of
+        Section 6.13 of IETF RFC 6733.
+
+        A request within the scope of a cached redirect is sent straight to
+        a Redirect-Host, with its Destination-Host set to it. An answer with
+        the DIAMETER_REDIRECT_INDICATION Result-Code is cached and the request
+        is sent again to a Redirect-Host not tried yet, up to `max_redirects`
+        times.
+
+        Redirected requests are sent through the Worker whose association is
+        with the Redirect-Host, Redirect-Hosts with such a Worker being
+        tried first. If there is none, they are sent through the Worker of
+        their Application-Id, with their Destination-Host only.
+        """
+        application_id = msg.header.application_id
+        routing = get_routing_avps(msg.dump())
+
+        worker = None
+        hosts = self.redirect_cache.get(routing, application_id)
+        if hosts:
+            host, worker = self.get_redirect_target(hosts, application_id)
+            msg = create_redirected_request(msg, host)
+
+        tried = set()
+        if msg.has_avp("destination_host_avp"):
+            tried.add(msg.destination_host_avp.data.decode("utf-8"))
+
+        answer = self.send_message(msg, worker=worker)
+
+        for _ in range(max_redirects):
+            if answer is None:
+                break
+
+            try:
+                indication = get_redirect_indication(answer.dump())
+            except AVPParsingError:
+                break
+
+            if indication is None:
+                break
+
+            self.redirect_cache.add(indication, routing, application_id)
+
+            hosts = [host for host in indication.hosts if host not in tried]
+            if not hosts:
+                break
+
+            host, worker = self.get_redirect_target(hosts, application_id)
+            bromelia_logger.debug(f"[{msg.header.hop_by_hop.hex()}] Diameter "\
+                                  f"Request redirected to {host}")
+
+            tried.add(host)
+            msg = create_redirected_request(msg, host)
+            answer = self.send_message(msg, worker=worker)
+
+        return answer
+
+
+    def get_redirect_target(self, hosts, application_id):
+        """Returns the first Redirect-Host with a Worker associated to it,
+        along with that Worker, or else the first Redirect-Host and None.
+        """
+        for host in hosts:
+            worker = self.get_worker_by_peer(host, application_id)
+            if worker is not None:
+                return host, worker
+
+        return hosts[0], None
+
+
     def load_messages_into_application_id(self, msgs, application_id):
         def decorated_message(msg):
             def proxy(**attrs):
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.cache
+    ~~~~~~~~~~~~~~
+
+    This module implements the duplicate request detection of Section 6.1.9
+    of IETF RFC 6733. Answers sent are cached as wire bytes by the Origin-Host
+    and End-to-End Identifier of their requests, so a retransmitted request,
+    as the ones with the T flag set after a peer failover, gets the very same
+    answer again instead of being processed twice.
+
+    Usage::
+
+        >>> from bromelia.cache import AnswerCache
+        >>> cache = AnswerCache(max_size=100000, ttl=240)
+        >>> answer = cache.get(request)
+        >>> if answer is None:
+        ...     answer = process(request)
+        ...     cache.put(request, answer)
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections import namedtuple
+from typing import Any, Callable
+
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .config import ANSWER_CACHE_MAXIMUM_SIZE
+from .config import ANSWER_CACHE_TTL
+from .constants import DIAMETER_HEADER_LENGTH
+from .constants import ORIGIN_HOST_AVP_CODE
+
+
+_origin_host_avp_codes = frozenset((int.from_bytes(ORIGIN_HOST_AVP_CODE,
+                                                    byteorder="big"),))
+
+#: Estimated bytes used by each entry besides the Origin-Host and the answer
+#: bytes: the OrderedDict slot and link, the key tuple and the entry tuple.
+_entry_overhead = sys.getsizeof(tuple()) * 2 + sys.getsizeof(0) * 2 + \
+                  sys.getsizeof(0.0) + sys.getsizeof(b"") * 2 + 100
+
+
+AnswerCacheStats = namedtuple("AnswerCacheStats", [
+                                        "size",
+                                        "memory_usage",
+                                        "hits",
+                                        "misses",
+                                        "expired",
+                                        "evictions",
+                                        "hit_rate"
+                                    ]
+)
+
+
+def get_duplicate_key(stream: Any) -> tuple:
+    """Returns the (Origin-Host, End-to-End Identifier) duplicate detection
+    key of a Diameter Request given as a byte stream or as a DiameterMessage
+    object. No DiameterAVP object is created for byte streams.
+    """
+    if isinstance(stream, DiameterMessage):
+        if stream.__dict__.get("_pending_stream") is None:
+            origin_host = stream.origin_host_avp.data \
+                            if stream.has_avp("origin_host_avp") else None
+            end_to_end = int.from_bytes(stream.header.end_to_end,
+                                        byteorder="big")
+            return origin_host, end_to_end
+
+        stream = stream.dump()
+
+    header = DiameterHeader.peek(stream)
+    end = min(header.length, len(stream))
+
+    #: Origin-Host is usually one of the first AVPs, so the scan is stopped
+    #: as soon as it is found.
+    for avp in DiameterAVP.scan(stream, DIAMETER_HEADER_LENGTH, end,
+                                _origin_host_avp_codes):
+        if avp.vendor_id is None:
+            return (bytes(stream[avp.offset:avp.offset + avp.data_length]),
+                    header.end_to_end)
+
+    return None, header.end_to_end
+
+
+class AnswerCache:
+    """Bounded cache of answers by (Origin-Host, End-to-End Identifier).
+
+    Entries expire `ttl` seconds after being put, and the least recently
+    used ones are evicted once there are `max_size` of them. It is safe to
+    be shared by threads.
+
+    :param max_size: the maximum number of cached answers.
+    :param ttl: the time, in seconds, an answer is kept. RFC 6733 requires
+        End-to-End Identifiers not to be reused for 4 minutes.
+    :param clock: a function returning the current time, in seconds.
+    """
+    def __init__(self,
+                 max_size: int = ANSWER_CACHE_MAXIMUM_SIZE,
+                 ttl: float = ANSWER_CACHE_TTL,
+                 clock: Callable = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.clear()
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries = OrderedDict()
+            self.num_bytes = 0
+
+            self.hits = 0
+            self.misses = 0
+            self.expired = 0
+            self.evictions = 0
+
+
+    def _pop(self, key: tuple) -> None:
+        _, answer = self.entries.pop(key)
+        self.num_bytes -= len(answer) + len(key[0] or b"")
+
+
+    def get(self, request: Any) -> bytes:
+        """Returns the cached answer wire bytes of a Diameter Request, with
+        the Hop-by-Hop Identifier of that request, or None if there is no
+        such answer.
+        """
+        if isinstance(request, DiameterMessage):
+            hop_by_hop = request.header.hop_by_hop
+        else:
+            hop_by_hop = bytes(request[12:16])
+
+        key = get_duplicate_key(request)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires, answer = entry
+            if expires <= self.clock():
+                self._pop(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        #: The Hop-by-Hop Identifier changes on each hop, so the one of the
+        #: retransmitted request is used.
+        return answer[:12] + hop_by_hop + answer[16:]
+
+
+    def put(self, request: Any, answer: Any) -> None:
+        """Caches the answer, given as a byte stream or as a DiameterMessage
+        object, to a Diameter Request.
+        """
+        if isinstance(answer, DiameterMessage):
+            answer = answer.dump()
+
+        key = get_duplicate_key(request)
+        expires = self.clock() + self.ttl
+
+        with self.lock:
+            if key in self.entries:
+                self._pop(key)
+
+            self.entries[key] = (expires, bytes(answer))
+            self.num_bytes += len(answer) + len(key[0] or b"")
+
+            while len(self.entries) > self.max_size:
+                self._pop(next(iter(self.entries)))
+                self.evictions += 1
+
+
+    def purge(self) -> int:
+        """Removes the expired entries and returns how many were removed."""
+        now = self.clock()
+        expired_keys = list()
+
+        with self.lock:
+            for key, (expires, _) in self.entries.items():
+                if expires <= now:
+                    expired_keys.append(key)
+
+            for key in expired_keys:
+                self._pop(key)
+            self.expired += len(expired_keys)
+
+        return len(expired_keys)
+
+
+    def get_memory_usage(self) -> int:
+        """Returns an estimate of the bytes used by the cached entries."""
+        return self.num_bytes + len(self.entries) * _entry_overhead
+
+
+    def get_stats(self) -> AnswerCacheStats:
+        lookups = self.hits + self.misses
+
+        return AnswerCacheStats(size=len(self.entries),
+                                memory_usage=self.get_memory_usage(),
+                                hits=self.hits,
+                                misses=self.misses,
+                                expired=self.expired,
+                                evictions=self.evictions,
+                                hit_rate=self.hits / lookups if lookups else 0.0)
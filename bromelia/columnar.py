@@ -0,0 +1,400 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.columnar
+    ~~~~~~~~~~~~~~~~~
+
+    This module implements the columnar export of Diameter Messages for
+    analytics. Batches of messages, either as byte streams, DiameterMessage
+    objects or TraceRecord objects from bromelia.pcap, are turned into one
+    column per field: the Diameter Header fields in numeric columns and the
+    selected AVPs, given as AVP paths, in typed columns.
+
+    Variable-length AVP Data is not copied into each row. It is kept in a
+    bytes pool shared by every column, and the rows hold its offset and
+    length only. With `share_values` set, equal values share the same
+    offset, so grouping by a string column can be done on its offsets, at
+    the cost of a dict holding every distinct value.
+
+    The columns are array.array objects, so no third-party module is needed
+    to build them. NumPy, if installed, turns them into a structured array,
+    on which result code histograms and request/answer matching are done
+    with vectorised operations.
+
+    Usage::
+
+        >>> from bromelia.columnar import ColumnarExporter
+        >>> from bromelia.pcap import TraceReader
+        >>> exporter = ColumnarExporter({"result_code": "Result-Code",
+        ...                              "origin_host": ("Origin-Host", "bytes")},
+        ...                             share_values=True)
+        >>> exporter.extend(TraceReader("trace.pcap"))
+        >>> table, pool = exporter.to_numpy()
+        >>> get_histogram(table, "result_code", table["result_code_present"])
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import struct
+from array import array
+from collections import namedtuple
+from importlib import import_module
+from typing import Any, Iterable
+
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .exceptions import AVPParsingError
+from .exceptions import DiameterAvpError
+from .exceptions import DiameterHeaderError
+from .query import AvpPath
+
+
+#: AVP column to be exported. The `path` field is an AVP path as accepted
+#: by bromelia.query, and the `type` field one of the COLUMN_TYPES keys.
+#: The first AVP found is exported, or `default` if there is none.
+ColumnSpec = namedtuple("ColumnSpec", [
+                                        "name",
+                                        "path",
+                                        "type",
+                                        "default"
+                                    ],
+                        defaults=("uint32", 0)
+)
+
+
+#: Struct format and array.array typecode of each numeric column type.
+COLUMN_TYPES = {
+        "int32": (">i", "i"),
+        "uint32": (">I", "I"),
+        "int64": (">q", "q"),
+        "uint64": (">Q", "Q"),
+        "float32": (">f", "f"),
+        "float64": (">d", "d"),
+}
+
+#: Type of the columns holding offsets into the bytes pool.
+BYTES_TYPE = "bytes"
+
+#: Diameter Header columns, which are always exported.
+HEADER_COLUMNS = [
+        ("timestamp", "d"),
+        ("length", "I"),
+        ("flags", "B"),
+        ("command_code", "I"),
+        ("application_id", "I"),
+        ("hop_by_hop", "I"),
+        ("end_to_end", "I"),
+]
+
+FLAG_REQUEST = 0x80
+FLAG_ERROR = 0x20
+
+#: NumPy dtype of each array.array typecode.
+_numpy_types = {
+        "b": "i1",
+        "B": "u1",
+        "i": "i4",
+        "I": "u4",
+        "q": "i8",
+        "Q": "u8",
+        "f": "f4",
+        "d": "f8",
+}
+
+
+def _import_numpy() -> Any:
+    try:
+        return import_module("numpy")
+    except ModuleNotFoundError as ex:
+        raise ModuleNotFoundError("Python 'numpy' module is required "\
+                                  "for NumPy export.") from ex
+
+
+def _get_column_spec(name: str, value: Any) -> ColumnSpec:
+    if isinstance(value, ColumnSpec):
+        return value
+
+    if isinstance(value, str):
+        return ColumnSpec(name, value)
+
+    return ColumnSpec(name, *value)
+
+
+class ColumnarExporter:
+    """Accumulates Diameter Messages into columns.
+
+    Every row has the Diameter Header columns, where `timestamp` is NaN
+    for messages with no timestamp, and a `flow` column, which is the index
+    of the message transport layer flow in the `flows` attribute, or -1 for
+    messages with no flow. A flow and its reverse flow are always given
+    the indexes 2n and 2n + 1. Then, for each AVP column:
+
+        - numeric columns are named after it, with a `<name>_present`
+          column set to 1 where the AVP has been found;
+        - bytes columns are made of a `<name>_offset` and a
+          `<name>_length` column, the latter set to -1 where the AVP has
+          not been found.
+
+    :param columns: the AVP columns to be exported, either as a list of
+        ColumnSpec objects or as a dict of AVP paths, or (path, type) or
+        (path, type, default) tuples, by column name.
+    :param share_values: whether equal AVP Data is kept only once in the
+        bytes pool. It is disabled by default, as it takes a dict entry per
+        distinct value.
+    """
+    def __init__(self,
+                 columns: Any = None,
+                 share_values: bool = False) -> None:
+        if isinstance(columns, dict):
+            columns = [_get_column_spec(name, value)
+                                        for name, value in columns.items()]
+
+        self.specs = list(columns or [])
+        self.share_values = share_values
+        self.paths = list()
+        self.formats = list()
+
+        for spec in self.specs:
+            if spec.type != BYTES_TYPE and spec.type not in COLUMN_TYPES:
+                raise DiameterAvpError(f"invalid column type '{spec.type}' "\
+                                       f"for column '{spec.name}'")
+
+            self.paths.append(AvpPath.compile(spec.path))
+            if spec.type == BYTES_TYPE:
+                self.formats.append(None)
+            else:
+                self.formats.append(struct.Struct(COLUMN_TYPES[spec.type][0]))
+
+        self.clear()
+
+
+    def __len__(self) -> int:
+        return len(self.columns["length"])
+
+
+    def get_column_types(self) -> list:
+        """Returns the (name, array.array typecode) of each column."""
+        column_types = list(HEADER_COLUMNS)
+        column_types.append(("flow", "i"))
+
+        for spec in self.specs:
+            if spec.type == BYTES_TYPE:
+                column_types.append((f"{spec.name}_offset", "q"))
+                column_types.append((f"{spec.name}_length", "q"))
+            else:
+                column_types.append((spec.name, COLUMN_TYPES[spec.type][1]))
+                column_types.append((f"{spec.name}_present", "B"))
+
+        return column_types
+
+
+    def clear(self) -> None:
+        self.columns = {name: array(typecode)
+                                for name, typecode in self.get_column_types()}
+        self.pool = bytearray()
+        self.pool_offsets = dict()
+
+        #: Transport layer flows, as pcap.Flow objects with no SCTP stream.
+        self.flows = list()
+        self.flow_indexes = dict()
+
+        #: Messages skipped for being malformed.
+        self.skipped = 0
+
+
+    def add_to_pool(self, data: bytes) -> int:
+        if not self.share_values:
+            offset = len(self.pool)
+            self.pool += data
+            return offset
+
+        offset = self.pool_offsets.get(data)
+        if offset is None:
+            offset = len(self.pool)
+            self.pool_offsets[data] = offset
+            self.pool += data
+
+        return offset
+
+
+    def get_flow_index(self, flow: Any) -> int:
+        if flow is None:
+            return -1
+
+        #: Answers may be sent on any SCTP stream of the association.
+        flow = flow._replace(stream=0)
+
+        index = self.flow_indexes.get(flow)
+        if index is None:
+            reverse_flow = flow._replace(src_ip_address=flow.dst_ip_address,
+                                         src_port=flow.dst_port,
+                                         dst_ip_address=flow.src_ip_address,
+                                         dst_port=flow.src_port)
+
+            index = len(self.flows)
+            self.flow_indexes[flow] = index
+            self.flows.append(flow)
+
+            if reverse_flow != flow:
+                self.flow_indexes[reverse_flow] = index + 1
+            self.flows.append(reverse_flow)
+
+        return index
+
+
+    def append(self,
+               stream: Any,
+               timestamp: float = None,
+               flow: Any = None) -> None:
+        """Appends a row for a Diameter Message given as a byte stream, a
+        DiameterMessage object or a TraceRecord object, along with its
+        pcap.Flow object, if any.
+        """
+        if isinstance(stream, DiameterMessage):
+            stream = stream.dump()
+
+        elif hasattr(stream, "data"):
+            if timestamp is None:
+                timestamp = stream.timestamp
+            if flow is None:
+                flow = stream.flow
+            stream = stream.data
+
+        try:
+            header = DiameterHeader.peek(stream)
+            values = [path.find(stream) for path in self.paths]
+        except (AVPParsingError, DiameterHeaderError):
+            self.skipped += 1
+            return
+
+        columns = self.columns
+        columns["timestamp"].append(timestamp if timestamp is not None
+                                              else float("nan"))
+        columns["length"].append(header.length)
+        columns["flags"].append(header.flags)
+        columns["command_code"].append(header.command_code)
+        columns["application_id"].append(header.application_id)
+        columns["hop_by_hop"].append(header.hop_by_hop)
+        columns["end_to_end"].append(header.end_to_end)
+        columns["flow"].append(self.get_flow_index(flow))
+
+        for spec, _format, value in zip(self.specs, self.formats, values):
+            if spec.type == BYTES_TYPE:
+                if value is None:
+                    columns[f"{spec.name}_offset"].append(0)
+                    columns[f"{spec.name}_length"].append(-1)
+                else:
+                    columns[f"{spec.name}_offset"].append(self.add_to_pool(value))
+                    columns[f"{spec.name}_length"].append(len(value))
+
+            elif value is None or len(value) != _format.size:
+                columns[spec.name].append(spec.default)
+                columns[f"{spec.name}_present"].append(0)
+
+            else:
+                columns[spec.name].append(_format.unpack(value)[0])
+                columns[f"{spec.name}_present"].append(1)
+
+
+    def extend(self, streams: Iterable) -> None:
+        for stream in streams:
+            self.append(stream)
+
+
+    def get_bytes(self, name: str, index: int) -> bytes:
+        """Returns the AVP Data of a bytes column at a given row, or None if
+        the AVP has not been found.
+        """
+        length = self.columns[f"{name}_length"][index]
+        if length < 0:
+            return None
+
+        offset = self.columns[f"{name}_offset"][index]
+        return bytes(self.pool[offset:offset + length])
+
+
+    def to_dict(self) -> dict:
+        """Returns the columns as array.array objects by name, along with
+        the bytes pool under the "pool" key.
+        """
+        columns = dict(self.columns)
+        columns["pool"] = bytes(self.pool)
+        return columns
+
+
+    def to_numpy(self) -> tuple:
+        """Returns a NumPy structured array with a field per column and the
+        bytes pool as a NumPy uint8 array.
+        """
+        np = _import_numpy()
+
+        column_types = self.get_column_types()
+        dtype = np.dtype([(name, _numpy_types[typecode])
+                                        for name, typecode in column_types])
+
+        table = np.empty(len(self), dtype=dtype)
+        for name, typecode in column_types:
+            table[name] = np.frombuffer(self.columns[name],
+                                        dtype=_numpy_types[typecode])
+
+        return table, np.frombuffer(bytes(self.pool), dtype=np.uint8)
+
+
+def get_histogram(table: Any, name: str, mask: Any = None) -> dict:
+    """Returns the number of rows by value of a column of a NumPy structured
+    array, such as "command_code" or a Result-Code column. Only the rows
+    selected by `mask` are counted, if given.
+    """
+    np = _import_numpy()
+
+    values = table[name] if mask is None else table[name][mask.astype(bool)]
+    keys, counts = np.unique(values, return_counts=True)
+
+    return dict(zip(keys.tolist(), counts.tolist()))
+
+
+def match_answers(table: Any) -> tuple:
+    """Matches answers to requests of a NumPy structured array by the
+    Hop-by-Hop and End-to-End Identifiers, an answer being looked up on the
+    reverse flow of its request. Returns the request row indexes, the
+    answer row indexes and the latencies, in seconds, as NumPy arrays.
+    Answers with no request are left out. For retransmitted requests, the
+    first one is matched.
+    """
+    np = _import_numpy()
+
+    is_request = (table["flags"] & FLAG_REQUEST) != 0
+
+    #: Flow indexes 2n and 2n + 1 are the reverse of each other.
+    flows = table["flow"].astype(np.int64)
+    flows = np.where(is_request | (flows < 0), flows, flows ^ 1)
+
+    #: Hop-by-Hop and End-to-End Identifiers are not unique across flows,
+    #: so each (flow, identifiers) pair is given its own key.
+    pairs = np.empty(len(table), dtype=[("flow", "i8"), ("ids", "u8")])
+    pairs["flow"] = flows
+    pairs["ids"] = (table["hop_by_hop"].astype(np.uint64) << np.uint64(32)) | \
+                    table["end_to_end"].astype(np.uint64)
+    _, keys = np.unique(pairs, return_inverse=True)
+    keys = keys.reshape(-1)
+
+    request_indexes = np.flatnonzero(is_request)
+    answer_indexes = np.flatnonzero(~is_request)
+
+    if len(request_indexes) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0)
+
+    order = np.argsort(keys[request_indexes], kind="stable")
+    sorted_indexes = request_indexes[order]
+    sorted_keys = keys[sorted_indexes]
+
+    positions = np.searchsorted(sorted_keys, keys[answer_indexes])
+    positions = np.minimum(positions, len(sorted_keys) - 1)
+    matched = sorted_keys[positions] == keys[answer_indexes]
+
+    requests = sorted_indexes[positions[matched]]
+    answers = answer_indexes[matched]
+    latencies = table["timestamp"][answers] - table["timestamp"][requests]
+
+    return requests, answers, latencies
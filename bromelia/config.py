@@ -49,6 +49,65 @@ SEND_THRESHOLD = 50 #40 #30
 #: Configs for transport.py module
 TRACKING_SOCKET_EVENTS_TIMEOUT = 1
 
+#: Configs for timers.py module
+TIMER_WHEEL_TICK = 0.01
+TIMER_WHEEL_SIZE = 256
+TIMER_WHEEL_LEVELS = 4
+
+WATCHDOG_MINIMUM_TIMEOUT = 6
+WATCHDOG_JITTER = 2
+TX_TIMER = 10
+DPA_TIMER = 10
+
+#: Configs for cache.py module
+ANSWER_CACHE_MAXIMUM_SIZE = 100000
+ANSWER_CACHE_TTL = 240
+
+#: Configs for scheduling.py module
+DRMP_DEFAULT_PRIORITY = 10
+
+#: Configs for routing.py module
+RELAY_REQUEST_TTL = 60
+
+#: Configs for redirect.py module
+REDIRECT_CACHE_MAXIMUM_SIZE = 10000
+REDIRECT_MAXIMUM_ATTEMPTS = 2
+
+#: Configs for sessions.py module
+SESSION_STORE_MAXIMUM_SIZE = 1000000
+SESSION_STORE_MAXIMUM_MEMORY = 512 * 1024 * 1024
+SESSION_STORE_SHARDS = 16
+SESSION_STORE_MAXIMUM_KEY_SIZE = 128
+SESSION_STORE_MAXIMUM_VALUE_SIZE = 1024
+SESSION_STORE_PROBES = 8
+
+#: Configs for metrics.py module
+METRICS_HTTP_HOST = "127.0.0.1"
+METRICS_HTTP_PORT = 9464
+METRICS_LATENCY_BUCKETS = (0.0001, 0.0002, 0.0005,
+                           0.001, 0.002, 0.005,
+                           0.01, 0.02, 0.05,
+                           0.1, 0.2, 0.5,
+                           1, 2, 5,
+                           10, 20, 30, 60)
+
+#: Configs for tracing.py module
+TRACING_SAMPLE_RATE = 100
+TRACING_STAGE_BUCKETS = (0.000001, 0.000002, 0.000005,
+                         0.00001, 0.00002, 0.00005,
+                         0.0001, 0.0002, 0.0005,
+                         0.001, 0.002, 0.005,
+                         0.01, 0.02, 0.05,
+                         0.1, 0.2, 0.5,
+                         1)
+
+#: Configs for recorder.py module
+FLIGHT_RECORDER_ENABLED = True
+FLIGHT_RECORDER_MAXIMUM_ENTRIES = 1024
+FLIGHT_RECORDER_MAXIMUM_BYTES = 1024 * 1024
+FLIGHT_RECORDER_DUMP_DIRECTORY = None
+FLIGHT_RECORDER_DUMP_INTERVAL = 60
+
 
 class Config(dict):
     def __init__(self, defaults=None):
@@ -24,6 +24,7 @@ from .ietf.rfc4072 import *
 from .ietf.rfc5447 import *
 from .ietf.rfc6733 import *
 from .ietf.rfc7155 import *
+from .ietf.rfc7944 import *
 from .ietf.rfc8506 import *
 
 from .app_ids import *
@@ -26,6 +26,14 @@ DIAMETER_AGENT_SERVER_MODE = "SERVER"
 #: Transport Types.
 DIAMETER_AGENT_TRANSPORT_TYPE_TCP = "TCP"
 DIAMETER_AGENT_TRANSPORT_TYPE_SCTP = "SCTP"
+DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK = "LOOPBACK"
+
+#: SCTP Payload Protocol Identifier of Diameter.
+DIAMETER_SCTP_PPID = 46
+
+#: SCTP outbound stream selection policies.
+DIAMETER_SCTP_STREAM_POLICY_SESSION_ID = "SESSION_ID"
+DIAMETER_SCTP_STREAM_POLICY_APPLICATION = "APPLICATION"
 
 #: Unknown Diameter message.
 DIAMETER_UNKNOWN_COMMAND_CODE = convert_to_3_bytes(0)
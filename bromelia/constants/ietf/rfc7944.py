@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.constants.ietf.rfc7944
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~    
+    
+    This module contains constants defined in IETF RFC 7944.
+    
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from ..._internal_utils import convert_to_4_bytes
+
+
+#: Diameter AVPs
+DRMP_AVP_CODE = convert_to_4_bytes(301)
+
+
+#: DRMP AVP values. PRIORITY_0 is the highest priority.
+DRMP_PRIORITY_0 = convert_to_4_bytes(0)
+DRMP_PRIORITY_1 = convert_to_4_bytes(1)
+DRMP_PRIORITY_2 = convert_to_4_bytes(2)
+DRMP_PRIORITY_3 = convert_to_4_bytes(3)
+DRMP_PRIORITY_4 = convert_to_4_bytes(4)
+DRMP_PRIORITY_5 = convert_to_4_bytes(5)
+DRMP_PRIORITY_6 = convert_to_4_bytes(6)
+DRMP_PRIORITY_7 = convert_to_4_bytes(7)
+DRMP_PRIORITY_8 = convert_to_4_bytes(8)
+DRMP_PRIORITY_9 = convert_to_4_bytes(9)
+DRMP_PRIORITY_10 = convert_to_4_bytes(10)
+DRMP_PRIORITY_11 = convert_to_4_bytes(11)
+DRMP_PRIORITY_12 = convert_to_4_bytes(12)
+DRMP_PRIORITY_13 = convert_to_4_bytes(13)
+DRMP_PRIORITY_14 = convert_to_4_bytes(14)
+DRMP_PRIORITY_15 = convert_to_4_bytes(15)
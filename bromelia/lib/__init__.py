@@ -8,4 +8,32 @@
 
     :copyright: (c) 2020-present Henrique Marques Ribeiro.
     :license: MIT, see LICENSE for more details.
-"""
\ No newline at end of file
+"""
+
+from importlib import import_module
+
+
+#: Application packages, which are only imported on first access, as in
+#: ``bromelia.lib.etsi_3gpp_gx.CCR``.
+_applications = (
+        "etsi_3gpp_gx",
+        "etsi_3gpp_gy",
+        "etsi_3gpp_rx",
+        "etsi_3gpp_s13",
+        "etsi_3gpp_s6a",
+        "etsi_3gpp_s6b",
+        "etsi_3gpp_swm",
+        "etsi_3gpp_swx",
+        "ietf_rfc6733",
+)
+
+
+def __getattr__(name):
+    if name in _applications:
+        return import_module(f".{name}", __name__)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_applications))
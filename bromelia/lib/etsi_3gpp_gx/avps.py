@@ -62,4 +62,6 @@ from ...avps.ietf.rfc7155 import FramedIpv6PrefixAVP
 
 from ...avps.ietf.rfc8506 import CcRequestNumberAVP
 from ...avps.ietf.rfc8506 import CcRequestTypeAVP
-from ...avps.ietf.rfc8506 import UserEquipmentInfoAVP
\ No newline at end of file
+from ...avps.ietf.rfc8506 import UserEquipmentInfoAVP
+
+from ...avps.ietf.rfc7944 import DrmpAVP
\ No newline at end of file
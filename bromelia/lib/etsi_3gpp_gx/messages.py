@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class CreditControlAnswer(DiameterAnswer):
         <Diameter Message: 272 [CCA] PXY, 16777238 [3GPP Gx], 7 AVP(s)>    
     """
 
+    command_code = CC_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -43,7 +45,7 @@ class CreditControlAnswer(DiameterAnswer):
                     "cc_request_number": CcRequestNumberAVP,
     }
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -90,11 +92,11 @@ class CreditControlAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_Gx,
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  result_code=DIAMETER_SUCCESS,
                  experimental_result=None,
                  cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
@@ -170,6 +172,9 @@ class CreditControlRequest(DiameterRequest):
         <Diameter Message: 272 [CCR] REQ|PXY, 16777238 [3GPP Gx], 7 AVP(s)>
     """
 
+    command_code = CC_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -180,7 +185,7 @@ class CreditControlRequest(DiameterRequest):
                     "cc_request_number": CcRequestNumberAVP,
     }
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     # "credit_management_status": CreditManagementStatusAVP,
                     "destination_host": DestinationHostAVP,
                     "origin_state_id": OriginStateIdAVP,
@@ -261,11 +266,11 @@ class CreditControlRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_Gx,
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  destination_realm=None,
                  cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
                  cc_request_number=0,
@@ -370,13 +375,16 @@ class ReAuthAnswer(DiameterAnswer):
         <Diameter Message: 258 [RAA] PXY, 16777238 [3GPP Gx], 4 AVP(s)>  
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     "origin_state_id": OriginStateIdAVP,
@@ -404,10 +412,10 @@ class ReAuthAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  result_code=DIAMETER_SUCCESS,
                  experimental_result=None,
                  origin_state_id=None,
@@ -459,6 +467,9 @@ class ReAuthRequest(DiameterRequest):
         <Diameter Message: 258 [RAR] REQ|PXY, 16777238 [3GPP Gx], 6 AVP(s)>
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -468,7 +479,7 @@ class ReAuthRequest(DiameterRequest):
                     "re_auth_request_type": ReAuthRequestTypeAVP,
     }
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     # "session_release_cause": SessionReleaseCauseAVP,
                     "origin_state_id": OriginStateIdAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -493,11 +504,11 @@ class ReAuthRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_Gx,
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  destination_realm=None,
                  destination_host=None,
                  re_auth_request_type=RE_AUTH_REQUEST_TYPE_AUTHORIZE_ONLY,
@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class CreditControlAnswer(DiameterAnswer):
         <Diameter Message: 272 [CCA] PXY, 4 [3GPP Gy], W AVP(s)>    
     """
 
+    command_code = CC_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gy
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "result_code": ResultCodeAVP,
@@ -61,10 +63,10 @@ class CreditControlAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  result_code=DIAMETER_SUCCESS,
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  auth_application_id=DIAMETER_APPLICATION_Gy,
                  cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
                  cc_request_number=0,
@@ -112,6 +114,9 @@ class CreditControlRequest(DiameterRequest):
         <Diameter Message: 272 [CCR] REQ|PXY, 16777238 [3GPP Gy], 7 AVP(s)>
     """
 
+    command_code = CC_MESSAGE
+    application_id = DIAMETER_APPLICATION_Gy
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -147,9 +152,9 @@ class CreditControlRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
-                 origin_host=platform.node(),
-                 origin_realm=socket.getfqdn(),
+                 session_id=DEFAULT_HOST_NAME,
+                 origin_host=DEFAULT_HOST_NAME,
+                 origin_realm=DEFAULT_REALM,
                  destination_realm=None,
                  auth_application_id=DIAMETER_APPLICATION_Gy,
                  service_context_id=None,
@@ -10,11 +10,11 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_IP_ADDRESS
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +34,9 @@ class AAAnswer(DiameterAnswer):
         <Diameter Message: 265 [AAA] PXY, 16777236 [3GPP Rx], 5 AVP(s)>   
     """
 
+    command_code = AA_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -41,7 +44,7 @@ class AAAnswer(DiameterAnswer):
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -75,11 +78,11 @@ class AAAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_Rx,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  result_code=DIAMETER_SUCCESS,
                  experimental_result=None,
                  auth_session_state=None,
@@ -137,6 +140,9 @@ class AARequest(DiameterRequest):
         <Diameter Message: 265 [AAR] REQ|PXY, 16777236 [3GPP Rx], 5 AVP(s)>
     """
 
+    command_code = AA_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -145,7 +151,7 @@ class AARequest(DiameterRequest):
                     "destination_realm": DestinationRealmAVP,
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     # "ip_domain_id": IpDomainIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -181,11 +187,11 @@ class AARequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_Rx,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_realm=None,
                  destination_host=None,
                  ip_domain_id=None,
@@ -243,13 +249,16 @@ class AbortSessionAnswer(DiameterAnswer):
         <Diameter Message: 274 [ASA] PXY, 16777236 [3GPP Rx], 4 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
     }
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
                     # "oc_olr": OcOlrAVP,
@@ -264,10 +273,10 @@ class AbortSessionAnswer(DiameterAnswer):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  result_code=DIAMETER_SUCCESS,
                  oc_supported_features=None,
                  oc_olr=None,
@@ -306,6 +315,9 @@ class AbortSessionRequest(DiameterRequest):
         <Diameter Message: 274 [ASR] REQ|PXY, 16777236 [3GPP Rx], 7 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = { 
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -316,7 +328,7 @@ class AbortSessionRequest(DiameterRequest):
                     "abort_cause": AbortCauseAVP,
     }
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
                     "origin_state_id": OriginStateIdAVP,
                     "proxy_info": ProxyInfoAVP,
@@ -324,11 +336,11 @@ class AbortSessionRequest(DiameterRequest):
     }
     
     def __init__(self,
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 drmp=None,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                destination_realm=socket.gethostbyname(platform.node()),
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                destination_realm=DEFAULT_IP_ADDRESS,
                 destination_host=None,
                 auth_application_id=DIAMETER_APPLICATION_Rx,
                 oc_supported_features=None,
@@ -360,13 +372,16 @@ class ReAuthAnswer(DiameterAnswer):
         <Diameter Message: 258 [RAA] PXY, 16777236 [3GPP Rx], 4 AVP(s)>   
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -385,10 +400,10 @@ class ReAuthAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  result_code=DIAMETER_SUCCESS,
                  experimental_result=None,
                  oc_supported_features=None,
@@ -432,6 +447,9 @@ class ReAuthRequest(DiameterRequest):
         <Diameter Message: 258 [RAR] REQ|PXY, 16777236 [3GPP Rx], 6 AVP(s)>
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -442,7 +460,7 @@ class ReAuthRequest(DiameterRequest):
                     "specific_action": SpecificActionAVP,
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
                     # "access_network_charging_identifier": AccessNetworkChargingIdentifierAVP,
                     "access_network_charging_address": AccessNetworkChargingAddressAVP,
@@ -471,10 +489,10 @@ class ReAuthRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_realm=None,
                  destination_host=None,
                  auth_application_id=DIAMETER_APPLICATION_Rx,
@@ -527,13 +545,16 @@ class SessionTerminationAnswer(DiameterAnswer):
         <Diameter Message: 275 [STA] PXY, 16777236 [3GPP Rx], 4 AVP(s)>
     """
 
+    command_code = SESSION_TERMINATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
     }
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "error_message": ErrorMessageAVP,
                     "error_reporting_host": ErrorReportingHostAVP,
@@ -561,10 +582,10 @@ class SessionTerminationAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 drmp=None,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 result_code=DIAMETER_SUCCESS, 
                 error_message=None,
                 error_reporting_host=None,
@@ -613,6 +634,9 @@ class SessionTerminationRequest(DiameterRequest):
         <Diameter Message: 275 [STR] REQ|PXY, 16777236 [3GPP Rx], 6 AVP(s)>
     """
 
+    command_code = SESSION_TERMINATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_Rx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -622,7 +646,7 @@ class SessionTerminationRequest(DiameterRequest):
                     "termination_cause": TerminationCauseAVP,
     }
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
                     # "required_access_info": RequiredAccessInfoAVP,
@@ -633,10 +657,10 @@ class SessionTerminationRequest(DiameterRequest):
     }
 
     def __init__(self,
-                session_id=platform.node(), 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                destination_realm=socket.gethostbyname(platform.node()),
+                session_id=DEFAULT_HOST_NAME, 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                destination_realm=DEFAULT_IP_ADDRESS,
                 auth_application_id=DIAMETER_APPLICATION_DEFAULT,
                 termination_cause=DIAMETER_LOGOUT,
                 user_name=None,
@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class MeIdentityCheckAnswer(DiameterAnswer):
         <Diameter Message: 324 [ECA] PXY, 16777252 [3GPP S13], 6 AVP(s)>    
     """
 
+    command_code = EC_MESSAGE
+    application_id = DIAMETER_APPLICATION_S13_S13
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -41,7 +43,7 @@ class MeIdentityCheckAnswer(DiameterAnswer):
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
@@ -52,14 +54,14 @@ class MeIdentityCheckAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S13_S13)],
                  result_code=DIAMETER_SUCCESS,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED, 
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  equipment_status=None,
                  avp=None,
                  failed_avp=None,
@@ -93,6 +95,9 @@ class MeIdentityCheckRequest(DiameterRequest):
         <Diameter Message: 324 [ECR] REQ|PXY, 16777252 [3GPP S13], 8 AVP(s)>
     """
 
+    command_code = EC_MESSAGE
+    application_id = DIAMETER_APPLICATION_S13_S13
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -102,7 +107,7 @@ class MeIdentityCheckRequest(DiameterRequest):
                     "terminal_information": TerminalInformationAVP,
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "destination_host": DestinationHostAVP,
                     "user_name": UserNameAVP, 
@@ -111,12 +116,12 @@ class MeIdentityCheckRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S13_S13)],
                  auth_session_state=NO_STATE_MAINTAINED, 
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  terminal_information=None,
@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class AuthenticationInformationAnswer(DiameterAnswer):
         <Diameter Message: 318 [AIA] PXY, 16777251 [3GPP S6a], 5 AVP(s)>
     """
 
+    command_code = AUTHENTICATION_INFORMATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -42,7 +44,7 @@ class AuthenticationInformationAnswer(DiameterAnswer):
     }
 
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
@@ -59,15 +61,15 @@ class AuthenticationInformationAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  result_code=None,
                  experimental_result=None,
                  error_diagnostic=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  oc_supported_features=None,
                  oc_olr=None,
                  load=None,
@@ -106,6 +108,9 @@ class AuthenticationInformationRequest(DiameterRequest):
         <Diameter Message: 318 [AIR] REQ|PXY, 16777251 [3GPP S6a], 8 AVP(s)>
     """    
 
+    command_code = AUTHENTICATION_INFORMATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -117,7 +122,7 @@ class AuthenticationInformationRequest(DiameterRequest):
     }
 
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "destination_host": DestinationHostAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -130,12 +135,12 @@ class AuthenticationInformationRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -171,6 +176,9 @@ class CancelLocationAnswer(DiameterAnswer):
         <Diameter Message: 317 [CLA] PXY, 16777251 [3GPP S6a], 5 AVP(s)>
     """
 
+    command_code = CANCEL_LOCATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -179,7 +187,7 @@ class CancelLocationAnswer(DiameterAnswer):
     }
 
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "supported_features": SupportedFeaturesAVP,
                     "result_code": ResultCodeAVP,
@@ -190,15 +198,15 @@ class CancelLocationAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  supported_features=None,
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  failed_avp=None,
                  proxy_info=None,
                  route_record=None,
@@ -231,6 +239,9 @@ class CancelLocationRequest(DiameterRequest):
         <Diameter Message: 317 [CLR] REQ|PXY, 16777251 [3GPP S6a], 9 AVP(s)>
     """    
 
+    command_code = CANCEL_LOCATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -243,7 +254,7 @@ class CancelLocationRequest(DiameterRequest):
     }
 
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "supported_features": SupportedFeaturesAVP,
                     "clr_flags": ClrFlagsAVP,
@@ -252,12 +263,12 @@ class CancelLocationRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -290,6 +301,9 @@ class NotifyAnswer(DiameterAnswer):
         <Diameter Message: 323 [NOA] PXY, 16777251 [3GPP S6a], 5 AVP(s)>
     """
 
+    command_code = NOTIFY_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -298,7 +312,7 @@ class NotifyAnswer(DiameterAnswer):
     }
 
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
@@ -312,14 +326,14 @@ class NotifyAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  oc_supported_features=None,
                  oc_olr=None,
                  load=None,
@@ -355,6 +369,9 @@ class NotifyRequest(DiameterRequest):
         <Diameter Message: 323 [NOR] REQ|PXY, 16777251 [3GPP S6a], 8 AVP(s)>
     """    
 
+    command_code = NOTIFY_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -366,7 +383,7 @@ class NotifyRequest(DiameterRequest):
 
     optionals = {
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
                     "supported_features": SupportedFeaturesAVP,
@@ -387,12 +404,12 @@ class NotifyRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  drmp=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -436,6 +453,9 @@ class PurgeUeAnswer(DiameterAnswer):
         <Diameter Message: 321 [PUA] PXY, 16777251 [3GPP S6a], 5 AVP(s)>
     """
 
+    command_code = PURGE_UE_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -444,7 +464,7 @@ class PurgeUeAnswer(DiameterAnswer):
     }
 
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
@@ -458,14 +478,14 @@ class PurgeUeAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  oc_supported_features=None,
                  oc_olr=None,
                  load=None,
@@ -501,6 +521,9 @@ class PurgeUeRequest(DiameterRequest):
         <Diameter Message: 321 [PUR] REQ|PXY, 16777251 [3GPP S6a], 8 AVP(s)>
     """    
 
+    command_code = PURGE_UE_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -511,7 +534,7 @@ class PurgeUeRequest(DiameterRequest):
     }
 
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "destination_host": DestinationHostAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -523,12 +546,12 @@ class PurgeUeRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -562,6 +585,9 @@ class UpdateLocationAnswer(DiameterAnswer):
         <Diameter Message: 316 [ULA] PXY, 16777251 [3GPP S6a], 5 AVP(s)>
     """
 
+    command_code = UPDATE_LOCATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -570,7 +596,7 @@ class UpdateLocationAnswer(DiameterAnswer):
     }
 
     optionals = { 
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
@@ -588,15 +614,15 @@ class UpdateLocationAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  result_code=None,
                  experimental_result=None,
                  error_diagnostic=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  oc_supported_features=None,
                  oc_olr=None,
                  load=None,
@@ -636,6 +662,9 @@ class UpdateLocationRequest(DiameterRequest):
         <Diameter Message: 316 [ULR] REQ|PXY, 16777251 [3GPP S6a], 10 AVP(s)>
     """    
 
+    command_code = UPDATE_LOCATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6a_S6d
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_session_state": AuthSessionStateAVP,
@@ -649,7 +678,7 @@ class UpdateLocationRequest(DiameterRequest):
     }
 
     optionals = {
-                    # "drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
                     "destination_host": DestinationHostAVP,
                     # "oc_supported_features": OcSupportedFeaturesAVP,
@@ -672,12 +701,12 @@ class UpdateLocationRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a_S6d)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -29,4 +29,6 @@ from ...avps.ietf.rfc6733 import RedirectHostAVP
 from ...avps.ietf.rfc6733 import ResultCodeAVP
 from ...avps.ietf.rfc6733 import SessionIdAVP
 from ...avps.ietf.rfc6733 import SessionTimeoutAVP
-from ...avps.ietf.rfc6733 import UserNameAVP
\ No newline at end of file
+from ...avps.ietf.rfc6733 import UserNameAVP
+
+from ...avps.ietf.rfc7944 import DrmpAVP
\ No newline at end of file
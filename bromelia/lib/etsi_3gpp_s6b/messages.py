@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -38,6 +37,9 @@ class AAAnswer(DiameterAnswer):
         <Diameter Message: 265 [AAA] PXY, 16777272 [3GPP S6b], 8 AVP(s)>        
     """
 
+    command_code = AA_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6b
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -48,7 +50,7 @@ class AAAnswer(DiameterAnswer):
                     "destination_realm": DestinationRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "mip6_feature_vector": Mip6FeatureVectorAVP, 
                     "session_timeout": SessionTimeoutAVP,
                     "apn_configuration": ApnConfigurationAVP,
@@ -62,13 +64,13 @@ class AAAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_S6b,
                  auth_request_type=AUTH_REQUEST_TYPE_AUTHORIZE_ONLY,
                  result_code=DIAMETER_SUCCESS,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  mip6_feature_vector=None,
                  session_timeout=None,
                  apn_configuration=None,
@@ -107,6 +109,9 @@ class AARequest(DiameterRequest):
         <Diameter Message: 265 [AAR] REQ|PXY, 16777272 [3GPP S6b], 7 AVP(s)>
     """    
 
+    command_code = AA_MESSAGE
+    application_id = DIAMETER_APPLICATION_S6b
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -116,7 +121,7 @@ class AARequest(DiameterRequest):
                     "auth_request_type": AuthRequestTypeAVP,
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "user_name": UserNameAVP,
                     "mip6_agent_info": Mip6AgentInfoAVP,
                     "mip6_feature_vector": Mip6FeatureVectorAVP, 
@@ -131,11 +136,11 @@ class AARequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  auth_application_id=DIAMETER_APPLICATION_S6b,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_realm=None,
                  auth_request_type=AUTH_REQUEST_TYPE_AUTHORIZE_ONLY,
                  user_name=None,
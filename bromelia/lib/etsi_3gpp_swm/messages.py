@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class AbortSessionAnswer(DiameterAnswer):
         <Diameter Message: 274 [ASA] PXY, 16777264 [3GPP SWm], 4 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWm
+
     mandatory = { 
                     "session_id": SessionIdAVP,
                     "result_code": ResultCodeAVP,
@@ -41,15 +43,15 @@ class AbortSessionAnswer(DiameterAnswer):
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAvp,
+                    "drmp": DrmpAVP,
     }
 
     def __init__(self,
-                session_id=platform.node(),
+                session_id=DEFAULT_HOST_NAME,
                 drmp=None,
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 **kwargs):
 
         DiameterAnswer.__init__(self, 
@@ -79,6 +81,9 @@ class AbortSessionRequest(DiameterRequest):
         <Diameter Message: 274 [ASR] REQ|PXY, 16777264 [3GPP SWm], 8 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWm
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -88,16 +93,16 @@ class AbortSessionRequest(DiameterRequest):
                     "auth_application_id": AuthApplicationIdAVP,
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "user_name": UserNameAVP,
                     "auth_session_state": AuthSessionStateAVP,
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_realm=None,
                  destination_host=None,
                  auth_application_id=DIAMETER_APPLICATION_SWm,
@@ -127,6 +132,9 @@ class DiameterEapAnswer(DiameterAnswer):
         <Diameter Message: 268 [DEA], PXY SWm, 9 AVP(s)>
     """
 
+    command_code = DIAMETER_EAP_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWm
+
     mandatory = { 
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -136,7 +144,7 @@ class DiameterEapAnswer(DiameterAnswer):
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAvp,
+                    "drmp": DrmpAVP,
                     "eap_payload": EapPayloadAVP,
                     "user_name": UserNameAVP,
                     "eap_master_session_key": EapMasterSessionKeyAVP,
@@ -160,13 +168,13 @@ class DiameterEapAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                session_id=platform.node(),
+                session_id=DEFAULT_HOST_NAME,
                 drmp=None,
                 auth_application_id=DIAMETER_APPLICATION_SWm,
                 auth_request_type=AUTH_REQUEST_TYPE_AUTHENTICATE_ONLY,
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 eap_payload=None, 
                 user_name=None, 
                 eap_master_session_key=None,
@@ -211,6 +219,9 @@ class DiameterEapRequest(DiameterRequest):
         <Diameter Message: 268 [DER], REQ, PXY SWm, 7 AVP(s)>
     """    
 
+    command_code = DIAMETER_EAP_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWm
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "auth_application_id": AuthApplicationIdAVP,
@@ -221,7 +232,7 @@ class DiameterEapRequest(DiameterRequest):
                     "eap_payload": EapPayloadAVP
     }
     optionals = {
-                    #"drmp": DrmpAvp,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     "user_name": UserNameAVP,
                     "rat_type": RatTypeAVP,
@@ -238,11 +249,11 @@ class DiameterEapRequest(DiameterRequest):
     }
 
     def __init__(self,
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 drmp=None,
                 auth_application_id=DIAMETER_APPLICATION_SWm,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 destination_realm=None,
                 destination_host=None,
                 auth_request_type=AUTH_REQUEST_TYPE_AUTHENTICATE_ONLY,
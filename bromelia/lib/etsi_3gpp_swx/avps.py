@@ -40,4 +40,6 @@ from ...avps.ietf.rfc6733 import ResultCodeAVP
 from ...avps.ietf.rfc6733 import SessionIdAVP
 from ...avps.ietf.rfc6733 import UserNameAVP
 from ...avps.ietf.rfc6733 import VendorIdAVP
-from ...avps.ietf.rfc6733 import VendorSpecificApplicationIdAVP
\ No newline at end of file
+from ...avps.ietf.rfc6733 import VendorSpecificApplicationIdAVP
+
+from ...avps.ietf.rfc7944 import DrmpAVP
\ No newline at end of file
@@ -10,11 +10,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from .avps import *
 
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 
@@ -34,6 +33,9 @@ class MultimediaAuthAnswer(DiameterAnswer):
         <Diameter Message: 303 [MAA], PXY SWx, 9 AVP(s)>
     """
 
+    command_code = MULTIMEDIA_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -43,7 +45,7 @@ class MultimediaAuthAnswer(DiameterAnswer):
                     "user_name": UserNameAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     "sip_number_auth_items": SipNumberAuthItemsAVP,
@@ -56,14 +58,14 @@ class MultimediaAuthAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  user_name=None,
                  sip_number_auth_items=None,
                  sip_auth_data_item=None,
@@ -96,6 +98,9 @@ class MultimediaAuthRequest(DiameterRequest):
         <Diameter Message: 303 [MAR], REQ, PXY SWx, 10 AVP(s)>
     """    
 
+    command_code = MULTIMEDIA_AUTH_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -108,7 +113,7 @@ class MultimediaAuthRequest(DiameterRequest):
                     "sip_number_auth_items": SipNumberAuthItemsAVP
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     "rat_type": RatTypeAVP,
                     #"anid": AnidAVP,
@@ -120,12 +125,12 @@ class MultimediaAuthRequest(DiameterRequest):
     }
 
     def __init__(self,
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_realm=None,
                  destination_host=None,
                  user_name=None,
@@ -165,6 +170,9 @@ class RegistrationTerminationAnswer(DiameterAnswer):
         <Diameter Message: 304 [RTA], PXY, 16777265 [3GPP SWx], 6 AVP(s)>
     """
 
+    command_code = REGISTRATION_TERMINATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -173,21 +181,21 @@ class RegistrationTerminationAnswer(DiameterAnswer):
                     "origin_realm": OriginRealmAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     "supported_features": SupportedFeaturesAVP,
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  supported_features=None,
                  **kwargs):
 
@@ -218,6 +226,9 @@ class RegistrationTerminationRequest(DiameterRequest):
         <Diameter Message: 304 [RTR] REQ|PXY, 16777265 [3GPP SWx], 9 AVP(s)>
     """    
 
+    command_code = REGISTRATION_TERMINATION_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -230,17 +241,17 @@ class RegistrationTerminationRequest(DiameterRequest):
                     "deregistration_reason": DeregistrationReasonAVP
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "supported_features": SupportedFeaturesAVP,
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  user_name=None,
@@ -273,6 +284,9 @@ class ServerAssignmentAnswer(DiameterAnswer):
         <Diameter Message: 301 [SAA], PXY SWx, 8 AVP(s)>
     """
 
+    command_code = SERVER_ASSIGNMENT_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -282,7 +296,7 @@ class ServerAssignmentAnswer(DiameterAnswer):
                     "user_name": UserNameAVP,
     }
     optionals = { 
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "result_code": ResultCodeAVP,
                     "experimental_result": ExperimentalResultAVP,
                     "non3gpp_user_data": Non3gppUserDataAVP,
@@ -294,14 +308,14 @@ class ServerAssignmentAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                 session_id=platform.node(),
+                 session_id=DEFAULT_HOST_NAME,
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  result_code=None,
                  experimental_result=None,
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  user_name=None,
                  non3gpp_user_data=None,
                  x3gpp_aaa_server_name=None,
@@ -338,6 +352,9 @@ class ServerAssignmentRequest(DiameterRequest):
         <Diameter Message: 301 [SAR], REQ, PXY SWx, 9 AVP(s)>
     """    
 
+    command_code = SERVER_ASSIGNMENT_MESSAGE
+    application_id = DIAMETER_APPLICATION_SWx
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "vendor_specific_application_id": VendorSpecificApplicationIdAVP,
@@ -349,7 +366,7 @@ class ServerAssignmentRequest(DiameterRequest):
                     "server_assignment_type": ServerAssignmentTypeAVP
     }
     optionals = {
-                    #"drmp": DrmpAVP,
+                    "drmp": DrmpAVP,
                     "destination_host": DestinationHostAVP,
                     "service_selection": ServiceSelectionAVP,
                     "context_identifier": ContextIdentifierAVP,
@@ -363,12 +380,12 @@ class ServerAssignmentRequest(DiameterRequest):
     }
 
     def __init__(self, 
-                 session_id=platform.node(), 
+                 session_id=DEFAULT_HOST_NAME, 
                  drmp=None,
                  vendor_specific_application_id=[VendorIdAVP(VENDOR_ID_3GPP), AuthApplicationIdAVP(DIAMETER_APPLICATION_SWx)],
                  auth_session_state=NO_STATE_MAINTAINED,
-                 origin_host=platform.node(), 
-                 origin_realm=socket.getfqdn(), 
+                 origin_host=DEFAULT_HOST_NAME, 
+                 origin_realm=DEFAULT_REALM, 
                  destination_host=None,
                  destination_realm=None,
                  service_selection=None,
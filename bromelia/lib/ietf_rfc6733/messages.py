@@ -9,10 +9,10 @@
     :license: MIT, see LICENSE for more details.
 """
 
-import platform
-import socket
-
 from ...avps import *
+from ..._internal_utils import DEFAULT_HOST_NAME
+from ..._internal_utils import DEFAULT_IP_ADDRESS
+from ..._internal_utils import DEFAULT_REALM
 from ...base import DiameterRequest, DiameterAnswer
 from ...constants import *
 from ...exceptions import DiameterMessageError
@@ -35,6 +35,9 @@ class AbortSessionAnswer(DiameterAnswer):
         <Diameter Message: 274 [ASA] PXY 3GPP Rx, 4 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = None
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "result_code": ResultCodeAVP,
@@ -54,10 +57,10 @@ class AbortSessionAnswer(DiameterAnswer):
     }
 
     def __init__(self, 
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 user_name=None,
                 origin_state_id=None,
                 error_message=None,
@@ -97,6 +100,9 @@ class AbortSessionRequest(DiameterRequest):
         <Diameter Message: 274 [ASR] REQ, PXY 3GPP Rx, 6 AVP(s)>
     """
 
+    command_code = ABORT_SESSION_MESSAGE
+    application_id = None
+
     mandatory = { 
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -113,10 +119,10 @@ class AbortSessionRequest(DiameterRequest):
     }
     
     def __init__(self,
-                session_id=platform.node(), 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                destination_realm=socket.gethostbyname(platform.node()),
+                session_id=DEFAULT_HOST_NAME, 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                destination_realm=DEFAULT_IP_ADDRESS,
                 destination_host=None,
                 auth_application_id=None,
                 user_name=None,
@@ -152,6 +158,9 @@ class CapabilitiesExchangeAnswer(DiameterAnswer):
         <Diameter Message: 257 [CEA], Default, 6 AVP(s)>
     """
 
+    command_code = CAPABILITIES_EXCHANGE_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = {
                     "result_code": ResultCodeAVP,
                     "origin_host": OriginHostAVP,
@@ -174,9 +183,9 @@ class CapabilitiesExchangeAnswer(DiameterAnswer):
 
     def __init__(self, 
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                host_ip_address=socket.gethostbyname(platform.node()),
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                host_ip_address=DEFAULT_IP_ADDRESS,
                 vendor_id=0,
                 product_name=PRODUCT_NAME,
                 origin_state_id=None,
@@ -212,6 +221,9 @@ class CapabilitiesExchangeRequest(DiameterRequest):
         <Diameter Message: 257 [CER], REQ Default, 6 AVP(s)>
     """
 
+    command_code = CAPABILITIES_EXCHANGE_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = { 
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
@@ -230,9 +242,9 @@ class CapabilitiesExchangeRequest(DiameterRequest):
     }
     
     def __init__(self, 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                host_ip_address=socket.gethostbyname(platform.node()),
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                host_ip_address=DEFAULT_IP_ADDRESS,
                 vendor_id=VENDOR_ID_DEFAULT,
                 product_name=PRODUCT_NAME,
                 origin_state_id=None,
@@ -266,6 +278,9 @@ class DeviceWatchdogAnswer(DiameterAnswer):
         <Diameter Message: 280 [DWA], Default, 3 AVP(s)>
     """
 
+    command_code = DEVICE_WATCHDOG_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = {
                     "result_code": ResultCodeAVP,
                     "origin_host": OriginHostAVP,
@@ -279,8 +294,8 @@ class DeviceWatchdogAnswer(DiameterAnswer):
 
     def __init__(self,
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(),
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM,
                 error_message=None,
                 failed_avp=None,
                 origin_state_id=None,
@@ -308,6 +323,9 @@ class DeviceWatchdogRequest(DiameterRequest):
         <Diameter Message: 280 [DWR], REQ Default, 2 AVP(s)>
     """
 
+    command_code = DEVICE_WATCHDOG_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = {
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
@@ -317,8 +335,8 @@ class DeviceWatchdogRequest(DiameterRequest):
     }
     
     def __init__(self,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 origin_state_id=None,
                 **kwargs):
 
@@ -343,6 +361,9 @@ class DisconnectPeerAnswer(DiameterAnswer):
         >>> dpa
         <Diameter Message: 282 [DPA], Default, 3 AVP(s)>
     """
+    command_code = DISCONNECT_PEER_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = {
                     "result_code": ResultCodeAVP,
                     "origin_host": OriginHostAVP,
@@ -355,8 +376,8 @@ class DisconnectPeerAnswer(DiameterAnswer):
 
     def __init__(self,
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 error_message=None,
                 failed_avp=None,
                 **kwargs):
@@ -383,6 +404,9 @@ class DisconnectPeerRequest(DiameterRequest):
         <Diameter Message: 282 [DPR], REQ Default, 3 AVP(s)>
     """
 
+    command_code = DISCONNECT_PEER_MESSAGE
+    application_id = DIAMETER_APPLICATION_DEFAULT
+
     mandatory = {
                     "origin_host": OriginHostAVP,
                     "origin_realm": OriginRealmAVP,
@@ -391,8 +415,8 @@ class DisconnectPeerRequest(DiameterRequest):
     optionals = {}
 
     def __init__(self,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 disconnect_cause=DISCONNECT_CAUSE_REBOOTING,
                 **kwargs):
 
@@ -420,6 +444,9 @@ class ReAuthAnswer(DiameterAnswer):
         <Diameter Message: 258 [RAA] PXY 3GPP Rx, 4 AVP(s)>
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = None
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "result_code": ResultCodeAVP,
@@ -439,10 +466,10 @@ class ReAuthAnswer(DiameterAnswer):
     }
 
     def __init__(self, 
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 result_code=DIAMETER_SUCCESS,
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 user_name=None,
                 origin_state_id=None,
                 error_message=None,
@@ -484,6 +511,9 @@ class ReAuthRequest(DiameterRequest):
         <Diameter Message: 258 [RAR] REQ, PXY 3GPP Gx, 7 AVP(s)>
     """
 
+    command_code = RE_AUTH_MESSAGE
+    application_id = None
+
     mandatory = { 
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -501,10 +531,10 @@ class ReAuthRequest(DiameterRequest):
     }
     
     def __init__(self,
-                session_id=platform.node(), 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                destination_realm=socket.gethostbyname(platform.node()),
+                session_id=DEFAULT_HOST_NAME, 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                destination_realm=DEFAULT_IP_ADDRESS,
                 destination_host=None,
                 auth_application_id=None,
                 re_auth_request_type=None,
@@ -541,6 +571,9 @@ class SessionTerminationAnswer(DiameterAnswer):
         <Diameter Message: 275 [STA], Default, 4 AVP(s)>
     """
 
+    command_code = SESSION_TERMINATION_MESSAGE
+    application_id = None
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "result_code": ResultCodeAVP,
@@ -561,10 +594,10 @@ class SessionTerminationAnswer(DiameterAnswer):
     }
 
     def __init__(self,
-                session_id=platform.node(), 
+                session_id=DEFAULT_HOST_NAME, 
                 result_code=DIAMETER_SUCCESS, 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
                 user_name=None,
                 _class=None,
                 error_message=None,
@@ -599,6 +632,9 @@ class SessionTerminationRequest(DiameterRequest):
         <Diameter Message: 275 [STR], REQ Default, 6 AVP(s)>
     """
 
+    command_code = SESSION_TERMINATION_MESSAGE
+    application_id = None
+
     mandatory = {
                     "session_id": SessionIdAVP,
                     "origin_host": OriginHostAVP,
@@ -617,10 +653,10 @@ class SessionTerminationRequest(DiameterRequest):
     }
 
     def __init__(self,
-                session_id=platform.node(), 
-                origin_host=platform.node(), 
-                origin_realm=socket.getfqdn(), 
-                destination_realm=socket.gethostbyname(platform.node()),
+                session_id=DEFAULT_HOST_NAME, 
+                origin_host=DEFAULT_HOST_NAME, 
+                origin_realm=DEFAULT_REALM, 
+                destination_realm=DEFAULT_IP_ADDRESS,
                 auth_application_id=DIAMETER_APPLICATION_DEFAULT,
                 termination_cause=DIAMETER_LOGOUT,
                 user_name=None,
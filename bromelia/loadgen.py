@@ -0,0 +1,982 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.loadgen
+    ~~~~~~~~~~~~~~~~
+
+    This module implements a Diameter load generator for Credit-Control
+    applications (Gx and Gy). Each session goes through a CCR-I, a given
+    number of CCR-U and a CCR-T, built from the message classes in
+    bromelia.lib and encoded once as templates, so every request sent is a
+    copy of a byte stream with its identifiers patched in place.
+
+    Requests are not sent through the Diameter class: each connection has a
+    sender thread, which paces the requests at the target TPS, and a
+    receiver thread, which matches the answers by Hop-by-Hop Identifier. No
+    thread ever blocks waiting for a given answer.
+
+    In open-loop mode requests are sent at the target TPS no matter how
+    fast the peer answers, which is how real traffic arrives. In closed-loop
+    mode each session waits for the answer of its previous request, so the
+    number of sessions caps the requests in flight.
+
+    Usage::
+
+        $ python -m bromelia.loadgen --application gx --tps 2000 \\
+        ...                          --sessions 1000 --duration 60 \\
+        ...                          --peer-ip-address 10.0.0.2 \\
+        ...                          --peer-host-name pcrf.bromelia.org
+
+        $ python -m bromelia.loadgen --stand-in --tps 500 --duration 10
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import collections
+import logging
+import math
+import multiprocessing
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Any, List
+
+from ._internal_utils import Connection
+from ._internal_utils import LocalNode
+from ._internal_utils import PeerNode
+from .avps import MultipleServicesCreditControlAVP
+from .avps import RatingGroupAVP
+from .avps import ServiceIdentifierAVP
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .constants import *
+from .exceptions import DiameterAssociationError
+from .proxy import DiameterBaseProxy
+from .transport import connect_loopback
+
+loadgen_logger = logging.getLogger("LoadGenerator")
+
+
+#: Session-Id AVP is built as "<Origin-Host>;<session number>;..." where the
+#: session number is zero-padded to a fixed width, so it can be patched in
+#: place in the template byte stream.
+SESSION_NUMBER_DIGITS = 12
+
+#: Sessions of different workers and connections never share a number.
+SESSION_NUMBERS_PER_CONNECTION = 10 ** 8
+
+#: Requests due at the same time are sent in a single write, up to this
+#: number of requests.
+MAX_BATCH_SIZE = 64
+
+LOADGEN_TICKER = 0.05
+
+_ids_struct = struct.Struct(">2L")
+_unsigned32_struct = struct.Struct(">L")
+
+_session_id_code = int.from_bytes(SESSION_ID_AVP_CODE, byteorder="big")
+_cc_request_number_code = int.from_bytes(CC_REQUEST_NUMBER_AVP_CODE,
+                                         byteorder="big")
+_result_code_code = int.from_bytes(RESULT_CODE_AVP_CODE, byteorder="big")
+_diameter_success = int.from_bytes(DIAMETER_SUCCESS, byteorder="big")
+_device_watchdog_code = int.from_bytes(DEVICE_WATCHDOG_MESSAGE, byteorder="big")
+_disconnect_peer_code = int.from_bytes(DISCONNECT_PEER_MESSAGE, byteorder="big")
+
+
+def _create_gx_ccr(cc_request_type: bytes, **kwargs) -> DiameterMessage:
+    from .lib.etsi_3gpp_gx.messages import CreditControlRequest
+
+    return CreditControlRequest(cc_request_type=cc_request_type, **kwargs)
+
+
+def _create_gy_ccr(cc_request_type: bytes, **kwargs) -> DiameterMessage:
+    from .lib.etsi_3gpp_gy.messages import CreditControlRequest
+
+    msg = CreditControlRequest(cc_request_type=cc_request_type, **kwargs)
+    if cc_request_type != CC_REQUEST_TYPE_TERMINATION_REQUEST:
+        msg.append(MultipleServicesCreditControlAVP([
+                                                    RatingGroupAVP(1),
+                                                    ServiceIdentifierAVP(1)
+        ]))
+
+    return msg
+
+
+#: Application name: (Vendor-Id, Application-Id, CCR factory).
+APPLICATIONS = {
+                "gx": (VENDOR_ID_3GPP, DIAMETER_APPLICATION_Gx, _create_gx_ccr),
+                "gy": (VENDOR_ID_DEFAULT, DIAMETER_APPLICATION_Gy, _create_gy_ccr),
+}
+
+
+class RequestTemplate:
+    """Wire template of a Credit-Control-Request. The Hop-by-Hop and
+    End-to-End Identifiers, the session number within the Session-Id AVP
+    and the CC-Request-Number AVP are patched in place by render().
+
+    :param message: the DiameterMessage object to be used as template. Its
+        Session-Id AVP must start with "<Origin-Host>;" followed by
+        SESSION_NUMBER_DIGITS digits.
+    """
+    def __init__(self, message: DiameterMessage) -> None:
+        self.stream = message.dump()
+        self.session_number_offset = None
+        self.cc_request_number_offset = None
+
+        prefix = message.origin_host_avp.data + b";"
+        for avp in DiameterAVP.scan(self.stream, DIAMETER_HEADER_LENGTH):
+            if avp.code == _session_id_code:
+                data = self.stream[avp.offset:avp.offset + avp.data_length]
+                if not data.startswith(prefix):
+                    raise DiameterAssociationError("Session-Id AVP does not "\
+                                                   "start with Origin-Host")
+                self.session_number_offset = avp.offset + len(prefix)
+
+            elif avp.code == _cc_request_number_code:
+                self.cc_request_number_offset = avp.offset
+
+        if self.session_number_offset is None:
+            raise DiameterAssociationError("template does not have "\
+                                           "Session-Id AVP")
+
+
+    def render(self,
+               hop_by_hop: int,
+               end_to_end: int,
+               session_number: int,
+               cc_request_number: int) -> bytes:
+        stream = bytearray(self.stream)
+        _ids_struct.pack_into(stream, 12, hop_by_hop, end_to_end)
+
+        offset = self.session_number_offset
+        stream[offset:offset + SESSION_NUMBER_DIGITS] = \
+                b"%0*d" % (SESSION_NUMBER_DIGITS, session_number)
+
+        if self.cc_request_number_offset is not None:
+            _unsigned32_struct.pack_into(stream,
+                                         self.cc_request_number_offset,
+                                         cc_request_number)
+
+        return bytes(stream)
+
+
+def create_templates(application: str,
+                     origin_host: str,
+                     origin_realm: str,
+                     destination_realm: str,
+                     destination_host: str = None) -> List[RequestTemplate]:
+    """Returns the CCR-I, CCR-U and CCR-T templates of an application.
+    """
+    _, _, create_ccr = APPLICATIONS[application]
+    session_id = f"{origin_host};{'0' * SESSION_NUMBER_DIGITS}"
+
+    templates = list()
+    for cc_request_type in (CC_REQUEST_TYPE_INITIAL_REQUEST,
+                            CC_REQUEST_TYPE_UPDATE_REQUEST,
+                            CC_REQUEST_TYPE_TERMINATION_REQUEST):
+        ccr = create_ccr(cc_request_type,
+                         session_id=session_id,
+                         origin_host=origin_host,
+                         origin_realm=origin_realm,
+                         destination_realm=destination_realm,
+                         destination_host=destination_host,
+                         cc_request_number=0)
+
+        templates.append(RequestTemplate(ccr))
+
+    return templates
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram. Each power of two of microseconds is
+    split into SUB_BUCKETS buckets, so percentiles are accurate to about 9%
+    with a small and mergeable set of counters.
+    """
+
+    SUB_BUCKETS = 8
+
+    def __init__(self) -> None:
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def record(self, latency: float) -> None:
+        microseconds = latency * 1e6
+        if microseconds < 1:
+            index = 0
+        else:
+            index = int(math.log2(microseconds) * self.SUB_BUCKETS)
+
+        self.counts[index] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+
+    def get_upper_bound(self, index: int) -> float:
+        return 2 ** ((index + 1) / self.SUB_BUCKETS) / 1e6
+
+
+    def get_percentile(self, percentile: float) -> float:
+        """Returns the upper bound, in seconds, of the bucket holding the
+        given percentile, or 0 if the histogram is empty.
+        """
+        if self.count == 0:
+            return 0.0
+
+        rank = max(math.ceil(percentile / 100 * self.count), 1)
+        cumulative = 0
+        for index in sorted(self.counts):
+            cumulative += self.counts[index]
+            if cumulative >= rank:
+                return min(self.get_upper_bound(index), self.max)
+
+        return self.max
+
+
+    def get_mean(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count
+
+
+    def get_rows(self) -> List[tuple]:
+        """Returns (upper bound in seconds, count) rows, one for each power
+        of two of microseconds holding any latency.
+        """
+        rows = collections.Counter()
+        for index, count in self.counts.items():
+            rows[index // self.SUB_BUCKETS] += count
+
+        return [(2 ** (row + 1) / 1e6, rows[row]) for row in sorted(rows)]
+
+
+class LoadStats:
+    """Counters of a worker, taken and reset by snapshot() at each report
+    interval.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    def reset(self) -> None:
+        self.sent = 0
+        self.answered = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.histogram = LatencyHistogram()
+
+
+    def add_sent(self, num_of_requests: int) -> None:
+        with self._lock:
+            self.sent += num_of_requests
+
+
+    def add_answer(self, latency: float, is_success: bool) -> None:
+        with self._lock:
+            self.answered += 1
+            if not is_success:
+                self.errors += 1
+            self.histogram.record(latency)
+
+
+    def add_timeouts(self, num_of_requests: int) -> None:
+        with self._lock:
+            self.timeouts += num_of_requests
+
+
+    def snapshot(self, outstanding: int = 0) -> dict:
+        with self._lock:
+            snapshot = {
+                            "sent": self.sent,
+                            "answered": self.answered,
+                            "errors": self.errors,
+                            "timeouts": self.timeouts,
+                            "outstanding": outstanding,
+                            "histogram": self.histogram,
+            }
+            self.reset()
+
+        return snapshot
+
+
+class Session:
+    __slots__ = ("number", "request_index", "cc_request_number")
+
+    def __init__(self, number: int) -> None:
+        self.number = number
+        self.request_index = 0
+        self.cc_request_number = 0
+
+
+class LoadConnection:
+    """Single Diameter connection of the load generator. It goes through the
+    Capabilities-Exchange, then sends the requests of its sessions at the
+    target TPS until stop() is called, answering DWR and DPR along the way.
+
+    :param index: the connection index, unique among every worker.
+    :param options: the LoadGenerator options.
+    :param stats: the LoadStats object to be updated.
+    """
+    def __init__(self, index: int, options: dict, stats: LoadStats) -> None:
+        self.index = index
+        self.options = options
+        self.stats = stats
+        self.sock = None
+
+        self.templates = create_templates(options["application"],
+                                          options["host_name"],
+                                          options["realm"],
+                                          options["peer_realm"],
+                                          options["peer_host_name"])
+
+        vendor_id, application_id, _ = APPLICATIONS[options["application"]]
+        connection = Connection(name=f"loadgen-{index}",
+                                mode=DIAMETER_AGENT_CLIENT_MODE,
+                                transport_type=options["transport_type"],
+                                local_node=LocalNode(options["host_name"],
+                                                     options["realm"],
+                                                     options["ip_address"],
+                                                     None),
+                                peer_node=PeerNode(options["peer_host_name"],
+                                                   options["peer_realm"],
+                                                   options["peer_ip_address"],
+                                                   options["peer_port"]),
+                                application_ids=[{
+                                                    "vendor_id": vendor_id,
+                                                    "app_id": application_id
+                                }],
+                                watchdog_timeout=30)
+        self.base = DiameterBaseProxy(connection).get_default_messages()
+
+        #: Pending requests by Hop-by-Hop Identifier: (sent at, Session).
+        self.pending = dict()
+        self._pending_lock = threading.Lock()
+
+        #: Sessions ready to send their next request.
+        self.sessions = collections.deque()
+        self._sessions_ready = threading.Condition()
+        self._next_session_number = index * SESSION_NUMBERS_PER_CONNECTION
+        for _ in range(options["sessions"]):
+            self.sessions.append(self.create_session())
+
+        self._hop_by_hop = index << 24
+        self._send_lock = threading.Lock()
+        self._stop_threads = threading.Event()
+        self._disconnected = threading.Event()
+        self._closing = threading.Event()
+        self._threads = list()
+
+
+    def create_session(self) -> Session:
+        self._next_session_number += 1
+        return Session(self._next_session_number)
+
+
+    def connect(self) -> None:
+        if self.options["transport_type"] == DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK:
+            self.sock = connect_loopback(self.options["peer_ip_address"],
+                                         self.options["peer_port"])
+        else:
+            self.sock = socket.create_connection((self.options["peer_ip_address"],
+                                                  self.options["peer_port"]))
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        self.sock.settimeout(self.options["timeout"])
+        self.sock.sendall(self.base.get_template("cer").render())
+
+        stream = b""
+        while len(stream) < DIAMETER_HEADER_LENGTH or \
+                            len(stream) < DiameterHeader.peek(stream).length:
+            data = self.sock.recv(4096)
+            if not data:
+                raise DiameterAssociationError("connection closed by peer "\
+                                               "during Capabilities-Exchange")
+            stream += data
+
+        result_code = DiameterMessage.find_avp(stream, _result_code_code)
+        if result_code is None or \
+                int.from_bytes(result_code, byteorder="big") != _diameter_success:
+            raise DiameterAssociationError("Capabilities-Exchange failed")
+
+        self.sock.settimeout(LOADGEN_TICKER)
+
+
+    def start(self) -> None:
+        self.connect()
+
+        for name, target in (("loadgen_send", self._send_requests),
+                             ("loadgen_recv", self._recv_answers)):
+            thrd = threading.Thread(name=f"{name}_{self.index}",
+                                    target=target,
+                                    daemon=True)
+            thrd.start()
+            self._threads.append(thrd)
+
+
+    def stop_sending(self) -> None:
+        self._stop_threads.set()
+        with self._sessions_ready:
+            self._sessions_ready.notify_all()
+
+
+    def stop(self) -> None:
+        self.stop_sending()
+
+        deadline = time.monotonic() + self.options["timeout"]
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(LOADGEN_TICKER)
+
+        if not self._disconnected.is_set():
+            self.send(self.base.get_template("dpr").render())
+        self._disconnected.wait(timeout=max(deadline - time.monotonic(),
+                                            LOADGEN_TICKER))
+        self._closing.set()
+
+        for thrd in self._threads:
+            thrd.join()
+
+        self.stats.add_timeouts(len(self.pending))
+        self.pending.clear()
+
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+    def send(self, stream: bytes) -> None:
+        with self._send_lock:
+            try:
+                self.sock.sendall(stream)
+            except OSError:
+                loadgen_logger.exception(f"[{self.index}] Cannot send")
+
+
+    def get_sessions(self, num_of_sessions: int) -> List[Session]:
+        with self._sessions_ready:
+            if not self.sessions:
+                self._sessions_ready.wait(timeout=LOADGEN_TICKER)
+
+            sessions = list()
+            while self.sessions and len(sessions) < num_of_sessions:
+                sessions.append(self.sessions.popleft())
+
+        return sessions
+
+
+    def release_session(self, session: Session) -> None:
+        if session.request_index > self.options["updates"] + 1:
+            session = self.create_session()
+
+        with self._sessions_ready:
+            self.sessions.append(session)
+            self._sessions_ready.notify()
+
+
+    def create_request(self, session: Session) -> bytes:
+        if session.request_index == 0:
+            template = self.templates[0]
+        elif session.request_index <= self.options["updates"]:
+            template = self.templates[1]
+        else:
+            template = self.templates[2]
+
+        self._hop_by_hop = (self._hop_by_hop + 1) & 0xffffffff
+        stream = template.render(self._hop_by_hop,
+                                 self._hop_by_hop,
+                                 session.number,
+                                 session.cc_request_number)
+
+        session.request_index += 1
+        session.cc_request_number += 1
+
+        return stream
+
+
+    def _send_requests(self) -> None:
+        is_open_loop = (self.options["mode"] == "open")
+        tps = self.options["tps"] / (self.options["processes"] *
+                                     self.options["connections"])
+        interval = 1 / tps if tps > 0 else 0
+        next_due = time.monotonic()
+
+        while not self._stop_threads.is_set():
+            now = time.monotonic()
+            if interval:
+                if now < next_due:
+                    time.sleep(min(next_due - now, LOADGEN_TICKER))
+                    continue
+
+                #: Do not burst to catch up after a long stall.
+                if now - next_due > 1:
+                    next_due = now
+
+                num_of_requests = min(int((now - next_due) / interval) + 1,
+                                      MAX_BATCH_SIZE)
+            else:
+                num_of_requests = MAX_BATCH_SIZE
+
+            sessions = self.get_sessions(num_of_requests)
+            if not sessions:
+                continue
+
+            chunks = list()
+            with self._pending_lock:
+                for session in sessions:
+                    stream = self.create_request(session)
+                    self.pending[self._hop_by_hop] = (now, session)
+                    chunks.append(stream)
+
+            if is_open_loop:
+                for session in sessions:
+                    self.release_session(session)
+
+            self.send(b"".join(chunks))
+            self.stats.add_sent(len(chunks))
+            next_due += len(chunks) * interval
+
+
+    def handle_answer(self, stream: bytes, received_at: float) -> None:
+        header = DiameterHeader.peek(stream)
+
+        if header.is_request():
+            if header.command_code == _device_watchdog_code:
+                self.send(self.base.get_template("dwa").render(
+                                                hop_by_hop=stream[12:16],
+                                                end_to_end=stream[16:20]))
+
+            elif header.command_code == _disconnect_peer_code:
+                self.send(self.base.get_template("dpa").render(
+                                                hop_by_hop=stream[12:16],
+                                                end_to_end=stream[16:20]))
+                self.stop_sending()
+                self._disconnected.set()
+            return
+
+        if header.command_code == _disconnect_peer_code:
+            self._disconnected.set()
+            return
+
+        with self._pending_lock:
+            pending = self.pending.pop(header.hop_by_hop, None)
+
+        if pending is None:
+            return
+
+        sent_at, session = pending
+        result_code = DiameterMessage.find_avp(stream, _result_code_code)
+        is_success = (result_code is not None and
+                      int.from_bytes(result_code, byteorder="big") == _diameter_success)
+
+        self.stats.add_answer(received_at - sent_at, is_success)
+
+        if self.options["mode"] == "closed":
+            self.release_session(session)
+
+
+    def expire_pending(self, now: float) -> None:
+        expired = list()
+        with self._pending_lock:
+            for hop_by_hop, (sent_at, session) in self.pending.items():
+                if now - sent_at > self.options["timeout"]:
+                    expired.append((hop_by_hop, session))
+
+            for hop_by_hop, _ in expired:
+                del self.pending[hop_by_hop]
+
+        if not expired:
+            return
+
+        self.stats.add_timeouts(len(expired))
+        if self.options["mode"] == "closed":
+            for _, session in expired:
+                self.release_session(session)
+
+
+    def _recv_answers(self) -> None:
+        buffer = b""
+        last_expiry = time.monotonic()
+
+        while not self._closing.is_set():
+            now = time.monotonic()
+            if now - last_expiry > 1:
+                self.expire_pending(now)
+                last_expiry = now
+
+            try:
+                data = self.sock.recv(4096*64)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            if not data:
+                return
+
+            received_at = time.monotonic()
+            buffer += data
+            offset = 0
+            while len(buffer) - offset >= DIAMETER_HEADER_LENGTH:
+                length = DiameterHeader.peek(buffer, offset).length
+                if length < DIAMETER_HEADER_LENGTH:
+                    loadgen_logger.warning(f"[{self.index}] Invalid message "\
+                                           f"length, dropping the connection")
+                    self.stop_sending()
+                    self._disconnected.set()
+                    return
+
+                if len(buffer) - offset < length:
+                    break
+
+                self.handle_answer(buffer[offset:offset + length], received_at)
+                offset += length
+
+            buffer = buffer[offset:]
+
+
+def run_worker(index: int,
+               options: dict,
+               reports: Any,
+               stop_event: Any) -> None:
+    """Runs the connections of a worker, putting a (worker index, snapshot,
+    is final) report into `reports` at every interval and once it is done.
+    """
+    stats = LoadStats()
+    connections = [LoadConnection(index * options["connections"] + _index,
+                                  options,
+                                  stats)
+                                for _index in range(options["connections"])]
+
+    try:
+        for connection in connections:
+            connection.start()
+
+        deadline = time.monotonic() + options["duration"]
+        while not stop_event.is_set() and time.monotonic() < deadline:
+            stop_event.wait(timeout=min(options["interval"],
+                                        max(deadline - time.monotonic(), 0)))
+
+            outstanding = sum([len(connection.pending)
+                                            for connection in connections])
+            reports.put((index, stats.snapshot(outstanding), False))
+
+    except (OSError, DiameterAssociationError) as e:
+        loadgen_logger.error(f"[worker {index}] {e}")
+
+    finally:
+        for connection in connections:
+            connection.stop_sending()
+
+        for connection in connections:
+            if connection.sock is not None:
+                connection.stop()
+
+        reports.put((index, stats.snapshot(), True))
+
+
+class LoadGenerator:
+    """Diameter Credit-Control load generator.
+
+    :param application: either "gx" or "gy".
+    :param mode: either "open" or "closed" loop.
+    :param tps: the target requests per second, over every connection. In
+        closed-loop mode it may be 0 to send as fast as answers arrive.
+    :param sessions: the number of concurrent sessions per connection.
+    :param updates: the number of CCR-U per session, between CCR-I and CCR-T.
+    :param connections: the number of connections per process.
+    :param processes: the number of processes.
+    :param duration: the test duration, in seconds.
+    :param interval: the report interval, in seconds.
+    :param timeout: the time, in seconds, after which a request with no
+        answer is counted as timed out.
+    """
+    def __init__(self,
+                 application: str = "gx",
+                 mode: str = "open",
+                 tps: float = 100,
+                 sessions: int = 100,
+                 updates: int = 1,
+                 connections: int = 1,
+                 processes: int = 1,
+                 duration: float = 10,
+                 interval: float = 1,
+                 timeout: float = 5,
+                 host_name: str = "loadgen.bromelia.org",
+                 realm: str = "bromelia.org",
+                 ip_address: str = "127.0.0.1",
+                 peer_host_name: str = None,
+                 peer_realm: str = "bromelia.org",
+                 peer_ip_address: str = "127.0.0.1",
+                 peer_port: int = 3868,
+                 transport_type: str = DIAMETER_AGENT_TRANSPORT_TYPE_TCP,
+                 output: Any = sys.stdout) -> None:
+
+        if application not in APPLICATIONS:
+            raise DiameterAssociationError(f"invalid application "\
+                                           f"'{application}'. It MUST be "\
+                                           f"either 'gx' or 'gy'")
+
+        if mode not in ("open", "closed"):
+            raise DiameterAssociationError(f"invalid mode '{mode}'. It MUST "\
+                                           f"be either 'open' or 'closed'")
+
+        if tps <= 0 and mode == "open":
+            raise DiameterAssociationError("open-loop mode needs a target TPS")
+
+        if processes > 1 and \
+                    transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK:
+            raise DiameterAssociationError("loopback transport cannot be "\
+                                           "used by multiple processes")
+
+        self.options = {
+                            "application": application,
+                            "mode": mode,
+                            "tps": tps,
+                            "sessions": sessions,
+                            "updates": updates,
+                            "connections": connections,
+                            "processes": processes,
+                            "duration": duration,
+                            "interval": interval,
+                            "timeout": timeout,
+                            "host_name": host_name,
+                            "realm": realm,
+                            "ip_address": ip_address,
+                            "peer_host_name": peer_host_name,
+                            "peer_realm": peer_realm,
+                            "peer_ip_address": peer_ip_address,
+                            "peer_port": peer_port,
+                            "transport_type": transport_type,
+        }
+        self.output = output
+
+        self.total = LoadStats().snapshot()
+        self.total["histogram"] = LatencyHistogram()
+
+
+    def print(self, line: str = "") -> None:
+        if self.output is not None:
+            print(line, file=self.output, flush=True)
+
+
+    def print_report(self, elapsed: float, report: dict) -> None:
+        interval = self.options["interval"]
+        histogram = report["histogram"]
+
+        self.print(f"{elapsed:>7.1f}s  "\
+                   f"sent {report['sent'] / interval:>8.0f}/s  "\
+                   f"answered {report['answered'] / interval:>8.0f}/s  "\
+                   f"p50 {histogram.get_percentile(50) * 1e3:>7.2f}ms  "\
+                   f"p99 {histogram.get_percentile(99) * 1e3:>7.2f}ms  "\
+                   f"errors {report['errors']:>5}  "\
+                   f"timeouts {report['timeouts']:>5}  "\
+                   f"outstanding {report['outstanding']:>5}")
+
+
+    def print_summary(self, elapsed: float) -> None:
+        total = self.total
+        histogram = total["histogram"]
+
+        self.print()
+        self.print(f"duration {elapsed:.1f}s, sent {total['sent']}, "\
+                   f"answered {total['answered']}, errors {total['errors']}, "\
+                   f"timeouts {total['timeouts']}")
+        self.print(f"throughput {total['answered'] / max(elapsed, 1e-9):.0f} "\
+                   f"answers/s")
+
+        self.print(f"latency mean {histogram.get_mean() * 1e3:.2f}ms, "\
+                   f"p50 {histogram.get_percentile(50) * 1e3:.2f}ms, "\
+                   f"p90 {histogram.get_percentile(90) * 1e3:.2f}ms, "\
+                   f"p99 {histogram.get_percentile(99) * 1e3:.2f}ms, "\
+                   f"p99.9 {histogram.get_percentile(99.9) * 1e3:.2f}ms, "\
+                   f"max {histogram.max * 1e3:.2f}ms")
+
+        rows = histogram.get_rows()
+        if not rows:
+            return
+
+        self.print()
+        largest = max([count for _, count in rows])
+        for upper_bound, count in rows:
+            bar = "#" * max(int(40 * count / largest), 1)
+            self.print(f"  <= {upper_bound * 1e3:>10.3f}ms  {count:>10}  "\
+                       f"{100 * count / histogram.count:>6.2f}%  {bar}")
+
+
+    def merge(self, report: dict) -> None:
+        for key in ("sent", "answered", "errors", "timeouts"):
+            self.total[key] += report[key]
+        self.total["histogram"].merge(report["histogram"])
+
+
+    def run(self) -> dict:
+        """Runs the load test and returns the total counters along with the
+        latency histogram.
+        """
+        num_of_processes = self.options["processes"]
+
+        if num_of_processes == 1:
+            reports = queue.Queue()
+            stop_event = threading.Event()
+            workers = [threading.Thread(name="loadgen_worker",
+                                        target=run_worker,
+                                        args=(0, self.options, reports,
+                                              stop_event),
+                                        daemon=True)]
+        else:
+            reports = multiprocessing.Queue()
+            stop_event = multiprocessing.Event()
+            workers = [multiprocessing.Process(name=f"loadgen_worker_{index}",
+                                               target=run_worker,
+                                               args=(index, self.options,
+                                                     reports, stop_event),
+                                               daemon=True)
+                                            for index in range(num_of_processes)]
+
+        start = time.monotonic()
+        for worker in workers:
+            worker.start()
+
+        running = set(range(num_of_processes))
+        interval_reports = dict()
+        try:
+            while running:
+                index, report, is_final = reports.get()
+                self.merge(report)
+                if is_final:
+                    running.discard(index)
+                    continue
+
+                interval_reports[index] = report
+
+                #: Print a line once every running worker reported.
+                if running.issubset(interval_reports):
+                    self.print_report(time.monotonic() - start,
+                                      self._merge_reports(interval_reports))
+                    interval_reports = dict()
+
+        except KeyboardInterrupt:
+            stop_event.set()
+            while running:
+                index, report, is_final = reports.get()
+                self.merge(report)
+                if is_final:
+                    running.discard(index)
+
+        for worker in workers:
+            worker.join()
+
+        self.print_summary(time.monotonic() - start)
+        return self.total
+
+
+    @staticmethod
+    def _merge_reports(reports: dict) -> dict:
+        merged = LoadStats().snapshot()
+        for report in reports.values():
+            for key in ("sent", "answered", "errors", "timeouts", "outstanding"):
+                merged[key] += report[key]
+            merged["histogram"].merge(report["histogram"])
+
+        return merged
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bromelia.loadgen",
+                                     description="Diameter Credit-Control "\
+                                                 "load generator.")
+
+    parser.add_argument("-a", "--application", choices=sorted(APPLICATIONS),
+                        default="gx")
+    parser.add_argument("-m", "--mode", choices=["open", "closed"],
+                        default="open",
+                        help="open loop sends at the target TPS regardless "\
+                             "of answers, closed loop waits for the answer "\
+                             "of each session (default: open)")
+    parser.add_argument("-t", "--tps", type=float, default=100,
+                        help="target requests per second (default: 100)")
+    parser.add_argument("-s", "--sessions", type=int, default=100,
+                        help="concurrent sessions per connection "\
+                             "(default: 100)")
+    parser.add_argument("-u", "--updates", type=int, default=1,
+                        help="CCR-U per session (default: 1)")
+    parser.add_argument("-c", "--connections", type=int, default=1,
+                        help="connections per process (default: 1)")
+    parser.add_argument("-p", "--processes", type=int, default=1,
+                        help="processes (default: 1)")
+    parser.add_argument("-d", "--duration", type=float, default=10,
+                        help="seconds (default: 10)")
+    parser.add_argument("-i", "--interval", type=float, default=1,
+                        help="report interval in seconds (default: 1)")
+    parser.add_argument("--timeout", type=float, default=5,
+                        help="answer timeout in seconds (default: 5)")
+    parser.add_argument("--host-name", default="loadgen.bromelia.org")
+    parser.add_argument("--realm", default="bromelia.org")
+    parser.add_argument("--ip-address", default="127.0.0.1")
+    parser.add_argument("--peer-host-name", default=None)
+    parser.add_argument("--peer-realm", default="bromelia.org")
+    parser.add_argument("--peer-ip-address", default="127.0.0.1")
+    parser.add_argument("--peer-port", type=int, default=3868)
+    parser.add_argument("--transport-type",
+                        choices=[DIAMETER_AGENT_TRANSPORT_TYPE_TCP,
+                                 DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK],
+                        default=DIAMETER_AGENT_TRANSPORT_TYPE_TCP)
+    parser.add_argument("--stand-in", action="store_true",
+                        help="answer with an in-process stand-in PCRF/OCS "\
+                             "over the loopback transport")
+
+    return parser
+
+
+def main(argv: list = None) -> int:
+    args = vars(get_parser().parse_args(argv))
+
+    stand_in = None
+    if args.pop("stand_in"):
+        from .testing import create_ocs
+        from .testing import create_pcrf
+
+        create_peer = create_pcrf if args["application"] == "gx" else create_ocs
+        stand_in = create_peer(ip_address=args["peer_ip_address"],
+                               port=args["peer_port"])
+        args["transport_type"] = DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK
+        args["peer_host_name"] = stand_in.connection.local_node.host_name
+        stand_in.start()
+
+    try:
+        LoadGenerator(**args).run()
+
+    except DiameterAssociationError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    finally:
+        if stand_in is not None:
+            stand_in.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
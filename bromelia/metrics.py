@@ -0,0 +1,545 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.metrics
+    ~~~~~~~~~~~~~~~~
+
+    This module implements the metrics of the Diameter associations of a
+    process, exported in the Prometheus text format:
+
+    - messages sent and received, by peer, Application-Id, Command Code,
+      direction and Result-Code class;
+    - request to answer latency histograms, by peer, Application-Id and
+      Command Code, measured from the pending requests of each association;
+    - queue depths and counters of each association;
+    - durations of the stages of the messages traced by the Tracer of
+      bromelia.tracing.
+
+    Each thread accumulates its own counters and histograms with no lock,
+    and they are only merged when the metrics are collected, so messages
+    cost a dict update each.
+
+    The MetricsRegistry is one per process, so the MetricsServer must run
+    in the process of the Diameter associations. The ones of a Bromelia
+    application live in its Worker processes, which serve them on the
+    `metrics_port` of their config spec, one port each:
+
+        spec:
+          - mode: client
+            ...
+            metrics_port: 9464
+
+    A Diameter object run in the current process is served by starting a
+    MetricsServer there.
+
+    Usage::
+
+        >>> from bromelia import Diameter
+        >>> from bromelia.metrics import MetricsServer
+        >>> from bromelia.metrics import get_metrics_registry
+        >>> app = Diameter(config=config)
+        >>> with app.context(), MetricsServer(get_metrics_registry(),
+        ...                                   port=9464):
+        ...     ...
+
+        $ curl http://127.0.0.1:9464/metrics
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import bisect
+import http.server
+import logging
+import os
+import struct
+import threading
+import weakref
+from collections import namedtuple
+from typing import Any, Type
+
+from .base import DiameterAVP
+from .base import DiameterMessage
+from .config import METRICS_HTTP_HOST
+from .config import METRICS_HTTP_PORT
+from .config import METRICS_LATENCY_BUCKETS
+from .config import TRACING_STAGE_BUCKETS
+from .constants import DIAMETER_HEADER_LENGTH
+from .constants import EXPERIMENTAL_RESULT_AVP_CODE
+from .constants import EXPERIMENTAL_RESULT_CODE_AVP_CODE
+from .constants import RESULT_CODE_AVP_CODE
+
+
+metrics_logger = logging.getLogger("Metrics")
+
+
+_result_code_avp_code = int.from_bytes(RESULT_CODE_AVP_CODE, byteorder="big")
+_experimental_result_avp_code = int.from_bytes(EXPERIMENTAL_RESULT_AVP_CODE,
+                                               byteorder="big")
+_experimental_result_code_avp_code = int.from_bytes(
+                                            EXPERIMENTAL_RESULT_CODE_AVP_CODE,
+                                            byteorder="big")
+
+_result_avp_codes = frozenset((_result_code_avp_code,
+                               _experimental_result_avp_code,
+                               _experimental_result_code_avp_code))
+
+_unsigned32_struct = struct.Struct(">I")
+
+#: Content-Type of the Prometheus text exposition format.
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+#: Directions of the messages counted.
+DIRECTION_IN = "in"
+DIRECTION_OUT = "out"
+
+
+#: Metrics merged from every thread. Counters map (peer, Application-Id,
+#: Command Code, direction, Result-Code class) keys to their counts, and
+#: latencies map (peer, Application-Id, Command Code) keys to a list of
+#: counts by bucket, the last one being the overflow one, followed by the
+#: sum of the latencies. Stages map stage names to histograms alike. Gauges
+#: map (name, peer) keys to their values summed over the associations with
+#: that peer.
+MetricsSnapshot = namedtuple("MetricsSnapshot", [
+                                        "counters",
+                                        "latencies",
+                                        "stages",
+                                        "gauges"
+                                    ]
+)
+
+
+def get_result_class(stream: bytes,
+                     offset: int = DIAMETER_HEADER_LENGTH,
+                     end: int = None) -> str:
+    """Returns the class of the Result-Code or Experimental-Result-Code of a
+    Diameter Answer byte stream, as in '2xxx', or an empty str if it has
+    none. The AVPs are scanned from `offset` to `end` with no DiameterAVP
+    object created, and AVPParsingError is raised as DiameterAVP.scan()
+    does.
+    """
+    for avp in DiameterAVP.scan(stream, offset, end, _result_avp_codes):
+        if avp.code == _experimental_result_avp_code:
+            if avp.vendor_id is None:
+                return get_result_class(stream,
+                                        avp.offset,
+                                        avp.offset + avp.data_length)
+
+        #: Vendor-specific Experimental-Result-Code AVPs are counted too,
+        #: since some applications send them.
+        elif avp.data_length == 4 and (avp.vendor_id is None or \
+                            avp.code == _experimental_result_code_avp_code):
+            value = _unsigned32_struct.unpack_from(stream, avp.offset)[0]
+            return f"{value // 1000}xxx"
+
+    return ""
+
+
+def get_decoded_result_class(msg: Type[DiameterMessage]) -> str:
+    """Returns the class of the Result-Code or Experimental-Result-Code of a
+    DiameterMessage object whose AVPs are already decoded, as
+    get_result_class() does for byte streams, with no message encoding.
+    """
+    avp = msg.__dict__.get("result_code_avp")
+    if avp is not None:
+        if len(avp.data) != 4:
+            return ""
+        return f"{_unsigned32_struct.unpack(avp.data)[0] // 1000}xxx"
+
+    avp = msg.__dict__.get("experimental_result_avp")
+    if avp is not None:
+        return get_result_class(avp.data, 0)
+
+    return ""
+
+
+class _ThreadMetrics:
+    """Counters and histograms updated by a single thread."""
+    __slots__ = ("counters", "latencies", "stages")
+
+    def __init__(self) -> None:
+        self.counters = dict()
+        self.latencies = dict()
+        self.stages = dict()
+
+
+class MetricsRegistry:
+    """Metrics of the Diameter associations of a process.
+
+    :param buckets: the upper bounds, in seconds, of the latency histogram
+        buckets, in ascending order. They grow by about 2x, so a latency
+        falls in a bucket whose bounds are within 2.5x of each other from
+        100us to 60s, as HDR histograms do with fixed precision.
+    :param stage_buckets: the upper bounds, in seconds, of the stage
+        duration histogram buckets, from 1us to 1s by default.
+    """
+    def __init__(self,
+                 buckets: tuple = METRICS_LATENCY_BUCKETS,
+                 stage_buckets: tuple = TRACING_STAGE_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.stage_buckets = tuple(stage_buckets)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = list()
+        self._retired = _ThreadMetrics()
+        self._associations = weakref.WeakSet()
+
+
+    def _get_thread_metrics(self) -> _ThreadMetrics:
+        try:
+            return self._local.metrics
+        except AttributeError:
+            metrics = self._local.metrics = _ThreadMetrics()
+            with self._lock:
+                self._threads.append((threading.current_thread(), metrics))
+            return metrics
+
+
+    def count_message(self,
+                      peer: str,
+                      msg: Type[DiameterMessage],
+                      direction: str,
+                      stream: bytes = None) -> None:
+        """Counts a Diameter Message sent to or received from a peer. The
+        Result-Code class of answers is looked up in `stream`, if given,
+        which is the message byte stream, in the wire bytes of lazy
+        messages, or else in the DiameterAVP objects already decoded.
+        """
+        header = msg.header
+        result_class = ""
+
+        if not header.flags[0] & 0x80:
+            if stream is not None:
+                result_class = get_result_class(stream)
+            else:
+                pending_stream = msg.__dict__.get("_pending_stream")
+                if pending_stream is not None:
+                    result_class = get_result_class(pending_stream, 0)
+                else:
+                    result_class = get_decoded_result_class(msg)
+
+        key = (peer, header.application_id, header.command_code, direction,
+               result_class)
+
+        counters = self._get_thread_metrics().counters
+        counters[key] = counters.get(key, 0) + 1
+
+
+    def observe_latency(self,
+                        peer: str,
+                        application_id: bytes,
+                        command_code: bytes,
+                        latency: float) -> None:
+        """Adds the time, in seconds, a peer has taken to answer a request
+        to the latency histograms.
+        """
+        key = (peer, application_id, command_code)
+
+        latencies = self._get_thread_metrics().latencies
+        histogram = latencies.get(key)
+        if histogram is None:
+            histogram = latencies[key] = [0] * (len(self.buckets) + 1) + [0.0]
+
+        histogram[bisect.bisect_left(self.buckets, latency)] += 1
+        histogram[-1] += latency
+
+
+    def observe_stage(self, stage: str, duration: float) -> None:
+        """Adds the time, in seconds, a message has spent in a stage of the
+        processing pipeline to the stage histograms.
+        """
+        stages = self._get_thread_metrics().stages
+        histogram = stages.get(stage)
+        if histogram is None:
+            histogram = stages[stage] = [0] * (len(self.stage_buckets) + 1) + \
+                                        [0.0]
+
+        histogram[bisect.bisect_left(self.stage_buckets, duration)] += 1
+        histogram[-1] += duration
+
+
+    def register_association(self, association: Any) -> None:
+        """Adds the queue depths and counters of a DiameterAssociation to
+        the metrics collected, for as long as it exists.
+        """
+        self._associations.add(association)
+
+
+    @staticmethod
+    def _merge(target: _ThreadMetrics, source: _ThreadMetrics) -> None:
+        #: Copying a dict holds the GIL, so it is consistent even while its
+        #: thread keeps on updating it.
+        for key, value in source.counters.copy().items():
+            target.counters[key] = target.counters.get(key, 0) + value
+
+        for attribute in ("latencies", "stages"):
+            histograms = getattr(target, attribute)
+            for key, histogram in getattr(source, attribute).copy().items():
+                histogram = list(histogram)
+                merged = histograms.get(key)
+                if merged is None:
+                    histograms[key] = histogram
+                else:
+                    histograms[key] = [a + b for a, b in zip(merged, histogram)]
+
+
+    def collect(self) -> MetricsSnapshot:
+        merged = _ThreadMetrics()
+
+        with self._lock:
+            #: Metrics of finished threads are kept apart, so their
+            #: _ThreadMetrics objects are dropped.
+            alive = list()
+            for thread, metrics in self._threads:
+                if thread.is_alive():
+                    alive.append((thread, metrics))
+                else:
+                    self._merge(self._retired, metrics)
+            self._threads = alive
+
+            self._merge(merged, self._retired)
+            for _, metrics in alive:
+                self._merge(merged, metrics)
+
+        #: Associations with the same peer, as the ones whose peer is not
+        #: identified yet, are summed up.
+        gauges = dict()
+        for association in list(self._associations):
+            peer = association.connection.peer_node.host_name
+            values = (
+                ("recv_queue_depth", association._recv_messages.qsize()),
+                ("send_queue_depth", association._send_messages.qsize()),
+                ("postprocess_queue_depth",
+                                association.postprocess_recv_messages.qsize()),
+                ("pending_requests", len(association.pending_requests)),
+                ("requests_processed", association.num_requests),
+                ("answers_processed", association.num_answers),
+                ("request_timeouts", association.num_request_timeouts),
+            )
+            for name, value in values:
+                gauges[(name, peer)] = gauges.get((name, peer), 0) + value
+
+        return MetricsSnapshot(counters=merged.counters,
+                               latencies=merged.latencies,
+                               stages=merged.stages,
+                               gauges=gauges)
+
+
+    def clear(self) -> None:
+        """Drops the counters and histograms, as when the process is forked.
+        It is only safe while no other thread updates them.
+        """
+        with self._lock:
+            for _, metrics in self._threads:
+                metrics.counters.clear()
+                metrics.latencies.clear()
+                metrics.stages.clear()
+            self._retired = _ThreadMetrics()
+
+
+    def to_prometheus(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        snapshot = self.collect()
+        lines = list()
+
+        lines.append("# HELP bromelia_messages_total Diameter Messages sent "\
+                     "and received.")
+        lines.append("# TYPE bromelia_messages_total counter")
+        for key, value in sorted(snapshot.counters.items(), key=get_sort_key):
+            peer, application_id, command_code, direction, result_class = key
+            labels = format_labels(peer=peer,
+                                   application_id=int.from_bytes(application_id,
+                                                                 byteorder="big"),
+                                   command_code=int.from_bytes(command_code,
+                                                               byteorder="big"),
+                                   direction=direction,
+                                   result_class=result_class)
+            lines.append(f"bromelia_messages_total{{{labels}}} {value}")
+
+        lines.append("# HELP bromelia_request_latency_seconds Time taken by "\
+                     "peers to answer Diameter Requests.")
+        lines.append("# TYPE bromelia_request_latency_seconds histogram")
+        for key, histogram in sorted(snapshot.latencies.items(),
+                                     key=get_sort_key):
+            peer, application_id, command_code = key
+            labels = format_labels(peer=peer,
+                                   application_id=int.from_bytes(application_id,
+                                                                 byteorder="big"),
+                                   command_code=int.from_bytes(command_code,
+                                                               byteorder="big"))
+            lines.extend(format_histogram("bromelia_request_latency_seconds",
+                                          labels,
+                                          self.buckets,
+                                          histogram))
+
+        if snapshot.stages:
+            lines.append("# HELP bromelia_stage_duration_seconds Time spent "\
+                         "by the messages traced in each processing stage.")
+            lines.append("# TYPE bromelia_stage_duration_seconds histogram")
+            for stage, histogram in sorted(snapshot.stages.items()):
+                lines.extend(format_histogram(
+                                        "bromelia_stage_duration_seconds",
+                                        format_labels(stage=stage),
+                                        self.stage_buckets,
+                                        histogram))
+
+        names = sorted(set(name for name, _ in snapshot.gauges))
+        for name in names:
+            lines.append(f"# TYPE bromelia_association_{name} gauge")
+            for (gauge_name, peer), value in sorted(snapshot.gauges.items(),
+                                                    key=get_sort_key):
+                if gauge_name == name:
+                    lines.append(f"bromelia_association_{name}"\
+                                 f"{{{format_labels(peer=peer)}}} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def format_histogram(name: str,
+                     labels: str,
+                     buckets: tuple,
+                     histogram: list) -> list:
+    """Returns the Prometheus samples of a histogram, whose buckets are
+    cumulative.
+    """
+    lines = list()
+
+    count = 0
+    for bound, bucket_count in zip(buckets, histogram):
+        count += bucket_count
+        lines.append(f"{name}_bucket{{{labels},le=\"{bound}\"}} {count}")
+
+    count += histogram[-2]
+    lines.append(f"{name}_bucket{{{labels},le=\"+Inf\"}} {count}")
+    lines.append(f"{name}_sum{{{labels}}} {histogram[-1]}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
+
+    return lines
+
+
+def format_labels(**labels: Any) -> str:
+    """Returns the Prometheus labels of a sample, with their values
+    escaped.
+    """
+    return ",".join(f"{name}=\"{escape_label_value(value)}\""
+                                            for name, value in labels.items())
+
+
+def get_sort_key(sample: tuple) -> tuple:
+    """Returns the key to sort the (key, value) samples of a MetricsSnapshot
+    by, in which None fields, as the peer of associations whose Origin-Host
+    is not known yet, come first.
+    """
+    key, _ = sample
+    return tuple((field is not None, field) for field in key)
+
+
+def escape_label_value(value: Any) -> str:
+    if value is None:
+        return ""
+
+    return str(value).replace("\\", "\\\\")\
+                     .replace("\"", "\\\"")\
+                     .replace("\n", "\\n")
+
+
+_registry = None
+_registry_pid = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the MetricsRegistry of the process. A new one is created in
+    forked processes, so their metrics are not mixed up with the ones of
+    their parent.
+    """
+    global _registry, _registry_pid
+
+    with _registry_lock:
+        if _registry is None or _registry_pid != os.getpid():
+            _registry = MetricsRegistry()
+            _registry_pid = os.getpid()
+
+        return _registry
+
+
+class MetricsServer:
+    """HTTP server of the Prometheus metrics of a MetricsRegistry, which
+    answers GET requests for '/metrics' in a thread of its own.
+
+    :param registry: the MetricsRegistry object.
+    :param host: the IP address to listen on. Metrics are only served
+        locally by default.
+    :param port: the TCP port to listen on, or 0 for any free one.
+    """
+    def __init__(self,
+                 registry: MetricsRegistry = None,
+                 host: str = METRICS_HTTP_HOST,
+                 port: int = METRICS_HTTP_PORT) -> None:
+        self.registry = registry or get_metrics_registry()
+        self.host = host
+        self.port = port
+
+        self.httpd = None
+        self._thread = None
+
+
+    def _create_handler(self) -> type:
+        registry = self.registry
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = registry.to_prometheus().encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                metrics_logger.debug(format % args)
+
+        return MetricsHandler
+
+
+    def start(self) -> None:
+        if self.httpd is not None:
+            return
+
+        self.httpd = http.server.ThreadingHTTPServer((self.host, self.port),
+                                                     self._create_handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+
+        self._thread = threading.Thread(name="metrics_server",
+                                        target=self.httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        metrics_logger.debug(f"Serving metrics on {self.host}:{self.port}")
+
+
+    def stop(self) -> None:
+        if self.httpd is None:
+            return
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self._thread.join()
+
+        self.httpd = None
+        self._thread = None
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.stop()
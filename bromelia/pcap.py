@@ -0,0 +1,805 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.pcap
+    ~~~~~~~~~~~~~
+
+    This module implements the offline decoding of Diameter traces. A pcap
+    or pcapng file is memory-mapped and read packet by packet, the TCP and
+    SCTP payloads are reassembled by flow and split into Diameter Messages
+    by the same DiameterStreamFramer used by the live receiver. Everything
+    is done by generators, so the memory in use does not depend on the
+    capture size.
+
+    Decoding the Diameter AVPs is the expensive part, so iter_decoded() may
+    fan it out to a pool of processes, with the messages of a given flow
+    always sent to the same batch queue.
+
+    Diameter Messages may also be written into pcap files, as TCP segments
+    with synthetic IP and TCP headers, by write_pcap(). This is how the
+    flight recorder of bromelia.recorder dumps its messages.
+
+    Usage::
+
+        >>> from bromelia.pcap import iter_messages
+        >>> for record in iter_messages("trace.pcap"):
+        ...     print(record.timestamp, record.flow, record.message)
+
+        $ python -m bromelia.pcap trace.pcap --ports 3868
+
+    IPv4 fragments other than the first one and the SCTP I-DATA chunk are
+    not supported, and their payloads are skipped.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import ipaddress
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+from typing import Any, Callable, Iterable, Iterator, List
+
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .base import DiameterStreamFramer
+from .exceptions import AVPParsingError
+from .exceptions import DiameterHeaderError
+from .exceptions import ParsingDataTypeError
+
+
+#: Transport layer flow of a Diameter Message, from sender to receiver.
+#: The `stream` field is the SCTP stream identifier, or 0 for TCP.
+Flow = namedtuple("Flow", [
+                            "protocol",
+                            "src_ip_address",
+                            "src_port",
+                            "dst_ip_address",
+                            "dst_port",
+                            "stream"
+                        ]
+)
+
+
+#: Whole Diameter Message found in a trace. The `data` field holds its byte
+#: stream, and the `message` field its lazily loaded DiameterMessage object.
+TraceRecord = namedtuple("TraceRecord", [
+                                            "timestamp",
+                                            "flow",
+                                            "data",
+                                            "message"
+                                        ],
+                         defaults=(None,)
+)
+
+
+Packet = namedtuple("Packet", [
+                                "timestamp",
+                                "link_type",
+                                "data"
+                            ]
+)
+
+
+PCAP_MAGIC_MICROSECONDS = 0xa1b2c3d4
+PCAP_MAGIC_NANOSECONDS = 0xa1b23c4d
+PCAPNG_BLOCK_SECTION_HEADER = 0x0a0d0d0a
+PCAPNG_BLOCK_INTERFACE_DESCRIPTION = 0x00000001
+PCAPNG_BLOCK_SIMPLE_PACKET = 0x00000003
+PCAPNG_BLOCK_ENHANCED_PACKET = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1a2b3c4d
+PCAPNG_OPTION_TSRESOL = 9
+
+LINK_TYPE_NULL = 0
+LINK_TYPE_ETHERNET = 1
+LINK_TYPE_RAW = 101
+LINK_TYPE_LOOP = 108
+LINK_TYPE_LINUX_SLL = 113
+LINK_TYPE_IPV4 = 228
+LINK_TYPE_IPV6 = 229
+LINK_TYPE_LINUX_SLL2 = 276
+
+ETHER_TYPE_IPV4 = 0x0800
+ETHER_TYPE_IPV6 = 0x86dd
+ETHER_TYPES_VLAN = (0x8100, 0x88a8, 0x9100)
+
+IP_PROTOCOL_TCP = 6
+IP_PROTOCOL_SCTP = 132
+IPV6_EXTENSION_HEADERS = (0, 43, 60)
+IPV6_FRAGMENT_HEADER = 44
+
+TCP_FLAG_FIN = 0x01
+TCP_FLAG_SYN = 0x02
+TCP_FLAG_RST = 0x04
+TCP_FLAG_PSH = 0x08
+TCP_FLAG_ACK = 0x10
+
+SCTP_CHUNK_DATA = 0
+SCTP_DATA_FLAG_END = 0x01
+SCTP_DATA_FLAG_BEGINNING = 0x02
+SCTP_PPID_DIAMETER = 46
+
+#: Flows are forgotten, oldest first, above this number.
+MAX_NUM_OF_FLOWS = 65536
+
+#: Out-of-order TCP bytes kept per flow before giving up on the gap.
+MAX_OUT_OF_ORDER_BYTES = 1 << 20
+
+#: Payload bytes per TCP segment written, so that both IPv4 and IPv6
+#: packets fit their 16-bit length fields.
+MAX_SEGMENT_SIZE = 65535 - 60
+
+_pcap_header_struct = struct.Struct("<IHHiIII")
+_pcap_record_structs = {"<": struct.Struct("<IIII"), ">": struct.Struct(">IIII")}
+_ipv4_header_struct = struct.Struct(">BBHHHBBH4s4s")
+_ipv6_header_struct = struct.Struct(">IHBB16s16s")
+_tcp_header_struct = struct.Struct(">HHIIBBHHH")
+
+
+def _open_mmap(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise DiameterHeaderError(f"empty capture file '{path}'")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_pcap(buffer: mmap.mmap) -> Iterator[Packet]:
+    magic = struct.unpack_from("<I", buffer)[0]
+    if magic in (PCAP_MAGIC_MICROSECONDS, PCAP_MAGIC_NANOSECONDS):
+        byte_order = "<"
+    else:
+        byte_order = ">"
+        magic = struct.unpack_from(">I", buffer)[0]
+
+    resolution = 1e-9 if magic == PCAP_MAGIC_NANOSECONDS else 1e-6
+    link_type = struct.unpack_from(f"{byte_order}I", buffer, 20)[0] & 0xffff
+    record_struct = _pcap_record_structs[byte_order]
+
+    offset = 24
+    while offset + record_struct.size <= len(buffer):
+        seconds, fraction, captured_length, _ = \
+                                    record_struct.unpack_from(buffer, offset)
+        offset += record_struct.size
+
+        yield Packet(timestamp=seconds + fraction * resolution,
+                     link_type=link_type,
+                     data=buffer[offset:offset + captured_length])
+
+        offset += captured_length
+
+
+def _get_tsresol(options: memoryview, byte_order: str) -> float:
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(f"{byte_order}HH", options, offset)
+        if code == 0:
+            break
+
+        if code == PCAPNG_OPTION_TSRESOL and length >= 1:
+            value = options[offset + 4]
+            if value & 0x80:
+                return 2 ** -(value & 0x7f)
+            return 10 ** -value
+
+        offset += 4 + ((length + 3) & ~3)
+
+    return 1e-6
+
+
+def _read_pcapng(buffer: mmap.mmap) -> Iterator[Packet]:
+    byte_order = "<"
+    interfaces = list()
+
+    offset = 0
+    while offset + 12 <= len(buffer):
+        block_type = struct.unpack_from(f"{byte_order}I", buffer, offset)[0]
+
+        if block_type == PCAPNG_BLOCK_SECTION_HEADER:
+            magic = struct.unpack_from("<I", buffer, offset + 8)[0]
+            byte_order = "<" if magic == PCAPNG_BYTE_ORDER_MAGIC else ">"
+            interfaces = list()
+
+        block_length = struct.unpack_from(f"{byte_order}I", buffer, offset + 4)[0]
+        if block_length < 12:
+            raise DiameterHeaderError(f"invalid pcapng block length "\
+                                      f"{block_length} at {offset}")
+
+        block = buffer[offset + 8:offset + block_length - 4]
+        offset += block_length
+
+        if block_type == PCAPNG_BLOCK_INTERFACE_DESCRIPTION:
+            link_type = struct.unpack_from(f"{byte_order}H", block)[0]
+            interfaces.append((link_type, _get_tsresol(block[8:], byte_order)))
+
+        elif block_type == PCAPNG_BLOCK_ENHANCED_PACKET:
+            (interface_id,
+             timestamp_high,
+             timestamp_low,
+             captured_length,
+             _) = struct.unpack_from(f"{byte_order}5I", block)
+            link_type, resolution = interfaces[interface_id]
+
+            yield Packet(timestamp=((timestamp_high << 32) | timestamp_low) \
+                                                                * resolution,
+                         link_type=link_type,
+                         data=block[20:20 + captured_length])
+
+        elif block_type == PCAPNG_BLOCK_SIMPLE_PACKET:
+            link_type, _ = interfaces[0]
+
+            yield Packet(timestamp=None,
+                         link_type=link_type,
+                         data=block[4:])
+
+
+def read_packets(path: str) -> Iterator[Packet]:
+    """Yields the Packet objects of a pcap or pcapng file. The file is
+    memory-mapped, so only the packet being read is copied into memory.
+    """
+    buffer = _open_mmap(path)
+
+    try:
+        magic = struct.unpack_from("<I", buffer)[0]
+        if magic == PCAPNG_BLOCK_SECTION_HEADER:
+            yield from _read_pcapng(buffer)
+        else:
+            big_endian_magic = struct.unpack_from(">I", buffer)[0]
+            if PCAP_MAGIC_MICROSECONDS not in (magic, big_endian_magic) and \
+               PCAP_MAGIC_NANOSECONDS not in (magic, big_endian_magic):
+                raise DiameterHeaderError(f"'{path}' is neither a pcap nor "\
+                                          f"a pcapng file")
+
+            yield from _read_pcap(buffer)
+
+    finally:
+        buffer.close()
+
+
+def get_ip_packet(link_type: int, data: memoryview) -> memoryview:
+    """Returns the IP packet carried by a link layer frame, or None if it
+    does not carry an IP packet.
+    """
+    if link_type in (LINK_TYPE_RAW, LINK_TYPE_IPV4, LINK_TYPE_IPV6):
+        return data
+
+    if link_type == LINK_TYPE_ETHERNET:
+        offset = 12
+        ether_type = struct.unpack_from(">H", data, offset)[0]
+        while ether_type in ETHER_TYPES_VLAN:
+            offset += 4
+            ether_type = struct.unpack_from(">H", data, offset)[0]
+        offset += 2
+
+    elif link_type == LINK_TYPE_LINUX_SLL:
+        ether_type = struct.unpack_from(">H", data, 14)[0]
+        offset = 16
+
+    elif link_type == LINK_TYPE_LINUX_SLL2:
+        ether_type = struct.unpack_from(">H", data, 0)[0]
+        offset = 20
+
+    elif link_type in (LINK_TYPE_NULL, LINK_TYPE_LOOP):
+        #: The address family is in the capturing host byte order.
+        family = struct.unpack_from("<I", data)[0]
+        if family > 0xffff:
+            family = struct.unpack_from(">I", data)[0]
+        ether_type = ETHER_TYPE_IPV4 if family == 2 else ETHER_TYPE_IPV6
+        offset = 4
+
+    else:
+        return None
+
+    if ether_type not in (ETHER_TYPE_IPV4, ETHER_TYPE_IPV6):
+        return None
+
+    return data[offset:]
+
+
+def get_transport_segment(packet: memoryview) -> tuple:
+    """Returns the (IP protocol, source IP address, destination IP address,
+    segment) of an IP packet, or None if it cannot carry a whole transport
+    layer header.
+    """
+    version = packet[0] >> 4
+
+    if version == 4:
+        header_length = (packet[0] & 0x0f) * 4
+        total_length, = struct.unpack_from(">H", packet, 2)
+        fragment, = struct.unpack_from(">H", packet, 6)
+
+        #: Only the first fragment holds the transport layer header.
+        if fragment & 0x1fff:
+            return None
+
+        end = min(total_length, len(packet)) if total_length else len(packet)
+        return (packet[9],
+                ipaddress.IPv4Address(bytes(packet[12:16])),
+                ipaddress.IPv4Address(bytes(packet[16:20])),
+                packet[header_length:end])
+
+    if version == 6:
+        payload_length, next_header = struct.unpack_from(">HB", packet, 4)
+        offset = 40
+
+        while next_header in IPV6_EXTENSION_HEADERS + (IPV6_FRAGMENT_HEADER,):
+            if next_header == IPV6_FRAGMENT_HEADER:
+                if struct.unpack_from(">H", packet, offset + 2)[0] & 0xfff8:
+                    return None
+                next_header = packet[offset]
+                offset += 8
+            else:
+                next_header, length = packet[offset], packet[offset + 1]
+                offset += (length + 1) * 8
+
+        end = min(40 + payload_length, len(packet)) if payload_length \
+                                                            else len(packet)
+        return (next_header,
+                ipaddress.IPv6Address(bytes(packet[8:24])),
+                ipaddress.IPv6Address(bytes(packet[24:40])),
+                packet[offset:end])
+
+    return None
+
+
+class TcpStream:
+    """Reassembles the payload of one direction of a TCP connection by
+    sequence number, dropping retransmitted bytes and keeping out-of-order
+    segments until the gap is filled.
+    """
+    def __init__(self) -> None:
+        self.next_seq = None
+        self.segments = dict()
+        self.num_of_out_of_order_bytes = 0
+
+        #: A connection seen from its SYN starts at a Diameter Header.
+        self.framer = DiameterStreamFramer(resync=True)
+
+
+    def feed(self, seq: int, flags: int, payload: memoryview) -> bytes:
+        if flags & TCP_FLAG_SYN:
+            self.next_seq = (seq + 1) & 0xffffffff
+            self.segments = dict()
+            self.num_of_out_of_order_bytes = 0
+            self.framer.reset()
+            return b""
+
+        if not payload:
+            return b""
+
+        if self.next_seq is None:
+            self.next_seq = seq
+
+        offset = (seq - self.next_seq) & 0xffffffff
+        if offset >= 0x80000000:
+            #: Retransmission, possibly holding some new bytes at its end.
+            overlap = (self.next_seq - seq) & 0xffffffff
+            if overlap >= len(payload):
+                return b""
+            payload, seq = payload[overlap:], self.next_seq
+            offset = 0
+
+        if offset > 0:
+            if seq not in self.segments:
+                self.segments[seq] = bytes(payload)
+                self.num_of_out_of_order_bytes += len(payload)
+
+            if self.num_of_out_of_order_bytes <= MAX_OUT_OF_ORDER_BYTES:
+                return b""
+
+            #: The missing bytes will not come, so skip the gap.
+            seq = min(self.segments, key=lambda _seq: (_seq - self.next_seq)
+                                                                & 0xffffffff)
+            payload = self.segments.pop(seq)
+            self.num_of_out_of_order_bytes -= len(payload)
+            self.framer.reset()
+
+        chunks = [bytes(payload)]
+        self.next_seq = (seq + len(payload)) & 0xffffffff
+
+        while self.next_seq in self.segments:
+            segment = self.segments.pop(self.next_seq)
+            self.num_of_out_of_order_bytes -= len(segment)
+            chunks.append(segment)
+            self.next_seq = (self.next_seq + len(segment)) & 0xffffffff
+
+        return self.framer.feed(b"".join(chunks))
+
+
+class SctpStream:
+    """Reassembles the user messages of one SCTP stream from DATA chunks
+    fragments, dropping retransmitted chunks by TSN.
+    """
+    def __init__(self) -> None:
+        self.fragments = list()
+        self.last_tsns = collections.deque(maxlen=1024)
+        self.framer = DiameterStreamFramer(resync=True)
+
+
+    def feed(self, tsn: int, flags: int, payload: memoryview) -> bytes:
+        if tsn in self.last_tsns:
+            return b""
+        self.last_tsns.append(tsn)
+
+        if flags & SCTP_DATA_FLAG_BEGINNING:
+            self.fragments = list()
+
+        self.fragments.append(bytes(payload))
+        if not flags & SCTP_DATA_FLAG_END:
+            return b""
+
+        user_message = b"".join(self.fragments)
+        self.fragments = list()
+
+        return self.framer.feed(user_message)
+
+
+class TraceReader:
+    """Reads the Diameter Messages of a pcap or pcapng file.
+
+    :param path: the capture file path.
+    :param ports: the TCP/SCTP ports to look into. Any port is looked into
+        if it is None, relying on the Diameter Header checks only.
+    """
+    def __init__(self, path: str, ports: List[int] = None) -> None:
+        self.path = path
+        self.ports = set(ports) if ports else None
+        self.streams = collections.OrderedDict()
+
+        #: Bytes skipped as they could not be part of any Diameter Message.
+        self.skipped = 0
+
+
+    def get_stream(self, flow: Flow, stream_class: type) -> Any:
+        stream = self.streams.get(flow)
+        if stream is None:
+            if len(self.streams) >= MAX_NUM_OF_FLOWS:
+                _, oldest = self.streams.popitem(last=False)
+                self.skipped += len(oldest.framer)
+
+            stream = stream_class()
+            self.streams[flow] = stream
+
+        return stream
+
+
+    def close_stream(self, flow: Flow) -> None:
+        stream = self.streams.pop(flow, None)
+        if stream is not None:
+            self.skipped += stream.framer.skipped + len(stream.framer)
+
+
+    def is_diameter_port(self, src_port: int, dst_port: int) -> bool:
+        return self.ports is None or src_port in self.ports or \
+                                     dst_port in self.ports
+
+
+    def _read_tcp(self, src: Any, dst: Any, segment: memoryview) -> Iterator:
+        src_port, dst_port, seq = struct.unpack_from(">HHI", segment)
+        if not self.is_diameter_port(src_port, dst_port):
+            return
+
+        data_offset = (segment[12] >> 4) * 4
+        flags = segment[13]
+        flow = Flow("TCP", src, src_port, dst, dst_port, 0)
+
+        stream = self.get_stream(flow, TcpStream)
+        data = stream.feed(seq, flags, segment[data_offset:])
+        if data:
+            yield flow, data
+
+        if flags & (TCP_FLAG_FIN | TCP_FLAG_RST):
+            self.close_stream(flow)
+
+
+    def _read_sctp(self, src: Any, dst: Any, segment: memoryview) -> Iterator:
+        src_port, dst_port = struct.unpack_from(">HH", segment)
+        if not self.is_diameter_port(src_port, dst_port):
+            return
+
+        offset = 12
+        while offset + 4 <= len(segment):
+            chunk_type, chunk_flags, chunk_length = \
+                                struct.unpack_from(">BBH", segment, offset)
+            if chunk_length < 4:
+                break
+
+            if chunk_type == SCTP_CHUNK_DATA and chunk_length > 16:
+                tsn, stream_id, _, ppid = struct.unpack_from(">IHHI",
+                                                             segment,
+                                                             offset + 4)
+
+                if ppid in (0, SCTP_PPID_DIAMETER):
+                    flow = Flow("SCTP", src, src_port, dst, dst_port, stream_id)
+                    stream = self.get_stream(flow, SctpStream)
+
+                    data = stream.feed(tsn,
+                                       chunk_flags,
+                                       segment[offset + 16:offset + chunk_length])
+                    if data:
+                        yield flow, data
+
+            offset += (chunk_length + 3) & ~3
+
+
+    def __iter__(self) -> Iterator[TraceRecord]:
+        """Yields a TraceRecord object, with no DiameterMessage object, for
+        each whole Diameter Message found.
+        """
+        for packet in read_packets(self.path):
+            try:
+                ip_packet = get_ip_packet(packet.link_type, packet.data)
+                if ip_packet is None or len(ip_packet) < 20:
+                    continue
+
+                segment = get_transport_segment(ip_packet)
+                if segment is None:
+                    continue
+
+                protocol, src, dst, segment = segment
+                if protocol == IP_PROTOCOL_TCP and len(segment) >= 20:
+                    payloads = self._read_tcp(src, dst, segment)
+                elif protocol == IP_PROTOCOL_SCTP and len(segment) >= 12:
+                    payloads = self._read_sctp(src, dst, segment)
+                else:
+                    continue
+
+                records = list()
+                for flow, data in payloads:
+                    offset = 0
+                    while offset < len(data):
+                        length = DiameterHeader.peek(data, offset).length
+                        records.append(TraceRecord(packet.timestamp,
+                                                   flow,
+                                                   data[offset:offset + length]))
+                        offset += length
+
+            except (struct.error, IndexError):
+                #: Truncated headers, as in captures with a small snaplen.
+                continue
+
+            yield from records
+
+        for flow in list(self.streams):
+            self.close_stream(flow)
+
+
+def iter_messages(path: str,
+                  ports: List[int] = None,
+                  lazy: bool = True) -> Iterator[TraceRecord]:
+    """Yields a TraceRecord object for each Diameter Message of a pcap or
+    pcapng file, with its DiameterMessage object. If `lazy` is True, only
+    the Diameter Header is loaded up front.
+    """
+    for record in TraceReader(path, ports):
+        try:
+            msg = DiameterMessage.load(record.data, lazy=lazy)[0]
+        except (AVPParsingError, DiameterHeaderError, ParsingDataTypeError):
+            continue
+
+        yield record._replace(message=msg)
+
+
+def decode_records(records: List[tuple], func: Callable = None) -> list:
+    """Fully loads the DiameterMessage object of each (timestamp, flow,
+    data) tuple and returns the results of `func` for each TraceRecord
+    object, or the TraceRecord objects themselves.
+    """
+    results = list()
+    for timestamp, flow, data in records:
+        try:
+            msg = DiameterMessage.load(data)[0]
+        except (AVPParsingError, DiameterHeaderError, ParsingDataTypeError):
+            continue
+
+        record = TraceRecord(timestamp, flow, data, msg)
+        results.append(func(record) if func is not None else record)
+
+    return results
+
+
+def iter_decoded(path: str,
+                 func: Callable = None,
+                 ports: List[int] = None,
+                 max_workers: int = None,
+                 batch_size: int = 1000) -> Iterator[Any]:
+    """Fully decodes the Diameter Messages of a pcap or pcapng file in a
+    pool of processes and yields the results of `func` for each TraceRecord
+    object, or the TraceRecord objects themselves if `func` is None.
+
+    The capture is read and reassembled in the calling process. Messages
+    are grouped by flow into batches of `batch_size`, so the results of a
+    given flow are yielded in capture order. No more than two batches per
+    worker are pending at a time, which bounds the memory in use.
+
+    Since results go back through pickling, a `func` returning a small
+    summary instead of the whole TraceRecord object is much faster. It
+    must be a module-level function.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    batches = collections.defaultdict(list)
+    pending = collections.deque()
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        def submit(records):
+            pending.append(executor.submit(decode_records, records, func))
+
+        for record in TraceReader(path, ports):
+            partition = hash(record.flow[:5]) % max_workers
+            batch = batches[partition]
+            batch.append(record[:3])
+
+            if len(batch) >= batch_size:
+                submit(batch)
+                batches[partition] = list()
+
+                while len(pending) > 2 * max_workers:
+                    yield from pending.popleft().result()
+
+        for batch in batches.values():
+            if batch:
+                submit(batch)
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def get_checksum(data: bytes) -> int:
+    """Returns the Internet checksum of a byte stream, as in IETF
+    RFC 1071.
+    """
+    if len(data) % 2:
+        data += b"\x00"
+
+    total = sum(struct.unpack(f">{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xffff) + (total >> 16)
+
+    return ~total & 0xffff
+
+
+def build_tcp_packet(flow: Flow,
+                     seq: int,
+                     ack: int,
+                     payload: bytes,
+                     flags: int = TCP_FLAG_PSH | TCP_FLAG_ACK) -> bytes:
+    """Returns an IPv4 or IPv6 packet carrying a TCP segment of a flow,
+    with its checksums set. Both IP addresses of the flow must be of the
+    same version.
+    """
+    src = ipaddress.ip_address(flow.src_ip_address)
+    dst = ipaddress.ip_address(flow.dst_ip_address)
+    length = 20 + len(payload)
+
+    if src.version == 4:
+        pseudo_header = struct.pack(">4s4sBBH",
+                                    src.packed, dst.packed, 0, IP_PROTOCOL_TCP,
+                                    length)
+    else:
+        pseudo_header = struct.pack(">16s16sI3xB",
+                                    src.packed, dst.packed, length,
+                                    IP_PROTOCOL_TCP)
+
+    tcp_header = _tcp_header_struct.pack(flow.src_port, flow.dst_port,
+                                         seq, ack, 5 << 4, flags, 65535, 0, 0)
+    checksum = get_checksum(pseudo_header + tcp_header + payload)
+    segment = tcp_header[:16] + struct.pack(">H", checksum) + \
+              tcp_header[18:] + payload
+
+    if src.version == 4:
+        #: Don't Fragment flag set.
+        ip_header = _ipv4_header_struct.pack(0x45, 0, 20 + length, 0, 0x4000,
+                                             64, IP_PROTOCOL_TCP, 0,
+                                             src.packed, dst.packed)
+        ip_header = ip_header[:10] + \
+                    struct.pack(">H", get_checksum(ip_header)) + \
+                    ip_header[12:]
+    else:
+        ip_header = _ipv6_header_struct.pack(6 << 28, length, IP_PROTOCOL_TCP,
+                                             64, src.packed, dst.packed)
+
+    return ip_header + segment
+
+
+def write_pcap(path: str, records: Iterable[TraceRecord]) -> int:
+    """Writes the data of TraceRecord objects into a pcap file as TCP
+    segments of raw IP packets, so the file may be opened by Wireshark or
+    read back by iter_messages(). Records must be in time order. The
+    sequence numbers of each flow start at 1 from its first record, and
+    data longer than MAX_SEGMENT_SIZE is split across segments.
+
+    Returns the number of packets written.
+    """
+    record_struct = _pcap_record_structs["<"]
+    next_seqs = dict()
+    num_of_packets = 0
+
+    with open(path, "wb") as f:
+        f.write(_pcap_header_struct.pack(PCAP_MAGIC_MICROSECONDS, 2, 4, 0, 0,
+                                         65535, LINK_TYPE_RAW))
+
+        for record in records:
+            flow = record.flow
+            reverse_flow = (flow.protocol,
+                            flow.dst_ip_address,
+                            flow.dst_port,
+                            flow.src_ip_address,
+                            flow.src_port)
+
+            seq = next_seqs.get(flow[:5], 1)
+            ack = next_seqs.get(reverse_flow, 1)
+
+            microseconds = int(round((record.timestamp or 0) * 1000000))
+            seconds, microseconds = divmod(microseconds, 1000000)
+
+            data = record.data
+            for offset in range(0, len(data), MAX_SEGMENT_SIZE):
+                payload = bytes(data[offset:offset + MAX_SEGMENT_SIZE])
+                packet = build_tcp_packet(flow, seq, ack, payload)
+
+                f.write(record_struct.pack(seconds, microseconds,
+                                           len(packet), len(packet)))
+                f.write(packet)
+
+                seq = (seq + len(payload)) & 0xffffffff
+                num_of_packets += 1
+
+            next_seqs[flow[:5]] = seq
+
+    return num_of_packets
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m bromelia.pcap",
+                                     description="Prints the Diameter "\
+                                                 "Messages of a pcap or "\
+                                                 "pcapng file.")
+
+    parser.add_argument("path", help="pcap or pcapng file")
+    parser.add_argument("-p", "--ports", type=int, nargs="*",
+                        help="TCP/SCTP ports to look into (default: any)")
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="decode the AVPs in this number of processes "\
+                             "and print a count by command (default: "\
+                             "headers only, no AVPs decoded)")
+
+    return parser
+
+
+def get_command(record: TraceRecord) -> tuple:
+    header = record.message.header
+    return (int.from_bytes(header.application_id, byteorder="big"),
+            int.from_bytes(header.command_code, byteorder="big"),
+            header.is_request())
+
+
+def main(argv: list = None) -> int:
+    args = get_parser().parse_args(argv)
+
+    if args.workers:
+        commands = collections.Counter(iter_decoded(args.path,
+                                                    func=get_command,
+                                                    ports=args.ports,
+                                                    max_workers=args.workers))
+
+        for (application_id, command_code, is_request), count in \
+                                                    sorted(commands.items()):
+            kind = "request" if is_request else "answer"
+            print(f"{application_id:>10} {command_code:>6} {kind:<8} {count:>10}")
+
+        return 0
+
+    for record in iter_messages(args.path, args.ports):
+        flow = record.flow
+        print(f"{record.timestamp:.6f} {flow.protocol} "\
+              f"{flow.src_ip_address}:{flow.src_port} -> "\
+              f"{flow.dst_ip_address}:{flow.dst_port} {record.message}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,8 +11,11 @@
     :license: MIT, see LICENSE for more details.
 """
 import logging
+from collections import namedtuple
 
-from .avps import AuthRequestTypeAVP
+from .base import DiameterAVP
+from .base import DiameterAnswer
+from .base import DiameterRequest
 from .constants import *
 from .exceptions import ProcessRequestException
 from .utils import is_answer_message
@@ -20,371 +23,284 @@ from .utils import is_request_message
 
 process_message_logging = logging.getLogger("ProcessDiameterMessage")
 
+FLAG_MANDATORY_BIT = DiameterAVP.get_flags_bit(DiameterAVP.flag_mandatory_bit)
 
-def process_request(association, message):
-    list_of_avps_by_code = [avp.code for avp in message.avps]
-
-    connection = association.connection
-
-    local_node_host_name = connection.local_node.host_name.encode("utf-8")
-    local_node_realm = connection.local_node.realm.encode("utf-8")
-
-    if DESTINATION_HOST_AVP_CODE in list_of_avps_by_code:
-        if not list(filter(lambda avp: avp.data == local_node_host_name, message.avps)):
-            logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter "\
-                          f"Request has Destination-Host AVP, however it was "\
-                          f"addressed to another node.")
-            
-            raise ProcessRequestException("Request does not comply with "\
-                                          "local consumption rules.")
-
-        logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter Request "\
-                      f"has Destination-Host AVP and contains the hostname of "\
-                      f"local node.")
-
-    elif (DESTINATION_HOST_AVP_CODE not in list_of_avps_by_code and 
-          DESTINATION_REALM_AVP_CODE in list_of_avps_by_code):
-
-        if not list(filter(lambda avp: avp.data == local_node_realm, message.avps)):
-            logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter "\
-                          f"Request does not include Destination-Host AVP, "\
-                          f"but it does include an invalid Destination-Realm "\
-                          f"AVP which was addressed to another realm.")
-
-            raise ProcessRequestException("Request does not comply with "\
-                                          "local consumption rules.")
-
-        logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter Request "\
-                      f"does not include Destination-Host AVP, but it does "\
-                      f"include a valid Destination-Realm AVP which contains "\
-                      f"realm of local node.")
-        
-    elif (DESTINATION_HOST_AVP_CODE not in list_of_avps_by_code and 
-          DESTINATION_REALM_AVP_CODE not in list_of_avps_by_code):
-
-        logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter Request "\
-                      f"does not include neither Destination-Host AVP nor "\
-                      f"Destination-Realm AVP.")
-
-    else:
-        raise ProcessRequestException("Request does not comply with local "\
-                                      "consumption rules.")
-
-    association.num_requests += 1
-    logging.debug(f"[{message.header.hop_by_hop.hex()}] Processed Diameter Request.")
-
-
-def process_answer(association, message):
-    end_to_end_key = message.header.end_to_end.hex()
-    hop_by_hop_key = message.header.hop_by_hop.hex()
-
-    if end_to_end_key in association.end_to_end_identifiers:
-        if hop_by_hop_key in association.pending_requests:
-            if message.header.end_to_end == association.pending_requests[hop_by_hop_key].header.end_to_end:
-                association.pending_requests.pop(hop_by_hop_key)
-                association.num_answers += 1
-    
-    logging.debug(f"[{message.header.hop_by_hop.hex()}] Processed Diameter Answer.")
-
-
-class ProcessDiameterMessage:
-    @staticmethod
-    def process_answer_from_existing_pending_request(association, message):
-        process_message_logging.debug("Processing Diameter Answer.")
-
-        end_to_end_key = message.header.end_to_end.hex()
-        hop_by_hop_key = message.header.hop_by_hop.hex()
+MessageValidation = namedtuple("MessageValidation", [
+                                        "is_valid",
+                                        "missing_avps",
+                                        "invalid_avps",
+                                        "unsupported_avps"
+                                    ]
+)
 
-        if end_to_end_key in association.end_to_end_identifiers:
-            if hop_by_hop_key in association.pending_requests:
-                if message.header.end_to_end == association.pending_requests[hop_by_hop_key].header.end_to_end:
-                    association.pending_requests.pop(hop_by_hop_key)
 
-    
-    @staticmethod
-    def is_valid_origin_host_avp(avp, connection):
-        if avp.code == ORIGIN_HOST_AVP_CODE:
-            
-            process_message_logging.debug(f"Origin-Host AVP validation.")
+class MessageValidator:
+    """Table-driven validator compiled from the `mandatory` and `optionals`
+    class attributes of a Diameter message class (e.g. the ones found in 
+    bromelia.lib packages).
 
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
-            
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == AVP_HEADER_LENGTH + len(avp.data):
-                checklist_mandatory_info += 1
+    Each AVP of a given DiameterMessage object is dispatched by its 
+    (AVP Code, Vendor-Id) key through a dictionary in a single pass, then
+    the set of mandatory AVPs found is compared against the schema. Extra
+    checks on AVP content may be provided by AVP name.
 
-            data = avp.data.decode("utf-8")
-            process_message_logging.debug(f"data: {data}.")
-            if data == connection.peer_node.host_name:
-                checklist_mandatory_info += 1
+    :param message_class: the DiameterMessage subclass which holds the 
+        `mandatory` and `optionals` schemas.
+    """
 
+    def __init__(self, message_class) -> None:
+        self.message_class = message_class
+        self.mandatory = tuple(message_class.mandatory.keys())
+        self.rules = dict()
 
-            if checklist_mandatory_info == 3:
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
+        for avp_name, avp_class in message_class.optionals.items():
+            self.rules[(avp_class.code, avp_class.vendor_id)] = avp_name
 
+        for avp_name, avp_class in message_class.mandatory.items():
+            self.rules[(avp_class.code, avp_class.vendor_id)] = avp_name
 
-    @staticmethod
-    def is_valid_origin_realm_avp(avp, connection):
-        if avp.code == ORIGIN_REALM_AVP_CODE:
-            process_message_logging.debug(f"Origin-Realm AVP validation.")
-
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
-            
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == AVP_HEADER_LENGTH + len(avp.data):
-                checklist_mandatory_info += 1
 
-            data = avp.data.decode("utf-8")
-            process_message_logging.debug(f"data: {data}.")
-            if data == connection.peer_node.realm:
-                checklist_mandatory_info += 1
+    def validate(self, message, checks: dict = None) -> MessageValidation:
+        """Validates a DiameterMessage object against the compiled schema. 
+        The `checks` argument maps AVP names to callables which receive 
+        the DiameterAVP object and return a boolean.
 
+        AVPs with M-bit set which are not defined in the schema are reported
+        as unsupported, but they do not invalidate the message since the 
+        message classes schemas are not exhaustive.
+        """
+        rules = self.rules
+        found = set()
+        invalid_avps = list()
+        unsupported_avps = list()
 
-            if checklist_mandatory_info == 3:
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
+        for avp in message.avps:
+            avp_name = rules.get((avp.code, avp.vendor_id))
 
+            if avp_name is None:
+                if avp.flags[0] & FLAG_MANDATORY_BIT:
+                    unsupported_avps.append(avp)
+                continue
 
-    @staticmethod
-    def is_valid_origin_state_id_avp(avp, connection):
-        if (avp.code == ORIGIN_STATE_ID_AVP_CODE):
-            return True
-        return False
+            found.add(avp_name)
 
+            if checks:
+                check = checks.get(avp_name)
+                if check is not None and not check(avp):
+                    invalid_avps.append(avp_name)
 
-    @staticmethod
-    def is_valid_result_code_avp(avp):
-        if avp.code == RESULT_CODE_AVP_CODE:
-            
-            process_message_logging.debug(f"Result-Code AVP validation.")
+        missing_avps = [avp_name for avp_name in self.mandatory 
+                                                    if avp_name not in found]
 
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
-            
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == AVP_LENGTH_UNSIGNED32:
-                checklist_mandatory_info += 1
+        return MessageValidation(is_valid=not (missing_avps or invalid_avps),
+                                 missing_avps=missing_avps,
+                                 invalid_avps=invalid_avps,
+                                 unsupported_avps=unsupported_avps)
 
-            process_message_logging.debug(f"data: {avp.data.hex()}.")
 
+class MessageValidatorLoader:
+    """Helper class used to find the message class which represents a given
+    Diameter Message by its Command Code, Application-Id and R-bit. It works
+    with any DiameterRequest / DiameterAnswer subclass that has been loaded
+    and defines the `command_code` and `application_id` class attributes,
+    which means all Diameter applications in bromelia.lib.
 
-            if checklist_mandatory_info == 2:
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
+    Message classes which are not bound to a single Application-Id (e.g.
+    RAR/RAA in IETF RFC 6733) define `application_id` as None and are used
+    as fallback.
 
+    MessageValidatorLoader class is expected to be used only inside the 
+    Bromelia library implementation.
+    """
 
-    @staticmethod
-    def is_valid_disconnect_cause_avp(avp):
-        if (avp.code == DISCONNECT_CAUSE_AVP_CODE) and (avp.data == DISCONNECT_CAUSE_REBOOTING):
-            return True
-        return False
+    def __init__(self) -> None:
+        self.message_classes = dict()
+        self.validators = dict()
+        self.num_of_classes = None
 
 
     @staticmethod
-    def is_valid_host_ip_address_avp(avp, connection):
-        if (avp.code == HOST_IP_ADDRESS_AVP_CODE):
-            host_ip_address = "{}.{}.{}.{}".format(int(avp.data[2]),int(avp.data[3]),int(avp.data[4]),int(avp.data[5]))
-            return True
-            # if connection.peer_node.ip_address == host_ip_address:
-            #     return True
-            # process_message_logging.debug("Host IP Address from Peer Node not valid!")
-            # return False
+    def _get_num_of_classes() -> int:
+        return len(DiameterRequest.__subclasses__()) + \
+               len(DiameterAnswer.__subclasses__())
 
 
     @staticmethod
-    def is_valid_product_name_avp(avp, connection):
-        if (avp.code == PRODUCT_NAME_AVP_CODE):
-            return True
-        return False
+    def _get_subclasses(cls) -> list:
+        subclasses = list()
+        for subclass in cls.__subclasses__():
+            subclasses.append(subclass)
+            subclasses.extend(MessageValidatorLoader._get_subclasses(subclass))
+        return subclasses
 
 
-    @staticmethod
-    def is_valid_vendor_id_avp(avp, connection):
-        if (avp.code == VENDOR_ID_AVP_CODE):
-            return True
-        return False
+    def _get_load_message_classes_dictionary(self) -> dict:
+        message_classes = dict()
 
+        for base, is_request in ((DiameterRequest, True), 
+                                 (DiameterAnswer, False)):
+            for cls in MessageValidatorLoader._get_subclasses(base):
+                command_code = cls.__dict__.get("command_code")
+                if command_code is None or "mandatory" not in cls.__dict__:
+                    continue
 
-    @staticmethod
-    def is_valid_session_id_avp(avp):
-        if avp.code == SESSION_ID_AVP_CODE:
-            process_message_logging.debug(f"Session-Id AVP validation.")
-
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
-            
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == (AVP_HEADER_LENGTH + len(avp.data)):
-                checklist_mandatory_info += 1
+                key = (command_code, cls.application_id, is_request)
+                message_classes.setdefault(key, cls)
 
-            process_message_logging.debug(f"data: {avp.data.hex()}.")
+        return message_classes
 
 
-            if checklist_mandatory_info == 2:
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
+    def get_message_class(self, header) -> type:
+        is_request = header.is_request()
+        key = (header.command_code, header.application_id, is_request)
 
+        #: Keys with no message class are cached as None, until message 
+        #: classes are loaded (e.g. a bromelia.lib package imported by the 
+        #: application).
+        message_class = self.message_classes.get(key)
+        if message_class is not None:
+            return message_class
 
-    @staticmethod
-    def is_valid_auth_application_id_avp(avp):
-        if avp.code == AUTH_APPLICATION_ID_AVP_CODE:
-            process_message_logging.debug(f"Auth-Application-Id AVP validation.")
+        num_of_classes = MessageValidatorLoader._get_num_of_classes()
+        if key in self.message_classes and \
+                                    num_of_classes == self.num_of_classes:
+            return None
 
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
+        if num_of_classes != self.num_of_classes:
+            self.message_classes = self._get_load_message_classes_dictionary()
+            self.num_of_classes = num_of_classes
 
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == AVP_LENGTH_UNSIGNED32:
-                checklist_mandatory_info += 1
-        
+        message_class = self.message_classes.get(key)
+        if message_class is None:
+            message_class = self.message_classes.get((header.command_code,
+                                                      None,
+                                                      is_request))
 
-            if checklist_mandatory_info == 2: # == 3
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
+        self.message_classes[key] = message_class
+        return message_class
 
 
-    @staticmethod
-    def is_valid_auth_request_type_avp(avp):
-        if avp.code == AUTH_REQUEST_TYPE_AVP_CODE:
-            process_message_logging.debug(f"Auth-Request-Type AVP validation.")
-
-            checklist_mandatory_info = 0
-        
-            process_message_logging.debug(f"flags: {avp.get_flags()}.")
-            if avp.flags == FLAG_NOT_VENDOR_SPECIFIC_AND_MANDATORY_AND_NOT_PROTECTED:
-                checklist_mandatory_info += 1
-            
-            process_message_logging.debug(f"length: {avp.get_length()}.")
-            if avp.get_length() == AVP_LENGTH_INTEGER32:
-                checklist_mandatory_info += 1
+    def get_validator(self, message) -> MessageValidator:
+        message_class = self.get_message_class(message.header)
+        if message_class is None:
+            return None
 
-            process_message_logging.debug(f"data: {avp.data.hex()}.")
-            if avp.data in AuthRequestTypeAVP.values:
-                checklist_mandatory_info += 1
+        validator = self.validators.get(message_class)
+        if validator is None:
+            validator = MessageValidator(message_class)
+            self.validators[message_class] = validator
 
+        return validator
 
-            if checklist_mandatory_info == 3:
-                process_message_logging.debug(f"Result: PASS.")
-                return True
-            process_message_logging.debug(f"Result: FAIL.")
-            return False
 
+validators = MessageValidatorLoader()
 
-class ProcessCapabilityExchange():
-    def __init__(self, association, message):
-        self.association = association
-        self.connection = association.connection
-        self.message = message
 
-        self.checklist_mandatory_avps = 0
-        self.checklist_optional_avps = 0
-        self.checklist_error_avps = 0
-        self.is_valid = False
+def validate_message(message, checks: dict = None) -> MessageValidation:
+    """Validates a DiameterMessage object against the schema of the message
+    class which represents it. It returns None if there is no message class 
+    loaded for its Command Code and Application-Id.
+    """
+    validator = validators.get_validator(message)
+    if validator is None:
+        return None
+    return validator.validate(message, checks)
 
-        if message.header.flags == FLAG_REQUEST:
-            self.process_request()
-        elif message.header.flags == FLAG_RESPONSE:
-            self.process_answer()
-        else:
-            """What should we do if find an error?"""
-            pass
 
+def get_peer_identity_checks(connection) -> dict:
+    peer_node_host_name = connection.peer_node.host_name.encode("utf-8")
+    peer_node_realm = connection.peer_node.realm.encode("utf-8")
 
-    def process_request(self):
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+    return {
+                "origin_host": lambda avp: avp.data == peer_node_host_name,
+                "origin_realm": lambda avp: avp.data == peer_node_realm
+    }
 
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
 
-            elif ProcessDiameterMessage.is_valid_host_ip_address_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+def process_request(association, message):
+    if association.relay:
+        #: The local consumption rules are up to the RelayAgent, which routes
+        #: the request with no need for its AVPs to be decoded.
+        association.num_requests += 1
+        return
 
-            elif ProcessDiameterMessage.is_valid_vendor_id_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+    destination_host = None
+    destination_realm = None
 
-            elif ProcessDiameterMessage.is_valid_product_name_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+    for avp in message.avps:
+        if avp.code == DESTINATION_HOST_AVP_CODE:
+            destination_host = avp.data
+        elif avp.code == DESTINATION_REALM_AVP_CODE:
+            destination_realm = avp.data
 
-            elif ProcessDiameterMessage.is_valid_origin_state_id_avp(avp, self.connection):
-                self.checklist_optional_avps += 1
+    connection = association.connection
 
+    if destination_host is not None:
+        if destination_host != connection.local_node.host_name.encode("utf-8"):
+            logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter "\
+                          f"Request has Destination-Host AVP, however it was "\
+                          f"addressed to another node.")
+            
+            raise ProcessRequestException("Request does not comply with "\
+                                          "local consumption rules.")
 
-        if (self.checklist_mandatory_avps == 5) and (self.checklist_optional_avps >= 0 and self.checklist_optional_avps <= 7):
-            self.is_valid = True
-        else:
-            self.is_valid = False
+    elif destination_realm is not None:
+        if destination_realm != connection.local_node.realm.encode("utf-8"):
+            logging.debug(f"[{message.header.hop_by_hop.hex()}] Diameter "\
+                          f"Request does not include Destination-Host AVP, "\
+                          f"but it does include an invalid Destination-Realm "\
+                          f"AVP which was addressed to another realm.")
 
+            raise ProcessRequestException("Request does not comply with "\
+                                          "local consumption rules.")
 
-    def process_answer(self):
-        ProcessDiameterMessage.process_answer_from_existing_pending_request(self.association, self.message)
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_result_code_avp(avp):
-                self.checklist_mandatory_avps += 1
+    validation = validate_message(message)
+    if validation is not None and not validation.is_valid:
+        process_message_logging.warning(f"[{message.header.hop_by_hop.hex()}] "\
+                                        f"Diameter Request is missing "\
+                                        f"mandatory AVP(s): "\
+                                        f"{validation.missing_avps}")
 
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+    association.num_requests += 1
+    logging.debug(f"[{message.header.hop_by_hop.hex()}] Processed Diameter Request.")
 
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
 
-            elif ProcessDiameterMessage.is_valid_host_ip_address_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+def process_answer(association, message):
+    end_to_end_key = message.header.end_to_end.hex()
+    hop_by_hop_key = message.header.hop_by_hop.hex()
 
-            elif ProcessDiameterMessage.is_valid_vendor_id_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+    if end_to_end_key in association.end_to_end_identifiers:
+        request = association.pending_requests.get(hop_by_hop_key)
+        if request is not None:
+            if message.header.end_to_end == request.header.end_to_end:
+                association.pop_pending_request(hop_by_hop_key)
+                association.num_answers += 1
+    
+    logging.debug(f"[{message.header.hop_by_hop.hex()}] Processed Diameter Answer.")
 
-            elif ProcessDiameterMessage.is_valid_product_name_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
 
-            elif ProcessDiameterMessage.is_valid_origin_state_id_avp(avp, self.connection):
-                self.checklist_optional_avps += 1
+class ProcessDiameterMessage:
+    @staticmethod
+    def process_answer_from_existing_pending_request(association, message):
+        process_message_logging.debug("Processing Diameter Answer.")
 
+        end_to_end_key = message.header.end_to_end.hex()
+        hop_by_hop_key = message.header.hop_by_hop.hex()
 
-        if (self.checklist_mandatory_avps == 6) and (self.checklist_optional_avps >= 0 or self.checklist_optional_avps <= 7):
-            self.is_valid = True
-        else:
-            self.is_valid = False
+        if end_to_end_key in association.end_to_end_identifiers:
+            request = association.pending_requests.get(hop_by_hop_key)
+            if request is not None:
+                if message.header.end_to_end == request.header.end_to_end:
+                    association.pop_pending_request(hop_by_hop_key)
 
 
-class ProcessDeviceWatchdog():
+class ProcessBaseMessage():
     def __init__(self, association, message):
         self.association = association
         self.connection = association.connection
         self.message = message
 
-        self.checklist_mandatory_avps = 0
-        self.checklist_optional_avps = 0
-        self.checklist_error_avps = 0
+        self.validation = None
         self.is_valid = False
 
         if message.header.flags == FLAG_REQUEST:
@@ -396,103 +312,38 @@ class ProcessDeviceWatchdog():
             pass
 
 
-    def process_request(self):
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_origin_state_id_avp(avp, self.connection):
-                self.checklist_optional_avps += 1
-
+    def validate(self):
+        checks = get_peer_identity_checks(self.connection)
+        self.validation = validate_message(self.message, checks)
 
-        if (self.checklist_mandatory_avps == 2) and (self.checklist_optional_avps == 0 or self.checklist_optional_avps == 1):
-            self.is_valid = True
-        else:
+        if self.validation is None:
             self.is_valid = False
-
-
-    def process_answer(self):
-        ProcessDiameterMessage.process_answer_from_existing_pending_request(self.association, self.message)
-
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_result_code_avp(avp):
-                self.checklist_mandatory_avps += 1
-
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_origin_state_id_avp(avp, self.connection):
-                self.checklist_optional_avps += 1
-
-
-        if (self.checklist_mandatory_avps == 3) and (self.checklist_optional_avps == 0 or self.checklist_optional_avps == 1):
-            self.is_valid = True
         else:
-            self.is_valid = False
-
-
-class ProcessDisconnectPeer():
-    def __init__(self, association, message):
-        self.association = association
-        self.connection = association.connection
-        self.message = message
-
-        self.checklist_mandatory_avps = 0
-        self.checklist_optional_avps = 0
-        self.checklist_error_avps = 0
-        self.is_valid = False
+            self.is_valid = self.validation.is_valid
 
-        if message.header.flags == FLAG_REQUEST:
-            self.process_request()
-        elif message.header.flags == FLAG_RESPONSE:
-            self.process_answer()
-        else:
-            """What should we do if find an error?"""
-            pass
+        if not self.is_valid:
+            process_message_logging.debug(f"Result: FAIL. {self.validation}")
 
 
     def process_request(self):
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
-
-            elif ProcessDiameterMessage.is_valid_disconnect_cause_avp(avp):
-                self.checklist_mandatory_avps += 1
-
-
-        if (self.checklist_mandatory_avps == 3):
-            self.is_valid = True
-        else:
-            self.is_valid = False
+        self.validate()
 
 
     def process_answer(self):
         ProcessDiameterMessage.process_answer_from_existing_pending_request(self.association, self.message)
+        self.validate()
 
-        for avp in self.message.avps:
-            if ProcessDiameterMessage.is_valid_result_code_avp(avp):
-                self.checklist_mandatory_avps += 1
 
-            if ProcessDiameterMessage.is_valid_origin_host_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
+class ProcessCapabilityExchange(ProcessBaseMessage):
+    pass
 
-            elif ProcessDiameterMessage.is_valid_origin_realm_avp(avp, self.connection):
-                self.checklist_mandatory_avps += 1
 
+class ProcessDeviceWatchdog(ProcessBaseMessage):
+    pass
 
-        if (self.checklist_mandatory_avps == 3) and (self.checklist_error_avps >= 0 and self.checklist_error_avps <= 2):
-            self.is_valid = True
-        else:
-            self.is_valid = False
+
+class ProcessDisconnectPeer(ProcessBaseMessage):
+    pass
 
 
 class BaseMessageProcessor:
@@ -517,18 +368,20 @@ class BaseMessageProcessor:
 
     def create_answer(self, msg):
         if msg.header.command_code == CAPABILITIES_EXCHANGE_MESSAGE:
-            answer = self.association.base.cea
+            name = "cea"
     
         elif msg.header.command_code == DEVICE_WATCHDOG_MESSAGE:
-            answer = self.association.base.dwa
+            name = "dwa"
 
         elif msg.header.command_code == DISCONNECT_PEER_MESSAGE:
-            answer = self.association.base.dpa
-
-        answer.header.hop_by_hop = msg.header.hop_by_hop
-        answer.header.end_to_end = msg.header.end_to_end
-
-        return answer
+            name = "dpa"
+
+        #: Answers are created from the pre-encoded templates, so the shared
+        #: BaseMessages objects are never modified while answering requests.
+        base = self.association.base
+        return base.create_message(name,
+                                   hop_by_hop=msg.header.hop_by_hop,
+                                   end_to_end=msg.header.end_to_end)
 
 
     def check_message(self, msg):
@@ -12,11 +12,17 @@
     :license: MIT, see LICENSE for more details.
 """
 
+import copy
+import os
 from typing import Any, List
 
 from ._internal_utils import Connection
+from ._internal_utils import convert_to_4_bytes
+from .base import DiameterMessage
 from .constants import *
+from .exceptions import DiameterMessageError
 from .avps import AuthApplicationIdAVP
+from .avps import OriginStateIdAVP
 from .avps import VendorIdAVP
 from .avps import VendorSpecificApplicationIdAVP
 from .messages import CEA
@@ -27,6 +33,146 @@ from .messages import DPA
 from .messages import DPR
 
 
+#: Dynamically created TemplateMessage subclasses by message class.
+_template_classes = dict()
+
+
+class TemplateMessage:
+    """Mixin for DiameterMessage objects created by a MessageTemplate. Its
+    byte stream is the patched template buffer, so dump() does not go 
+    through the DiameterAVP objects again. Such objects are expected to be
+    sent as they are, and changes in their AVPs are not reflected in dump().
+    """
+    def dump(self) -> bytes:
+        return self._stream
+
+
+def get_template_class(message_class: type) -> type:
+    template_class = _template_classes.get(message_class)
+    if template_class is None:
+        template_class = type(message_class.__name__, 
+                              (TemplateMessage, message_class), 
+                              {"__module__": message_class.__module__})
+        _template_classes[message_class] = template_class
+    return template_class
+
+
+class MessageTemplate:
+    """Immutable wire template of a Diameter base message. The message is 
+    encoded once and the offsets of the fields which change per message are
+    recorded: Hop-by-Hop Identifier, End-to-End Identifier and the 
+    Origin-State-Id AVP data, if present.
+
+    New DiameterMessage objects are then created by patching a copy of the 
+    template buffer, which avoids both re-encoding every AVP and mutating 
+    the shared BaseMessages objects.
+
+    :param message: the DiameterMessage object to be used as template.
+
+    Usage::
+
+        >>> from bromelia.messages import DWA
+        >>> from bromelia.proxy import MessageTemplate
+        >>> template = MessageTemplate(DWA())
+        >>> dwa = template.create(hop_by_hop=dwr.header.hop_by_hop, 
+        ...                       end_to_end=dwr.header.end_to_end)
+    """
+
+    def __init__(self, message: DiameterMessage) -> None:
+        if not isinstance(message, DiameterMessage):
+            raise DiameterMessageError("invalid message. It MUST be a "\
+                                       "DiameterMessage subclass object to be "\
+                                       "used as template")
+
+        message.refresh()
+
+        self.message = message
+        self.message_class = get_template_class(message.__class__)
+        self.stream = message.dump()
+        self.is_request = message.header.is_request()
+
+        self.origin_state_id_offset = None
+        self.origin_state_id_index = None
+
+        index = DIAMETER_HEADER_LENGTH
+        for avp_index, avp in enumerate(message.avps):
+            if avp.code == ORIGIN_STATE_ID_AVP_CODE:
+                self.origin_state_id_offset = index + len(avp) - 4
+                self.origin_state_id_index = avp_index
+                break
+
+            index += len(avp) + (avp.get_padding_length() or 0)
+
+
+    def render(self,
+               hop_by_hop: bytes = None, 
+               end_to_end: bytes = None,
+               origin_state_id: Any = None) -> bytes:
+        """Returns the template byte stream with the given fields patched. 
+        Fields not provided keep the template value.
+        """
+        stream = bytearray(self.stream)
+
+        if hop_by_hop is not None:
+            stream[12:16] = hop_by_hop
+
+        if end_to_end is not None:
+            stream[16:20] = end_to_end
+
+        if origin_state_id is not None:
+            if self.origin_state_id_offset is None:
+                raise DiameterMessageError("template does not have "\
+                                           "Origin-State-Id AVP")
+
+            if isinstance(origin_state_id, int):
+                origin_state_id = convert_to_4_bytes(origin_state_id)
+
+            offset = self.origin_state_id_offset
+            stream[offset:offset+4] = origin_state_id
+
+        return bytes(stream)
+
+
+    def create(self,
+               hop_by_hop: bytes = None, 
+               end_to_end: bytes = None,
+               origin_state_id: Any = None) -> DiameterMessage:
+        """Creates a new DiameterMessage object from the template. Requests
+        get brand new Hop-by-Hop and End-to-End Identifiers unless they are
+        provided.
+        """
+        if self.is_request:
+            if hop_by_hop is None:
+                hop_by_hop = os.urandom(4)
+            if end_to_end is None:
+                end_to_end = os.urandom(4)
+
+        if isinstance(origin_state_id, int):
+            origin_state_id = convert_to_4_bytes(origin_state_id)
+
+        msg = self.message_class.__new__(self.message_class)
+        msg.__dict__.update(self.message.__dict__)
+
+        msg._stream = self.render(hop_by_hop, end_to_end, origin_state_id)
+        msg._avps = list(self.message._avps)
+        msg.header = copy.copy(self.message.header)
+
+        if hop_by_hop is not None:
+            msg.header.hop_by_hop = hop_by_hop
+
+        if end_to_end is not None:
+            msg.header.end_to_end = end_to_end
+
+        if origin_state_id is not None:
+            avp = OriginStateIdAVP(origin_state_id)
+            avp.flags = msg._avps[self.origin_state_id_index].flags
+
+            msg._avps[self.origin_state_id_index] = avp
+            msg.origin_state_id_avp = avp
+
+        return msg
+
+
 class BaseMessages:
     def __init__(self,
                  cer: CER,
@@ -42,6 +188,31 @@ class BaseMessages:
         self.dpr = dpr
         self.dpa = dpa
 
+        self._templates = dict()
+
+
+    def get_template(self, name: str) -> MessageTemplate:
+        """Returns the MessageTemplate object of a given base message by its
+        attribute name (e.g. "dwa"). Templates are compiled on first use and
+        compiled again if the base message has been replaced.
+        """
+        msg = getattr(self, name)
+        template = self._templates.get(name)
+
+        if template is None or template.message is not msg:
+            template = MessageTemplate(msg)
+            self._templates[name] = template
+
+        return template
+
+
+    def create_message(self, name: str, **kwargs) -> DiameterMessage:
+        """Creates a new DiameterMessage object of a given base message from
+        its MessageTemplate object. It accepts the same keyword arguments of 
+        MessageTemplate.create().
+        """
+        return self.get_template(name).create(**kwargs)
+
 
 class DiameterBaseProxy:
     def __init__(self, connection: Connection) -> None:
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.query
+    ~~~~~~~~~~~~~~
+
+    This module implements AVP path queries over Diameter Message byte
+    streams. A path such as "Subscription-Id/Subscription-Id-Data" is
+    compiled once into a list of (AVP Code, Vendor-ID) steps, which is then
+    walked straight over the wire bytes with DiameterAVP.scan(), so neither
+    DiameterMessage nor DiameterAVP objects are created.
+
+    Usage::
+
+        >>> from bromelia.query import find, find_all
+        >>> find(stream, "Subscription-Id/Subscription-Id-Data")
+        b'5511123456789'
+        >>> find_all(stream, "Multiple-Services-Credit-Control/Rating-Group")
+        [b'\\x00\\x00\\x00\\x01', b'\\x00\\x00\\x00\\x02']
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from collections import namedtuple
+from importlib import import_module
+from typing import Any, List
+
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .constants import DIAMETER_HEADER_LENGTH
+from .definitions import diameter_avps
+from .exceptions import AVPParsingError
+from .exceptions import DiameterAvpError
+
+
+#: A single step of a compiled AvpPath. The `code` field is None for the
+#: "*" wildcard, which matches any AVP. The `index` field is None unless a
+#: given occurrence has been selected, as in "Subscription-Id[1]".
+PathStep = namedtuple("PathStep", [
+                                    "code",
+                                    "vendor_id",
+                                    "index"
+                                ]
+)
+
+
+_step_pattern = re.compile(r"^(?P<name>[^\[\]]+)(\[(?P<index>\d+)\])?$")
+_numeric_pattern = re.compile(r"^(?P<code>\d+)(:(?P<vendor_id>\d+))?$")
+
+
+def _normalize_avp_name(name: str) -> str:
+    return name.replace("-", "").replace("_", "").lower()
+
+
+class AvpNameIndex:
+    """Maps AVP names to (AVP Code, Vendor-ID) pairs in Integer format. Names
+    are matched regardless of case, hyphens and underscores, so
+    "CC-Total-Octets", "cc_total_octets" and "CcTotalOctets" are the same.
+
+    The DiameterAVP subclasses are looked up first, followed by the base
+    AVP names in bromelia.definitions.
+    """
+    def __init__(self) -> None:
+        self.names = None
+        self.num_of_avps = 0
+        self._lock = threading.Lock()
+
+
+    def _get_names(self) -> dict:
+        names = dict()
+
+        for avp in diameter_avps:
+            names[_normalize_avp_name(avp["name"])] = (avp["id"], None)
+
+        #: Make sure the AVP classes are imported before going through them.
+        import_module(".avps", __package__).import_avp_modules()
+
+        avps = DiameterAVP.__subclasses__()
+        self.num_of_avps = len(avps)
+        for avp in avps:
+            if not avp.__name__.endswith("AVP") or avp.code is None:
+                continue
+
+            code = int.from_bytes(avp.code, byteorder="big")
+            vendor_id = None
+            if avp.vendor_id is not None:
+                vendor_id = int.from_bytes(avp.vendor_id, byteorder="big")
+
+            names[_normalize_avp_name(avp.__name__[:-3])] = (code, vendor_id)
+
+        return names
+
+
+    def get(self, name: str) -> tuple:
+        key = _normalize_avp_name(name)
+
+        with self._lock:
+            if self.names is None or (key not in self.names and
+                        self.num_of_avps != len(DiameterAVP.__subclasses__())):
+                self.names = self._get_names()
+
+        try:
+            return self.names[key]
+        except KeyError:
+            raise DiameterAvpError(f"unknown AVP name '{name}' in AVP path")
+
+
+names = AvpNameIndex()
+
+
+class AvpPath:
+    """Compiled AVP path query.
+
+    A path is made of steps separated by "/". Each step is either an AVP
+    name, an AVP Code optionally followed by its Vendor-ID (e.g. "1032" or
+    "1032:10415") or the "*" wildcard. Any step may select a single
+    occurrence among repeated AVPs with a zero-based index, such as
+    "Multiple-Services-Credit-Control[2]". Otherwise every occurrence is
+    followed.
+
+    Compiled paths are cached, so AvpPath.compile() may be called on every
+    query.
+
+    :param path: the AVP path to be compiled.
+    """
+
+    #: Compiled AvpPath objects by path.
+    paths = dict()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+        steps = list()
+        for token in path.strip("/").split("/"):
+            steps.append(self._compile_step(token.strip()))
+
+        self.steps = tuple(steps)
+
+
+    def __repr__(self) -> str:
+        return f"<AvpPath: {self.path}>"
+
+
+    @staticmethod
+    def _compile_step(token: str) -> PathStep:
+        match = _step_pattern.match(token)
+        if match is None:
+            raise DiameterAvpError(f"invalid AVP path step '{token}'")
+
+        name = match.group("name")
+        index = match.group("index")
+        if index is not None:
+            index = int(index)
+
+        if name == "*":
+            return PathStep(code=None, vendor_id=None, index=index)
+
+        numeric = _numeric_pattern.match(name)
+        if numeric is not None:
+            code = int(numeric.group("code"))
+            vendor_id = numeric.group("vendor_id")
+            if vendor_id is not None:
+                vendor_id = int(vendor_id)
+
+        else:
+            code, vendor_id = names.get(name)
+
+        return PathStep(code=code, vendor_id=vendor_id, index=index)
+
+
+    @classmethod
+    def compile(cls, path: str) -> AvpPath:
+        avp_path = cls.paths.get(path)
+        if avp_path is None:
+            avp_path = cls(path)
+            cls.paths[path] = avp_path
+
+        return avp_path
+
+
+    def _walk(self,
+              stream: Any,
+              start: int,
+              end: int,
+              depth: int,
+              results: list,
+              limit: int) -> None:
+        step = self.steps[depth]
+        is_last_step = (depth == len(self.steps) - 1)
+
+        occurrence = -1
+        for avp in DiameterAVP.scan(stream, start, end):
+            if step.code is not None:
+                if avp.code != step.code or avp.vendor_id != step.vendor_id:
+                    continue
+
+            occurrence += 1
+            if step.index is not None and occurrence != step.index:
+                continue
+
+            if is_last_step:
+                results.append(bytes(stream[avp.offset:
+                                            avp.offset + avp.data_length]))
+
+            elif step.code is None:
+                #: The wildcard may match AVPs which are not of type Grouped,
+                #: whose data cannot be walked through.
+                _results = list()
+                try:
+                    self._walk(stream,
+                               avp.offset,
+                               avp.offset + avp.data_length,
+                               depth + 1,
+                               _results,
+                               limit - len(results))
+                except AVPParsingError:
+                    _results = list()
+                results.extend(_results)
+
+            else:
+                self._walk(stream,
+                           avp.offset,
+                           avp.offset + avp.data_length,
+                           depth + 1,
+                           results,
+                           limit)
+
+            if len(results) >= limit or step.index is not None:
+                return
+
+
+    def find_all(self,
+                 stream: Any,
+                 offset: int = 0,
+                 limit: int = None) -> List[bytes]:
+        """Returns the AVP Data of every Diameter AVP matching the path in
+        the Diameter Message found at `offset` of a byte stream. A
+        DiameterMessage object is accepted as well.
+        """
+        if isinstance(stream, DiameterMessage):
+            stream, offset = stream.dump(), 0
+
+        stream = memoryview(stream)
+        end = offset + DiameterHeader.peek(stream, offset).length
+
+        results = list()
+        self._walk(stream,
+                   offset + DIAMETER_HEADER_LENGTH,
+                   min(end, len(stream)),
+                   0,
+                   results,
+                   limit or float("inf"))
+
+        return results
+
+
+    def find(self, stream: Any, offset: int = 0) -> bytes:
+        """Returns the AVP Data of the first Diameter AVP matching the path
+        in the Diameter Message found at `offset` of a byte stream, or None
+        if there is no such Diameter AVP.
+        """
+        results = self.find_all(stream, offset, limit=1)
+        if results:
+            return results[0]
+
+
+def find_all(stream: Any, path: str, offset: int = 0) -> List[bytes]:
+    return AvpPath.compile(path).find_all(stream, offset)
+
+
+def find(stream: Any, path: str, offset: int = 0) -> bytes:
+    return AvpPath.compile(path).find(stream, offset)
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.recorder
+    ~~~~~~~~~~~~~~~~~
+
+    This module implements the flight recorder of Diameter associations.
+    It keeps the last byte streams received from and sent to a peer, each
+    direction in a ring buffer of its own, bounded both by the number of
+    entries and by their size in bytes. Entries are the bytes objects read
+    from or handed to the transport connection, which hold one or more
+    Diameter Messages, so they are kept by reference and never copied.
+
+    The ring buffers are dumped on demand, or once the byte stream of the
+    peer cannot be parsed, into a pcap file with synthetic IP and TCP
+    headers, which Wireshark is able to open. Unlike DEBUG logging, which
+    hex-dumps every buffer, recording costs a deque append per buffer.
+
+    Usage::
+
+        >>> app = Diameter(config=config)
+        >>> app.start()
+        >>> app.association.dump_flight_recorder("incident.pcap")
+
+        $ wireshark incident.pcap
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import collections
+import heapq
+import ipaddress
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, List
+
+from .config import FLIGHT_RECORDER_DUMP_DIRECTORY
+from .config import FLIGHT_RECORDER_DUMP_INTERVAL
+from .config import FLIGHT_RECORDER_MAXIMUM_BYTES
+from .config import FLIGHT_RECORDER_MAXIMUM_ENTRIES
+from .exceptions import InvalidConfigValue
+from .pcap import Flow
+from .pcap import TraceRecord
+from .pcap import write_pcap
+
+
+recorder_logger = logging.getLogger("FlightRecorder")
+
+
+#: Addresses used in the pcap files for the nodes whose IP address is not
+#: known, such as the ones of loopback associations.
+DEFAULT_LOCAL_ADDRESS = ("127.0.0.1", 3868)
+DEFAULT_PEER_ADDRESS = ("127.0.0.2", 3868)
+
+
+#: Entries and bytes held by a FlightRecorder, by direction.
+RecorderStats = namedtuple("RecorderStats", [
+                                        "num_of_recv_entries",
+                                        "recv_bytes",
+                                        "num_of_sent_entries",
+                                        "sent_bytes",
+                                        "num_of_dumps"
+                                    ]
+)
+
+
+class RingBuffer:
+    """Last byte streams of one direction, along with their timestamps.
+    It is meant to be appended to by a single thread.
+
+    :param max_entries: the maximum number of byte streams kept.
+    :param max_bytes: the maximum number of bytes kept. The last byte
+        stream is kept even if it is larger.
+    """
+    __slots__ = ("entries", "max_bytes", "size")
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.entries = collections.deque(maxlen=max_entries)
+        self.max_bytes = max_bytes
+        self.size = 0
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def append(self, timestamp: float, data: bytes) -> None:
+        entries = self.entries
+        if len(entries) == entries.maxlen:
+            self.size -= len(entries[0][1])
+
+        entries.append((timestamp, data))
+        self.size += len(data)
+
+        while self.size > self.max_bytes and len(entries) > 1:
+            self.size -= len(entries.popleft()[1])
+
+
+    def get_entries(self) -> list:
+        #: deque.copy() holds the GIL, so it is consistent even while the
+        #: writer thread keeps on appending.
+        return list(self.entries.copy())
+
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.size = 0
+
+
+def get_address(address: tuple, default: tuple) -> tuple:
+    """Returns the (IP address, port) of a node to be written in pcap
+    files, falling back to `default` for whatever is unknown.
+    """
+    ip_address, port = address
+    try:
+        ip_address = ipaddress.ip_address(ip_address)
+    except ValueError:
+        ip_address = ipaddress.ip_address(default[0])
+
+    return (ip_address, port or default[1])
+
+
+class FlightRecorder:
+    """Flight recorder of a Diameter association.
+
+    :param max_entries: the maximum number of byte streams kept by
+        direction.
+    :param max_bytes: the maximum number of bytes kept by direction.
+    :param dump_directory: the directory the pcap files are dumped into
+        on errors, or None to dump them on demand only.
+    :param dump_interval: the minimum time, in seconds, between two dumps
+        on errors, so that a peer sending garbage cannot fill the disk.
+    :param clock: the function returning the current wall clock time.
+    """
+    def __init__(self,
+                 max_entries: int = FLIGHT_RECORDER_MAXIMUM_ENTRIES,
+                 max_bytes: int = FLIGHT_RECORDER_MAXIMUM_BYTES,
+                 dump_directory: str = FLIGHT_RECORDER_DUMP_DIRECTORY,
+                 dump_interval: float = FLIGHT_RECORDER_DUMP_INTERVAL,
+                 clock: Callable[[], float] = time.time) -> None:
+        if max_entries < 1 or max_bytes < 1:
+            raise InvalidConfigValue("max_entries and max_bytes MUST be "\
+                                     "positive")
+
+        self.recv_ring = RingBuffer(max_entries, max_bytes)
+        self.sent_ring = RingBuffer(max_entries, max_bytes)
+
+        self.dump_directory = dump_directory
+        self.dump_interval = dump_interval
+        self.clock = clock
+
+        self.num_of_dumps = 0
+        self.last_error_dump_time = None
+        self._lock = threading.Lock()
+
+
+    def record_recv(self, data: bytes) -> None:
+        """Records a byte stream received from the peer."""
+        self.recv_ring.append(self.clock(), data)
+
+
+    def record_sent(self, data: bytes) -> None:
+        """Records a byte stream sent to the peer."""
+        self.sent_ring.append(self.clock(), data)
+
+
+    def get_records(self,
+                    local_address: tuple = DEFAULT_LOCAL_ADDRESS,
+                    peer_address: tuple = DEFAULT_PEER_ADDRESS
+    ) -> List[TraceRecord]:
+        """Returns the byte streams of both directions as TraceRecord
+        objects in time order, with TCP flows between the (IP address,
+        port) of both nodes.
+        """
+        local_ip_address, local_port = get_address(local_address,
+                                                   DEFAULT_LOCAL_ADDRESS)
+        peer_ip_address, peer_port = get_address(peer_address,
+                                                 DEFAULT_PEER_ADDRESS)
+
+        if local_ip_address.version != peer_ip_address.version:
+            local_ip_address, local_port = get_address(("", local_port),
+                                                       DEFAULT_LOCAL_ADDRESS)
+            peer_ip_address, peer_port = get_address(("", peer_port),
+                                                     DEFAULT_PEER_ADDRESS)
+
+        recv_flow = Flow("TCP", str(peer_ip_address), peer_port,
+                                str(local_ip_address), local_port, 0)
+        sent_flow = Flow("TCP", str(local_ip_address), local_port,
+                                str(peer_ip_address), peer_port, 0)
+
+        recv_records = [TraceRecord(timestamp, recv_flow, data)
+                            for timestamp, data in self.recv_ring.get_entries()]
+        sent_records = [TraceRecord(timestamp, sent_flow, data)
+                            for timestamp, data in self.sent_ring.get_entries()]
+
+        return list(heapq.merge(recv_records,
+                                sent_records,
+                                key=lambda record: record.timestamp))
+
+
+    def dump(self,
+             path: str,
+             local_address: tuple = DEFAULT_LOCAL_ADDRESS,
+             peer_address: tuple = DEFAULT_PEER_ADDRESS) -> int:
+        """Writes the byte streams recorded into a pcap file and returns
+        the number of packets written.
+        """
+        records = self.get_records(local_address, peer_address)
+
+        with self._lock:
+            num_of_packets = write_pcap(path, records)
+            self.num_of_dumps += 1
+
+        recorder_logger.info(f"Dumped {len(records)} byte stream(s) into "\
+                             f"{path}")
+        return num_of_packets
+
+
+    def dump_on_error(self,
+                      name: str,
+                      local_address: tuple = DEFAULT_LOCAL_ADDRESS,
+                      peer_address: tuple = DEFAULT_PEER_ADDRESS) -> str:
+        """Dumps the byte streams recorded into a pcap file named after
+        `name` in the dump directory, unless there is no dump directory or
+        the last dump on error is too recent. Returns the path of the pcap
+        file, or None.
+        """
+        if self.dump_directory is None:
+            return None
+
+        now = self.clock()
+        with self._lock:
+            if self.last_error_dump_time is not None and \
+                    now - self.last_error_dump_time < self.dump_interval:
+                return None
+            self.last_error_dump_time = now
+
+        name = "".join(char if char.isalnum() or char in "-_." else "_"
+                                                            for char in name)
+        path = os.path.join(self.dump_directory,
+                            f"{name}-{time.strftime('%Y%m%d%H%M%S')}.pcap")
+
+        try:
+            self.dump(path, local_address, peer_address)
+        except OSError:
+            recorder_logger.exception(f"Could not dump into {path}")
+            return None
+
+        return path
+
+
+    def clear(self) -> None:
+        self.recv_ring.clear()
+        self.sent_ring.clear()
+
+
+    def get_stats(self) -> RecorderStats:
+        return RecorderStats(num_of_recv_entries=len(self.recv_ring),
+                             recv_bytes=self.recv_ring.size,
+                             num_of_sent_entries=len(self.sent_ring),
+                             sent_bytes=self.sent_ring.size,
+                             num_of_dumps=self.num_of_dumps)
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.redirect
+    ~~~~~~~~~~~~~~~~~
+
+    This module implements the cache of redirect indications of Sections
+    6.12 to 6.14 of IETF RFC 6733. An answer with the DIAMETER_REDIRECT_-
+    INDICATION Result-Code lists the Redirect-Host AVPs the request should
+    have been sent to. Unless its Redirect-Host-Usage is DONT_CACHE, such
+    hosts are used for later requests within the same scope (session, realm,
+    application, ...) for Redirect-Max-Cache-Time seconds, which saves a
+    round trip to the redirect agent for each one. Relay agents follow them
+    in bromelia.routing, and clients by Bromelia.send_request().
+
+    Usage::
+
+        >>> from bromelia.redirect import RedirectCache
+        >>> from bromelia.redirect import get_redirect_indication
+        >>> cache = RedirectCache()
+        >>> indication = get_redirect_indication(answer.dump())
+        >>> if indication is not None:
+        ...     cache.add(indication, request_avps, application_id)
+        >>> cache.get(other_request_avps, application_id)
+        ('pcrf2.bromelia.org', 'pcrf3.bromelia.org')
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections import namedtuple
+from typing import Any, Callable
+
+from .avps import DestinationHostAVP
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .config import REDIRECT_CACHE_MAXIMUM_SIZE
+from .constants import DIAMETER_HEADER_LENGTH
+from .constants import DIAMETER_REDIRECT_INDICATION
+from .constants import REDIRECT_HOST_AVP_CODE
+from .constants import REDIRECT_HOST_USAGE_AVP_CODE
+from .constants import REDIRECT_HOST_USAGE_ALL_APPLICATION
+from .constants import REDIRECT_HOST_USAGE_ALL_HOST
+from .constants import REDIRECT_HOST_USAGE_ALL_REALM
+from .constants import REDIRECT_HOST_USAGE_ALL_SESSION
+from .constants import REDIRECT_HOST_USAGE_ALL_USER
+from .constants import REDIRECT_HOST_USAGE_DONT_CACHE
+from .constants import REDIRECT_HOST_USAGE_REALM_AND_APPLICATION
+from .constants import REDIRECT_MAX_CACHE_TIME_AVP_CODE
+from .constants import RESULT_CODE_AVP_CODE
+
+
+_redirect_host_avp_code = int.from_bytes(REDIRECT_HOST_AVP_CODE,
+                                         byteorder="big")
+_redirect_host_usage_avp_code = int.from_bytes(REDIRECT_HOST_USAGE_AVP_CODE,
+                                               byteorder="big")
+_redirect_max_cache_time_avp_code = int.from_bytes(
+                                            REDIRECT_MAX_CACHE_TIME_AVP_CODE,
+                                            byteorder="big")
+_result_code_avp_code = int.from_bytes(RESULT_CODE_AVP_CODE, byteorder="big")
+
+_redirect_avp_codes = frozenset((_redirect_host_avp_code,
+                                 _redirect_host_usage_avp_code,
+                                 _redirect_max_cache_time_avp_code,
+                                 _result_code_avp_code))
+
+_unsigned32_struct = struct.Struct(">I")
+
+_flag_error_bit = 0x20
+
+
+#: Redirect-Host-Usage values, in the order of precedence of Section 6.13 of
+#: IETF RFC 6733 for requests matching cached redirects of several usages.
+USAGE_PRECEDENCE = tuple(int.from_bytes(usage, byteorder="big") for usage in (
+                                    REDIRECT_HOST_USAGE_ALL_SESSION,
+                                    REDIRECT_HOST_USAGE_ALL_USER,
+                                    REDIRECT_HOST_USAGE_REALM_AND_APPLICATION,
+                                    REDIRECT_HOST_USAGE_ALL_REALM,
+                                    REDIRECT_HOST_USAGE_ALL_APPLICATION,
+                                    REDIRECT_HOST_USAGE_ALL_HOST
+))
+
+_dont_cache = int.from_bytes(REDIRECT_HOST_USAGE_DONT_CACHE, byteorder="big")
+_all_session = USAGE_PRECEDENCE[0]
+_all_user = USAGE_PRECEDENCE[1]
+_realm_and_application = USAGE_PRECEDENCE[2]
+_all_realm = USAGE_PRECEDENCE[3]
+_all_application = USAGE_PRECEDENCE[4]
+_all_host = USAGE_PRECEDENCE[5]
+
+
+#: Redirect-Host AVPs of an answer, given as the host names of their
+#: DiameterURI values, along with the Redirect-Host-Usage and Redirect-Max-
+#: Cache-Time values as int.
+RedirectIndication = namedtuple("RedirectIndication", [
+                                        "hosts",
+                                        "usage",
+                                        "max_cache_time"
+                                    ]
+)
+
+
+def get_host_from_uri(uri: bytes) -> str:
+    """Returns the FQDN of a DiameterURI, as in 'aaa://host.example.com:
+    3868;transport=tcp'.
+    """
+    uri = uri.decode("utf-8")
+
+    _, _, host = uri.partition("://")
+    return host.split(";", 1)[0].split(":", 1)[0]
+
+
+def get_redirect_indication(stream: bytes) -> RedirectIndication:
+    """Returns the RedirectIndication of a Diameter Answer byte stream, or
+    None if it is not a redirect one. Answers without E flag are skipped
+    without walking their AVPs, since DIAMETER_REDIRECT_INDICATION is a
+    protocol error.
+    """
+    if not stream[4] & _flag_error_bit:
+        return None
+
+    result_code = None
+    hosts = list()
+    usage = _dont_cache
+    max_cache_time = None
+
+    end = min(DiameterHeader.peek(stream).length, len(stream))
+
+    for avp in DiameterAVP.scan(stream, DIAMETER_HEADER_LENGTH, end,
+                                _redirect_avp_codes):
+        if avp.vendor_id is not None:
+            continue
+
+        if avp.code == _result_code_avp_code:
+            result_code = bytes(stream[avp.offset:avp.offset + avp.data_length])
+        elif avp.code == _redirect_host_avp_code:
+            hosts.append(get_host_from_uri(
+                            stream[avp.offset:avp.offset + avp.data_length]))
+        elif avp.data_length == 4:
+            value = _unsigned32_struct.unpack_from(stream, avp.offset)[0]
+
+            if avp.code == _redirect_host_usage_avp_code:
+                usage = value
+            else:
+                max_cache_time = value
+
+    if result_code != DIAMETER_REDIRECT_INDICATION or not hosts:
+        return None
+
+    return RedirectIndication(hosts=tuple(hosts),
+                              usage=usage,
+                              max_cache_time=max_cache_time)
+
+
+def get_redirect_key(usage: int, request_avps: Any, application_id: int) -> tuple:
+    """Returns the key of the scope of a Redirect-Host-Usage for a request,
+    or None if the request is out of any such scope. The `request_avps` is
+    any object with the session_id, user_name, destination_realm and
+    destination_host attributes, such as bromelia.routing.RoutingAvps.
+    """
+    if usage == _all_session:
+        value = request_avps.session_id
+    elif usage == _all_user:
+        value = request_avps.user_name
+    elif usage == _realm_and_application:
+        value = request_avps.destination_realm
+        if value is not None:
+            value = (value, application_id)
+    elif usage == _all_realm:
+        value = request_avps.destination_realm
+    elif usage == _all_application:
+        value = application_id
+    elif usage == _all_host:
+        value = request_avps.destination_host
+    else:
+        return None
+
+    if value is None:
+        return None
+    return usage, value
+
+
+def create_redirected_request(request: Any, host: str) -> Any:
+    """Returns a copy of a Diameter Request to be sent again to a Redirect-
+    Host, which has its Destination-Host AVP set to `host` and a new Hop-by-
+    Hop Identifier. The End-to-End Identifier is kept, as the request is the
+    same one.
+    """
+    redirected = request.copy()
+
+    if redirected.has_avp("destination_host_avp"):
+        redirected.update_avp("destination_host_avp", host)
+    else:
+        redirected.append(DestinationHostAVP(host))
+
+    redirected.header.hop_by_hop = os.urandom(4)
+    redirected.refresh()
+
+    return redirected
+
+
+class RedirectCache:
+    """Cache of the redirect indications received. Entries expire after the
+    Redirect-Max-Cache-Time of their answer, and the least recently used
+    ones are evicted once there are `max_size` of them. It is safe to be
+    shared by threads.
+
+    :param max_size: the maximum number of cached redirects.
+    :param clock: a function returning the current time, in seconds.
+    """
+    def __init__(self,
+                 max_size: int = REDIRECT_CACHE_MAXIMUM_SIZE,
+                 clock: Callable = time.monotonic) -> None:
+        self.max_size = max_size
+        self.clock = clock
+
+        self.lock = threading.Lock()
+        self.clear()
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries = OrderedDict()
+            self.usages = set()
+
+            self.hits = 0
+            self.misses = 0
+
+
+    def add(self,
+            indication: RedirectIndication,
+            request_avps: Any,
+            application_id: int) -> bool:
+        """Caches a redirect indication received in answer to a request.
+        Returns False if it is not to be cached, as for DONT_CACHE usage.
+        """
+        if not indication.max_cache_time:
+            return False
+
+        key = get_redirect_key(indication.usage, request_avps, application_id)
+        if key is None:
+            return False
+
+        expires = self.clock() + indication.max_cache_time
+
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (expires, indication.hosts)
+            self.usages.add(indication.usage)
+
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        return True
+
+
+    def get(self, request_avps: Any, application_id: int) -> tuple:
+        """Returns the redirect hosts for a request, or None if there is no
+        cached redirect for it.
+        """
+        if not self.entries:
+            return None
+
+        now = self.clock()
+
+        with self.lock:
+            for usage in USAGE_PRECEDENCE:
+                if usage not in self.usages:
+                    continue
+
+                key = get_redirect_key(usage, request_avps, application_id)
+                entry = self.entries.get(key)
+                if entry is None:
+                    continue
+
+                expires, hosts = entry
+                if expires <= now:
+                    del self.entries[key]
+                    continue
+
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return hosts
+
+            self.misses += 1
+            return None
+
+
+    def remove(self, host: str) -> int:
+        """Removes the cached redirects to a host, as when it is no longer
+        reachable. Returns how many were removed.
+        """
+        with self.lock:
+            keys = [key for key, (_, hosts) in self.entries.items()
+                                                        if host in hosts]
+            for key in keys:
+                del self.entries[key]
+
+        return len(keys)
+
+
+    def purge(self) -> int:
+        """Removes the expired entries and returns how many were removed."""
+        now = self.clock()
+
+        with self.lock:
+            keys = [key for key, (expires, _) in self.entries.items()
+                                                        if expires <= now]
+            for key in keys:
+                del self.entries[key]
+
+        return len(keys)
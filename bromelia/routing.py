@@ -0,0 +1,813 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.routing
+    ~~~~~~~~~~~~~~~~
+
+    This module implements the Diameter Relay and Proxy agent of Section 2.8
+    of IETF RFC 6733. Requests not addressed to the local node are forwarded
+    to a peer chosen by Destination-Host or, failing that, by a realm routing
+    table of Destination-Realm and Application-Id, as in Section 6.1.6. The
+    answers find their way back by the Hop-by-Hop Identifier.
+
+    Redirect indications received for forwarded requests are cached by their
+    Redirect-Host-Usage, and the request is sent again to a Redirect-Host
+    peer. Later requests within the same scope go straight to such peer.
+
+    Relayed messages are never decoded: the request wire bytes are forwarded
+    with a new Hop-by-Hop Identifier and a Route-Record AVP appended, and the
+    answer ones with the original Hop-by-Hop Identifier restored.
+
+    Usage::
+
+        >>> from bromelia.routing import RelayAgent
+        >>> from bromelia.routing import RoutingTable
+        >>> from bromelia.server import DiameterServer
+        >>> table = RoutingTable()
+        >>> table.add_route("epc.bromelia.org", ["hss1.bromelia.org",
+        ...                                      "hss2.bromelia.org"],
+        ...                 application_id=DIAMETER_APPLICATION_S6a)
+        >>> table.add_route("*", ["dra.partner.org"])
+        >>> server = DiameterServer(config)
+        >>> with RelayAgent(table, server=server) as agent:
+        ...     while True:
+        ...         incoming = agent.get_message()
+        ...         agent.send_message(create_answer(incoming.message),
+        ...                            incoming.peer)
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import itertools
+import logging
+import queue
+import random
+import struct
+import threading
+import time
+from collections import OrderedDict
+from collections import namedtuple
+from typing import Any, Callable, List, Type
+
+from .avps import OriginHostAVP
+from .avps import OriginRealmAVP
+from .avps import ResultCodeAVP
+from .avps import RouteRecordAVP
+from .avps import SessionIdAVP
+from .base import DiameterAVP
+from .base import DiameterAnswer
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .config import LISTENING_TICKER
+from .config import RELAY_REQUEST_TTL
+from .constants import DESTINATION_HOST_AVP_CODE
+from .constants import DESTINATION_REALM_AVP_CODE
+from .constants import DIAMETER_HEADER_LENGTH
+from .constants import DIAMETER_LOOP_DETECTED
+from .constants import DIAMETER_REALM_NOT_SERVED
+from .constants import DIAMETER_UNABLE_TO_DELIVER
+from .constants import ROUTE_RECORD_AVP_CODE
+from .constants import SESSION_ID_AVP_CODE
+from .constants import USER_NAME_AVP_CODE
+from .exceptions import DiameterApplicationError
+from .exceptions import DiameterAssociationError
+from .exceptions import AVPParsingError
+from .redirect import RedirectCache
+from .redirect import get_redirect_indication
+from .server import IncomingMessage
+
+routing_logger = logging.getLogger("RelayAgent")
+
+
+_destination_host_avp_code = int.from_bytes(DESTINATION_HOST_AVP_CODE,
+                                            byteorder="big")
+_destination_realm_avp_code = int.from_bytes(DESTINATION_REALM_AVP_CODE,
+                                             byteorder="big")
+_route_record_avp_code = int.from_bytes(ROUTE_RECORD_AVP_CODE, byteorder="big")
+_session_id_avp_code = int.from_bytes(SESSION_ID_AVP_CODE, byteorder="big")
+_user_name_avp_code = int.from_bytes(USER_NAME_AVP_CODE, byteorder="big")
+
+_routing_avp_codes = frozenset((_destination_host_avp_code,
+                                _destination_realm_avp_code,
+                                _route_record_avp_code,
+                                _session_id_avp_code,
+                                _user_name_avp_code))
+
+#: Diameter Header Version/Message Length word.
+_one_word = struct.Struct(">I")
+
+#: Realm of the wildcard routes, which match any Destination-Realm.
+WILDCARD_REALM = "*"
+
+
+#: Routing AVPs of a Diameter Request. The Route-Record values are given as
+#: a tuple. Session-Id and User-Name are the keys of the redirect cache.
+RoutingAvps = namedtuple("RoutingAvps", [
+                                        "destination_host",
+                                        "destination_realm",
+                                        "route_records",
+                                        "session_id",
+                                        "user_name"
+                                    ]
+)
+
+
+Route = namedtuple("Route", [
+                                "realm",
+                                "application_id",
+                                "peers"
+                            ]
+)
+
+
+#: Request forwarded by a RelayAgent, kept by its new Hop-by-Hop Identifier
+#: until the answer comes back. The request byte stream, as received, and
+#: its RoutingAvps are kept to send it again on a redirect indication.
+ForwardedRequest = namedtuple("ForwardedRequest", [
+                                        "peer",
+                                        "hop_by_hop",
+                                        "expires",
+                                        "request",
+                                        "routing"
+                                    ]
+)
+
+
+def get_routing_avps(stream: bytes) -> RoutingAvps:
+    """Returns the Destination-Host, Destination-Realm, Route-Record,
+    Session-Id and User-Name values of a Diameter Request byte stream. No
+    DiameterAVP object is created.
+    """
+    destination_host = None
+    destination_realm = None
+    route_records = list()
+    session_id = None
+    user_name = None
+
+    end = min(DiameterHeader.peek(stream).length, len(stream))
+
+    for code, _, vendor_id, offset, data_length, _ in DiameterAVP.scan(
+                                                    stream,
+                                                    DIAMETER_HEADER_LENGTH,
+                                                    end,
+                                                    _routing_avp_codes):
+        #: Routing AVPs are base protocol ones, which have no Vendor-Id.
+        if vendor_id is not None:
+            continue
+
+        value = bytes(stream[offset:offset + data_length])
+
+        if code == _destination_realm_avp_code:
+            destination_realm = value
+        elif code == _destination_host_avp_code:
+            destination_host = value
+        elif code == _route_record_avp_code:
+            route_records.append(value)
+        elif code == _session_id_avp_code:
+            session_id = value
+        else:
+            user_name = value
+
+    return RoutingAvps(destination_host=destination_host,
+                       destination_realm=destination_realm,
+                       route_records=tuple(route_records),
+                       session_id=session_id,
+                       user_name=user_name)
+
+
+def forward_request(stream: bytes, hop_by_hop: int, avps: bytes = b"") -> bytes:
+    """Returns the byte stream of a Diameter Request with the Hop-by-Hop
+    Identifier replaced and the encoded `avps` appended, such as a
+    Route-Record AVP.
+    """
+    length = _one_word.unpack_from(stream, 0)[0] & 0xFFFFFF
+
+    return b"".join((_one_word.pack(stream[0] << 24 | length + len(avps)),
+                     stream[4:12],
+                     _one_word.pack(hop_by_hop),
+                     stream[16:length],
+                     avps))
+
+
+def forward_answer(stream: bytes, hop_by_hop: bytes) -> bytes:
+    """Returns the byte stream of a Diameter Answer with the Hop-by-Hop
+    Identifier replaced.
+    """
+    return stream[:12] + hop_by_hop + stream[16:]
+
+
+def create_error_answer(request: Type[DiameterMessage],
+                        result_code: bytes,
+                        origin_host: str,
+                        origin_realm: str) -> DiameterAnswer:
+    """Returns the answer with the E flag set, as in Section 7.1.3 of IETF
+    RFC 6733, for a request that cannot be routed.
+    """
+    session_id = DiameterMessage.find_avp(request.dump(), _session_id_avp_code)
+
+    avps = list()
+    if session_id is not None:
+        avps.append(SessionIdAVP(session_id))
+
+    avps.extend([
+                    OriginHostAVP(origin_host),
+                    OriginRealmAVP(origin_realm),
+                    ResultCodeAVP(result_code)
+    ])
+
+    #: The answer has the P flag of the request, as in Section 6.2.
+    answer = DiameterAnswer(header=request.header, avps=avps)
+    answer.header.flags = request.header.flags
+    answer.header.set_request_bit(False)
+    if answer.header.is_retransmitted():
+        answer.header.set_retransmitted_bit(False)
+    answer.header.set_error_bit(True)
+
+    return answer
+
+
+class RoutingTable:
+    """Realm routing table of Section 2.7 of IETF RFC 6733. Each route maps
+    a Destination-Realm and an Application-Id to a group of peers, given by
+    their Origin-Host, which are used by round robin.
+
+    Routes with realm '*' match any realm, and routes with no Application-Id
+    match any application. The most specific route is chosen, so the one
+    with both realm '*' and no Application-Id is the default route.
+    """
+    def __init__(self) -> None:
+        self.routes = dict()
+        self._counters = dict()
+
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+
+    @staticmethod
+    def get_key(realm: Any, application_id: Any) -> tuple:
+        if isinstance(realm, str):
+            realm = realm.encode("utf-8")
+
+        if isinstance(application_id, bytes):
+            application_id = int.from_bytes(application_id, byteorder="big")
+
+        return realm, application_id
+
+
+    def add_route(self,
+                  realm: str,
+                  peers: List[str],
+                  application_id: Any = None) -> Route:
+        """Adds a route, replacing any other one for the same realm and
+        Application-Id.
+
+        :param realm: the Destination-Realm, or '*' for any realm.
+        :param peers: the Origin-Host of the peers to forward requests to.
+        :param application_id: the Application-Id, given as 4 bytes or int,
+            or None for any application.
+        """
+        if not peers:
+            raise DiameterApplicationError("A route must have at least one "\
+                                           "peer")
+
+        key = RoutingTable.get_key(realm, application_id)
+        route = Route(realm=key[0],
+                      application_id=key[1],
+                      peers=tuple(peers))
+
+        self.routes[key] = route
+        self._counters[key] = itertools.count()
+
+        return route
+
+
+    def remove_route(self, realm: str, application_id: Any = None) -> None:
+        key = RoutingTable.get_key(realm, application_id)
+
+        if self.routes.pop(key, None) is None:
+            raise DiameterApplicationError(f"There is no route for realm "\
+                                           f"'{realm}' and Application-Id "\
+                                           f"{key[1]}")
+        self._counters.pop(key, None)
+
+
+    def get_route(self, realm: bytes, application_id: Any) -> Route:
+        """Returns the route of a Destination-Realm and Application-Id, or
+        None if there is no such route.
+        """
+        realm, application_id = RoutingTable.get_key(realm, application_id)
+        wildcard = WILDCARD_REALM.encode("utf-8")
+
+        for key in ((realm, application_id),
+                    (realm, None),
+                    (wildcard, application_id),
+                    (wildcard, None)):
+            route = self.routes.get(key)
+            if route is not None:
+                return route
+
+        return None
+
+
+    def select_peer(self, route: Route, is_available: Callable) -> str:
+        """Returns the next peer of a route, by round robin, for which
+        `is_available` returns True, or None if there is no such peer.
+        """
+        counter = self._counters.get((route.realm, route.application_id))
+        start = next(counter) if counter is not None else 0
+
+        for index in range(len(route.peers)):
+            peer = route.peers[(start + index) % len(route.peers)]
+            if is_available(peer):
+                return peer
+
+        return None
+
+
+class ForwardingTable:
+    """Hop-by-Hop Identifiers of the requests forwarded, mapped back to the
+    peer they came from and their original Hop-by-Hop Identifier. Entries
+    whose answer has not come back after `ttl` seconds are dropped.
+    """
+    def __init__(self,
+                 ttl: float = RELAY_REQUEST_TTL,
+                 clock: Callable = time.monotonic) -> None:
+        self.ttl = ttl
+        self.clock = clock
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.expired = 0
+
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+    def add(self,
+            hop_by_hop: int,
+            peer: Any,
+            original_hop_by_hop: bytes,
+            request: bytes = None,
+            routing: RoutingAvps = None) -> None:
+        now = self.clock()
+
+        with self.lock:
+            self.entries[hop_by_hop] = ForwardedRequest(peer=peer,
+                                                        hop_by_hop=original_hop_by_hop,
+                                                        expires=now + self.ttl,
+                                                        request=request,
+                                                        routing=routing)
+
+            #: Every entry has the same ttl, so the oldest ones come first.
+            while self.entries:
+                entry = next(iter(self.entries.values()))
+                if entry.expires > now:
+                    break
+                self.entries.popitem(last=False)
+                self.expired += 1
+
+
+    def pop(self, hop_by_hop: int) -> ForwardedRequest:
+        with self.lock:
+            entry = self.entries.pop(hop_by_hop, None)
+
+        if entry is None or entry.expires <= self.clock():
+            return None
+        return entry
+
+
+class RelayAgent:
+    """Diameter Relay agent, or Proxy agent if a `proxy_handler` is given.
+
+    Peers are the ones connected to a DiameterServer and the Diameter
+    objects in CLIENT mode given, which are started and closed along with
+    the agent. Requests addressed to the local node are not forwarded and
+    are returned by get_message(), as are the answers to requests not
+    forwarded by the agent.
+
+    :param routing_table: the RoutingTable object.
+    :param server: the DiameterServer object, if any.
+    :param clients: the Diameter objects connected to other peers, if any.
+    :param proxy_handler: a function called with each request to be
+        forwarded, fully decoded, returning the DiameterMessage object to
+        be forwarded instead, or None to drop it. Such decoding takes most
+        of the time of forwarding a request.
+    :param ttl: the time, in seconds, to wait for the answer of a forwarded
+        request.
+    :param redirect_cache: the RedirectCache object. A new one is created
+        if not given.
+    """
+    def __init__(self,
+                 routing_table: RoutingTable,
+                 server: Any = None,
+                 clients: List[Any] = None,
+                 proxy_handler: Callable = None,
+                 ttl: float = RELAY_REQUEST_TTL,
+                 redirect_cache: RedirectCache = None) -> None:
+        if server is None and not clients:
+            raise DiameterApplicationError("RelayAgent needs either a "\
+                                           "DiameterServer or Diameter "\
+                                           "clients")
+
+        self.routing_table = routing_table
+        self.server = server
+        self.clients = list(clients or [])
+        self.proxy_handler = proxy_handler
+
+        if server is not None:
+            self.host_name = server.connection.local_node.host_name
+            self.realm = server.connection.local_node.realm
+            server.relay = True
+        else:
+            self.host_name = self.clients[0].config["LOCAL_NODE_HOSTNAME"]
+            self.realm = self.clients[0].config["LOCAL_NODE_REALM"]
+
+        for client in self.clients:
+            client.relay = True
+            if client.association is not None:
+                client.association.relay = True
+
+        self._local_host_name = self.host_name.encode("utf-8")
+        self._local_realm = self.realm.encode("utf-8")
+
+        self.forwarding_table = ForwardingTable(ttl)
+        if redirect_cache is None:
+            redirect_cache = RedirectCache()
+        self.redirect_cache = redirect_cache
+        self._hop_by_hop = itertools.count(random.getrandbits(32))
+        self._route_records = dict()
+
+        self.num_forwarded_requests = 0
+        self.num_forwarded_answers = 0
+        self.num_rejected_requests = 0
+        self.num_redirected_requests = 0
+
+        self._recv_messages = queue.Queue()
+        self._stop_threads = threading.Event()
+        self._threads = list()
+
+
+    def get_peers(self) -> dict:
+        """Returns the open peers by Origin-Host."""
+        peers = dict()
+        for client in self.clients:
+            if client.is_open():
+                peers[client.host_name] = client
+
+        if self.server is not None:
+            for peer in self.server.peers:
+                peers[peer.host_name] = peer
+
+        return peers
+
+
+    def get_route_record(self, peer: Any) -> bytes:
+        """Returns the encoded Route-Record AVP with the identity of a peer,
+        which is appended to the requests received from it.
+        """
+        route_record = self._route_records.get(peer.host_name)
+        if route_record is None:
+            route_record = RouteRecordAVP(peer.host_name).dump()
+            self._route_records[peer.host_name] = route_record
+
+        return route_record
+
+
+    def get_next_hop(self, peer: Any, msg: Type[DiameterMessage], routing: RoutingAvps) -> tuple:
+        """Returns the (peer, Result-Code) tuple for a request received from
+        `peer`. The peer is None if the request is to be processed locally
+        or answered with the Result-Code.
+        """
+        if self._local_host_name in routing.route_records:
+            return None, DIAMETER_LOOP_DETECTED
+
+        if routing.destination_host == self._local_host_name:
+            return None, None
+
+        peers = self.get_peers()
+
+        if routing.destination_host is not None:
+            next_hop = peers.get(routing.destination_host.decode("utf-8"))
+            if next_hop is not None:
+                return next_hop, None
+
+        #: Cached redirects take precedence over the realm routing table.
+        if self.redirect_cache:
+            hosts = self.redirect_cache.get(routing, msg.header.application_id)
+            if hosts is not None:
+                next_hop = self.select_redirect_host(hosts, peers, peer)
+                if next_hop is not None:
+                    return next_hop, None
+
+        if routing.destination_realm is None:
+            return None, None
+
+        route = self.routing_table.get_route(routing.destination_realm,
+                                             msg.header.application_id)
+        if route is None:
+            if routing.destination_realm == self._local_realm:
+                return None, None
+            return None, DIAMETER_REALM_NOT_SERVED
+
+        host_name = self.routing_table.select_peer(route,
+                            lambda host_name: host_name in peers and \
+                                              host_name != peer.host_name)
+        if host_name is None:
+            return None, DIAMETER_UNABLE_TO_DELIVER
+
+        return peers[host_name], None
+
+
+    @staticmethod
+    def select_redirect_host(hosts: tuple, peers: dict, *excluded: Any) -> Any:
+        """Returns the first open peer of the Redirect-Host values, other
+        than the `excluded` ones, or None if there is no such peer.
+        """
+        for host_name in hosts:
+            next_hop = peers.get(host_name)
+            if next_hop is not None and next_hop not in excluded:
+                return next_hop
+
+        return None
+
+
+    def route_request(self, peer: Any, msg: Type[DiameterMessage]) -> None:
+        stream = msg.dump()
+        hop_by_hop = msg.header.hop_by_hop
+
+        try:
+            routing = get_routing_avps(stream)
+        except AVPParsingError:
+            routing_logger.exception(f"[{hop_by_hop.hex()}] Cannot route "\
+                                     f"Diameter Request")
+            return
+
+        next_hop, result_code = self.get_next_hop(peer, msg, routing)
+
+        if next_hop is None:
+            if result_code is None:
+                self._recv_messages.put(IncomingMessage(peer, msg))
+                return
+
+            routing_logger.debug(f"[{hop_by_hop.hex()}] Rejecting Diameter "\
+                                 f"Request with Result-Code "\
+                                 f"{int.from_bytes(result_code, byteorder='big')}")
+
+            self.num_rejected_requests += 1
+            self.send_message(create_error_answer(msg,
+                                                  result_code,
+                                                  self.host_name,
+                                                  self.realm),
+                              peer)
+            return
+
+        if self.proxy_handler is not None:
+            msg = self.proxy_handler(DiameterMessage.load(stream)[0])
+            if msg is None:
+                return
+            stream = msg.dump()
+
+        if not self.forward_request(peer, stream, hop_by_hop, routing, next_hop):
+            self.num_rejected_requests += 1
+            self.send_message(create_error_answer(msg,
+                                                  DIAMETER_UNABLE_TO_DELIVER,
+                                                  self.host_name,
+                                                  self.realm),
+                              peer)
+
+
+    def forward_request(self,
+                        peer: Any,
+                        stream: bytes,
+                        hop_by_hop: bytes,
+                        routing: RoutingAvps,
+                        next_hop: Any,
+                        redirectable: bool = True) -> bool:
+        """Forwards the byte stream of a request received from `peer` to
+        `next_hop`. Returns False if the next hop is not connected. If not
+        `redirectable`, a redirect indication in answer to it is forwarded
+        back as any other answer.
+        """
+        new_hop_by_hop = next(self._hop_by_hop) & 0xFFFFFFFF
+        self.forwarding_table.add(new_hop_by_hop,
+                                  peer,
+                                  hop_by_hop,
+                                  stream if redirectable else None,
+                                  routing)
+
+        #: The request has been checked on receipt, so the AVPs layout is
+        #: not checked again.
+        forwarded_msg = DiameterMessage.load(forward_request(stream,
+                                                             new_hop_by_hop,
+                                                             self.get_route_record(peer)),
+                                             lazy=True,
+                                             trusted=True)[0]
+
+        try:
+            self.send_message(forwarded_msg, next_hop)
+        except DiameterAssociationError:
+            self.forwarding_table.pop(new_hop_by_hop)
+            return False
+
+        self.num_forwarded_requests += 1
+        routing_logger.debug(f"[{hop_by_hop.hex()}] Forwarded Diameter "\
+                             f"Request to {next_hop.host_name}")
+        return True
+
+
+    def redirect_request(self,
+                         peer: Any,
+                         stream: bytes,
+                         forwarded: ForwardedRequest) -> bool:
+        """Handles the answer byte stream of a forwarded request, received
+        from `peer`, if it is a redirect indication. The redirect is cached
+        and the request is forwarded to a Redirect-Host peer, only once, so
+        redirect agents pointing at each other cannot make it loop. Returns
+        False if it is not a redirect indication or there is no Redirect-Host
+        peer open, so the answer is to be forwarded back instead.
+        """
+        if forwarded.request is None:
+            return False
+
+        try:
+            indication = get_redirect_indication(stream)
+        except AVPParsingError:
+            return False
+
+        if indication is None:
+            return False
+
+        application_id = forwarded.request[8:12]
+        self.redirect_cache.add(indication, forwarded.routing, application_id)
+
+        next_hop = self.select_redirect_host(indication.hosts,
+                                             self.get_peers(),
+                                             peer,
+                                             forwarded.peer)
+        if next_hop is None:
+            return False
+
+        if not self.forward_request(forwarded.peer,
+                                    forwarded.request,
+                                    forwarded.hop_by_hop,
+                                    forwarded.routing,
+                                    next_hop,
+                                    redirectable=False):
+            return False
+
+        self.num_redirected_requests += 1
+        routing_logger.debug(f"[{forwarded.hop_by_hop.hex()}] Diameter "\
+                             f"Request redirected by {peer.host_name} to "\
+                             f"{next_hop.host_name}")
+        return True
+
+
+    def route_answer(self, peer: Any, msg: Type[DiameterMessage]) -> None:
+        hop_by_hop = int.from_bytes(msg.header.hop_by_hop, byteorder="big")
+
+        forwarded = self.forwarding_table.pop(hop_by_hop)
+        if forwarded is None:
+            self._recv_messages.put(IncomingMessage(peer, msg))
+            return
+
+        stream = msg.dump()
+        if self.redirect_request(peer, stream, forwarded):
+            return
+
+        stream = forward_answer(stream, forwarded.hop_by_hop)
+
+        forwarded_msg = DiameterMessage.load(stream, lazy=True, trusted=True)[0]
+
+        try:
+            self.send_message(forwarded_msg, forwarded.peer)
+        except DiameterAssociationError:
+            routing_logger.warning(f"[{forwarded.hop_by_hop.hex()}] "\
+                                   f"Cannot forward Diameter Answer. Peer "\
+                                   f"{forwarded.peer.host_name} is gone")
+            return
+
+        self.num_forwarded_answers += 1
+
+
+    def handle_message(self, peer: Any, msg: Type[DiameterMessage]) -> None:
+        if msg.header.is_request():
+            self.route_request(peer, msg)
+        else:
+            self.route_answer(peer, msg)
+
+
+    def _handle_message(self, peer: Any, msg: Type[DiameterMessage]) -> None:
+        try:
+            self.handle_message(peer, msg)
+        except Exception:
+            routing_logger.exception(f"[{msg.header.hop_by_hop.hex()}] "\
+                                     f"Cannot route Diameter Message from "\
+                                     f"{peer.host_name}")
+
+
+    def start(self) -> None:
+        if self._threads:
+            raise DiameterApplicationError("Cannot start the agent. It is "\
+                                           "already running")
+
+        self._stop_threads.clear()
+
+        if self.server is not None and self.server.listener is None:
+            self.server.start()
+
+        for client in self.clients:
+            if client.is_closed():
+                client.start()
+
+        if self.server is not None:
+            self._threads.append(threading.Thread(name="relay_agent_server",
+                                                  target=self._route_server_messages,
+                                                  daemon=True))
+
+        for client in self.clients:
+            self._threads.append(threading.Thread(name="relay_agent_client",
+                                                  target=self._route_client_messages,
+                                                  args=(client,),
+                                                  daemon=True))
+
+        for thread in self._threads:
+            thread.start()
+
+
+    def _route_server_messages(self) -> None:
+        while not self._stop_threads.is_set():
+            incoming = self.server.get_message(timeout=LISTENING_TICKER * 10)
+            if incoming is not None:
+                self._handle_message(incoming.peer, incoming.message)
+
+
+    def _route_client_messages(self, client: Any) -> None:
+        while not self._stop_threads.is_set():
+            #: A new DiameterAssociation is created on every reconnection.
+            association = client.association
+            if association is None:
+                time.sleep(LISTENING_TICKER * 10)
+                continue
+
+            try:
+                msg = association.postprocess_recv_messages.get(
+                                                timeout=LISTENING_TICKER * 10)
+            except queue.Empty:
+                continue
+
+            self._handle_message(client, msg)
+
+
+    def stop(self) -> None:
+        self._stop_threads.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = list()
+
+        for client in self.clients:
+            if client.is_open():
+                client.close()
+
+        if self.server is not None and self.server.listener is not None:
+            self.server.close()
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+    def get_message(self, timeout: float = None) -> IncomingMessage:
+        """Returns the next IncomingMessage object to be processed locally,
+        or None if there is none within `timeout` seconds.
+        """
+        try:
+            return self._recv_messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+    def send_message(self, msg: Type[DiameterMessage], peer: Any) -> None:
+        """Sends a Diameter Message to a peer, given either as a Peer or
+        Diameter object, or by its Origin-Host.
+        """
+        if isinstance(peer, str):
+            peers = self.get_peers()
+            if peer not in peers:
+                raise DiameterApplicationError(f"There is no open peer with "\
+                                               f"Origin-Host '{peer}'")
+            peer = peers[peer]
+
+        association = peer.association
+        if association is None or not association.is_connected():
+            raise DiameterAssociationError(f"There is no transport "\
+                                           f"connection up for peer "\
+                                           f"{peer.host_name}")
+
+        association.put_message_into_send_queue(msg)
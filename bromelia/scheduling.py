@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.scheduling
+    ~~~~~~~~~~~~~~~~~~~
+
+    This module implements the priority scheduling of the Diameter Messages
+    waiting to be sent by a Diameter association. Base protocol messages, as
+    the DWR/DWA, always go first, so a burst of application traffic cannot
+    delay them until the peer declares the connection down. The remaining
+    messages go by their DRMP AVP priority of IETF RFC 7944, and messages of
+    the same priority are shared among the Diameter applications by weighted
+    round robin.
+
+    Usage::
+
+        >>> from bromelia.scheduling import PriorityMessageQueue
+        >>> send_queue = PriorityMessageQueue()
+        >>> send_queue.set_weight(DIAMETER_APPLICATION_Gx, 4)
+        >>> send_queue.put(ccr)
+        >>> send_queue.put(dwa)
+        >>> send_queue.get()
+        <Diameter Message: 280 [DWA], 0 [Diameter common message], 3 AVP(s)>
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Type
+
+from .base import DiameterMessage
+from .config import DRMP_DEFAULT_PRIORITY
+from .constants import DIAMETER_APPLICATION_DEFAULT
+from .constants import DRMP_AVP_CODE
+from .constants import DRMP_PRIORITY_15
+from .exceptions import InvalidConfigValue
+
+
+_drmp_avp_code = int.from_bytes(DRMP_AVP_CODE, byteorder="big")
+
+#: Scheduling classes: the base protocol one, followed by a class for each
+#: DRMP priority, from PRIORITY_0 to PRIORITY_15.
+BASE_PROTOCOL_CLASS = 0
+NUMBER_OF_CLASSES = int.from_bytes(DRMP_PRIORITY_15, byteorder="big") + 2
+
+
+def get_drmp_priority(msg: Type[DiameterMessage],
+                      default: int = DRMP_DEFAULT_PRIORITY) -> int:
+    """Returns the DRMP priority of a Diameter Message, or `default` if it
+    has no valid DRMP AVP. For messages loaded lazily, the DRMP AVP is
+    looked up in the wire bytes.
+    """
+    if msg.__dict__.get("_pending_stream") is not None:
+        data = DiameterMessage.find_avp(msg.dump(), _drmp_avp_code)
+
+    elif msg.has_avp("drmp_avp"):
+        data = msg.drmp_avp.data
+
+    else:
+        return default
+
+    if data is None or len(data) != 4:
+        return default
+
+    priority = int.from_bytes(data, byteorder="big")
+    if priority >= NUMBER_OF_CLASSES - 1:
+        return default
+
+    return priority
+
+
+class _SchedulingClass:
+    """Messages of a scheduling class, queued by Diameter application and
+    served by weighted round robin.
+    """
+    __slots__ = ("queues", "active", "credit")
+
+    def __init__(self) -> None:
+        self.queues = dict()
+        self.active = deque()
+        self.credit = 0
+
+
+    def put(self, application_id: bytes, msg: Any, first: bool) -> None:
+        app_queue = self.queues.get(application_id)
+        if app_queue is None:
+            app_queue = self.queues[application_id] = deque()
+
+        if first:
+            if not self.active or self.active[0] != application_id:
+                if app_queue:
+                    self.active.remove(application_id)
+                self.active.appendleft(application_id)
+                self.credit = 0
+
+        elif not app_queue:
+            self.active.append(application_id)
+
+        if first:
+            app_queue.appendleft(msg)
+        else:
+            app_queue.append(msg)
+
+
+    def get(self, weights: dict) -> Any:
+        application_id = self.active[0]
+        app_queue = self.queues[application_id]
+        msg = app_queue.popleft()
+
+        self.credit += 1
+        if not app_queue:
+            self.active.popleft()
+            self.credit = 0
+
+        elif self.credit >= weights.get(application_id, 1):
+            self.active.rotate(-1)
+            self.credit = 0
+
+        return msg
+
+
+class PriorityMessageQueue:
+    """Drop-in replacement of queue.Queue for the Diameter Messages to be
+    sent by a Diameter association.
+
+    Classes are served by strict priority: base protocol messages first,
+    then DRMP PRIORITY_0 up to PRIORITY_15. Messages without DRMP AVP get
+    the `default_priority`, which is a local policy. Within a class, up to
+    `weight` messages of a Diameter application are sent before moving to
+    the next one.
+
+    :param default_priority: the DRMP priority of messages without it.
+    :param weights: the weight of each Application-Id, given as 4 bytes.
+        Applications not found there have weight 1.
+    """
+    def __init__(self,
+                 default_priority: int = DRMP_DEFAULT_PRIORITY,
+                 weights: dict = None) -> None:
+        self.default_priority = default_priority
+        self.weights = dict(weights or {})
+
+        self.classes = [_SchedulingClass() for _ in range(NUMBER_OF_CLASSES)]
+        self.num_messages = 0
+
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+
+
+    def __len__(self) -> int:
+        return self.num_messages
+
+
+    def set_weight(self, application_id: bytes, weight: int) -> None:
+        if not isinstance(weight, int) or weight < 1:
+            raise InvalidConfigValue("`weight` must be a positive int")
+
+        with self.lock:
+            self.weights[application_id] = weight
+
+
+    def get_class(self, msg: Type[DiameterMessage]) -> int:
+        if msg.header.application_id == DIAMETER_APPLICATION_DEFAULT:
+            return BASE_PROTOCOL_CLASS
+
+        return get_drmp_priority(msg, self.default_priority) + 1
+
+
+    def _put(self, msg: Type[DiameterMessage], first: bool) -> None:
+        scheduling_class = self.classes[self.get_class(msg)]
+
+        with self.not_empty:
+            scheduling_class.put(msg.header.application_id, msg, first)
+            self.num_messages += 1
+            self.not_empty.notify()
+
+
+    def put(self, msg: Type[DiameterMessage]) -> None:
+        self._put(msg, first=False)
+
+
+    def requeue(self, msg: Type[DiameterMessage]) -> None:
+        """Puts back a message got from the queue, so it is the next one of
+        its class to be got.
+        """
+        self._put(msg, first=True)
+
+
+    def get(self, block: bool = True, timeout: float = None) -> Any:
+        """Removes and returns the next message to be sent. It raises
+        queue.Empty if there is none, as queue.Queue.get() does.
+        """
+        with self.not_empty:
+            if not block:
+                if not self.num_messages:
+                    raise queue.Empty
+
+            elif timeout is None:
+                while not self.num_messages:
+                    self.not_empty.wait()
+
+            else:
+                end = time.monotonic() + timeout
+                while not self.num_messages:
+                    remaining = end - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty
+                    self.not_empty.wait(remaining)
+
+            for scheduling_class in self.classes:
+                if scheduling_class.active:
+                    self.num_messages -= 1
+                    return scheduling_class.get(self.weights)
+
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+
+    def empty(self) -> bool:
+        return self.num_messages == 0
+
+
+    def qsize(self) -> int:
+        return self.num_messages
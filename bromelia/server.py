@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.server
+    ~~~~~~~~~~~~~~~
+
+    This module implements the Diameter server engine. As opposed to the
+    Diameter class in SERVER mode, which serves the first connecting peer
+    only, a DiameterServer keeps accepting connections and runs its own
+    DiameterAssociation and PeerStateMachine objects for each one. Peers
+    are identified by the Origin-Host AVP of their CER.
+
+    A ShardedServer runs several DiameterServer objects, one per process,
+    listening on the same address with SO_REUSEPORT, so the incoming
+    connections are spread among them by the kernel.
+
+    Usage::
+
+        >>> from bromelia.server import DiameterServer
+        >>> config = {"LOCAL_NODE_HOSTNAME": "hss.bromelia.org",
+        ...           "LOCAL_NODE_REALM": "bromelia.org",
+        ...           "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+        ...           "LOCAL_NODE_PORT": 3868,
+        ...           "APPLICATIONS": [{"vendor_id": VENDOR_ID_3GPP,
+        ...                             "app_id": DIAMETER_APPLICATION_S6a}]}
+        >>> with DiameterServer(config) as server:
+        ...     while True:
+        ...         incoming = server.get_message()
+        ...         incoming.peer.send_message(create_answer(incoming.message))
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import multiprocessing
+import queue
+import socket
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Callable, List, Type
+
+from ._internal_utils import _convert_config_to_connection_obj
+from ._internal_utils import Connection
+from ._internal_utils import DEFAULT_HOST_NAME
+from ._internal_utils import DEFAULT_IP_ADDRESS
+from ._internal_utils import DEFAULT_REALM
+from ._internal_utils import PeerNode
+from ._internal_utils import resolve_default
+from .base import DiameterMessage
+from .config import DiameterLogging
+from .config import LISTENING_TICKER
+from .config import I_OPEN, R_OPEN
+from .constants import DIAMETER_AGENT_SERVER_MODE
+from .constants import DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK
+from .constants import DIAMETER_AGENT_TRANSPORT_TYPE_TCP
+from .exceptions import DiameterApplicationError
+from .exceptions import DiameterAssociationError
+from .exceptions import InvalidConfigKey
+from .proxy import DiameterBaseProxy
+from .setup import DiameterAssociation
+from .statemachine import PeerStateMachine
+from .transport import TcpListener
+from .transport import listen_loopback
+from .utils import is_base_answer
+from .utils import is_base_request
+
+server_logger = logging.getLogger("DiameterServer")
+
+
+#: Diameter Message received by a DiameterServer, along with the Peer
+#: object it came from, which is the one to send the answer to.
+IncomingMessage = namedtuple("IncomingMessage", [
+                                                    "peer",
+                                                    "message"
+                                                ]
+)
+
+
+class Peer:
+    """Diameter peer connected to a DiameterServer. It has its own
+    DiameterAssociation and PeerStateMachine objects, and its received
+    messages are forwarded to the DiameterServer queue.
+    """
+    def __init__(self, server: "DiameterServer", sock: socket.socket) -> None:
+        self.server = server
+        self.association = DiameterAssociation(server.connection,
+                                               server.base,
+                                               sock)
+        self.association.allowed_peers = server.allowed_peers
+        self.association.relay = server.relay
+        self.state_machine = PeerStateMachine(self.association)
+
+        self._stop_threads = threading.Event()
+
+
+    def __repr__(self) -> str:
+        return f"<Peer: {self.host_name}, {self.get_current_state()}>"
+
+
+    @property
+    def host_name(self) -> str:
+        """Origin-Host of the peer, or None before its CER is received."""
+        return self.association.connection.peer_node.host_name
+
+
+    def start(self) -> None:
+        self.state_machine.start()
+        self.association.start()
+
+        threading.Thread(name="peer_recv_messages",
+                         target=self._forward_messages,
+                         daemon=True).start()
+
+
+    def _forward_messages(self) -> None:
+        recv_messages = self.association.postprocess_recv_messages
+
+        while not self._stop_threads.is_set():
+            try:
+                msg = recv_messages.get(timeout=LISTENING_TICKER * 10)
+            except queue.Empty:
+                continue
+
+            self.server._recv_messages.put(IncomingMessage(self, msg))
+
+
+    def get_current_state(self) -> str:
+        return self.state_machine.get_current_state()
+
+
+    def is_open(self) -> bool:
+        return self.get_current_state() in (I_OPEN, R_OPEN)
+
+
+    def is_alive(self) -> bool:
+        transport = self.association.transport
+        return transport is not None and \
+               transport.is_connected and \
+               not transport._stop_threads
+
+
+    def send_message(self, msg: Type[DiameterMessage]) -> None:
+        if msg.header.is_request() and is_base_request(msg) or \
+           not msg.header.is_request() and is_base_answer(msg):
+            raise DiameterApplicationError("Cannot send a Base protocol "\
+                                           "message")
+
+        self.association.put_message_into_send_queue(msg)
+
+
+    def close(self) -> None:
+        """Starts the Disconnect-Peer procedure if the peer is open."""
+        if self.is_open():
+            self.state_machine.close()
+
+
+    def stop(self) -> None:
+        """Stops the threads of a peer which is no longer alive, closing
+        its connection if it is still up.
+        """
+        self._stop_threads.set()
+        self.state_machine.is_running = False
+
+        if self.association.transport is not None:
+            try:
+                self.association.close()
+            except (ConnectionError, DiameterAssociationError):
+                pass
+
+
+class DiameterServer:
+    """Diameter server which accepts any number of peers.
+
+    :param config: the local node configuration, with the same keys of
+        the Diameter class config but the MODE and PEER_NODE_* ones. Only
+        the TCP and LOOPBACK transport types are supported.
+    :param reuse_port: whether to listen with SO_REUSEPORT, so other
+        processes may listen on the same address.
+    :param allowed_peers: the Origin-Host values of the peers allowed to
+        connect, or None for any peer.
+    :param max_peers: the maximum number of connected peers, or None for
+        no limit. Connections above it are closed as soon as accepted.
+    """
+    default_config = {
+            "APPLICATIONS": [],
+            "TRANSPORT_TYPE": "TCP",
+            "LOCAL_NODE_HOSTNAME": DEFAULT_HOST_NAME,
+            "LOCAL_NODE_REALM": DEFAULT_REALM,
+            "LOCAL_NODE_IP_ADDRESS": DEFAULT_IP_ADDRESS,
+            "LOCAL_NODE_PORT": 3868,
+            "WATCHDOG_TIMEOUT": 60
+    }
+
+
+    def __init__(self,
+                 config: dict = None,
+                 reuse_port: bool = False,
+                 allowed_peers: List[str] = None,
+                 max_peers: int = None,
+                 debug: bool = False,
+                 is_logging: bool = False,
+                 app_name: str = None) -> None:
+
+        self.logging = DiameterLogging(debug, is_logging, app_name)
+
+        self.connection = self.make_connection(config or {})
+        self.base = DiameterBaseProxy(self.connection).get_default_messages()
+
+        if reuse_port and \
+           self.connection.transport_type != DIAMETER_AGENT_TRANSPORT_TYPE_TCP:
+            raise DiameterApplicationError("SO_REUSEPORT is only available "\
+                                           "for TCP transport type")
+
+        self.reuse_port = reuse_port
+        self.allowed_peers = set(allowed_peers) if allowed_peers else None
+        self.max_peers = max_peers
+
+        #: Set by a RelayAgent, which routes the requests received.
+        self.relay = False
+
+        self.listener = None
+        self._peers = list()
+        self._peers_lock = threading.Lock()
+        self._recv_messages = queue.Queue()
+        self._stop_threads = threading.Event()
+        self._accept_thread = None
+
+
+    def make_connection(self, config: dict) -> Connection:
+        for key in config.keys():
+            if key not in self.default_config:
+                raise InvalidConfigKey(f"Invalid config key '{key}' found")
+
+        config = {key: resolve_default(config.get(key, value))
+                            for key, value in self.default_config.items()}
+
+        if config["TRANSPORT_TYPE"] not in (DIAMETER_AGENT_TRANSPORT_TYPE_TCP,
+                                            DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK):
+            raise DiameterApplicationError("DiameterServer supports either "\
+                                           "'TCP' or 'LOOPBACK' transport "\
+                                           "type")
+
+        #: The Peer Node is set by each DiameterAssociation upon CER, so the
+        #: local node address stands in for it while validating the config.
+        connection = _convert_config_to_connection_obj({
+                **config,
+                "MODE": DIAMETER_AGENT_SERVER_MODE,
+                "PEER_NODE_HOSTNAME": None,
+                "PEER_NODE_REALM": None,
+                "PEER_NODE_IP_ADDRESS": config["LOCAL_NODE_IP_ADDRESS"],
+                "PEER_NODE_PORT": None
+        })
+
+        return connection._replace(name="bromelia-server",
+                                   peer_node=PeerNode(host_name=None,
+                                                      realm=None,
+                                                      ip_address=None,
+                                                      port=None))
+
+
+    @property
+    def peers(self) -> List[Peer]:
+        """Peers that have completed the Capabilities-Exchange."""
+        with self._peers_lock:
+            return [peer for peer in self._peers if peer.is_open()]
+
+
+    def get_peer(self, host_name: str) -> Peer:
+        for peer in self.peers:
+            if peer.host_name == host_name:
+                return peer
+
+        raise DiameterApplicationError(f"There is no open peer with "\
+                                       f"Origin-Host '{host_name}'")
+
+
+    def start(self) -> None:
+        if self._accept_thread is not None:
+            raise DiameterApplicationError("Cannot start the server. It is "\
+                                           "already running")
+
+        local_node = self.connection.local_node
+        if self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_TCP:
+            self.listener = TcpListener(local_node.ip_address,
+                                        local_node.port,
+                                        reuse_port=self.reuse_port)
+            self.listener.start()
+        else:
+            self.listener = listen_loopback(local_node.ip_address,
+                                            local_node.port)
+
+        self._stop_threads.clear()
+        self._accept_thread = threading.Thread(name="diameter_server_accept",
+                                               target=self._accept,
+                                               daemon=True)
+        self._accept_thread.start()
+
+        server_logger.info(f"Listening on {local_node.ip_address}:"\
+                           f"{local_node.port}")
+
+
+    def _accept(self) -> None:
+        while not self._stop_threads.is_set():
+            sock = self.listener.accept(timeout=LISTENING_TICKER * 10)
+            self.remove_dead_peers()
+
+            if sock is None:
+                continue
+
+            with self._peers_lock:
+                num_of_peers = len(self._peers)
+
+            if self.max_peers is not None and num_of_peers >= self.max_peers:
+                server_logger.info("Maximum number of peers reached. "\
+                                   "Closing new connection")
+                sock.close()
+                continue
+
+            peer = Peer(self, sock)
+            peer.start()
+
+            with self._peers_lock:
+                self._peers.append(peer)
+
+
+    def remove_dead_peers(self) -> None:
+        with self._peers_lock:
+            dead_peers = [peer for peer in self._peers if not peer.is_alive()]
+            for peer in dead_peers:
+                self._peers.remove(peer)
+
+        for peer in dead_peers:
+            server_logger.debug(f"Removing {peer}")
+            peer.stop()
+
+
+    def close(self, timeout: float = 5) -> None:
+        """Stops accepting connections and disconnects every peer. Peers
+        still connected after `timeout` seconds are closed by force.
+        """
+        if self._accept_thread is None:
+            raise DiameterApplicationError("Cannot close the server. It is "\
+                                           "not running")
+
+        self._stop_threads.set()
+        self._accept_thread.join()
+        self._accept_thread = None
+
+        for peer in self.peers:
+            peer.close()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.remove_dead_peers()
+            with self._peers_lock:
+                if not self._peers:
+                    break
+            time.sleep(LISTENING_TICKER)
+
+        with self._peers_lock:
+            peers, self._peers = self._peers, list()
+
+        for peer in peers:
+            peer.stop()
+
+        self.listener.close()
+        self.listener = None
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def get_message(self, timeout: float = None) -> IncomingMessage:
+        """Returns the next IncomingMessage object received from any peer,
+        or None if there is none within `timeout` seconds.
+        """
+        try:
+            return self._recv_messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+    def send_message(self,
+                     msg: Type[DiameterMessage],
+                     peer: Any) -> None:
+        """Sends a Diameter Message to a peer, given either as a Peer
+        object or by its Origin-Host.
+        """
+        if not isinstance(peer, Peer):
+            peer = self.get_peer(peer)
+
+        peer.send_message(msg)
+
+
+def _run_shard(config: dict,
+               handler: Callable,
+               stop_event: Any,
+               kwargs: dict) -> None:
+    with DiameterServer(config, reuse_port=True, **kwargs) as server:
+        while not stop_event.is_set():
+            incoming = server.get_message(timeout=LISTENING_TICKER * 10)
+            if incoming is None:
+                continue
+
+            answer = handler(incoming.message)
+            if answer is not None:
+                incoming.peer.send_message(answer)
+
+
+class ShardedServer:
+    """Runs a DiameterServer per process on the same TCP address, with
+    SO_REUSEPORT. Each received request is passed to `handler`, which
+    returns the answer to be sent back, or None. As it runs in the child
+    processes, `handler` must be a module-level function.
+
+    :param config: the DiameterServer config.
+    :param handler: the function called with each received DiameterMessage
+        object.
+    :param processes: the number of processes.
+    """
+    def __init__(self,
+                 config: dict,
+                 handler: Callable,
+                 processes: int = None,
+                 **kwargs) -> None:
+        self.config = config
+        self.handler = handler
+        self.num_of_processes = processes or multiprocessing.cpu_count()
+        self.kwargs = kwargs
+
+        self.processes = list()
+        self.stop_event = multiprocessing.Event()
+
+
+    def start(self) -> None:
+        self.stop_event.clear()
+
+        for index in range(self.num_of_processes):
+            process = multiprocessing.Process(name=f"diameter_server_{index}",
+                                              target=_run_shard,
+                                              args=(self.config,
+                                                    self.handler,
+                                                    self.stop_event,
+                                                    self.kwargs),
+                                              daemon=True)
+            process.start()
+            self.processes.append(process)
+
+
+    def close(self, timeout: float = 10) -> None:
+        self.stop_event.set()
+
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+        self.processes = list()
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
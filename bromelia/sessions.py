@@ -0,0 +1,761 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.sessions
+    ~~~~~~~~~~~~~~~~~
+
+    This module implements the session state store of stateful Diameter
+    applications, as the Gx, Gy and Rx sessions of a PCRF or an OCS. The
+    state of each session is kept by its Session-Id, which is looked up in
+    O(1) time.
+
+    Sessions are spread over shards, each one with its own lock, so threads
+    handling different sessions seldom wait for each other. They expire
+    after their lifetime, as given by the Session-Timeout or Authorization-
+    Lifetime AVPs of Section 8 of IETF RFC 6733, and the least recently used
+    ones are evicted once the store is full.
+
+    The SharedMemorySessionStore keeps the sessions in a multiprocessing
+    shared memory segment instead, so every Worker process sees the same
+    sessions.
+
+    Usage::
+
+        >>> from bromelia.sessions import SessionStore
+        >>> from bromelia.sessions import get_session_lifetime
+        >>> sessions = SessionStore()
+        >>> sessions.set(ccr.session_id_avp.data,
+        ...              {"cc_request_number": 0},
+        ...              lifetime=get_session_lifetime(cca))
+        >>> sessions.get(ccr.session_id_avp.data)
+        {'cc_request_number': 0}
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import multiprocessing
+import os
+import pickle
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections import namedtuple
+from typing import Any, Callable, Type
+
+from .base import DiameterMessage
+from .config import SESSION_STORE_MAXIMUM_KEY_SIZE
+from .config import SESSION_STORE_MAXIMUM_MEMORY
+from .config import SESSION_STORE_MAXIMUM_SIZE
+from .config import SESSION_STORE_MAXIMUM_VALUE_SIZE
+from .config import SESSION_STORE_PROBES
+from .config import SESSION_STORE_SHARDS
+from .constants import AUTH_GRACE_PERIOD_AVP_CODE
+from .constants import AUTHORIZATION_LIFETIME_AVP_CODE
+from .constants import SESSION_TIMEOUT_AVP_CODE
+from .exceptions import DiameterApplicationError
+from .exceptions import InvalidConfigValue
+from .timers import get_timer_wheel
+
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    #: Python 3.7 has no shared memory support.
+    shared_memory = None
+
+
+_session_timeout_avp_code = int.from_bytes(SESSION_TIMEOUT_AVP_CODE,
+                                           byteorder="big")
+_authorization_lifetime_avp_code = int.from_bytes(
+                                            AUTHORIZATION_LIFETIME_AVP_CODE,
+                                            byteorder="big")
+_auth_grace_period_avp_code = int.from_bytes(AUTH_GRACE_PERIOD_AVP_CODE,
+                                             byteorder="big")
+
+#: Authorization-Lifetime value for authorizations that never expire.
+_infinite_lifetime = 0xFFFFFFFF
+
+#: Estimated bytes used by each entry besides the Session-Id and the state:
+#: the OrderedDict slot and link and the entry list.
+_entry_overhead = sys.getsizeof([None] * 3) + 100
+
+_missing = object()
+
+
+SessionStoreStats = namedtuple("SessionStoreStats", [
+                                        "size",
+                                        "memory_usage",
+                                        "hits",
+                                        "misses",
+                                        "expired",
+                                        "evictions"
+                                    ]
+)
+
+
+def get_session_lifetime(msg: Type[DiameterMessage]) -> float:
+    """Returns the lifetime, in seconds, of the session of a Diameter Message
+    by its Session-Timeout and Authorization-Lifetime AVPs, plus the Auth-
+    Grace-Period for the latter, as in Sections 8.9 to 8.13 of IETF RFC
+    6733. The shortest one is returned, or None if the session does not
+    expire.
+    """
+    stream = msg.dump()
+    lifetimes = list()
+
+    session_timeout = DiameterMessage.find_avp(stream, _session_timeout_avp_code)
+    if session_timeout is not None:
+        session_timeout = int.from_bytes(session_timeout, byteorder="big")
+        if session_timeout != 0:
+            lifetimes.append(session_timeout)
+
+    lifetime = DiameterMessage.find_avp(stream, _authorization_lifetime_avp_code)
+    if lifetime is not None:
+        lifetime = int.from_bytes(lifetime, byteorder="big")
+        if lifetime != _infinite_lifetime:
+            grace_period = DiameterMessage.find_avp(stream,
+                                                    _auth_grace_period_avp_code)
+            if grace_period is not None:
+                lifetime += int.from_bytes(grace_period, byteorder="big")
+            lifetimes.append(lifetime)
+
+    if not lifetimes:
+        return None
+    return min(lifetimes)
+
+
+def get_session_key(session_id: Any) -> bytes:
+    """Returns the Session-Id, given as str or bytes, as bytes, which is the
+    way it is found in the Session-Id AVP data.
+    """
+    if isinstance(session_id, str):
+        return session_id.encode("utf-8")
+    return bytes(session_id)
+
+
+class _SessionShard:
+    """Sessions of a shard, from the least to the most recently used one.
+    Each entry is a [state, size, timer] list.
+    """
+    __slots__ = ("entries", "lock", "num_bytes", "hits", "misses", "expired",
+                 "evictions")
+
+    def __init__(self) -> None:
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.num_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+
+class SessionStore:
+    """Sharded store of session states by Session-Id, for the threads of a
+    process. It behaves as a dict, so it can be used as the
+    `Bromelia.sessions` one.
+
+    Sessions with a lifetime are removed by a timer of the TimerWheel of the
+    process once it elapses, and `on_expire(session_id, state)` is called,
+    if given. Once there are `max_size` sessions, or their estimated memory
+    usage goes over `max_memory`, the least recently used sessions of the
+    shard are evicted.
+
+    :param max_size: the maximum number of sessions.
+    :param max_memory: the maximum estimated memory usage, in bytes.
+    :param num_shards: the number of shards, each one with its own lock.
+    :param default_lifetime: the lifetime, in seconds, of the sessions set
+        without one. None for sessions which do not expire.
+    :param on_expire: a function called with the Session-Id and the state
+        of each expired session.
+    :param sizeof: a function returning the estimated bytes used by a
+        state. The shallow sys.getsizeof() is used by default.
+    :param timers: the TimerWheel object. The one of the process is used
+        by default.
+    """
+    def __init__(self,
+                 max_size: int = SESSION_STORE_MAXIMUM_SIZE,
+                 max_memory: int = SESSION_STORE_MAXIMUM_MEMORY,
+                 num_shards: int = SESSION_STORE_SHARDS,
+                 default_lifetime: float = None,
+                 on_expire: Callable = None,
+                 sizeof: Callable = sys.getsizeof,
+                 timers: Any = None) -> None:
+        if not isinstance(num_shards, int) or num_shards < 1:
+            raise InvalidConfigValue("`num_shards` must be a positive int")
+
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.num_shards = num_shards
+        self.default_lifetime = default_lifetime
+        self.on_expire = on_expire
+        self.sizeof = sizeof
+        self._timers = timers
+
+        #: Limits are enforced by shard, so no lock is shared by all of them.
+        self._shard_max_size = max(1, max_size // num_shards)
+        self._shard_max_memory = max(1, max_memory // num_shards)
+
+        self.shards = [_SessionShard() for _ in range(num_shards)]
+
+
+    @property
+    def timers(self) -> Any:
+        if self._timers is None:
+            self._timers = get_timer_wheel()
+        return self._timers
+
+
+    def _get_shard(self, key: bytes) -> _SessionShard:
+        return self.shards[hash(key) % self.num_shards]
+
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self.shards)
+
+
+    def __contains__(self, session_id: Any) -> bool:
+        key = get_session_key(session_id)
+        return key in self._get_shard(key).entries
+
+
+    def __getitem__(self, session_id: Any) -> Any:
+        state = self.get(session_id, _missing)
+        if state is _missing:
+            raise KeyError(session_id)
+        return state
+
+
+    def __setitem__(self, session_id: Any, state: Any) -> None:
+        self.set(session_id, state)
+
+
+    def __delitem__(self, session_id: Any) -> None:
+        if self.pop(session_id, _missing) is _missing:
+            raise KeyError(session_id)
+
+
+    def get(self, session_id: Any, default: Any = None) -> Any:
+        """Returns the state of a session, or `default` if there is no such
+        session.
+        """
+        key = get_session_key(session_id)
+        shard = self._get_shard(key)
+
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
+                return default
+
+            shard.entries.move_to_end(key)
+            shard.hits += 1
+            return entry[0]
+
+
+    def set(self, session_id: Any, state: Any, lifetime: float = None) -> None:
+        """Sets the state of a session, which expires after `lifetime`
+        seconds, or the `default_lifetime` if not given.
+        """
+        key = get_session_key(session_id)
+        shard = self._get_shard(key)
+
+        if lifetime is None:
+            lifetime = self.default_lifetime
+
+        entry = [state, len(key) + self.sizeof(state) + _entry_overhead, None]
+
+        with shard.lock:
+            old_entry = shard.entries.pop(key, None)
+            if old_entry is not None:
+                shard.num_bytes -= old_entry[1]
+                if old_entry[2] is not None:
+                    old_entry[2].cancel()
+
+            if lifetime is not None:
+                entry[2] = self.timers.schedule(lifetime,
+                                                self._expire,
+                                                key,
+                                                entry)
+
+            shard.entries[key] = entry
+            shard.num_bytes += entry[1]
+
+            while len(shard.entries) > 1 and \
+                  (len(shard.entries) > self._shard_max_size or \
+                   shard.num_bytes > self._shard_max_memory):
+                _, evicted = shard.entries.popitem(last=False)
+                shard.num_bytes -= evicted[1]
+                shard.evictions += 1
+                if evicted[2] is not None:
+                    evicted[2].cancel()
+
+
+    def touch(self, session_id: Any, lifetime: float = None) -> bool:
+        """Restarts the lifetime of a session, as when it is re-authorized.
+        Returns False if there is no such session.
+        """
+        key = get_session_key(session_id)
+        shard = self._get_shard(key)
+
+        if lifetime is None:
+            lifetime = self.default_lifetime
+
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                return False
+
+            if entry[2] is not None:
+                entry[2].cancel()
+
+            entry[2] = None
+            if lifetime is not None:
+                entry[2] = self.timers.schedule(lifetime,
+                                                self._expire,
+                                                key,
+                                                entry)
+            shard.entries.move_to_end(key)
+
+        return True
+
+
+    def pop(self, session_id: Any, default: Any = None) -> Any:
+        """Removes a session and returns its state, or `default` if there is
+        no such session.
+        """
+        key = get_session_key(session_id)
+        shard = self._get_shard(key)
+
+        with shard.lock:
+            entry = shard.entries.pop(key, None)
+            if entry is None:
+                return default
+
+            shard.num_bytes -= entry[1]
+
+        if entry[2] is not None:
+            entry[2].cancel()
+
+        return entry[0]
+
+
+    def _expire(self, key: bytes, entry: list) -> None:
+        shard = self._get_shard(key)
+
+        with shard.lock:
+            #: The session may have been set again since the timer was
+            #: scheduled.
+            if shard.entries.get(key) is not entry:
+                return
+
+            del shard.entries[key]
+            shard.num_bytes -= entry[1]
+            shard.expired += 1
+
+        if self.on_expire is not None:
+            self.on_expire(key, entry[0])
+
+
+    def clear(self) -> None:
+        for shard in self.shards:
+            with shard.lock:
+                for entry in shard.entries.values():
+                    if entry[2] is not None:
+                        entry[2].cancel()
+
+                shard.entries = OrderedDict()
+                shard.num_bytes = 0
+
+
+    def get_memory_usage(self) -> int:
+        """Returns an estimate of the bytes used by the sessions."""
+        return sum(shard.num_bytes for shard in self.shards)
+
+
+    def get_stats(self) -> SessionStoreStats:
+        return SessionStoreStats(
+                        size=len(self),
+                        memory_usage=self.get_memory_usage(),
+                        hits=sum(shard.hits for shard in self.shards),
+                        misses=sum(shard.misses for shard in self.shards),
+                        expired=sum(shard.expired for shard in self.shards),
+                        evictions=sum(shard.evictions for shard in self.shards))
+
+
+#: Slot header of the SharedMemorySessionStore: the used flag, the Session-Id
+#: and state lengths, and the expiry and last use times.
+_slot_header = struct.Struct(">BxHIdd")
+_shard_counter = struct.Struct(">Q")
+
+
+class SharedMemorySessionStore:
+    """Session store kept in a multiprocessing shared memory segment, for
+    the Worker processes of a Bromelia application. It is to be created
+    before starting the processes, which inherit it.
+
+    The segment is a hash table of fixed size slots, split in shards, each
+    one with its own multiprocessing.Lock. A Session-Id lives in one of the
+    `probes` slots following its hash, so lookups take O(1) time. When all
+    of them are taken, the least recently used one is evicted, which is an
+    approximation of the LRU order of the whole shard.
+
+    States are pickled into the slots, so they must be picklable and take no
+    more than `max_value_size` bytes once pickled. Expired sessions are
+    removed as they are found, as timers cannot be shared by processes, and
+    their slots are reused. The memory used is fixed by `max_size` and the
+    maximum Session-Id and state sizes.
+
+    :param max_size: the number of slots.
+    :param num_shards: the number of shards, each one with its own lock.
+    :param max_key_size: the maximum Session-Id length, in bytes.
+    :param max_value_size: the maximum pickled state length, in bytes.
+    :param probes: the number of slots a Session-Id can live in.
+    :param default_lifetime: the lifetime, in seconds, of the sessions set
+        without one. None for sessions which do not expire.
+    :param name: the name of the shared memory segment. A random one is
+        used by default.
+    """
+    def __init__(self,
+                 max_size: int = SESSION_STORE_MAXIMUM_SIZE,
+                 num_shards: int = SESSION_STORE_SHARDS,
+                 max_key_size: int = SESSION_STORE_MAXIMUM_KEY_SIZE,
+                 max_value_size: int = SESSION_STORE_MAXIMUM_VALUE_SIZE,
+                 probes: int = SESSION_STORE_PROBES,
+                 default_lifetime: float = None,
+                 name: str = None) -> None:
+        if shared_memory is None:
+            raise DiameterApplicationError("SharedMemorySessionStore needs "\
+                                           "Python 3.8 or later")
+
+        if not isinstance(num_shards, int) or num_shards < 1:
+            raise InvalidConfigValue("`num_shards` must be a positive int")
+
+        self.num_shards = num_shards
+        self.slots_per_shard = max(1, max_size // num_shards)
+        self.max_size = self.slots_per_shard * num_shards
+        self.max_key_size = max_key_size
+        self.max_value_size = max_value_size
+        self.probes = min(probes, self.slots_per_shard)
+        self.default_lifetime = default_lifetime
+
+        self.slot_size = _slot_header.size + max_key_size + max_value_size
+        self.header_size = _shard_counter.size * num_shards
+
+        self.shm = shared_memory.SharedMemory(name=name,
+                                              create=True,
+                                              size=self.header_size + \
+                                                   self.max_size * self.slot_size)
+        self.shm.buf[:self.header_size] = bytes(self.header_size)
+
+        self.locks = [multiprocessing.Lock() for _ in range(num_shards)]
+        self._owner_pid = os.getpid()
+        self._init_stats()
+
+
+    def _init_stats(self) -> None:
+        #: Counters are kept by each process.
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["shm"]
+        state["name"] = self.shm.name
+        return state
+
+
+    def __setstate__(self, state: dict) -> None:
+        name = state.pop("name")
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=name)
+        self._init_stats()
+
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+
+    def close(self) -> None:
+        """Detaches the shared memory segment from this process. The one
+        which created it also destroys it.
+        """
+        self.shm.close()
+        if self._owner_pid == os.getpid():
+            self.shm.unlink()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def _get_shard(self, key: bytes) -> tuple:
+        """Returns the shard and the first slot of a Session-Id."""
+        #: The hash must be the same for every process, which the builtin
+        #: hash() of bytes is not.
+        key_hash = zlib.crc32(key)
+        return key_hash % self.num_shards, \
+               (key_hash // self.num_shards) % self.slots_per_shard
+
+
+    def _get_offset(self, shard: int, slot: int) -> int:
+        return self.header_size + \
+               (shard * self.slots_per_shard + slot) * self.slot_size
+
+
+    def _add_to_counter(self, shard: int, value: int) -> None:
+        offset = shard * _shard_counter.size
+        count = _shard_counter.unpack_from(self.shm.buf, offset)[0]
+        _shard_counter.pack_into(self.shm.buf, offset, count + value)
+
+
+    def _free_slot(self, shard: int, offset: int) -> None:
+        self.shm.buf[offset] = 0
+        self._add_to_counter(shard, -1)
+
+
+    def _find(self, shard: int, first_slot: int, key: bytes, now: float) -> int:
+        """Returns the offset of the slot of a Session-Id, or None. Expired
+        slots found along the way are freed. It is called with the shard
+        lock held.
+        """
+        buf = self.shm.buf
+
+        for index in range(self.probes):
+            offset = self._get_offset(shard,
+                                      (first_slot + index) % self.slots_per_shard)
+            used, key_length, _, expires, _ = _slot_header.unpack_from(buf, offset)
+            if not used:
+                continue
+
+            if expires and expires <= now:
+                self._free_slot(shard, offset)
+                self.expired += 1
+                continue
+
+            key_offset = offset + _slot_header.size
+            if key_length == len(key) and \
+               buf[key_offset:key_offset + key_length] == key:
+                return offset
+
+        return None
+
+
+    def __len__(self) -> int:
+        return sum(_shard_counter.unpack_from(self.shm.buf, offset)[0]
+                        for offset in range(0, self.header_size,
+                                            _shard_counter.size))
+
+
+    def __contains__(self, session_id: Any) -> bool:
+        return self.get(session_id, _missing) is not _missing
+
+
+    def __getitem__(self, session_id: Any) -> Any:
+        state = self.get(session_id, _missing)
+        if state is _missing:
+            raise KeyError(session_id)
+        return state
+
+
+    def __setitem__(self, session_id: Any, state: Any) -> None:
+        self.set(session_id, state)
+
+
+    def __delitem__(self, session_id: Any) -> None:
+        if self.pop(session_id, _missing) is _missing:
+            raise KeyError(session_id)
+
+
+    def get(self, session_id: Any, default: Any = None) -> Any:
+        """Returns the state of a session, or `default` if there is no such
+        session.
+        """
+        key = get_session_key(session_id)
+        shard, first_slot = self._get_shard(key)
+        now = time.time()
+
+        with self.locks[shard]:
+            offset = self._find(shard, first_slot, key, now)
+            if offset is None:
+                self.misses += 1
+                return default
+
+            used, key_length, value_length, expires, _ = \
+                                _slot_header.unpack_from(self.shm.buf, offset)
+            _slot_header.pack_into(self.shm.buf, offset,
+                                   used, key_length, value_length, expires, now)
+
+            value_offset = offset + _slot_header.size + self.max_key_size
+            value = bytes(self.shm.buf[value_offset:value_offset + value_length])
+
+        self.hits += 1
+        return pickle.loads(value)
+
+
+    def set(self, session_id: Any, state: Any, lifetime: float = None) -> None:
+        """Sets the state of a session, which expires after `lifetime`
+        seconds, or the `default_lifetime` if not given.
+        """
+        key = get_session_key(session_id)
+        if len(key) > self.max_key_size:
+            raise DiameterApplicationError(f"Session-Id is longer than "\
+                                           f"{self.max_key_size} bytes")
+
+        value = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(value) > self.max_value_size:
+            raise DiameterApplicationError(f"Session state is longer than "\
+                                           f"{self.max_value_size} bytes "\
+                                           f"once pickled")
+
+        if lifetime is None:
+            lifetime = self.default_lifetime
+
+        shard, first_slot = self._get_shard(key)
+        now = time.time()
+        expires = now + lifetime if lifetime is not None else 0.0
+
+        with self.locks[shard]:
+            offset = self._find(shard, first_slot, key, now)
+
+            if offset is None:
+                offset = self._get_free_slot(shard, first_slot)
+                self._add_to_counter(shard, 1)
+
+            _slot_header.pack_into(self.shm.buf, offset,
+                                   1, len(key), len(value), expires, now)
+
+            key_offset = offset + _slot_header.size
+            self.shm.buf[key_offset:key_offset + len(key)] = key
+
+            value_offset = key_offset + self.max_key_size
+            self.shm.buf[value_offset:value_offset + len(value)] = value
+
+
+    def _get_free_slot(self, shard: int, first_slot: int) -> int:
+        """Returns the offset of the first free slot of a Session-Id, or of
+        the least recently used one, which is evicted. It is called with the
+        shard lock held, right after _find(), so expired slots are free.
+        """
+        lru_offset = None
+        lru_time = None
+
+        for index in range(self.probes):
+            offset = self._get_offset(shard,
+                                      (first_slot + index) % self.slots_per_shard)
+            used, _, _, _, last_used = _slot_header.unpack_from(self.shm.buf,
+                                                                offset)
+            if not used:
+                return offset
+
+            if lru_time is None or last_used < lru_time:
+                lru_offset = offset
+                lru_time = last_used
+
+        self._free_slot(shard, lru_offset)
+        self.evictions += 1
+        return lru_offset
+
+
+    def touch(self, session_id: Any, lifetime: float = None) -> bool:
+        """Restarts the lifetime of a session, as when it is re-authorized.
+        Returns False if there is no such session.
+        """
+        key = get_session_key(session_id)
+        shard, first_slot = self._get_shard(key)
+        now = time.time()
+
+        if lifetime is None:
+            lifetime = self.default_lifetime
+        expires = now + lifetime if lifetime is not None else 0.0
+
+        with self.locks[shard]:
+            offset = self._find(shard, first_slot, key, now)
+            if offset is None:
+                return False
+
+            used, key_length, value_length, _, _ = \
+                                _slot_header.unpack_from(self.shm.buf, offset)
+            _slot_header.pack_into(self.shm.buf, offset,
+                                   used, key_length, value_length, expires, now)
+
+        return True
+
+
+    def pop(self, session_id: Any, default: Any = None) -> Any:
+        """Removes a session and returns its state, or `default` if there is
+        no such session.
+        """
+        key = get_session_key(session_id)
+        shard, first_slot = self._get_shard(key)
+
+        with self.locks[shard]:
+            offset = self._find(shard, first_slot, key, time.time())
+            if offset is None:
+                return default
+
+            value_length = _slot_header.unpack_from(self.shm.buf, offset)[2]
+            value_offset = offset + _slot_header.size + self.max_key_size
+            value = bytes(self.shm.buf[value_offset:value_offset + value_length])
+
+            self._free_slot(shard, offset)
+
+        return pickle.loads(value)
+
+
+    def purge(self) -> int:
+        """Removes the expired sessions and returns how many were removed.
+        It takes O(n) time, while expired sessions are otherwise removed as
+        they are found.
+        """
+        now = time.time()
+        num_expired = 0
+
+        for shard in range(self.num_shards):
+            with self.locks[shard]:
+                for slot in range(self.slots_per_shard):
+                    offset = self._get_offset(shard, slot)
+                    used, _, _, expires, _ = \
+                                _slot_header.unpack_from(self.shm.buf, offset)
+                    if used and expires and expires <= now:
+                        self._free_slot(shard, offset)
+                        num_expired += 1
+
+        self.expired += num_expired
+        return num_expired
+
+
+    def clear(self) -> None:
+        for shard in range(self.num_shards):
+            with self.locks[shard]:
+                for slot in range(self.slots_per_shard):
+                    self.shm.buf[self._get_offset(shard, slot)] = 0
+
+                _shard_counter.pack_into(self.shm.buf,
+                                         shard * _shard_counter.size,
+                                         0)
+
+
+    def get_memory_usage(self) -> int:
+        """Returns the bytes of the shared memory segment."""
+        return self.shm.size
+
+
+    def get_stats(self) -> SessionStoreStats:
+        return SessionStoreStats(size=len(self),
+                                 memory_usage=self.get_memory_usage(),
+                                 hits=self.hits,
+                                 misses=self.misses,
+                                 expired=self.expired,
+                                 evictions=self.evictions)
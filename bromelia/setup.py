@@ -14,9 +14,8 @@
 import copy
 import datetime
 import logging
-import platform
 import queue
-import socket 
+import socket
 import sys
 import threading
 import time
@@ -27,36 +26,72 @@ from ._internal_utils import _convert_config_to_connection_obj
 from ._internal_utils import get_app_ids
 from ._internal_utils import application_id_look_up
 from ._internal_utils import Connection
+from ._internal_utils import DEFAULT_HOST_NAME
+from ._internal_utils import DEFAULT_IP_ADDRESS
+from ._internal_utils import DEFAULT_REALM
+from ._internal_utils import PeerNode
+from ._internal_utils import resolve_default
 from .base import DiameterMessage
+from .base import DiameterStreamFramer
 from .config import Config
 from .config import DiameterLogging
 from .config import (SLEEP_TIMER, WAITING_CONN_TIMER,
                      LISTENING_TICKER, SEND_BUFFER_MAXIMUM_SIZE)
+from .config import DPA_TIMER
+from .config import TX_TIMER
 from .config import CLOSED, I_OPEN, R_OPEN
+from .config import FLIGHT_RECORDER_ENABLED
 from .constants import DIAMETER_AGENT_CLIENT_MODE
 from .constants import DIAMETER_AGENT_SERVER_MODE
 from .constants import DIAMETER_AGENT_TRANSPORT_TYPE_TCP
 from .constants import DIAMETER_AGENT_TRANSPORT_TYPE_SCTP
+from .constants import DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK
 from .exceptions import AVPParsingError
 from .exceptions import DiameterApplicationError
 from .exceptions import DiameterAssociationError
+from .exceptions import DiameterHeaderError
 from .messages import DiameterAnswer
 from .messages import DiameterRequest
+from .metrics import DIRECTION_IN
+from .metrics import DIRECTION_OUT
+from .metrics import get_metrics_registry
 from .proxy import BaseMessages
 from .proxy import DiameterBaseProxy
+from .recorder import FlightRecorder
+from .scheduling import PriorityMessageQueue
 from .statemachine import PeerStateMachine
+from .timers import get_timer_wheel
+from .timers import get_watchdog_interval
+from .tracing import STAGE_DECODING
+from .tracing import STAGE_ENCODING
+from .tracing import STAGE_FRAMING
+from .tracing import STAGE_READ
+from .tracing import STAGE_SEND_QUEUE
+from .tracing import get_trace
+from .tracing import get_tracer
+from .tracing import set_trace
+from .transport import AcceptedConnection
 from .transport import TcpClient
 from .transport import TcpServer
 from .transport import SctpClient
 from .transport import SctpServer
+from .transport import LoopbackClient
+from .transport import LoopbackServer
 from .utils import is_base_request
 from .utils import is_base_answer
 
 diameter_conn_logger = logging.getLogger("DiameterConnection")
 diameter_logger = logging.getLogger("Diameter")
 
+tracer = get_tracer()
+
 
 def make_logging(msg, disable_else=False):
+    #: The AVPs of lazily loaded messages are decoded to be logged, so it is
+    #: only done if the debug messages are logged.
+    if not diameter_conn_logger.isEnabledFor(logging.DEBUG):
+        return
+
     if msg.has_avp("user_name_avp"):
         diameter_conn_logger.debug(f"Message from "\
                                    f"postprocess_recv_messages Queue: "\
@@ -80,10 +115,23 @@ def make_logging(msg, disable_else=False):
 
 
 class DiameterAssociation(object):
-    def __init__(self, connection: Connection, base: BaseMessages) -> None:
+    def __init__(self, 
+                 connection: Connection, 
+                 base: BaseMessages, 
+                 sock: socket.socket = None) -> None:
         self.connection = connection
         self.base = base
 
+        #: Socket already accepted by a DiameterServer, if any.
+        self.sock = sock
+
+        #: Origin-Host values accepted by identify_peer(), or None for any.
+        self.allowed_peers = None
+
+        #: Whether the requests received are routed by a RelayAgent rather
+        #: than consumed locally.
+        self.relay = False
+
         self.state_is_active = False
         self.transport = None
         self.error_has_raised = False
@@ -93,19 +141,54 @@ class DiameterAssociation(object):
         self.num_requests = 0
 
         self.watchdog_timeout = self.connection.watchdog_timeout
-        self.tracking_events_count = 0
+        self.tx_timeout = self.connection.tx_timeout or TX_TIMER
+        self.dpa_timeout = DPA_TIMER
+
+        #: Tw, Tx and DPA timers, which are run by the TimerWheel thread. 
+        #: Their callbacks only set flags handled by the Peer State Machine
+        #: thread, which is the one sending messages.
+        self.timers = get_timer_wheel()
+        self.watchdog_timer = None
+        self.watchdog_interval = None
+        self.request_timers = dict()
+        self.dpa_timer = None
+
+        self.watchdog_expired = False
+        self.watchdog_pending = False
+        self.watchdog_failed = False
+        self.dpa_timed_out = False
+        self.last_recv_time = self.timers.clock()
+
+        #: Called with each Diameter Request whose Tx timer has expired.
+        self.request_timeout_callback = None
+        self.num_request_timeouts = 0
+
+        #: Called once the association is closed.
+        self.close_callback = None
 
         self.end_to_end_identifiers = list()
         self.pending_requests = dict()
 
+        #: Times the pending requests were sent, for the latency metrics.
+        self.pending_request_times = dict()
+
         self._recv_messages = queue.Queue()
-        self._send_messages = queue.Queue()
+        self._send_messages = PriorityMessageQueue()
+
+        #: Keeps the bytes of a Diameter Message split across reads.
+        self.framer = DiameterStreamFramer()
+
+        #: Last byte streams received and sent, dumped into pcap files.
+        self.recorder = FlightRecorder() if FLIGHT_RECORDER_ENABLED else None
 
         self.postprocess_recv_messages = queue.Queue() 
         self.postprocess_recv_messages_ready = threading.Event()
         self.postprocess_recv_messages_lock = threading.Lock()
         self.lock = threading.Lock()
 
+        self.metrics = get_metrics_registry()
+        self.metrics.register_association(self)
+
 
     def is_connected(self) -> bool:
         if self.transport:
@@ -122,14 +205,23 @@ class DiameterAssociation(object):
 
     def start(self) -> None:
         self._stop_threads = False
+        self.framer.reset()
 
-        if self.connection.mode == DIAMETER_AGENT_CLIENT_MODE:
+        if self.sock is not None:
+            self.transport = AcceptedConnection(self.sock)
+
+        elif self.connection.mode == DIAMETER_AGENT_CLIENT_MODE:
             if self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_TCP:
                 self.transport = TcpClient(self.connection.peer_node.ip_address,
                                           self.connection.peer_node.port)
             elif self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_SCTP:
                 self.transport = SctpClient(self.connection.peer_node.ip_address,
-                                           self.connection.peer_node.port)
+                                           self.connection.peer_node.port,
+                                           self.connection.sctp_streams,
+                                           self.connection.sctp_stream_policy)
+            elif self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK:
+                self.transport = LoopbackClient(self.connection.peer_node.ip_address,
+                                                self.connection.peer_node.port)
             else:
                 raise DiameterAssociationError("Invalid Diameter Agent transport type.")
 
@@ -139,7 +231,12 @@ class DiameterAssociation(object):
                                         self.connection.local_node.port)
             elif self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_SCTP:
                 self.transport = SctpServer(self.connection.local_node.ip_address,
-                                       self.connection.local_node.port)
+                                       self.connection.local_node.port,
+                                       self.connection.sctp_streams,
+                                       self.connection.sctp_stream_policy)
+            elif self.connection.transport_type == DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK:
+                self.transport = LoopbackServer(self.connection.local_node.ip_address,
+                                                self.connection.local_node.port)
             else:
                 raise DiameterAssociationError("Invalid Diameter Agent transport type.")
 
@@ -161,6 +258,54 @@ class DiameterAssociation(object):
         self.transport.close()
         self.transport = None
 
+        self.cancel_timers()
+
+        if self.close_callback is not None:
+            self.close_callback()
+
+
+    def cancel_timers(self) -> None:
+        if self.watchdog_timer is not None:
+            self.watchdog_timer.cancel()
+            self.watchdog_timer = None
+
+        if self.dpa_timer is not None:
+            self.dpa_timer.cancel()
+            self.dpa_timer = None
+
+        for key in list(self.request_timers):
+            timer = self.request_timers.pop(key, None)
+            if timer is not None:
+                timer.cancel()
+
+
+    def identify_peer(self, msg: Type[DiameterMessage]) -> bool:
+        """Sets the Peer Node from the Origin-Host and Origin-Realm AVPs of 
+        a CER received on an association whose Peer Node has no host name, 
+        as the ones created by DiameterServer for any connecting peer. 
+        Returns False if the peer is not allowed.
+        """
+        if self.connection.peer_node.host_name is not None:
+            return True
+
+        if not msg.has_avp("origin_host_avp") or \
+           not msg.has_avp("origin_realm_avp"):
+            return False
+
+        host_name = msg.origin_host_avp.data.decode("utf-8")
+        if self.allowed_peers is not None and \
+           host_name not in self.allowed_peers:
+            diameter_conn_logger.info(f"Rejecting unknown peer {host_name}")
+            return False
+
+        peer_node = PeerNode(host_name=host_name,
+                             realm=msg.origin_realm_avp.data.decode("utf-8"),
+                             ip_address=self.transport.ip_address,
+                             port=self.transport.port)
+
+        self.connection = self.connection._replace(peer_node=peer_node)
+        return True
+
 
     def recv_message_from_queue(self) -> None:
         while not self._stop_threads and self.transport:
@@ -171,27 +316,94 @@ class DiameterAssociation(object):
             if self.transport is None:
                 break
 
-            data_stream = copy.copy(self.transport._recv_data_stream)
-            self.transport._recv_data_stream = b""
-            self.transport._recv_data_available.clear()
+            try:
+                data_stream = copy.copy(self.transport._recv_data_stream)
+                self.transport._recv_data_stream = b""
+                self.transport._recv_data_available.clear()
+
+                if data_stream and self.recorder is not None:
+                    self.recorder.record_recv(data_stream)
+
+                diameter_conn_logger.debug("Grabbing data stream from "\
+                                           "Transport Layer to Diameter "\
+                                           "Layer.")
+
+                try:
+                    #: Only the Diameter Headers are decoded here, which is
+                    #: enough for the Peer State Machine dispatching.
+                    #: DiameterAVP objects are created by whoever consumes
+                    #: the message.
+                    if tracer.enabled:
+                        msgs = self._load_traced_messages(data_stream)
+                    else:
+                        stream = self.framer.feed(data_stream)
+                        msgs = DiameterMessage.load(stream, lazy=True)
+                    if msgs:
+                        #: Any message received resets Tw, as in Section
+                        #: 3.4.1 of IETF RFC 3539.
+                        self.last_recv_time = self.timers.clock()
+                        self.watchdog_pending = False
+
+                    peer = self.connection.peer_node.host_name
+                    for msg in msgs:
+                        make_logging(msg, disable_else=True)
+                        self.metrics.count_message(peer, msg, DIRECTION_IN)
+                        self._recv_messages.put(msg)
+
+                    diameter_conn_logger.debug(f"Found {len(msgs)} Diameter "\
+                                               f"Message(s).")
+                except (AVPParsingError, DiameterHeaderError):
+                    diameter_conn_logger.exception(f"AVPParsingError has "\
+                                                   f"been raised due stream: "\
+                                                   f"{self.transport._recv_data_stream.hex()}")
+
+                    if self.recorder is not None:
+                        local_address, peer_address = self.get_addresses()
+
+                        #: Peers of a DiameterServer have no Host Name until
+                        #: they send their CER.
+                        name = self.connection.peer_node.host_name or \
+                               peer_address[0] or "unknown"
+
+                        path = self.recorder.dump_on_error(name,
+                                                           local_address,
+                                                           peer_address)
+                        if path is not None:
+                            diameter_conn_logger.error(f"Flight recorder "\
+                                                       f"has been dumped "\
+                                                       f"into {path}")
+            finally:
+                self.lock.release()
+
+
+    def _load_traced_messages(self, data_stream: bytes) -> List[DiameterMessage]:
+        """Loads the Diameter Messages of a data stream as the
+        recv_message_from_queue() method does, stamping the ones sampled
+        with the read, framing and decoding stages.
+        """
+        recv_data_times = self.transport._recv_data_times
+        self.transport._recv_data_times = None
+
+        framing_start = tracer.clock()
+        stream = self.framer.feed(data_stream)
+        framing_end = tracer.clock()
+        msgs = DiameterMessage.load(stream, lazy=True)
+        decoding_end = tracer.clock()
 
-            diameter_conn_logger.debug("Grabbing data stream from "\
-                                       "Transport Layer to Diameter Layer.")
+        for msg in msgs:
+            if recv_data_times is None:
+                trace = tracer.start_trace(framing_start)
+            else:
+                trace = tracer.start_trace(recv_data_times[0])
 
-            try:
-                msgs = DiameterMessage.load(data_stream)
-                for msg in msgs:
-                    make_logging(msg, disable_else=True)
-                    self._recv_messages.put(msg)
-                
-                diameter_conn_logger.debug(f"Found {len(msgs)} Diameter "\
-                                           f"Message(s).")
-            except AVPParsingError:
-                diameter_conn_logger.exception(f"AVPParsingError has "\
-                                               f"been raised due stream: "\
-                                               f"{self.transport._recv_data_stream.hex()}")
+            if trace is not None:
+                if recv_data_times is not None:
+                    tracer.stamp(trace, STAGE_READ, recv_data_times[1])
+                tracer.stamp(trace, STAGE_FRAMING, framing_end)
+                tracer.stamp(trace, STAGE_DECODING, decoding_end)
+                set_trace(msg, trace)
 
-            self.lock.release()
+        return msgs
 
 
     def put_message_into_send_queue(self, msg: Type[DiameterMessage]) -> None:
@@ -207,8 +419,9 @@ class DiameterAssociation(object):
                                        f"Request have been put into "\
                                        f"_send_messages Queue.")
 
-            key = msg.header.end_to_end.hex()
-            self.end_to_end_identifiers.append(key)
+            if not self.relay:
+                key = msg.header.end_to_end.hex()
+                self.end_to_end_identifiers.append(key)
 
         elif isinstance(msg, DiameterAnswer):
             diameter_conn_logger.debug(f"[{hop_by_hop.hex()}] Diameter "\
@@ -221,8 +434,10 @@ class DiameterAssociation(object):
                                            f"Message (Request) have been put "\
                                            f"into _send_messages Queue.")
 
-                key = msg.header.end_to_end.hex()
-                self.end_to_end_identifiers.append(key)
+                #: Requests relayed are tracked by the RelayAgent.
+                if not self.relay:
+                    key = msg.header.end_to_end.hex()
+                    self.end_to_end_identifiers.append(key)
 
             else:
                 diameter_conn_logger.debug(f"[{hop_by_hop.hex()}] Diameter "\
@@ -241,26 +456,43 @@ class DiameterAssociation(object):
                                    f"Message(s) in the Sending Queue.")
 
         stream = b""
+        peer = self.connection.peer_node.host_name
         while not self._send_messages.empty() and \
                 len(stream) <= SEND_BUFFER_MAXIMUM_SIZE:
             msg = self._send_messages.get()
             diameter_conn_logger.debug(f"[{msg.header.hop_by_hop.hex()}] "\
                                        f"Preparing message to be sent.")
 
-            MESSAGE_LENGTH = len(msg.dump())
+            trace = tracer.enabled and get_trace(msg)
+            if trace:
+                encoding_start = tracer.clock()
+
+            msg_stream = msg.dump()
+            MESSAGE_LENGTH = len(msg_stream)
 
             if MESSAGE_LENGTH > SEND_BUFFER_MAXIMUM_SIZE - len(stream):
-                self._send_messages.put(msg)
+                self._send_messages.requeue(msg)
                 break
 
+            if trace:
+                tracer.stamp(trace, STAGE_SEND_QUEUE, encoding_start)
+                tracer.stamp(trace, STAGE_ENCODING)
+                tracer.finish(trace, msg)
+
             if isinstance(msg, DiameterRequest):
                 key = msg.header.hop_by_hop.hex()
                 self.pending_requests.update({key: msg})
+                self.pending_request_times[key] = time.perf_counter()
+                self.start_request_timer(key)
                 diameter_conn_logger.debug(f"[{msg.header.hop_by_hop.hex()}] "\
                                            f"Diameter Request have been "\
                                            f"put into Pending Request Queue.")
-    
-            stream += msg.dump()
+
+            self.metrics.count_message(peer, msg, DIRECTION_OUT, msg_stream)
+            stream += msg_stream
+
+        if stream and self.recorder is not None:
+            self.recorder.record_sent(stream)
 
         if self.transport:
             if not self.transport.is_write_mode():
@@ -289,6 +521,42 @@ class DiameterAssociation(object):
         self.lock.release()
 
 
+    def get_addresses(self) -> tuple:
+        """Returns the (IP address, port) of the local node and of the peer
+        node, as seen by the socket if it is connected, or as configured.
+        """
+        local_node = self.connection.local_node
+        peer_node = self.connection.peer_node
+        local_address = (local_node.ip_address, local_node.port)
+        peer_address = (peer_node.ip_address, peer_node.port)
+
+        sock = getattr(self.transport, "sock", None)
+        if sock is not None:
+            try:
+                sock_name, peer_name = sock.getsockname(), sock.getpeername()
+            except OSError:
+                pass
+            else:
+                #: Loopback sockets have no IP address.
+                if isinstance(sock_name, tuple):
+                    local_address = sock_name[:2]
+                if isinstance(peer_name, tuple):
+                    peer_address = peer_name[:2]
+
+        return local_address, peer_address
+
+
+    def dump_flight_recorder(self, path: str) -> int:
+        """Writes the last byte streams received from and sent to the peer
+        into a pcap file and returns the number of packets written.
+        """
+        if self.recorder is None:
+            raise DiameterAssociationError("Flight recorder is disabled")
+
+        local_address, peer_address = self.get_addresses()
+        return self.recorder.dump(path, local_address, peer_address)
+
+
     def get_postprocess_recv_message(self):
         self.lock.acquire()
         diameter_conn_logger.debug("Acquired DiameterAssociation lock")
@@ -321,17 +589,129 @@ class DiameterAssociation(object):
             return self.get_postprocess_recv_message()
 
 
+    def start_request_timer(self, key: str) -> None:
+        timer = self.request_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        self.request_timers[key] = self.timers.schedule(self.tx_timeout,
+                                                        self._on_request_timeout,
+                                                        key)
+
+
+    def pop_pending_request(self, key: str) -> Type[DiameterMessage]:
+        """Removes a Diameter Request from the pending requests, given its
+        Hop-by-Hop Identifier in hex, and cancels its Tx timer. Returns None
+        if there is no such request.
+        """
+        timer = self.request_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+        sent_time = self.pending_request_times.pop(key, None)
+        msg = self.pending_requests.pop(key, None)
+
+        if msg is not None and sent_time is not None:
+            self.metrics.observe_latency(self.connection.peer_node.host_name,
+                                         msg.header.application_id,
+                                         msg.header.command_code,
+                                         time.perf_counter() - sent_time)
+        return msg
+
+
+    def _on_request_timeout(self, key: str) -> None:
+        self.request_timers.pop(key, None)
+        self.pending_request_times.pop(key, None)
+
+        msg = self.pending_requests.pop(key, None)
+        if msg is None:
+            return
+
+        self.num_request_timeouts += 1
+        diameter_conn_logger.warning(f"[{key}] Tx timer has expired for "\
+                                     f"Diameter Request.")
+
+        if self.request_timeout_callback is not None:
+            self.request_timeout_callback(msg)
+
+
+    def start_watchdog(self, interval: float = None) -> None:
+        if interval is None:
+            interval = get_watchdog_interval(self.watchdog_timeout)
+            self.watchdog_interval = interval
+
+        self.watchdog_timer = self.timers.schedule(interval,
+                                                   self._on_watchdog_timeout)
+
+
+    def reset_watchdog(self) -> None:
+        """Cancels Tw and clears the watchdog state. It is called whenever
+        the Open state is entered, so that Tw is started over by
+        tracking_events().
+        """
+        if self.watchdog_timer is not None:
+            self.watchdog_timer.cancel()
+            self.watchdog_timer = None
+
+        self.watchdog_expired = False
+        self.watchdog_pending = False
+        self.watchdog_failed = False
+
+
+    def _on_watchdog_timeout(self) -> None:
+        if self._stop_threads:
+            return
+
+        #: Tw is reset by received messages lazily: instead of rescheduling
+        #: it for each message, it is rescheduled here for the time left.
+        remaining = self.watchdog_interval - \
+                    (self.timers.clock() - self.last_recv_time)
+
+        if remaining > self.timers.tick:
+            self.start_watchdog(remaining)
+        else:
+            self.watchdog_expired = True
+
+
+    def start_dpa_timer(self) -> None:
+        self.dpa_timed_out = False
+        self.dpa_timer = self.timers.schedule(self.dpa_timeout,
+                                              self._on_dpa_timeout)
+
+
+    def _on_dpa_timeout(self) -> None:
+        self.dpa_timer = None
+        self.dpa_timed_out = True
+
+
     def tracking_events(self) -> None:
-        try:
-            if (not self.transport.events) and (self.transport.tracking_events_count >= self.watchdog_timeout):
-                self.put_message_into_send_queue(self.base.dwr)
-                diameter_conn_logger.debug("Generating a DWR message.")
+        """Handles the watchdog timer (Tw) as in Section 3.4 of IETF 
+        RFC 3539. It is called by the Peer State Machine in the Open state.
+        A DWR is sent when Tw expires, and the association is set as failed
+        if Tw expires again before any message is received.
+        """
+        if self.watchdog_timer is None:
+            self.last_recv_time = self.timers.clock()
+            self.start_watchdog()
+            return
 
-                self.transport.tracking_events_count = 0
-        
-        except AttributeError as e:
-            if e.args[0] == "'TcpServer' object has no attribute 'events'":
-                pass
+        if not self.watchdog_expired or not self.is_connected():
+            return
+
+        self.watchdog_expired = False
+
+        if self.watchdog_pending:
+            diameter_conn_logger.warning("Watchdog timer has expired with "\
+                                         "no answer to the DWR message.")
+            self.watchdog_failed = True
+            return
+
+        self.put_message_into_send_queue(self.base.create_message("dwr"))
+        diameter_conn_logger.debug("Generating a DWR message.")
+
+        self.watchdog_pending = True
+        self.last_recv_time = self.timers.clock()
+        self.start_watchdog()
 
 
 class Diameter:
@@ -341,9 +721,9 @@ class Diameter:
             "MODE": "CLIENT",
             "APPLICATIONS": [],
             "TRANSPORT_TYPE": "TCP",
-            "LOCAL_NODE_HOSTNAME": platform.node(),
-            "LOCAL_NODE_REALM": socket.getfqdn(),
-            "LOCAL_NODE_IP_ADDRESS": socket.gethostbyname(platform.node()),
+            "LOCAL_NODE_HOSTNAME": DEFAULT_HOST_NAME,
+            "LOCAL_NODE_REALM": DEFAULT_REALM,
+            "LOCAL_NODE_IP_ADDRESS": DEFAULT_IP_ADDRESS,
             "LOCAL_NODE_PORT": 3868,
             "PEER_NODE_HOSTNAME": None,
             "PEER_NODE_REALM": None,
@@ -367,11 +747,32 @@ class Diameter:
         self._association = None
         self._peer_state_machine = None
 
+        #: Reconnect timer (Tc), only used in client mode if TC_TIMEOUT is
+        #: set.
+        self._reconnect_timer = None
+        self._closed_locally = False
+
+        #: Whether the requests received are routed by a RelayAgent.
+        self.relay = False
+
+
+    @property
+    def association(self) -> DiameterAssociation:
+        return self._association
+
+
+    @property
+    def host_name(self) -> str:
+        """Origin-Host of the peer node."""
+        return self._connection.peer_node.host_name
+
 
     def make_config(self, config: dict) -> Config:
         if config:
             return self.config_class(config)
-        return self.config_class(Diameter.default_config)
+        default_config = {key: resolve_default(value)
+                            for key, value in Diameter.default_config.items()}
+        return self.config_class(default_config)
 
 
     def get_base_messages(self, msgs: List[Type[DiameterMessage]] = None) -> BaseMessages:
@@ -396,7 +797,11 @@ class Diameter:
                                            "Peer State Machine is already "\
                                            "running")
 
+        self._closed_locally = False
+
         self._association = DiameterAssociation(self._connection, self._base)
+        self._association.close_callback = self._on_association_closed
+        self._association.relay = self.relay
         self._peer_state_machine = PeerStateMachine(self._association)
 
         self._peer_state_machine.start()
@@ -424,9 +829,48 @@ class Diameter:
                                            "Peer State Machine is already "\
                                            "closed")
 
+        self._closed_locally = True
+        if self._reconnect_timer is not None:
+            self._reconnect_timer.cancel()
+            self._reconnect_timer = None
+
         self._peer_state_machine.close()
 
 
+    def _on_association_closed(self) -> None:
+        if self._closed_locally or self._connection.tc_timeout is None or \
+           self._connection.mode != DIAMETER_AGENT_CLIENT_MODE:
+            return
+
+        diameter_logger.info(f"Reconnecting in "\
+                             f"{self._connection.tc_timeout} second(s).")
+
+        self._reconnect_timer = get_timer_wheel().schedule(
+                                                self._connection.tc_timeout,
+                                                self._on_reconnect_timeout)
+
+
+    def _on_reconnect_timeout(self) -> None:
+        #: Connecting may block, so it is not done by the TimerWheel thread.
+        threading.Thread(name="reconnect_thread",
+                         target=self._reconnect).start()
+
+
+    def _reconnect(self) -> None:
+        self._reconnect_timer = None
+        if self._closed_locally:
+            return
+
+        if not self.is_closed():
+            self._on_association_closed()
+            return
+
+        try:
+            self.start()
+        except DiameterApplicationError:
+            self._on_association_closed()
+
+
     def send_messages(self, msgs: List[Type[DiameterMessage]]) -> None:
         for msg in msgs:
             self._association.put_message_into_send_queue(msg)
@@ -447,7 +891,7 @@ class Diameter:
 
             self._association.put_message_into_send_queue(msg)
             if not avoid:
-                return self._association.get_message(msg)
+                return self._association.get_message()
 
         elif isinstance(msg, DiameterAnswer):
             diameter_logger.debug(f"External app wants to send a Diameter "\
@@ -20,6 +20,9 @@ from ._internal_utils import application_id_look_up
 from .base import DiameterMessage
 from .config import *
 from .process import BaseMessageProcessor
+from .tracing import STAGE_STATE_MACHINE
+from .tracing import get_trace
+from .tracing import get_tracer
 from .utils import is_client_mode
 from .utils import is_server_mode
 from .utils import is_dwa_message as has_recv_dwa
@@ -73,8 +76,15 @@ closing_logger = logging.getLogger("Closing")
 
 statemachine_logger = logging.getLogger("PeerStateMachine")
 
+tracer = get_tracer()
+
 
 def make_logging(msg):
+    #: The AVPs of lazily loaded messages are decoded to be logged, so it is
+    #: only done if the debug messages are logged.
+    if not open_logger.isEnabledFor(logging.DEBUG):
+        return
+
     if msg.has_avp("user_name"):
         open_logger.debug(f"Message from _recv_messages: "\
                             f"{application_id_look_up(msg.header.application_id)[0]}, "\
@@ -120,6 +130,10 @@ class State():
 
 
     def notify_postprocess_message(self, msg: Type[DiameterMessage]) -> None:
+        trace = tracer.enabled and get_trace(msg)
+        if trace:
+            tracer.stamp(trace, STAGE_STATE_MACHINE)
+
         self.association.postprocess_recv_messages_lock.acquire()
         self.association.postprocess_recv_messages.put(msg)
         self.association.postprocess_recv_messages_lock.release()
@@ -186,6 +200,7 @@ class State():
     def set_open_state(self, set_name: bool = False, early_stage: bool = False) -> None:
         if early_stage:
             self.association.state_is_active = True
+            self.association.reset_watchdog()
 
         if set_name:
             self.name = self.next_state = OPEN
@@ -250,6 +265,10 @@ class Closed(State):
     def event_responder_conn_cer(self) -> None:
         closed_logger.debug("Event has been triggered.")
 
+        if not self.association.identify_peer(self.msg):
+            self.association.close()
+            return
+
         if self.processor.is_valid_capability_exchange(msg=self.msg):
             cea = self.processor.create_answer(msg=self.msg)
             self.send_message(msg=cea)
@@ -278,7 +297,7 @@ class WaitConnAck(State):
     def event_initiator_rcv_conn_ack(self) -> None:
         wait_conn_ack_logger.debug("Event has been triggered.")
 
-        self.send_message(msg=self.association.base.cer)
+        self.send_message(msg=self.association.base.create_message("cer"))
         self.set_wait_initiator_cea_state()
 
 
@@ -361,6 +380,10 @@ class Open(State):
 
         self.association.tracking_events()
 
+        if self.association.watchdog_failed:
+            self.event_open_watchdog_failure()
+            return
+
         if self.is_set_release_signal_from_peer():
             self.event_open_peer_disc()      
 
@@ -446,7 +469,8 @@ class Open(State):
     def event_stop(self) -> None:
         open_logger.debug("Event has been triggered.")
 
-        self.send_message(msg=self.association.base.dpr)
+        self.send_message(msg=self.association.base.create_message("dpr"))
+        self.association.start_dpa_timer()
         self.set_closing_state()
 
 
@@ -466,6 +490,18 @@ class Open(State):
         self.set_closed_state()
 
 
+    def event_open_watchdog_failure(self) -> None:
+        open_logger.debug("Event has been triggered.")
+
+        #: The transport connection is still up, so it is closed right away
+        #: along with the association, which also lets a reconnection (Tc)
+        #: start from a brand new connection.
+        if self.association.is_connected():
+            self.association.close()
+
+        self.set_closed_state()
+
+
     def event_open_rcv_cer(self) -> None:
         open_logger.debug("Event has been triggered.")
 
@@ -505,6 +541,9 @@ class Closing(State):
             if has_recv_dpa(self.msg):
                 self.event_rcv_dpa()
 
+        elif self.association.dpa_timed_out:
+            self.event_timeout()
+
 
     def event_rcv_dpa(self) -> None:
         open_logger.debug("Event has been triggered.")
@@ -512,6 +551,12 @@ class Closing(State):
         self.set_closed_state(force=True)
 
 
+    def event_timeout(self) -> None:
+        closing_logger.debug("Event has been triggered.")
+
+        self.set_closed_state(force=True)
+
+
 class PeerStateMachine():
     def __init__(self, diameter_association) -> None:
         statemachine_logger.debug("PeerStateMachine has been called.")
@@ -541,7 +586,11 @@ class PeerStateMachine():
 
         elif next_state == CLOSED and self.current_state.name != CLOSED:
             self.is_running = False
-            self.association.close()
+
+            #: The transport connection may have been closed meanwhile, as
+            #: done by DiameterServer for peers not answering DPR.
+            if self.association.is_connected():
+                self.association.close()
 
         if next_state in self.states:
             if self.current_state.name != next_state:
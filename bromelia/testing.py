@@ -0,0 +1,508 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.testing
+    ~~~~~~~~~~~~~~~~
+
+    This module implements a scriptable stand-in Diameter peer which runs
+    over the loopback transport. Diameter applications configured with
+    TRANSPORT_TYPE "LOOPBACK" and pointing to the stand-in peer address go
+    through the whole Peer State Machine (CER/CEA, DWR/DWA, DPR/DPA) and get
+    canned answers to their requests, at a configurable latency, with no
+    network involved.
+
+    Usage::
+
+        >>> from bromelia.testing import create_hss
+        >>> hss = create_hss(host_name="hss.bromelia.org",
+        ...                  realm="bromelia.org",
+        ...                  port=3870,
+        ...                  latency=0.002)
+        >>> hss.start()
+        >>> # Diameter application with PEER_NODE_PORT 3870 goes here
+        >>> hss.close()
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import heapq
+import itertools
+import logging
+import socket
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, List, Union
+
+from ._internal_utils import Connection
+from ._internal_utils import LocalNode
+from ._internal_utils import PeerNode
+from ._internal_utils import convert_to_3_bytes
+from .avps import OriginHostAVP
+from .avps import OriginRealmAVP
+from .avps import ResultCodeAVP
+from .avps import SessionIdAVP
+from .base import DiameterAnswer
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .base import DiameterMessage
+from .constants import *
+from .proxy import DiameterBaseProxy
+from .proxy import MessageTemplate
+from .transport import listen_loopback
+
+stand_in_peer_logger = logging.getLogger("StandInPeer")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bytes):
+        return int.from_bytes(value, byteorder="big")
+    return value
+
+
+def _get_avp_spans(stream: bytes, codes: tuple) -> dict:
+    """Returns the (start, end) positions, padding included, of the first
+    top-level AVP of each given AVP Code in a Diameter Message byte stream.
+    """
+    spans = dict()
+    end = DiameterHeader.peek(stream).length
+
+    for avp in DiameterAVP.scan(stream, DIAMETER_HEADER_LENGTH, end):
+        if avp.code in codes and avp.code not in spans:
+            start = avp.offset + avp.data_length - avp.length
+            spans[avp.code] = (start, min(start + ((avp.length + 3) & ~3), end))
+
+    return spans
+
+
+class CannedAnswer:
+    """Pre-encoded answer to be sent back for any request of a given route.
+
+    The Hop-by-Hop and End-to-End Identifiers are taken from the request, as
+    well as the top-level AVPs listed in `echo_avps` (by default Session-Id),
+    which replace the ones found in the answer.
+
+    :param answer: the DiameterMessage object to be used as answer.
+    :param echo_avps: the AVP Codes to be copied from the request.
+    """
+    def __init__(self,
+                 answer: DiameterMessage,
+                 echo_avps: tuple = (SESSION_ID_AVP_CODE,)) -> None:
+        self.template = MessageTemplate(answer)
+        self.echo_avps = tuple([_to_int(code) for code in echo_avps])
+        self.spans = _get_avp_spans(self.template.stream, self.echo_avps)
+
+
+    def render(self, request: bytes) -> bytes:
+        stream = self.template.render(hop_by_hop=request[12:16],
+                                      end_to_end=request[16:20])
+        if not self.spans:
+            return stream
+
+        request_spans = _get_avp_spans(request, self.echo_avps)
+        if not request_spans:
+            return stream
+
+        chunks = list()
+        index = 0
+        for code, (start, end) in sorted(self.spans.items(),
+                                         key=lambda item: item[1]):
+            if code not in request_spans:
+                continue
+
+            request_start, request_end = request_spans[code]
+            chunks.append(stream[index:start])
+            chunks.append(request[request_start:request_end])
+            index = end
+
+        chunks.append(stream[index:])
+        stream = bytearray(b"".join(chunks))
+        stream[1:4] = convert_to_3_bytes(len(stream))
+
+        return bytes(stream)
+
+
+class StandInPeer:
+    """Scriptable Diameter peer listening on a loopback address.
+
+    Capabilities-Exchange, Device-Watchdog and Disconnect-Peer requests are
+    answered from the base messages built for its own identity. Any other
+    request is answered as per the routes added by the route() method, or
+    with DIAMETER_COMMAND_UNSUPPORTED otherwise. Many peers may be connected
+    at the same time, each one served by its own thread.
+
+    :param host_name: the Origin-Host of the stand-in peer.
+    :param realm: the Origin-Realm of the stand-in peer.
+    :param ip_address: the loopback address to listen on.
+    :param port: the loopback port to listen on.
+    :param application_ids: the list of applications to be advertised in
+        CEA, in the same format of the APPLICATIONS config key.
+    :param latency: the default delay, in seconds, before sending each
+        answer. It may be a callable returning the delay.
+    """
+    def __init__(self,
+                 host_name: str = "peer.bromelia.org",
+                 realm: str = "bromelia.org",
+                 ip_address: str = "127.0.0.1",
+                 port: int = 3868,
+                 application_ids: List[dict] = None,
+                 latency: Union[float, Callable] = 0) -> None:
+
+        local_node = LocalNode(host_name=host_name,
+                               realm=realm,
+                               ip_address=ip_address,
+                               port=port)
+
+        peer_node = PeerNode(host_name=None,
+                             realm=None,
+                             ip_address=None,
+                             port=None)
+
+        self.connection = Connection(name="stand-in-peer",
+                                     mode=DIAMETER_AGENT_SERVER_MODE,
+                                     transport_type=DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK,
+                                     local_node=local_node,
+                                     peer_node=peer_node,
+                                     application_ids=application_ids or [],
+                                     watchdog_timeout=30)
+
+        self.base = DiameterBaseProxy(self.connection).get_default_messages()
+        self.latency = latency
+        self.routes = dict()
+
+        #: Number of requests received by (Application-ID, Command Code).
+        self.received = Counter()
+        self.num_answers = 0
+
+        self.listener = None
+
+        #: Sockets of the connected peers.
+        self.socks = set()
+
+        self._stop_threads = threading.Event()
+        self._send_lock = threading.Lock()
+        self._pending_answers = list()
+        self._pending_answers_ready = threading.Condition()
+        self._sequence = itertools.count()
+        self._threads = list()
+        self._connection_threads = list()
+
+
+    def route(self,
+              application_id: Any,
+              command_code: Any,
+              answer: Union[DiameterMessage, CannedAnswer, Callable],
+              latency: Union[float, Callable] = None) -> None:
+        """Adds the answer for the requests of a given Application-ID and
+        Command Code. The answer is either a DiameterMessage object (sent as
+        a CannedAnswer object), a CannedAnswer object or a callable which
+        receives the request DiameterMessage object and returns the answer
+        DiameterMessage object. The `latency` argument overrides the default
+        one for this route.
+        """
+        if isinstance(answer, DiameterMessage):
+            answer = CannedAnswer(answer)
+
+        key = (_to_int(application_id), _to_int(command_code))
+        self.routes[key] = (answer, latency)
+
+
+    def start(self) -> None:
+        self._stop_threads.clear()
+        self.listener = listen_loopback(self.connection.local_node.ip_address,
+                                        self.connection.local_node.port)
+
+        for name, target in (("stand_in_peer_serve", self._serve),
+                             ("stand_in_peer_send", self._send_pending)):
+            thrd = threading.Thread(name=name, target=target, daemon=True)
+            thrd.start()
+            self._threads.append(thrd)
+
+        stand_in_peer_logger.debug(f"Listening on loopback "\
+                                   f"{self.listener.ip_address}:"\
+                                   f"{self.listener.port}")
+
+
+    def close(self) -> None:
+        self._stop_threads.set()
+        with self._pending_answers_ready:
+            self._pending_answers_ready.notify()
+
+        for thrd in self._threads:
+            thrd.join()
+        self._threads = list()
+
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+
+    def __enter__(self):
+        self.start()
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def get_latency(self, latency: Union[float, Callable] = None) -> float:
+        if latency is None:
+            latency = self.latency
+
+        if callable(latency):
+            return latency()
+        return latency
+
+
+    def create_error_answer(self, request: bytes) -> bytes:
+        msg = DiameterMessage.load(request)[0]
+
+        avps = [
+                    OriginHostAVP(self.connection.local_node.host_name),
+                    OriginRealmAVP(self.connection.local_node.realm),
+                    ResultCodeAVP(DIAMETER_COMMAND_UNSUPPORTED)
+        ]
+        if msg.has_avp("session_id_avp"):
+            avps.insert(0, SessionIdAVP(msg.session_id_avp.data))
+
+        answer = DiameterAnswer(header=msg.header, avps=avps)
+        answer.header.set_error_bit(True)
+
+        return answer.dump()
+
+
+    def create_answer(self, request: bytes) -> tuple:
+        header = DiameterHeader.peek(request)
+        key = (header.application_id, header.command_code)
+
+        if header.application_id == 0:
+            name = {
+                        _to_int(CAPABILITIES_EXCHANGE_MESSAGE): "cea",
+                        _to_int(DEVICE_WATCHDOG_MESSAGE): "dwa",
+                        _to_int(DISCONNECT_PEER_MESSAGE): "dpa",
+            }.get(header.command_code)
+
+            if name is not None:
+                template = self.base.get_template(name)
+                return template.render(hop_by_hop=request[12:16],
+                                       end_to_end=request[16:20]), 0
+
+        answer, latency = self.routes.get(key, (None, None))
+
+        if answer is None:
+            return self.create_error_answer(request), latency
+
+        if isinstance(answer, CannedAnswer):
+            return answer.render(request), latency
+
+        msg = answer(DiameterMessage.load(request)[0])
+        msg.header.hop_by_hop = request[12:16]
+        msg.header.end_to_end = request[16:20]
+
+        return msg.dump(), latency
+
+
+    def handle_request(self, request: bytes, sock: socket.socket) -> None:
+        header = DiameterHeader.peek(request)
+        if not header.is_request():
+            return
+
+        self.received[(header.application_id, header.command_code)] += 1
+
+        stream, latency = self.create_answer(request)
+        delay = self.get_latency(latency) if latency != 0 else 0
+
+        if delay <= 0:
+            self.send(stream, sock)
+        else:
+            with self._pending_answers_ready:
+                heapq.heappush(self._pending_answers, (time.monotonic() + delay,
+                                                       next(self._sequence),
+                                                       stream,
+                                                       sock))
+                self._pending_answers_ready.notify()
+
+
+    def send(self, stream: bytes, sock: socket.socket) -> None:
+        with self._send_lock:
+            if sock not in self.socks:
+                return
+
+            try:
+                sock.sendall(stream)
+                self.num_answers += 1
+
+            except OSError:
+                stand_in_peer_logger.exception("Cannot send answer")
+
+
+    def _send_pending(self) -> None:
+        while not self._stop_threads.is_set():
+            with self._pending_answers_ready:
+                if not self._pending_answers:
+                    self._pending_answers_ready.wait()
+                    continue
+
+                due, _, stream, sock = self._pending_answers[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._pending_answers_ready.wait(timeout=delay)
+                    continue
+
+                heapq.heappop(self._pending_answers)
+
+            self.send(stream, sock)
+
+
+    def _serve(self) -> None:
+        while not self._stop_threads.is_set():
+            sock = self.listener.accept(timeout=0.1)
+            if sock is None:
+                continue
+
+            sock.settimeout(0.1)
+            with self._send_lock:
+                self.socks.add(sock)
+
+            thrd = threading.Thread(name="stand_in_peer_connection",
+                                    target=self._serve_connection,
+                                    args=(sock,),
+                                    daemon=True)
+            thrd.start()
+            self._connection_threads.append(thrd)
+
+            stand_in_peer_logger.debug("Peer connected")
+
+        for thrd in self._connection_threads:
+            thrd.join()
+        self._connection_threads = list()
+
+
+    def _serve_connection(self, sock: socket.socket) -> None:
+        buffer = b""
+
+        while not self._stop_threads.is_set():
+            try:
+                data = sock.recv(4096*64)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            if not data:
+                break
+
+            buffer += data
+            while len(buffer) >= DIAMETER_HEADER_LENGTH:
+                length = DiameterHeader.peek(buffer).length
+                if length < DIAMETER_HEADER_LENGTH:
+                    buffer = None
+                    break
+
+                if len(buffer) < length:
+                    break
+
+                self.handle_request(buffer[:length], sock)
+                buffer = buffer[length:]
+
+            #: The stream cannot be framed anymore, so the peer is dropped.
+            if buffer is None:
+                stand_in_peer_logger.warning("Invalid message length, "\
+                                             "dropping the peer")
+                break
+
+        with self._send_lock:
+            self.socks.discard(sock)
+        sock.close()
+
+        stand_in_peer_logger.debug("Peer disconnected")
+
+
+def create_hss(host_name: str = "hss.bromelia.org",
+               realm: str = "bromelia.org",
+               ip_address: str = "127.0.0.1",
+               port: int = 3868,
+               latency: Union[float, Callable] = 0) -> StandInPeer:
+    """Creates a StandInPeer object acting as HSS, which answers S6a/S6d
+    Update-Location-Request with DIAMETER_SUCCESS.
+    """
+    from .lib.etsi_3gpp_s6a.messages import UpdateLocationAnswer
+
+    peer = StandInPeer(host_name=host_name,
+                       realm=realm,
+                       ip_address=ip_address,
+                       port=port,
+                       application_ids=[{
+                                    "vendor_id": VENDOR_ID_3GPP,
+                                    "app_id": DIAMETER_APPLICATION_S6a_S6d
+                       }],
+                       latency=latency)
+
+    ula = UpdateLocationAnswer(origin_host=host_name,
+                               origin_realm=realm,
+                               result_code=DIAMETER_SUCCESS,
+                               ula_flags=1)
+
+    peer.route(DIAMETER_APPLICATION_S6a_S6d, UPDATE_LOCATION_MESSAGE, ula)
+    return peer
+
+
+def create_pcrf(host_name: str = "pcrf.bromelia.org",
+                realm: str = "bromelia.org",
+                ip_address: str = "127.0.0.1",
+                port: int = 3868,
+                latency: Union[float, Callable] = 0) -> StandInPeer:
+    """Creates a StandInPeer object acting as PCRF, which answers Gx
+    Credit-Control-Request with DIAMETER_SUCCESS.
+    """
+    from .lib.etsi_3gpp_gx.messages import CreditControlAnswer
+
+    peer = StandInPeer(host_name=host_name,
+                       realm=realm,
+                       ip_address=ip_address,
+                       port=port,
+                       application_ids=[{
+                                    "vendor_id": VENDOR_ID_3GPP,
+                                    "app_id": DIAMETER_APPLICATION_Gx
+                       }],
+                       latency=latency)
+
+    cca = CannedAnswer(CreditControlAnswer(origin_host=host_name,
+                                           origin_realm=realm),
+                       echo_avps=(SESSION_ID_AVP_CODE,
+                                  CC_REQUEST_TYPE_AVP_CODE,
+                                  CC_REQUEST_NUMBER_AVP_CODE))
+
+    peer.route(DIAMETER_APPLICATION_Gx, CC_MESSAGE, cca)
+    return peer
+
+
+def create_ocs(host_name: str = "ocs.bromelia.org",
+               realm: str = "bromelia.org",
+               ip_address: str = "127.0.0.1",
+               port: int = 3868,
+               latency: Union[float, Callable] = 0) -> StandInPeer:
+    """Creates a StandInPeer object acting as OCS, which answers Gy
+    Credit-Control-Request with DIAMETER_SUCCESS.
+    """
+    from .lib.etsi_3gpp_gy.messages import CreditControlAnswer
+
+    peer = StandInPeer(host_name=host_name,
+                       realm=realm,
+                       ip_address=ip_address,
+                       port=port,
+                       application_ids=[{
+                                    "vendor_id": VENDOR_ID_DEFAULT,
+                                    "app_id": DIAMETER_APPLICATION_Gy
+                       }],
+                       latency=latency)
+
+    cca = CannedAnswer(CreditControlAnswer(origin_host=host_name,
+                                           origin_realm=realm),
+                       echo_avps=(SESSION_ID_AVP_CODE,
+                                  CC_REQUEST_TYPE_AVP_CODE,
+                                  CC_REQUEST_NUMBER_AVP_CODE))
+
+    peer.route(DIAMETER_APPLICATION_Gy, CC_MESSAGE, cca)
+    return peer
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.timers
+    ~~~~~~~~~~~~~~~
+
+    This module implements a hierarchical timing wheel shared by every
+    Diameter association of a process. It drives the timers of IETF RFC 3539
+    and IETF RFC 6733: the watchdog timer (Tw), the per-request timer (Tx),
+    the reconnect timer (Tc) and the DPA wait timer.
+
+    Scheduling and cancelling a timer are O(1). Timers further away than the
+    first wheel are kept in coarser wheels and cascaded down as the time
+    goes by, so millions of pending timers cost no more per tick than a few.
+
+    Usage::
+
+        >>> from bromelia.timers import get_timer_wheel
+        >>> timers = get_timer_wheel()
+        >>> timer = timers.schedule(10, print, "Tx expired")
+        >>> timer.cancel()
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable
+
+from .config import TIMER_WHEEL_LEVELS
+from .config import TIMER_WHEEL_SIZE
+from .config import TIMER_WHEEL_TICK
+from .config import WATCHDOG_JITTER
+from .config import WATCHDOG_MINIMUM_TIMEOUT
+
+
+timer_wheel_logger = logging.getLogger("TimerWheel")
+
+
+def get_watchdog_interval(watchdog_timeout: float) -> float:
+    """Returns the interval of the next watchdog timer (Tw), which is the
+    configured watchdog timeout, never lower than 6 seconds, with a random
+    jitter of up to 2 seconds either way, as in Section 3.4.1 of IETF
+    RFC 3539.
+    """
+    watchdog_timeout = max(watchdog_timeout, WATCHDOG_MINIMUM_TIMEOUT)
+    return watchdog_timeout + random.uniform(-WATCHDOG_JITTER, WATCHDOG_JITTER)
+
+
+class Timer:
+    """Handle of a scheduled timer. It is created by TimerWheel.schedule()
+    only.
+    """
+    __slots__ = ("deadline", "callback", "args", "slot", "wheel")
+
+    def __init__(self,
+                 wheel: "TimerWheel",
+                 deadline: int,
+                 callback: Callable,
+                 args: tuple) -> None:
+        self.wheel = wheel
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+
+        #: Wheel slot holding the timer, or None once fired or cancelled.
+        self.slot = None
+
+
+    def is_active(self) -> bool:
+        return self.slot is not None
+
+
+    def cancel(self) -> bool:
+        """Cancels the timer. Returns False if it has already fired or been
+        cancelled.
+        """
+        return self.wheel.cancel(self)
+
+
+class TimerWheel:
+    """Hierarchical timing wheel.
+
+    The first wheel has a slot per tick, and each following wheel has a
+    slot per turn of the previous one. With the defaults, a 10 ms tick and
+    4 wheels of 256 slots, timers up to about 16 months are kept exactly;
+    further ones are cascaded again as they get closer.
+
+    Callbacks are run by the thread calling advance(), which is the wheel
+    thread once start() is called. They SHOULD return quickly, as all timers
+    of the process share that thread.
+
+    :param tick: the wheel resolution, in seconds.
+    :param wheel_size: the number of slots in each wheel.
+    :param levels: the number of wheels.
+    :param clock: a function returning the current time, in seconds.
+    """
+    def __init__(self,
+                 tick: float = TIMER_WHEEL_TICK,
+                 wheel_size: int = TIMER_WHEEL_SIZE,
+                 levels: int = TIMER_WHEEL_LEVELS,
+                 clock: Callable = time.monotonic) -> None:
+        self.tick = tick
+        self.wheel_size = wheel_size
+        self.levels = levels
+        self.clock = clock
+
+        self.wheels = [[set() for _ in range(wheel_size)]
+                                            for _ in range(levels)]
+        self.spans = [wheel_size ** level for level in range(levels + 1)]
+
+        self.start_time = clock()
+        self.current_tick = 0
+        self.num_timers = 0
+
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+
+    def __len__(self) -> int:
+        return self.num_timers
+
+
+    def _add(self, timer: Timer) -> None:
+        ticks = timer.deadline - self.current_tick
+        deadline = timer.deadline
+
+        if ticks >= self.spans[-1]:
+            #: Beyond the last wheel. It is cascaded again from there.
+            deadline = self.current_tick + self.spans[-1] - 1
+            ticks = self.spans[-1] - 1
+
+        level = 0
+        while ticks >= self.spans[level + 1]:
+            level += 1
+
+        index = (deadline // self.spans[level]) % self.wheel_size
+        timer.slot = self.wheels[level][index]
+        timer.slot.add(timer)
+
+
+    def schedule(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        """Schedules `callback(*args)` to be run after `delay` seconds and
+        returns its Timer object.
+        """
+        ticks = max(1, int(-(-delay // self.tick)))
+
+        with self.lock:
+            timer = Timer(self, self.current_tick + ticks, callback, args)
+            self._add(timer)
+            self.num_timers += 1
+
+        return timer
+
+
+    def cancel(self, timer: Timer) -> bool:
+        with self.lock:
+            if timer.slot is None:
+                return False
+
+            timer.slot.discard(timer)
+            timer.slot = None
+            self.num_timers -= 1
+            return True
+
+
+    def _step(self) -> list:
+        self.current_tick += 1
+
+        for level in range(self.levels - 1, 0, -1):
+            if self.current_tick % self.spans[level] != 0:
+                continue
+
+            index = (self.current_tick // self.spans[level]) % self.wheel_size
+            slot = self.wheels[level][index]
+            self.wheels[level][index] = set()
+
+            for timer in slot:
+                self._add(timer)
+
+        index = self.current_tick % self.wheel_size
+        expired = self.wheels[0][index]
+        self.wheels[0][index] = set()
+
+        for timer in expired:
+            timer.slot = None
+        self.num_timers -= len(expired)
+
+        return expired
+
+
+    def advance(self, now: float = None) -> int:
+        """Moves the wheel up to `now`, or the current time, running the
+        callbacks of the expired timers. Returns how many were run.
+        """
+        if now is None:
+            now = self.clock()
+
+        target_tick = int((now - self.start_time) / self.tick)
+        num_expired = 0
+
+        while True:
+            with self.lock:
+                if self.current_tick >= target_tick:
+                    break
+
+                if self.num_timers == 0:
+                    self.current_tick = target_tick
+                    break
+
+                expired = self._step()
+
+            for timer in expired:
+                try:
+                    timer.callback(*timer.args)
+                except Exception:
+                    timer_wheel_logger.exception("Timer callback has raised "\
+                                                 "an exception.")
+            num_expired += len(expired)
+
+        return num_expired
+
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(name="timer_wheel_thread",
+                                        target=self._run,
+                                        daemon=True)
+        self._thread.start()
+
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.tick):
+            self.advance()
+
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_timer_wheel = None
+_timer_wheel_pid = None
+_timer_wheel_lock = threading.Lock()
+
+
+def get_timer_wheel() -> TimerWheel:
+    """Returns the TimerWheel of the process, which is started on first
+    use. A new one is created in forked processes, which do not inherit the
+    wheel thread.
+    """
+    global _timer_wheel, _timer_wheel_pid
+
+    with _timer_wheel_lock:
+        if _timer_wheel is None or _timer_wheel_pid != os.getpid():
+            _timer_wheel = TimerWheel()
+            _timer_wheel_pid = os.getpid()
+            _timer_wheel.start()
+
+        return _timer_wheel
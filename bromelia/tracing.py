@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+    bromelia.tracing
+    ~~~~~~~~~~~~~~~~
+
+    This module implements the stage timing of the messages received, along
+    the processing pipeline:
+
+    - read: the socket read by the transport connection;
+    - framing: the hand-over of the byte stream to the association and its
+      split into Diameter Messages;
+    - decoding: the load of the Diameter Headers;
+    - state_machine: the wait in the receive queue and the Peer State
+      Machine tick;
+    - dispatch: the hop through the Manager queue to the process of the
+      Bromelia object;
+    - thread: the creation of the thread which handles the message and its
+      wait for the request or answer threshold;
+    - route: the route function, for requests, or the pending answer
+      handling, for answers;
+    - send_queue: the hop of the answer back to the association and its
+      wait in the send queue;
+    - encoding: the dump of the answer.
+
+    Tracing is disabled by default, and then it costs an attribute lookup
+    per stage. Once enabled, 1 in every `sample_rate` messages is stamped
+    with a MessageTrace, whose stage durations are added to the histograms
+    of the MetricsRegistry of each process the message goes through. The
+    hooks added are called with each trace finished, so they can be
+    exported as spans, e.g. by OpenTelemetry.
+
+    The stamps are taken by time.perf_counter(), which is system-wide on
+    Linux, so traces are comparable between the Worker processes and the
+    process of the Bromelia object. Hooks must be added before the Worker
+    processes are started to be inherited by them.
+
+    Usage::
+
+        >>> from bromelia.tracing import get_tracer
+        >>> tracer = get_tracer()
+        >>> tracer.add_hook(lambda trace, msg: print(trace.get_spans()))
+        >>> tracer.enable(sample_rate=10)
+        >>> app.run()
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Callable, List, Type
+
+from .base import DiameterMessage
+from .config import TRACING_SAMPLE_RATE
+from .exceptions import InvalidConfigValue
+from .metrics import MetricsRegistry
+from .metrics import get_metrics_registry
+
+
+tracing_logger = logging.getLogger("Tracing")
+
+
+#: Stages of the processing pipeline, in order.
+STAGE_READ = "read"
+STAGE_FRAMING = "framing"
+STAGE_DECODING = "decoding"
+STAGE_STATE_MACHINE = "state_machine"
+STAGE_DISPATCH = "dispatch"
+STAGE_THREAD = "thread"
+STAGE_ROUTE = "route"
+STAGE_SEND_QUEUE = "send_queue"
+STAGE_ENCODING = "encoding"
+
+STAGES = (
+            STAGE_READ,
+            STAGE_FRAMING,
+            STAGE_DECODING,
+            STAGE_STATE_MACHINE,
+            STAGE_DISPATCH,
+            STAGE_THREAD,
+            STAGE_ROUTE,
+            STAGE_SEND_QUEUE,
+            STAGE_ENCODING,
+)
+
+
+#: A stage of a MessageTrace, from its start to its end time, in seconds.
+Span = namedtuple("Span", ["stage", "start", "end"])
+
+
+class MessageTrace:
+    """Timestamps of a Diameter Message along the processing pipeline. It
+    is carried by the message itself, so it is pickled along with it
+    between processes.
+
+    :param start: the time the first stage has started.
+    """
+    __slots__ = ("start", "stamps")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.stamps = list()
+
+
+    def __repr__(self) -> str:
+        return f"<MessageTrace: {len(self.stamps)} stage(s)>"
+
+
+    def get_last_time(self) -> float:
+        if self.stamps:
+            return self.stamps[-1][1]
+        return self.start
+
+
+    def get_spans(self) -> List[Span]:
+        spans = list()
+
+        start = self.start
+        for stage, end in self.stamps:
+            spans.append(Span(stage, start, end))
+            start = end
+
+        return spans
+
+
+    def get_durations(self) -> dict:
+        return {span.stage: span.end - span.start for span in self.get_spans()}
+
+
+def get_trace(msg: Type[DiameterMessage]) -> MessageTrace:
+    """Returns the MessageTrace of a Diameter Message, if it has been
+    sampled. The AVPs of lazy messages are not decoded.
+    """
+    return msg.__dict__.get("_trace")
+
+
+def set_trace(msg: Type[DiameterMessage], trace: MessageTrace) -> None:
+    msg.__dict__["_trace"] = trace
+
+
+class Tracer:
+    """Stage timing of the Diameter Messages of a process.
+
+    :param sample_rate: 1 in every `sample_rate` messages is traced.
+    :param registry: the MetricsRegistry of the stage histograms. By
+        default, the one of the process stamping the message is used.
+    :param clock: the function returning the current time, in seconds.
+    """
+    def __init__(self,
+                 sample_rate: int = TRACING_SAMPLE_RATE,
+                 registry: MetricsRegistry = None,
+                 clock: Callable[[], float] = time.perf_counter) -> None:
+        self.enabled = False
+        self.sample_rate = self._check_sample_rate(sample_rate)
+        self.registry = registry
+        self.clock = clock
+        self.hooks = list()
+
+        #: The count is not locked, so threads racing for it may sample a
+        #: message more or less now and then.
+        self._count = 0
+
+
+    @staticmethod
+    def _check_sample_rate(sample_rate: int) -> int:
+        if not isinstance(sample_rate, int) or sample_rate < 1:
+            raise InvalidConfigValue("sample_rate MUST be a positive integer")
+        return sample_rate
+
+
+    def enable(self, sample_rate: int = None) -> None:
+        if sample_rate is not None:
+            self.sample_rate = self._check_sample_rate(sample_rate)
+        self.enabled = True
+
+
+    def disable(self) -> None:
+        self.enabled = False
+
+
+    def add_hook(self, hook: Callable[[MessageTrace, Any], None]) -> None:
+        """Adds a function to be called with each MessageTrace finished and
+        the Diameter Message it has finished with.
+        """
+        self.hooks.append(hook)
+
+
+    def remove_hook(self, hook: Callable[[MessageTrace, Any], None]) -> None:
+        self.hooks.remove(hook)
+
+
+    def start_trace(self, start: float = None) -> MessageTrace:
+        """Returns a new MessageTrace if the next message is sampled, or
+        None otherwise.
+        """
+        self._count += 1
+        if self._count % self.sample_rate:
+            return None
+
+        if start is None:
+            start = self.clock()
+        return MessageTrace(start)
+
+
+    def stamp(self, trace: MessageTrace, stage: str, now: float = None) -> None:
+        """Ends a stage of a MessageTrace, which has started by the end of
+        the previous one, and adds its duration to the stage histograms.
+        """
+        if now is None:
+            now = self.clock()
+
+        registry = self.registry or get_metrics_registry()
+        registry.observe_stage(stage, now - trace.get_last_time())
+        trace.stamps.append((stage, now))
+
+
+    def finish(self, trace: MessageTrace, msg: Type[DiameterMessage]) -> None:
+        """Calls the hooks with a MessageTrace whose last stage is over.
+        Exceptions raised by hooks are logged, not propagated.
+        """
+        for hook in self.hooks:
+            try:
+                hook(trace, msg)
+            except Exception:
+                tracing_logger.exception(f"Hook {hook} has raised an "\
+                                         f"exception")
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Returns the Tracer of the process. Unlike the MetricsRegistry, it is
+    kept in forked processes, so they are traced as their parent.
+    """
+    global _tracer
+
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+
+        return _tracer
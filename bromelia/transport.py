@@ -4,7 +4,11 @@
     ~~~~~~~~~~~~~~~~~~
     
     This module defines the TCP transport layer connections that are used
-    by the Diameter application protocol underlying.
+    by the Diameter application protocol underlying, along with the 
+    TcpListener used by DiameterServer to accept many peers. It also 
+    defines the in-process loopback connections, backed by 
+    socket.socketpair(), which let Diameter applications talk to each other
+    (or to a StandInPeer from bromelia.testing) without any network.
 
     :copyright: (c) 2020-present Henrique Marques Ribeiro.
     :license: MIT, see LICENSE for more details.
@@ -12,17 +16,92 @@
 
 import copy
 import logging
+import queue
 import random
 import selectors
 import socket
 import threading
+import zlib
 from typing import Any, Literal
 
+from .base import DiameterAVP
+from .base import DiameterHeader
+from .base import DiameterStreamFramer
+from .config import SEND_BUFFER_MAXIMUM_SIZE
 from .config import TRACKING_SOCKET_EVENTS_TIMEOUT
+from .constants import DIAMETER_HEADER_LENGTH
+from .constants import DIAMETER_SCTP_PPID
+from .constants import DIAMETER_SCTP_STREAM_POLICY_APPLICATION
+from .constants import DIAMETER_SCTP_STREAM_POLICY_SESSION_ID
+from .constants import SESSION_ID_AVP_CODE
+from .tracing import get_tracer
 
 tcp_connection = logging.getLogger("TcpConnection")
 tcp_client = logging.getLogger("TcpClient")
 tcp_server = logging.getLogger("TcpServer")
+loopback_connection = logging.getLogger("LoopbackConnection")
+
+_session_id_avp_code = int.from_bytes(SESSION_ID_AVP_CODE, byteorder="big")
+
+tracer = get_tracer()
+
+
+#: LoopbackListener objects by (ip_address, port). The addresses are only 
+#: used as keys, there is no network involved.
+loopback_listeners = dict()
+loopback_listeners_lock = threading.Lock()
+
+
+class LoopbackListener:
+    """In-process counterpart of a listening socket. Each connect() call 
+    creates a socket.socketpair(): one end is returned to the caller, while
+    the other end is queued to be returned by accept().
+    """
+    def __init__(self, ip_address: str, port: int) -> None:
+        self.ip_address = ip_address
+        self.port = port
+        self.pending_connections = queue.Queue()
+
+
+    def connect(self) -> socket.socket:
+        local_sock, remote_sock = socket.socketpair()
+        self.pending_connections.put(remote_sock)
+        return local_sock
+
+
+    def accept(self, timeout: float = None) -> socket.socket:
+        try:
+            return self.pending_connections.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+    def close(self) -> None:
+        with loopback_listeners_lock:
+            if loopback_listeners.get((self.ip_address, self.port)) is self:
+                del loopback_listeners[(self.ip_address, self.port)]
+
+
+def listen_loopback(ip_address: str, port: int) -> LoopbackListener:
+    with loopback_listeners_lock:
+        if (ip_address, port) in loopback_listeners:
+            raise ConnectionError(f"Loopback address {ip_address}:{port} "\
+                                  f"is already in use")
+
+        listener = LoopbackListener(ip_address, port)
+        loopback_listeners[(ip_address, port)] = listener
+        return listener
+
+
+def connect_loopback(ip_address: str, port: int) -> socket.socket:
+    with loopback_listeners_lock:
+        listener = loopback_listeners.get((ip_address, port))
+
+    if listener is None:
+        raise ConnectionRefusedError(f"There is no loopback listener on "\
+                                     f"{ip_address}:{port}")
+
+    return listener.connect()
 
 
 class TcpConnection():
@@ -33,6 +112,10 @@ class TcpConnection():
         self.data_stream = b""
         self._recv_data_stream = b""
 
+        #: Start and end times of the first socket read whose data is in
+        #: _recv_data_stream, while tracing is enabled.
+        self._recv_data_times = None
+
         self._recv_data_available = threading.Event()
         self.write_mode_on = threading.Event()
         self.read_mode_on = threading.Event()
@@ -53,7 +136,6 @@ class TcpConnection():
         self._stop_threads = False
 
         self.selector = selectors.DefaultSelector()
-        self.tracking_events_count = 0
         self.connection_attempts = 3
 
         self.events_mask = selectors.EVENT_READ
@@ -110,7 +192,6 @@ class TcpConnection():
     def _run(self) -> None:
         while self.is_connected and not self._stop_threads:
             self.events = self.selector.select(timeout=TRACKING_SOCKET_EVENTS_TIMEOUT)
-            self.tracking_events_count += TRACKING_SOCKET_EVENTS_TIMEOUT
 
             for key, mask in self.events:
                 if key.data is not None:
@@ -224,9 +305,14 @@ class TcpConnection():
 
 
     def read(self) -> None:
+        read_start = tracer.enabled and tracer.clock()
+
         self._read()
 
         if self._recv_buffer:
+            if read_start and not self._recv_data_stream:
+                self._recv_data_times = (read_start, tracer.clock())
+
             self._recv_data_stream += copy.copy(self._recv_buffer)
             self._recv_data_available.set()
             self._recv_buffer = b""
@@ -250,9 +336,130 @@ class TcpConnection():
 
 
 
+def select_stream_by_session_id(stream: bytes,
+                                offset: int,
+                                num_streams: int) -> int:
+    """Returns the SCTP stream of the Diameter Message found at `offset` of
+    a byte stream by hashing its Session-Id, so messages of a given session
+    keep their order while different sessions do not block each other. Base
+    protocol messages and messages with no Session-Id go in stream 0.
+    """
+    header = DiameterHeader.peek(stream, offset)
+    if num_streams == 1 or header.application_id == 0:
+        return 0
+
+    for avp in DiameterAVP.scan(stream,
+                                offset + DIAMETER_HEADER_LENGTH,
+                                offset + header.length):
+        if avp.code == _session_id_avp_code and avp.vendor_id is None:
+            session_id = stream[avp.offset:avp.offset + avp.data_length]
+            return 1 + zlib.crc32(session_id) % (num_streams - 1)
+
+    return 0
+
+
+def select_stream_by_application(stream: bytes,
+                                 offset: int,
+                                 num_streams: int) -> int:
+    """Returns the SCTP stream of the Diameter Message found at `offset` of
+    a byte stream by its Application-ID. Base protocol messages go in
+    stream 0.
+    """
+    application_id = DiameterHeader.peek(stream, offset).application_id
+    if num_streams == 1 or application_id == 0:
+        return 0
+
+    return 1 + application_id % (num_streams - 1)
+
+
+sctp_stream_policies = {
+        DIAMETER_SCTP_STREAM_POLICY_SESSION_ID: select_stream_by_session_id,
+        DIAMETER_SCTP_STREAM_POLICY_APPLICATION: select_stream_by_application,
+}
+
+
+class SctpStreams:
+    """Keeps the streams of an SCTP association. Outbound Diameter Messages
+    are spread among the streams by a stream selection policy, and the
+    messages of a given stream are batched together. Inbound data is
+    reassembled per stream, as each stream is an independent byte stream.
+
+    :param num_streams: the number of outbound streams requested. It is 
+        lowered to the number negotiated by set_num_streams().
+    :param policy: either a key of sctp_stream_policies or a function with 
+        the same arguments of select_stream_by_session_id().
+    :param max_batch_size: the maximum number of bytes sent at once in a
+        stream.
+    """
+    def __init__(self,
+                 num_streams: int = 1,
+                 policy: Any = DIAMETER_SCTP_STREAM_POLICY_SESSION_ID,
+                 max_batch_size: int = SEND_BUFFER_MAXIMUM_SIZE) -> None:
+        self.num_streams = num_streams
+        self.policy = sctp_stream_policies.get(policy, policy)
+        self.max_batch_size = max_batch_size
+        self.framers = dict()
+
+
+    def set_num_streams(self, num_streams: int) -> None:
+        self.num_streams = max(1, min(self.num_streams, num_streams))
+
+
+    def split(self, data: bytes) -> list:
+        """Splits a byte stream of whole Diameter Messages into a list of
+        (stream id, batch) tuples. Messages keep their order within each
+        stream, but not across streams.
+        """
+        batches = dict()
+
+        offset = 0
+        while len(data) - offset >= DIAMETER_HEADER_LENGTH:
+            length = DiameterHeader.peek(data, offset).length
+            if length < DIAMETER_HEADER_LENGTH or offset + length > len(data):
+                break
+
+            stream_id = self.policy(data, offset, self.num_streams)
+            batches.setdefault(stream_id, list()).append(data[offset:offset + length])
+            offset += length
+
+        if offset < len(data):
+            batches.setdefault(0, list()).append(data[offset:])
+
+        result = list()
+        for stream_id, msgs in batches.items():
+            batch = b""
+            for msg in msgs:
+                if batch and len(batch) + len(msg) > self.max_batch_size:
+                    result.append((stream_id, batch))
+                    batch = b""
+                batch += msg
+            result.append((stream_id, batch))
+
+        return result
+
+
+    def feed(self, stream_id: int, data: bytes) -> bytes:
+        """Returns the whole Diameter Messages received so far in a given
+        stream.
+        """
+        framer = self.framers.get(stream_id)
+        if framer is None:
+            framer = self.framers[stream_id] = DiameterStreamFramer()
+
+        return framer.feed(data)
+
+
+    def reset(self) -> None:
+        self.framers = dict()
+
+
 import importlib
 class SctpConnection(TcpConnection):
-    def __init__(self, ip_address, port):
+    def __init__(self, 
+                 ip_address, 
+                 port, 
+                 num_streams=1, 
+                 policy=DIAMETER_SCTP_STREAM_POLICY_SESSION_ID):
         try:
             self.sctp = importlib.import_module("sctp")
             self._sctp = importlib.import_module("_sctp")
@@ -260,25 +467,54 @@ class SctpConnection(TcpConnection):
             tcp_connection.error(f"Python 'pysctp' module is required. Cannot initialize SctpConnection.")
             raise ex
         super().__init__(ip_address, port)
+        self.streams = SctpStreams(num_streams, policy)
+        self.streams_negotiated = False
 
-    def _write(self):
-        if self._send_buffer:
-            try:
-                sent = self.sock.sctp_send(self._send_buffer)
-                tcp_connection.debug(f"[Socket-{self.sock_id}] Just sent "\
-                                     f"{sent} bytes in _send_buffer")
+    def _set_init_params(self, sock):
+        sock.initparams.num_ostreams = self.streams.num_streams
+        sock.initparams.max_instreams = self.streams.num_streams
 
-            except BlockingIOError:
-                tcp_connection.exception(f"[Socket-{self.sock_id}] An error "\
-                                         f"has occurred")
+        #: Needed for sctp_recv() to tell the stream of the received data.
+        sock.events.clear()
+        sock.events.data_io = 1
 
-                self._stop_threads = True
+    def _set_negotiated_streams(self):
+        try:
+            self.streams.set_num_streams(self.sock.get_status().outstrms)
+        except (AttributeError, OSError):
+            self.streams.set_num_streams(1)
 
-            else:
-                self._send_buffer = self._send_buffer[sent:]
+        self.streams_negotiated = True
+        tcp_connection.debug(f"[Socket-{self.sock_id}] Using "\
+                             f"{self.streams.num_streams} SCTP stream(s)")
+
+    def _write(self):
+        if self._send_buffer:
+            if not self.streams_negotiated:
+                self._set_negotiated_streams()
+
+            batches = self.streams.split(self._send_buffer)
+            self._send_buffer = b""
+
+            for index, (stream_id, batch) in enumerate(batches):
+                try:
+                    sent = self.sock.sctp_send(batch, 
+                                               ppid=socket.htonl(DIAMETER_SCTP_PPID),
+                                               stream=stream_id)
+                    tcp_connection.debug(f"[Socket-{self.sock_id}] Just sent "\
+                                         f"{sent} bytes in stream {stream_id}")
+
+                except BlockingIOError:
+                    #: The remaining batches are tried again on the next
+                    #: EVENT_WRITE. They are split again in the same way, as
+                    #: they hold whole Diameter Messages only.
+                    self._send_buffer = b"".join([_batch for _, _batch in 
+                                                  batches[index:]])
+                    break
 
             tcp_connection.debug(f"[Socket-{self.sock_id}] Stream data "\
                                  f"has been sent")
+
     def _read(self):
         try:
             fromaddr, flags, data, notif = self.sock.sctp_recv(4096*64)
@@ -293,8 +529,13 @@ class SctpConnection(TcpConnection):
             self._stop_threads = True
 
         else:
-            if data:
-                self._recv_buffer += data
+            if flags & getattr(self.sctp, "FLAG_NOTIFICATION", 0):
+                tcp_connection.debug(f"[Socket-{self.sock_id}] SCTP "\
+                                     f"notification received: {notif}")
+
+            elif data:
+                stream_id = getattr(notif, "stream", 0)
+                self._recv_buffer += self.streams.feed(stream_id, data)
                 tcp_connection.debug(f"[Socket-{self.sock_id}] _recv_buffer: "\
                                      f"{self._recv_buffer.hex()}")
             else:
@@ -340,8 +581,12 @@ class TcpClient(TcpConnection):
 
 
 class SctpClient(TcpClient,SctpConnection):
-    def __init__(self, ip_address, port):
-        SctpConnection.__init__(self, ip_address, port)
+    def __init__(self, 
+                 ip_address, 
+                 port, 
+                 num_streams=1, 
+                 policy=DIAMETER_SCTP_STREAM_POLICY_SESSION_ID):
+        SctpConnection.__init__(self, ip_address, port, num_streams, policy)
 
     def test_connection(self):
         return SctpConnection.test_connection(self)
@@ -355,6 +600,7 @@ class SctpClient(TcpClient,SctpConnection):
     def start(self):
         try:
             self.sock = self.sctp.sctpsocket_tcp(socket.AF_INET)
+            self._set_init_params(self.sock)
             tcp_client.debug(f"[Socket-{self.sock_id}] Client-side Socket: "\
                              f"{self.sock}")
 
@@ -446,8 +692,12 @@ class TcpServer(TcpConnection):
 
 
 class SctpServer(TcpServer,SctpConnection):
-    def __init__(self, ip_address, port):
-        SctpConnection.__init__(self, ip_address, port)
+    def __init__(self, 
+                 ip_address, 
+                 port, 
+                 num_streams=1, 
+                 policy=DIAMETER_SCTP_STREAM_POLICY_SESSION_ID):
+        SctpConnection.__init__(self, ip_address, port, num_streams, policy)
 
     def test_connection(self):
         return SctpConnection.test_connection(self)
@@ -463,10 +713,9 @@ class SctpServer(TcpServer,SctpConnection):
             if self._sctp.getconstant("IPPROTO_SCTP") != 132:
                 raise Exception("SCTP not supported by system")
             self.server_sock = self.sctp.sctpsocket_tcp(socket.AF_INET)
-            # sock.initparams.max_instreams = 3
-            # sock.initparams.max_ostreams = 3
-            # sock.events.clear()
-            # sock.events.data_io = 1
+
+            #: Accepted sockets inherit the listening socket init params.
+            self._set_init_params(self.server_sock)
 
             tcp_connection.debug(f"[Socket-{self.sock_id}] Server-side "\
                                  f"Socket: {self.server_sock}")
@@ -490,3 +739,171 @@ class SctpServer(TcpServer,SctpConnection):
 
         except Exception as e:
             tcp_server.exception(f"server_error: {e.args}")
+
+
+class TcpListener:
+    """Listening TCP socket which keeps accepting connections, as opposed 
+    to TcpServer, which serves the first one only. It has the same accept() 
+    method as LoopbackListener.
+
+    If `reuse_port` is True, SO_REUSEPORT is set, so many processes may 
+    listen on the same address and the kernel spreads the incoming 
+    connections among them.
+    """
+    def __init__(self, 
+                 ip_address: str, 
+                 port: int, 
+                 reuse_port: bool = False,
+                 backlog: int = 1024) -> None:
+        self.ip_address = ip_address
+        self.port = port
+        self.reuse_port = reuse_port
+        self.backlog = backlog
+
+        self.sock = None
+        self.selector = selectors.DefaultSelector()
+
+
+    def start(self) -> None:
+        #: The address family, either IPv4 or IPv6, is taken from the 
+        #: IP address.
+        family, _, _, _, address = socket.getaddrinfo(self.ip_address,
+                                                      self.port,
+                                                      type=socket.SOCK_STREAM,
+                                                      flags=socket.AI_PASSIVE)[0]
+
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        if self.reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise ConnectionError("SO_REUSEPORT is not supported by "\
+                                      "this system")
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+        self.sock.bind(address)
+        self.sock.listen(self.backlog)
+        self.sock.setblocking(False)
+        self.selector.register(self.sock, selectors.EVENT_READ)
+
+        tcp_server.debug(f"Listening on {self.ip_address}:{self.port}")
+
+
+    def accept(self, timeout: float = None) -> socket.socket:
+        if not self.selector.select(timeout=timeout):
+            return None
+
+        try:
+            sock, remote_address = self.sock.accept()
+        except BlockingIOError:
+            #: Another process sharing the port took the connection.
+            return None
+
+        tcp_server.debug(f"New connection accepted from {remote_address}")
+        return sock
+
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.selector.unregister(self.sock)
+            self.sock.close()
+            self.sock = None
+
+
+class AcceptedConnection(TcpConnection):
+    """Transport connection over a socket already accepted by a TcpListener
+    or a LoopbackListener.
+    """
+    def __init__(self, sock: socket.socket) -> None:
+        try:
+            ip_address, port = sock.getpeername()[:2]
+        except (OSError, ValueError):
+            #: Loopback sockets have no peer address.
+            ip_address, port = None, None
+
+        super().__init__(ip_address, port)
+        self.accepted_sock = sock
+
+
+    def start(self) -> None:
+        self.sock = self.accepted_sock
+        self.sock.setblocking(False)
+        self.is_connected = True
+
+        self.selector.register(self.sock, selectors.EVENT_READ)
+        tcp_server.debug(f"[Socket-{self.sock_id}] Registering accepted "\
+                         f"Socket into Selector address: "\
+                         f"{self.selector.get_map()}")
+
+
+    def test_connection(self) -> bool:
+        return self.is_connected
+
+
+class LoopbackClient(TcpConnection):
+    def __init__(self, ip_address: str, port: str) -> None:
+        super().__init__(ip_address, port)
+
+
+    def start(self) -> None:
+        try:
+            self.sock = connect_loopback(self.ip_address, self.port)
+            loopback_connection.debug(f"[Socket-{self.sock_id}] Client-side "\
+                                      f"Socket: {self.sock}")
+
+            self.sock.setblocking(False)
+            self.is_connected = True
+
+            self.selector.register(self.sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+            loopback_connection.debug(f"[Socket-{self.sock_id}] Registering "\
+                                      f"Socket Selector address: "\
+                                      f"{self.selector.get_map()}")
+
+        except Exception as e:
+            loopback_connection.exception(f"client_errors: {e.args}")
+
+
+    def test_connection(self) -> bool:
+        return self.is_connected
+
+
+class LoopbackServer(TcpConnection):
+    def __init__(self, ip_address: str, port: str) -> None:
+        super().__init__(ip_address, port)
+        self.listener = None
+
+
+    def start(self) -> None:
+        try:
+            self.listener = listen_loopback(self.ip_address, self.port)
+            loopback_connection.debug(f"[Socket-{self.sock_id}] Listening on "\
+                                      f"loopback {self.ip_address}:{self.port}")
+
+        except Exception as e:
+            loopback_connection.exception(f"server_error: {e.args}")
+
+
+    def run(self) -> None:
+        if self.listener is not None and not self.is_connected:
+            self.sock = self.listener.accept()
+            self.sock.setblocking(False)
+            loopback_connection.debug(f"[Socket-{self.sock_id}] New Socket "\
+                                      f"accepted: {self.sock}")
+
+            self.is_connected = True
+            self.selector.register(self.sock, selectors.EVENT_READ)
+
+        super().run()
+
+
+    def test_connection(self) -> bool:
+        return self.is_connected
+
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            if self.listener is not None:
+                self.listener.close()
+                self.listener = None
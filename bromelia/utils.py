@@ -9,10 +9,11 @@
     :license: MIT, see LICENSE for more details.
 """
 
-from typing import Any
+from typing import Any, Iterable, List
 
 from ._internal_utils import convert_to_integer_from_bytes
 from .constants import *
+from .exceptions import DataTypeError
 
 FLAG_VENDOR_BIT = FLAG_VENDOR_SPECIFIC_AND_NOT_MANDATORY_AND_NOT_PROTECTED
 
@@ -219,33 +220,139 @@ def is_special_char(bits: str) -> bool:
     return any(char in bits for char in special_chars.keys())
 
 
+#: TBCD (Telephony Binary Coded Decimal) as per clause 17.7.8 of 
+#: ETSI TS 129 002. Each octet carries two digits, the first one in the low 
+#: order nibble. Once the nibble pairs are swapped, TBCD is nothing more than
+#: a hexadecimal string, so both directions are reduced to 256-entry 
+#: translation tables plus `bytes.fromhex` / `bytes.hex`, which run in C.
+TBCD_FILLER = "f"
+
+_TBCD_DIGITS = "0123456789*#abc"
+_TBCD_NIBBLES = "0123456789abcde"
+
+_TBCD_INVALID = 0x00
+
+_TBCD_ENCODE_TABLE = bytearray(256)
+for _digit, _nibble in zip(_TBCD_DIGITS, _TBCD_NIBBLES):
+    _TBCD_ENCODE_TABLE[ord(_digit)] = ord(_nibble)
+    _TBCD_ENCODE_TABLE[ord(_digit.upper())] = ord(_nibble)
+_TBCD_ENCODE_TABLE = bytes(_TBCD_ENCODE_TABLE)
+
+_TBCD_DECODE_TABLE = bytearray(range(256))
+for _digit, _nibble in zip(_TBCD_DIGITS, _TBCD_NIBBLES):
+    _TBCD_DECODE_TABLE[ord(_nibble)] = ord(_digit)
+_TBCD_DECODE_TABLE = bytes(_TBCD_DECODE_TABLE)
+
+
+def _swap_nibbles(stream: bytes) -> bytearray:
+    swapped = bytearray(len(stream))
+    swapped[0::2] = stream[1::2]
+    swapped[1::2] = stream[0::2]
+    return swapped
+
+
+def _to_ascii_digits(digits: Any) -> bytes:
+    if isinstance(digits, int):
+        digits = str(digits)
+
+    if isinstance(digits, str):
+        try:
+            digits = digits.encode("ascii")
+        except UnicodeEncodeError:
+            raise DataTypeError(f"invalid TBCD digits: '{digits}'")
+
+    elif not isinstance(digits, (bytes, bytearray)):
+        raise DataTypeError("TBCD digits MUST be either 'str', 'int' or "\
+                            "'bytes'")
+
+    return digits
+
+
+def _translate_digits(digits: bytes) -> bytes:
+    translated = digits.translate(_TBCD_ENCODE_TABLE)
+
+    if _TBCD_INVALID in translated:
+        digits = digits.decode("ascii", errors="backslashreplace")
+        raise DataTypeError(f"invalid TBCD digits: '{digits}'")
+
+    if len(translated) % 2 != 0:
+        translated += TBCD_FILLER.encode("ascii")
+
+    return translated
+
+
+def encode_tbcd(digits: Any) -> bytes:
+    """Encodes a string of digits (IMSI, MSISDN, STN-SR ...) into its TBCD
+    byte stream. Odd-length inputs are padded with the filler nibble.
+
+    Usage::
+
+        >>> from bromelia.utils import encode_tbcd
+        >>> encode_tbcd("5521993082672").hex()
+        '551299032876f2'
+    """
+    translated = _translate_digits(_to_ascii_digits(digits))
+    return bytes.fromhex(_swap_nibbles(translated).decode("ascii"))
+
+
+def decode_tbcd(stream: bytes) -> str:
+    """Decodes a TBCD byte stream into its string of digits. The trailing
+    filler nibbles, if any, are removed.
+
+    Usage::
+
+        >>> from bromelia.utils import decode_tbcd
+        >>> decode_tbcd(bytes.fromhex("551299032876f2"))
+        '5521993082672'
+    """
+    digits = _swap_nibbles(stream.hex().encode("ascii"))
+    digits = digits.translate(_TBCD_DECODE_TABLE).decode("ascii")
+
+    return digits.rstrip(TBCD_FILLER)
+
+
+def encode_tbcd_batch(identities: Iterable[Any]) -> List[bytes]:
+    """Encodes several identities at once. All of them are swapped and 
+    converted in a single pass over one joint buffer, which is then split 
+    back as per each identity length.
+    """
+    streams = [_translate_digits(_to_ascii_digits(digits)) 
+                                                for digits in identities]
+    joint = b"".join(streams)
+
+    encoded = bytes.fromhex(_swap_nibbles(joint).decode("ascii"))
+
+    output, offset = list(), 0
+    for stream in streams:
+        length = len(stream) // 2
+        output.append(encoded[offset:offset+length])
+        offset += length
+
+    return output
+
+
+def decode_tbcd_batch(streams: Iterable[bytes]) -> List[str]:
+    """Decodes several TBCD byte streams at once. It is the counterpart of
+    encode_tbcd_batch function.
+    """
+    streams = list(streams)
+    joint = _swap_nibbles(b"".join(streams).hex().encode("ascii"))
+    digits = joint.translate(_TBCD_DECODE_TABLE).decode("ascii")
+
+    output, offset = list(), 0
+    for stream in streams:
+        length = 2*len(stream)
+        output.append(digits[offset:offset+length].rstrip(TBCD_FILLER))
+        offset += length
+
+    return output
+
+
 def encode_to_tbcd(input: Any) -> str:
-    offset, output = 0, ""
-    input = str(input) if isinstance(input, int) else input
-    
-    while offset < len(input):
-        bits = get_two_bits(input, offset)
-
-        if len(bits) == 2:
-            bits = bits[::-1]
-            bits = transform_bits(bits) if is_special_char(bits) else bits
-            output += bits
-            offset += 2
-        else:
-            bits = "f" + str(bits)
-            output += bits
-            return output
-
-
-def decode_from_tbcd(input: str) -> str:
-    offset, output = 0, ""
-
-    while offset < len(input):
-        bits = get_two_bits(input, offset)
-
-        if "f" not in bits:
-            output += bits[::-1]
-            offset += 2
-        else:
-            output += bits[1]
-            return output
\ No newline at end of file
+    return encode_tbcd(input).hex()
+
+
+def decode_from_tbcd(input: Any) -> str:
+    if isinstance(input, str):
+        input = bytes.fromhex(input)
+    return decode_tbcd(input)
@@ -21,6 +21,7 @@ sys.path.insert(0, base_dir)
 from bromelia.avps.etsi_3gpp.ts_129_272 import *
 from bromelia.avps.ietf.rfc6733 import *
 from bromelia.avps.ietf.rfc5447 import *
+from bromelia.utils import encode_to_tbcd
 
 
 class TestDiameterAVP(unittest.TestCase):
@@ -19,6 +19,7 @@ base_dir = os.path.dirname(os.path.dirname(testing_dir))
 sys.path.insert(0, base_dir)
 
 from bromelia.avps.etsi_3gpp.ts_129_329 import *
+from bromelia.utils import encode_to_tbcd
 
 
 class TestDiameterAVP(unittest.TestCase):
@@ -89,6 +90,13 @@ class TestMsisdnAVP(unittest.TestCase):
         avp = MsisdnAVP("5599900000000")
         self.assertEqual(avp.dump().hex(), ref)
 
+    def test__msisdn_avp__decode(self):
+        avp = MsisdnAVP("5521993082672")
+        self.assertEqual(avp.decode(), "5521993082672")
+
+        avp = MsisdnAVP(bytes.fromhex("551299032876f2"))
+        self.assertEqual(avp.decode(), "5521993082672")
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
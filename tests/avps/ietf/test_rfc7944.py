@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+    tests.avps.ietf.test_rfc7944
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    This module contains Diameter AVP unittests defined for IETF RFC 7944.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps.ietf.rfc7944 import *
+
+
+class TestDiameterAVP(unittest.TestCase):
+    def test_diameter_avp__load_staticmethod__parsing_drmp_avp_stream(self):
+        stream = bytes.fromhex("0000012d0000000c0000000a")
+
+        avps = DiameterAVP.load(stream)
+
+        self.assertTrue(isinstance(avps[0], DrmpAVP))
+        self.assertEqual(avps[0].code, DRMP_AVP_CODE)
+        self.assertFalse(avps[0].is_vendor_id())
+        self.assertFalse(avps[0].is_mandatory())
+        self.assertFalse(avps[0].is_protected())
+        self.assertEqual(avps[0].get_length(), 12)
+        self.assertIsNone(avps[0].vendor_id)
+        self.assertEqual(avps[0].data, DRMP_PRIORITY_10)
+        self.assertIsNone(avps[0].get_padding_length())
+        self.assertEqual(avps[0].__repr__(), "<Diameter AVP: 301 [Drmp]>")
+
+
+class TestDrmpAVP(unittest.TestCase):
+    def test_drmp_avp__repr_dunder(self):
+        avp = DrmpAVP(DRMP_PRIORITY_0)
+        self.assertEqual(avp.__repr__(), "<Diameter AVP: 301 [Drmp]>")
+
+    def test_drmp_avp__diameter_avp_convert_classmethod(self):
+        avp = DrmpAVP(DRMP_PRIORITY_0)
+
+        custom = DiameterAVP.convert(avp)
+        self.assertEqual(custom.code, avp.code)
+        self.assertEqual(custom.flags, avp.flags)
+        self.assertEqual(custom.length, avp.length)
+        self.assertEqual(custom.vendor_id, avp.vendor_id)
+        self.assertEqual(custom.data, avp.data)
+        self.assertEqual(custom._padding, avp._padding)
+
+    def test_drmp_avp__priority_0(self):
+        avp = DrmpAVP(DRMP_PRIORITY_0)
+        ref = "0000012d0000000c00000000"
+        self.assertEqual(avp.dump().hex(), ref)
+
+    def test_drmp_avp__priority_10(self):
+        avp = DrmpAVP(DRMP_PRIORITY_10)
+        ref = "0000012d0000000c0000000a"
+        self.assertEqual(avp.dump().hex(), ref)
+
+    def test_drmp_avp__priority_15(self):
+        avp = DrmpAVP(DRMP_PRIORITY_15)
+        ref = "0000012d0000000c0000000f"
+        self.assertEqual(avp.dump().hex(), ref)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+    test.helpers
+    ~~~~~~~~~~~~
+
+    This module contains the mocks and factories shared by the unittests of
+    the Diameter associations, caches and routing.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+from bromelia.constants import *
+from bromelia.lib.etsi_3gpp_gx import CCR
+
+
+class Clock:
+    """Clock to be given to timers and caches, whose time only moves when
+    `now` is set.
+    """
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class MockTransport:
+    """Transport of a DiameterAssociation that keeps the byte streams sent
+    instead of writing them to a socket.
+    """
+    is_connected = True
+
+    def __init__(self):
+        self.streams = list()
+        self._recv_data_stream = b""
+        self._recv_data_times = None
+
+    def is_write_mode(self):
+        return False
+
+    def _set_selector_events_mask(self, mode, stream):
+        self.streams.append(stream)
+
+    def close(self):
+        self.is_connected = False
+
+
+class MockAssociation:
+    def __init__(self):
+        self.messages = list()
+        self.relay = False
+
+    def is_connected(self):
+        return True
+
+    def put_message_into_send_queue(self, msg):
+        self.messages.append(msg)
+
+
+class MockPeer:
+    """Peer of a RelayAgent, whose messages sent are kept by its
+    MockAssociation.
+    """
+    def __init__(self, host_name):
+        self.host_name = host_name
+        self.association = MockAssociation()
+        self.config = {
+                "LOCAL_NODE_HOSTNAME": "dra.bromelia.org",
+                "LOCAL_NODE_REALM": "bromelia.org"
+        }
+
+    def is_open(self):
+        return True
+
+    def is_closed(self):
+        return False
+
+
+def get_config(**kwargs):
+    """Returns the config of a Gx client association of pgw.bromelia.org
+    with pcrf.bromelia.org, updated with `kwargs`.
+    """
+    config = {
+            "MODE": "CLIENT",
+            "TRANSPORT_TYPE": "TCP",
+            "APPLICATIONS": [{
+                                "vendor_id": VENDOR_ID_3GPP,
+                                "app_id": DIAMETER_APPLICATION_Gx
+            }],
+            "LOCAL_NODE_HOSTNAME": "pgw.bromelia.org",
+            "LOCAL_NODE_REALM": "bromelia.org",
+            "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+            "LOCAL_NODE_PORT": 3868,
+            "PEER_NODE_HOSTNAME": "pcrf.bromelia.org",
+            "PEER_NODE_REALM": "bromelia.org",
+            "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+            "PEER_NODE_PORT": 3868,
+            "WATCHDOG_TIMEOUT": 30
+    }
+    config.update(kwargs)
+    return config
+
+
+def create_ccr(origin_host="pgw.bromelia.org"):
+    return CCR(session_id="pgw.bromelia.org;1;1",
+               origin_host=origin_host,
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+               cc_request_number=0)
@@ -11,6 +11,7 @@
 
 import unittest
 import os
+import platform
 import sys
 import struct
 
@@ -20,9 +21,11 @@ base_dir = os.path.dirname(testing_dir)
 sys.path.insert(0, base_dir)
 
 from bromelia._internal_utils import *
+from bromelia._internal_utils import _convert_config_to_connection_obj
 from bromelia.avps import *
 from bromelia.base import *
 from bromelia.constants import *
+from bromelia.exceptions import InvalidConfigValue
 
 
 class TestConvertTo1Byte(unittest.TestCase):
@@ -803,5 +806,73 @@ class TestGetLoggingFileName(unittest.TestCase):
         self.assertEqual(cm.exception.args[0], "Invalid symbol found")
 
 
+class TestLazyDefault(unittest.TestCase):
+    def test__resolve__calls_func_only_once(self):
+        calls = []
+        default = LazyDefault("test", lambda: calls.append(1) or "value")
+
+        self.assertEqual(calls, [])
+        self.assertEqual(default.resolve(), "value")
+        self.assertEqual(default.resolve(), "value")
+        self.assertEqual(calls, [1])
+
+    def test__repr(self):
+        default = LazyDefault("socket.getfqdn()", lambda: "bromelia.org")
+
+        self.assertEqual(default.__repr__(), "<LazyDefault: socket.getfqdn()>")
+
+    def test__resolve_default(self):
+        default = LazyDefault("test", lambda: "value")
+
+        self.assertEqual(resolve_default(default), "value")
+        self.assertEqual(resolve_default("other"), "other")
+        self.assertIsNone(resolve_default(None))
+
+    def test__default_host_name(self):
+        self.assertEqual(DEFAULT_HOST_NAME.resolve(), platform.node())
+
+
+class TestConvertConfigToConnectionObj(unittest.TestCase):
+    def setUp(self):
+        self.config = {
+                "MODE": "CLIENT",
+                "TRANSPORT_TYPE": "SCTP",
+                "APPLICATIONS": [],
+                "LOCAL_NODE_HOSTNAME": "mme.bromelia.org",
+                "LOCAL_NODE_REALM": "bromelia.org",
+                "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+                "LOCAL_NODE_PORT": 3868,
+                "PEER_NODE_HOSTNAME": "hss.bromelia.org",
+                "PEER_NODE_REALM": "bromelia.org",
+                "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+                "PEER_NODE_PORT": 3868,
+                "WATCHDOG_TIMEOUT": 30
+        }
+
+    def test__sctp_streams__default(self):
+        connection = _convert_config_to_connection_obj(self.config)
+
+        self.assertEqual(connection.sctp_streams, 1)
+        self.assertEqual(connection.sctp_stream_policy, "SESSION_ID")
+
+    def test__sctp_streams(self):
+        self.config["SCTP_STREAMS"] = 8
+        self.config["SCTP_STREAM_POLICY"] = "APPLICATION"
+        connection = _convert_config_to_connection_obj(self.config)
+
+        self.assertEqual(connection.sctp_streams, 8)
+        self.assertEqual(connection.sctp_stream_policy, "APPLICATION")
+
+    def test__sctp_streams__invalid(self):
+        self.config["SCTP_STREAMS"] = 0
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(self.config)
+
+        self.config["SCTP_STREAMS"] = 2
+        self.config["SCTP_STREAM_POLICY"] = "ROUND_ROBIN"
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(self.config)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
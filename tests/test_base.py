@@ -2795,5 +2795,414 @@ class TestDiameterMessage(unittest.TestCase):
         self.assertIsNone(cea.supported_vendor_id_avp.get_padding_length())
 
 
+class TestDiameterAvpLoader(unittest.TestCase):
+    def test__diameter_avp_loader__has_updated(self):
+        _loader = DiameterAvpLoader()
+        _loader.get_avp_class(OriginHostAVP("host"))
+
+        self.assertFalse(_loader.has_updated())
+
+        class TemporaryAVP(DiameterAVP):
+            code = convert_to_4_bytes(99999)
+            vendor_id = None
+
+        self.assertTrue(_loader.has_updated())
+
+
+class TestDiameterMessageSchema(unittest.TestCase):
+    def test__diameter_message_schema__compile__is_cached(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        self.assertIs(DiameterMessageSchema.compile(DeviceWatchdogRequest),
+                      DiameterMessageSchema.compile(DeviceWatchdogRequest))
+
+    def test__diameter_message_schema__fields_follow_constructor_order(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        schema = DiameterMessageSchema.compile(DeviceWatchdogRequest)
+        self.assertEqual([field[0] for field in schema.fields], 
+                         ["origin_host", "origin_realm", "origin_state_id"])
+        self.assertEqual([field[3] for field in schema.fields], 
+                         ["origin_host_avp", 
+                          "origin_realm_avp", 
+                          "origin_state_id_avp"])
+
+    def test__diameter_message_schema__build(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        dwr = DeviceWatchdogRequest(origin_host="host",
+                                    origin_realm="realm",
+                                    origin_state_id=1)
+
+        self.assertEqual(dwr.avps, [dwr.origin_host_avp,
+                                    dwr.origin_realm_avp,
+                                    dwr.origin_state_id_avp])
+        self.assertEqual(dwr.header.get_length(), 20 + 12 + 16 + 12)
+
+    def test__diameter_message_schema__build__lazy_defaults(self):
+        import platform
+        from bromelia.messages import DeviceWatchdogRequest
+
+        dwr = DeviceWatchdogRequest()
+
+        self.assertEqual(dwr.origin_host_avp.data, platform.node().encode())
+
+    def test__diameter_message_schema__build__missing_mandatory_avp(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        with self.assertRaises(DiameterMessageError) as cm:
+            DeviceWatchdogRequest(origin_host=None)
+
+        self.assertEqual(cm.exception.args[0], "missing mandatory AVP "\
+                                               "argument avp_value: "\
+                                               "'origin_host'")
+
+    def test__diameter_message_schema__build__custom_avps(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        dwr = DeviceWatchdogRequest(session_id_avp=SessionIdAVP("session"),
+                                    user_name_avp=UserNameAVP("user"))
+
+        self.assertEqual(dwr.avps[-2], dwr.session_id_avp)
+        self.assertEqual(dwr.avps[-1], dwr.user_name_avp)
+        self.assertEqual(dwr.header.get_length(), len(dwr.dump()))
+
+    def test__diameter_message_schema__build__custom_avps__invalid(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        with self.assertRaises(DiameterMessageError) as cm:
+            DeviceWatchdogRequest(session_id="session")
+
+        self.assertEqual(cm.exception.args[0], "non-mandatory and "\
+                                               "non-optionals AVPs should "\
+                                               "include DiameterAVP object "\
+                                               "only")
+
+
+class TestCopy(unittest.TestCase):
+    def setUp(self):
+        from bromelia.messages import CapabilitiesExchangeRequest
+
+        self.cer = CapabilitiesExchangeRequest(origin_host="host",
+                                               origin_realm="realm",
+                                               host_ip_address="10.0.0.1")
+        self.cer.append(VendorSpecificApplicationIdAVP([
+                                        VendorIdAVP(VENDOR_ID_3GPP),
+                                        AuthApplicationIdAVP(DIAMETER_APPLICATION_S6a)
+        ]))
+
+    def test__diameter_avp__copy(self):
+        avp = OriginHostAVP("host")
+        _avp = avp.copy()
+
+        self.assertIsNot(avp, _avp)
+        self.assertEqual(avp, _avp)
+        self.assertEqual(type(avp), type(_avp))
+
+        _avp.data = b"another-host"
+        self.assertEqual(avp.data, b"host")
+
+    def test__diameter_avp__copy__grouped(self):
+        avp = self.cer.vendor_specific_application_id_avp
+        _avp = avp.copy()
+
+        self.assertEqual(avp, _avp)
+        self.assertIsNot(avp.avps[0], _avp.avps[0])
+        self.assertIs(_avp.vendor_id_avp, _avp.avps[0])
+        self.assertIs(_avp.auth_application_id_avp, _avp.avps[1])
+
+    def test__diameter_header__copy(self):
+        header = self.cer.header
+        _header = header.copy()
+
+        self.assertIsNot(header, _header)
+        self.assertEqual(header, _header)
+
+        _header.hop_by_hop = bytes.fromhex("00000001")
+        self.assertNotEqual(header.hop_by_hop, _header.hop_by_hop)
+
+    def test__diameter_message__copy(self):
+        _cer = self.cer.copy()
+
+        self.assertEqual(type(self.cer), type(_cer))
+        self.assertEqual(self.cer.dump(), _cer.dump())
+        self.assertIsNot(self.cer.header, _cer.header)
+        self.assertIsNot(self.cer.origin_host_avp, _cer.origin_host_avp)
+        self.assertIs(_cer.origin_host_avp, _cer.avps[0])
+
+        _cer.origin_host_avp.data = b"another-host"
+        self.assertEqual(self.cer.origin_host_avp.data, b"host")
+
+    def test__diameter_message__copy__from_stream(self):
+        _cer = self.cer.copy(from_stream=True)
+
+        #: AVPs are not decoded yet
+        self.assertNotIn("_avps", _cer.__dict__)
+        self.assertEqual(self.cer.dump(), _cer.dump())
+        self.assertEqual(type(self.cer), type(_cer))
+
+        #: AVPs are decoded on first access
+        self.assertEqual(_cer.origin_host_avp.data, b"host")
+        self.assertIn("_avps", _cer.__dict__)
+        self.assertEqual(len(_cer.avps), len(self.cer.avps))
+        self.assertEqual(self.cer.dump(), _cer.dump())
+        self.assertEqual(_cer.vendor_specific_application_id_avp.vendor_id_avp.data,
+                         VENDOR_ID_3GPP)
+
+    def test__diameter_message__copy__from_stream__append(self):
+        self.cer.append(RouteRecordAVP("first.host"))
+        _cer = self.cer.copy(from_stream=True)
+
+        _cer.append(RouteRecordAVP("second.host"))
+
+        self.assertEqual(_cer.route_record_avp.data, b"first.host")
+        self.assertEqual(_cer.route_record_avp__1.data, b"second.host")
+        self.cer.append(RouteRecordAVP("second.host"))
+        self.assertEqual(_cer.dump(), self.cer.dump())
+
+    def test__diameter_message__copy__from_stream__cleanup(self):
+        _cer = self.cer.copy(from_stream=True)
+
+        _cer.avps = [OriginHostAVP("other")]
+
+        self.assertEqual(_cer.avps, [OriginHostAVP("other")])
+        self.assertEqual(_cer.dump()[DIAMETER_HEADER_LENGTH:], 
+                         OriginHostAVP("other").dump())
+        self.assertEqual(_cer.header.get_length(), len(_cer.dump()))
+
+    def test__diameter_message__copy__from_stream__unknown_attribute(self):
+        _cer = self.cer.copy(from_stream=True)
+
+        with self.assertRaises(AttributeError):
+            _cer.user_name_avp
+
+
+class TestLazyImports(unittest.TestCase):
+    def run_statement(self, statement):
+        import subprocess
+
+        process = subprocess.run([sys.executable, "-c", statement],
+                                 cwd=base_dir,
+                                 capture_output=True,
+                                 text=True)
+        self.assertEqual(process.returncode, 0, process.stderr)
+        return process.stdout.strip()
+
+    def test__bromelia__import_all(self):
+        self.assertEqual(self.run_statement("from bromelia import *; "\
+                                            "print(Bromelia.__name__, "\
+                                            "Diameter.__name__)"),
+                         "Bromelia Diameter")
+
+    def test__avps__first_access(self):
+        output = self.run_statement("import sys; "\
+                                    "from bromelia.avps import OriginHostAVP; "\
+                                    "print('bromelia.avps.etsi_3gpp.ts_129_272' "\
+                                    "in sys.modules)")
+
+        self.assertEqual(output, "False")
+
+    def test__avps__import_all(self):
+        import bromelia.avps
+
+        self.assertIn("SubscriptionIdAVP", bromelia.avps.__all__)
+        self.assertIs(bromelia.avps.UserNameAVP, UserNameAVP)
+
+        with self.assertRaises(AttributeError):
+            bromelia.avps.UnknownAVP
+
+    def test__lib__first_access(self):
+        import bromelia.lib
+
+        self.assertEqual(bromelia.lib.etsi_3gpp_gx.CCR.__name__,
+                         "CreditControlRequest")
+
+        with self.assertRaises(AttributeError):
+            bromelia.lib.unknown
+
+
+class TestHeaderPeek(unittest.TestCase):
+    def setUp(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        self.dwr = DeviceWatchdogRequest(origin_host="host",
+                                         origin_realm="realm")
+        self.stream = self.dwr.dump()
+
+    def test__diameter_header__peek(self):
+        view = DiameterHeader.peek(self.stream)
+
+        self.assertEqual(view.version, 1)
+        self.assertEqual(view.length, len(self.stream))
+        self.assertEqual(view.command_code, 280)
+        self.assertEqual(view.application_id, 0)
+        self.assertEqual(view.hop_by_hop, 
+                         int.from_bytes(self.dwr.header.hop_by_hop, "big"))
+        self.assertEqual(view.end_to_end, 
+                         int.from_bytes(self.dwr.header.end_to_end, "big"))
+        self.assertTrue(view.is_request())
+        self.assertFalse(view.is_proxiable())
+        self.assertFalse(view.is_error())
+        self.assertFalse(view.is_retransmitted())
+
+    def test__diameter_header__peek__offset(self):
+        view = DiameterHeader.peek(b"\x00" * 4 + self.stream, 4)
+
+        self.assertEqual(view.command_code, 280)
+
+    def test__diameter_header__peek__short_stream(self):
+        with self.assertRaises(DiameterHeaderError):
+            DiameterHeader.peek(self.stream[:19])
+
+    def test__diameter_header__load__matches_setters(self):
+        header = DiameterHeader.load(self.stream[:20])
+
+        self.assertEqual(header, self.dwr.header)
+        self.assertEqual(header.flags, self.dwr.header.flags)
+
+    def test__diameter_avp__scan(self):
+        avps = list(DiameterAVP.scan(self.stream, 20))
+
+        self.assertEqual([avp.code for avp in avps], [264, 296])
+        self.assertEqual(avps[0].vendor_id, None)
+        self.assertEqual(self.stream[avps[0].offset:
+                                     avps[0].offset + avps[0].data_length], 
+                         b"host")
+        self.assertEqual(avps[1].offset, 20 + 12 + 8)
+
+    def test__diameter_avp__scan__codes(self):
+        avps = list(DiameterAVP.scan(self.stream, 20, codes={296}))
+
+        self.assertEqual([avp.code for avp in avps], [296])
+        self.assertEqual(avps[0].offset, 20 + 12 + 8)
+
+        with self.assertRaises(AVPParsingError):
+            list(DiameterAVP.scan(self.stream[:-4], 20, codes={264}))
+
+    def test__diameter_avp__scan__vendor_id(self):
+        stream = MsisdnAVP("5511123456789").dump()
+        avps = list(DiameterAVP.scan(stream))
+
+        self.assertEqual(avps[0].vendor_id, 10415)
+        self.assertEqual(avps[0].offset, 12)
+
+    def test__diameter_avp__scan__invalid_length(self):
+        stream = OriginHostAVP("host").dump()
+
+        with self.assertRaises(AVPParsingError):
+            list(DiameterAVP.scan(stream[:-4]))
+
+    def test__diameter_avp__scan__truncated_header(self):
+        with self.assertRaises(AVPParsingError):
+            list(DiameterAVP.scan(b"\x00\x00\x01\x08\x40"))
+
+    def test__diameter_message__find_avp(self):
+        self.assertEqual(DiameterMessage.find_avp(self.stream, 296), b"realm")
+        self.assertIsNone(DiameterMessage.find_avp(self.stream, 263))
+        self.assertIsNone(DiameterMessage.find_avp(self.stream, 296, 10415))
+
+    def test__diameter_message__find_avp__second_message(self):
+        stream = DiameterMessage().dump() + self.stream
+
+        self.assertIsNone(DiameterMessage.find_avp(stream, 264))
+        self.assertEqual(DiameterMessage.find_avp(stream, 264, offset=20), 
+                         b"host")
+
+    def test__diameter_message__load__lazy(self):
+        msgs = DiameterMessage.load(self.stream + self.stream, lazy=True)
+
+        self.assertEqual(len(msgs), 2)
+        self.assertIn("_pending_stream", msgs[0].__dict__)
+        self.assertEqual(msgs[0].dump(), self.stream)
+        self.assertEqual(msgs[0].header, self.dwr.header)
+
+        self.assertEqual(msgs[1].origin_host_avp.data, b"host")
+        self.assertNotIn("_pending_stream", msgs[1].__dict__)
+        self.assertEqual(msgs[1].avps, DiameterMessage.load(self.stream)[0].avps)
+
+    def test__diameter_message__load__lazy__invalid_avps_layout(self):
+        stream = bytearray(self.stream)
+        stream[27] = 0xff
+
+        with self.assertRaises(AVPParsingError):
+            DiameterMessage.load(bytes(stream), lazy=True)
+
+    def test__diameter_avp__check_layout__grouped(self):
+        stream = SubscriptionIdAVP([
+                                SubscriptionIdTypeAVP(END_USER_E164),
+                                SubscriptionIdDataAVP("5511123456789")
+        ]).dump()
+
+        DiameterAVP.check_layout(stream)
+
+        #: Length field of the inner Subscription-Id-Type AVP.
+        stream = bytearray(stream)
+        stream[15] = 0xff
+
+        with self.assertRaises(AVPParsingError):
+            DiameterAVP.check_layout(bytes(stream))
+
+        with self.assertRaises(AVPParsingError):
+            DiameterAVP.load(bytes(stream))
+
+    def test__diameter_message__load__lazy__invalid_grouped_avp_layout(self):
+        msg = DiameterMessage(avps=[SubscriptionIdAVP([
+                                SubscriptionIdTypeAVP(END_USER_E164),
+                                SubscriptionIdDataAVP("5511123456789")
+        ])])
+        stream = bytearray(msg.dump())
+        stream[20 + 15] = 0xff
+
+        with self.assertRaises(AVPParsingError):
+            DiameterMessage.load(bytes(stream), lazy=True)
+
+    def test__diameter_message__load__invalid_length(self):
+        stream = bytearray(self.stream)
+        stream[1:4] = b"\x00\x00\x04"
+
+        with self.assertRaises(DiameterHeaderError):
+            DiameterMessage.load(bytes(stream))
+
+
+class TestDiameterStreamFramer(unittest.TestCase):
+    def setUp(self):
+        from bromelia.messages import DeviceWatchdogRequest
+
+        self.stream = DeviceWatchdogRequest(origin_host="host",
+                                            origin_realm="realm").dump()
+
+    def test__feed__split_message(self):
+        framer = DiameterStreamFramer()
+
+        self.assertEqual(framer.feed(self.stream[:10]), b"")
+        self.assertEqual(framer.feed(self.stream[10:30]), b"")
+        self.assertEqual(len(framer), 30)
+        self.assertEqual(framer.feed(self.stream[30:] + self.stream[:5]),
+                         self.stream)
+        self.assertEqual(len(framer), 5)
+
+    def test__feed__many_messages(self):
+        framer = DiameterStreamFramer()
+
+        self.assertEqual(framer.feed(self.stream * 3), self.stream * 3)
+        self.assertEqual(len(framer), 0)
+
+    def test__feed__invalid_length(self):
+        framer = DiameterStreamFramer()
+
+        with self.assertRaises(DiameterHeaderError):
+            framer.feed(b"\x01\x00\x00\x08" + b"\x00" * 16)
+        self.assertEqual(len(framer), 0)
+
+    def test__feed__resync(self):
+        framer = DiameterStreamFramer(resync=True)
+        garbage = b"\x01\xff\xff\xff\x00\x01" + b"\x00" * 20
+
+        self.assertEqual(framer.feed(garbage + self.stream[:8]), b"")
+        self.assertEqual(framer.feed(self.stream[8:] + self.stream),
+                         self.stream * 2)
+        self.assertEqual(framer.skipped, len(garbage))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
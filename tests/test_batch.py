@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_batch
+    ~~~~~~~~~~~~~~~
+
+    This module contains the batch encoding unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps import SubscriptionIdDataAVP
+from bromelia.avps import SubscriptionIdTypeAVP
+from bromelia.base import DiameterMessage
+from bromelia.batch import BatchTemplate
+from bromelia.constants import *
+from bromelia.exceptions import DiameterAvpError
+from bromelia.exceptions import DiameterMessageError
+from bromelia.lib.etsi_3gpp_gx import CCA
+from bromelia.lib.etsi_3gpp_gx import CCR
+from bromelia.lib.etsi_3gpp_s6a import CLR
+
+
+def create_clr(session_id, user_name, hop_by_hop=0, end_to_end=0):
+    clr = CLR(destination_realm="example.com",
+              destination_host="mme.example.com",
+              user_name=user_name)
+
+    clr.session_id_avp.data = session_id
+    clr.header.hop_by_hop = hop_by_hop.to_bytes(4, byteorder="big")
+    clr.header.end_to_end = end_to_end.to_bytes(4, byteorder="big")
+    clr.refresh()
+
+    return clr
+
+
+def create_ccr(msisdn, cc_request_number, hop_by_hop=0, end_to_end=0):
+    ccr = CCR(origin_host="pgw.bromelia.org",
+              destination_realm="bromelia.org",
+              cc_request_type=CC_REQUEST_TYPE_UPDATE_REQUEST,
+              cc_request_number=cc_request_number,
+              subscription_id=[
+                        SubscriptionIdTypeAVP(END_USER_E164),
+                        SubscriptionIdDataAVP(msisdn)
+              ],
+              called_station_id="internet")
+
+    ccr.session_id_avp.data = "pgw.bromelia.org;1;1"
+    ccr.header.hop_by_hop = hop_by_hop.to_bytes(4, byteorder="big")
+    ccr.header.end_to_end = end_to_end.to_bytes(4, byteorder="big")
+    ccr.refresh()
+
+    return ccr
+
+
+class TestBatchTemplate(unittest.TestCase):
+    def setUp(self):
+        self.session_ids = [f"hss.example.com;{index}" for index in range(6)]
+        self.imsis = ["7240" + "1" * index for index in range(6)]
+        self.ids = list(range(6))
+
+        self.template = BatchTemplate(create_clr("hss.example.com;0",
+                                                 "000000000000000"),
+                                      {"session_id": "Session-Id",
+                                       "imsi": "User-Name"})
+
+    def get_expected_clrs(self):
+        return [create_clr(*values).dump()
+                    for values in zip(self.session_ids,
+                                      self.imsis,
+                                      self.ids,
+                                      self.ids)]
+
+    def test__encode(self):
+        stream = self.template.encode(session_id=self.session_ids,
+                                      imsi=self.imsis,
+                                      hop_by_hop=self.ids,
+                                      end_to_end=self.ids)
+
+        self.assertEqual(stream, b"".join(self.get_expected_clrs()))
+
+    def test__iter_encode(self):
+        streams = self.template.iter_encode(session_id=self.session_ids,
+                                            imsi=self.imsis,
+                                            hop_by_hop=self.ids,
+                                            end_to_end=self.ids)
+
+        self.assertEqual(list(streams), self.get_expected_clrs())
+
+    def test__encode__bytes_values(self):
+        streams = self.template.iter_encode(
+                        session_id=[value.encode() for value in self.session_ids],
+                        imsi=[value.encode() for value in self.imsis],
+                        hop_by_hop=self.ids,
+                        end_to_end=self.ids)
+
+        self.assertEqual(list(streams), self.get_expected_clrs())
+
+    def test__encode__missing_column(self):
+        streams = list(self.template.iter_encode(imsi=self.imsis[:2]))
+
+        for stream, imsi in zip(streams, self.imsis):
+            msg = DiameterMessage.load(stream)[0]
+            self.assertEqual(msg.session_id_avp.data, b"hss.example.com;0")
+            self.assertEqual(msg.user_name_avp.data, imsi.encode())
+
+    def test__encode__request_identifiers(self):
+        streams = list(self.template.iter_encode(count=3))
+
+        hop_by_hops = [int.from_bytes(stream[12:16], byteorder="big")
+                                                        for stream in streams]
+        self.assertEqual(len(set(hop_by_hops)), 3)
+        self.assertEqual(streams[0][20:], create_clr("hss.example.com;0",
+                                                "000000000000000").dump()[20:])
+
+    def test__encode__answer_identifiers(self):
+        cca = CCA(session_id="pgw.bromelia.org;1;1",
+                  origin_host="pcrf.bromelia.org",
+                  origin_realm="bromelia.org")
+        template = BatchTemplate(cca, {"session_id": "Session-Id"})
+
+        streams = list(template.iter_encode(session_id=["a", "b"]))
+        self.assertEqual(streams[0][12:20], cca.dump()[12:20])
+        self.assertEqual(streams[1][12:20], cca.dump()[12:20])
+
+    def test__encode__grouped_and_integer_slots(self):
+        msisdns = ["1", "5511123456789", "551112345678901"]
+        cc_request_numbers = [1, 2, 2**32 - 1]
+
+        template = BatchTemplate(create_ccr("5511123456789", 0),
+                                 {"msisdn": "Subscription-Id/"\
+                                            "Subscription-Id-Data",
+                                  "cc_request_number": "CC-Request-Number"})
+        self.assertEqual(template.slots["msisdn"].group_offsets[0],
+                         template.slots["msisdn"].header_offset - 20)
+
+        streams = template.iter_encode(msisdn=msisdns,
+                                       cc_request_number=cc_request_numbers,
+                                       hop_by_hop=[1, 2, 3],
+                                       end_to_end=[1, 2, 3])
+
+        self.assertEqual(list(streams),
+                         [create_ccr(*values).dump()
+                                for values in zip(msisdns,
+                                                  cc_request_numbers,
+                                                  [1, 2, 3],
+                                                  [1, 2, 3])])
+
+    def test__encode__no_rows(self):
+        self.assertEqual(self.template.encode(imsi=[]), b"")
+        self.assertEqual(list(self.template.iter_encode(imsi=[])), [])
+
+    def test__invalid_columns(self):
+        with self.assertRaises(DiameterMessageError):
+            self.template.encode(unknown=["1"])
+
+        with self.assertRaises(DiameterMessageError):
+            self.template.encode(session_id=["1", "2"], imsi=["1"])
+
+        with self.assertRaises(DiameterAvpError):
+            self.template.encode(imsi=[1])
+
+    def test__invalid_slots(self):
+        clr = create_clr("hss.example.com;0", "000000000000000")
+
+        with self.assertRaises(DiameterMessageError):
+            BatchTemplate(clr, {"msisdn": "Subscription-Id"})
+
+        with self.assertRaises(DiameterMessageError):
+            BatchTemplate(clr, {"hop_by_hop": "Session-Id"})
+
+        with self.assertRaises(DiameterMessageError):
+            BatchTemplate(clr, {"a": "Session-Id", "b": "Session-Id"})
+
+        with self.assertRaises(DiameterAvpError):
+            BatchTemplate(clr, {"a": "*"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_benchmarks
+    ~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the benchmark results handling unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.benchmarks import BenchmarkResult
+from bromelia.benchmarks import compare_results
+from bromelia.benchmarks import get_percentile
+from bromelia.benchmarks import load_results
+from bromelia.benchmarks import run_latency_benchmark
+from bromelia.benchmarks import save_results
+
+
+class TestBenchmarkResults(unittest.TestCase):
+    def setUp(self):
+        self.results = {
+                "codec": [
+                        BenchmarkResult("encode", 1000, 0.000010, 0.000012),
+                        BenchmarkResult("decode", 1000, 0.000100, 0.000110),
+                ],
+                "loopback": [
+                        BenchmarkResult("round trip", 1000, 0.0005, 0.0007,
+                                        0.0006, 0.0010),
+                ]
+        }
+
+    def test__get_percentile(self):
+        timings = [float(timing) for timing in range(100, 0, -1)]
+
+        self.assertEqual(get_percentile(timings, 50), 50.0)
+        self.assertEqual(get_percentile(timings, 99), 99.0)
+        self.assertEqual(get_percentile([1.0], 99), 1.0)
+
+    def test__run_latency_benchmark(self):
+        result = run_latency_benchmark("noop", lambda: None, number=10,
+                                       per_call=2)
+
+        self.assertEqual(result.name, "noop")
+        self.assertEqual(result.number, 20)
+        self.assertLessEqual(result.best, result.p50)
+        self.assertLessEqual(result.p50, result.p99)
+
+    def test__save_results__and__load_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.json")
+
+            save_results(self.results, path)
+            self.assertEqual(load_results(path), self.results)
+
+    def test__compare_results(self):
+        results = {
+                "codec": [
+                        BenchmarkResult("encode", 1000, 0.000020, 0.000022),
+                        BenchmarkResult("new", 1000, 0.000001, 0.000001),
+                ]
+        }
+
+        comparisons = compare_results(results, self.results)
+
+        self.assertEqual(len(comparisons), 1)
+        self.assertEqual(comparisons[0].module, "codec")
+        self.assertEqual(comparisons[0].name, "encode")
+        self.assertAlmostEqual(comparisons[0].change, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
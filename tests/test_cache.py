@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_cache
+    ~~~~~~~~~~~~~~~
+
+    This module contains the duplicate request detection unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import threading
+import unittest.mock
+from types import SimpleNamespace
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.base import DiameterMessage
+from bromelia.bromelia import Bromelia
+from bromelia.bromelia import decorate_answer
+from bromelia.cache import AnswerCache
+from bromelia.cache import get_duplicate_key
+from bromelia.constants import *
+from bromelia.exceptions import AVPParsingError
+from bromelia.lib.etsi_3gpp_gx import CCA
+from tests.helpers import Clock
+from tests.helpers import create_ccr
+
+
+def create_cca(ccr):
+    cca = CCA(session_id="pgw.bromelia.org;1;1",
+              origin_host="pcrf.bromelia.org",
+              origin_realm="bromelia.org",
+              cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+              cc_request_number=0)
+    cca.header.hop_by_hop = ccr.header.hop_by_hop
+    cca.header.end_to_end = ccr.header.end_to_end
+    return cca
+
+
+def retransmit(ccr, hop_by_hop=b"\x00\x00\x00\x01"):
+    stream = bytearray(ccr.dump())
+    stream[4] |= 0x10
+    stream[12:16] = hop_by_hop
+    return bytes(stream)
+
+
+class TestGetDuplicateKey(unittest.TestCase):
+    def test__get_duplicate_key(self):
+        ccr = create_ccr()
+        key = (b"pgw.bromelia.org",
+               int.from_bytes(ccr.header.end_to_end, byteorder="big"))
+
+        self.assertEqual(get_duplicate_key(ccr), key)
+        self.assertEqual(get_duplicate_key(ccr.dump()), key)
+        self.assertEqual(get_duplicate_key(retransmit(ccr)), key)
+        self.assertEqual(get_duplicate_key(DiameterMessage.load(ccr.dump(),
+                                                                lazy=True)[0]),
+                         key)
+
+    def test__get_duplicate_key__no_origin_host(self):
+        ccr = create_ccr()
+        ccr.pop("origin_host_avp")
+
+        self.assertIsNone(get_duplicate_key(ccr.dump())[0])
+
+    def test__get_duplicate_key__invalid_avp_length(self):
+        stream = bytearray(create_ccr().dump())
+        stream[25:28] = b"\x00\x00\x04"
+
+        with self.assertRaises(AVPParsingError):
+            get_duplicate_key(bytes(stream))
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = AnswerCache(max_size=2, ttl=240, clock=self.clock)
+
+    def test__get(self):
+        ccr = create_ccr()
+        cca = create_cca(ccr)
+
+        self.assertIsNone(self.cache.get(ccr))
+        self.cache.put(ccr, cca)
+
+        stream = retransmit(ccr, hop_by_hop=b"\x00\x00\x00\x07")
+        answer = self.cache.get(stream)
+
+        self.assertEqual(answer[12:16], b"\x00\x00\x00\x07")
+        self.assertEqual(answer[:12], cca.dump()[:12])
+        self.assertEqual(answer[16:], cca.dump()[16:])
+
+    def test__get__other_origin_host(self):
+        ccr = create_ccr()
+        self.cache.put(ccr, create_cca(ccr))
+
+        other = create_ccr(origin_host="other.bromelia.org")
+        other.header.end_to_end = ccr.header.end_to_end
+
+        self.assertIsNone(self.cache.get(other))
+
+    def test__ttl(self):
+        ccr = create_ccr()
+        self.cache.put(ccr, create_cca(ccr))
+
+        self.clock.now = 239
+        self.assertIsNotNone(self.cache.get(ccr))
+
+        self.clock.now = 240
+        self.assertIsNone(self.cache.get(ccr))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.expired, 1)
+
+    def test__purge(self):
+        ccr = create_ccr()
+        self.cache.put(ccr, create_cca(ccr))
+
+        self.clock.now = 300
+        self.assertEqual(self.cache.purge(), 1)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.get_memory_usage(), 0)
+
+    def test__lru(self):
+        ccrs = [create_ccr() for _ in range(3)]
+
+        self.cache.put(ccrs[0], create_cca(ccrs[0]))
+        self.cache.put(ccrs[1], create_cca(ccrs[1]))
+        self.cache.get(ccrs[0])
+        self.cache.put(ccrs[2], create_cca(ccrs[2]))
+
+        self.assertIsNotNone(self.cache.get(ccrs[0]))
+        self.assertIsNone(self.cache.get(ccrs[1]))
+        self.assertIsNotNone(self.cache.get(ccrs[2]))
+        self.assertEqual(self.cache.evictions, 1)
+
+    def test__get_stats(self):
+        ccr = create_ccr()
+        cca = create_cca(ccr)
+
+        self.cache.get(ccr)
+        self.cache.put(ccr, cca)
+        self.cache.get(ccr)
+        self.cache.get(ccr)
+        self.cache.get(ccr)
+
+        stats = self.cache.get_stats()
+        self.assertEqual(stats.size, 1)
+        self.assertEqual(stats.hits, 3)
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.hit_rate, 0.75)
+        self.assertGreater(stats.memory_usage, len(cca.dump()))
+
+
+class TestCallbackRoute(unittest.TestCase):
+    def setUp(self):
+        self.sent = list()
+
+        self.app = Bromelia.__new__(Bromelia)
+        self.app.request_threshold = threading.Barrier(1)
+        self.app.answer_cache = AnswerCache(clock=Clock())
+        self.app.get_worker_by_message = lambda msg: SimpleNamespace(name="gx")
+        self.app.get_request_callback = lambda request: create_cca
+        self.app.send_message = self.sent.append
+
+    def test__answer_is_encoded_once(self):
+        ccr = create_ccr()
+        encoded = list()
+        dump = CCA.dump
+
+        def encode(msg):
+            if "_pending_stream" not in msg.__dict__:
+                encoded.append(msg)
+            return dump(msg)
+
+        with unittest.mock.patch.object(CCA, "dump", encode):
+            self.app.callback_route(ccr)
+            self.sent[0].dump()
+
+        self.assertEqual(len(encoded), 1)
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(self.sent[0].dump(),
+                         decorate_answer(create_cca(ccr), ccr).dump())
+        self.assertEqual(self.app.answer_cache.get(ccr), self.sent[0].dump())
+        self.assertEqual(self.sent[0].session_id_avp.data,
+                         ccr.session_id_avp.data)
+
+    def test__retransmitted_request(self):
+        ccr = create_ccr()
+        self.app.callback_route(ccr)
+
+        retransmitted = DiameterMessage.load(retransmit(ccr))[0]
+        self.app.get_request_callback = lambda request: None
+        self.app.callback_route(retransmitted)
+
+        self.assertEqual(len(self.sent), 2)
+        self.assertEqual(self.sent[1].header.hop_by_hop,
+                         b"\x00\x00\x00\x01")
+        self.assertEqual(self.sent[1].dump()[16:], self.sent[0].dump()[16:])
+
+
+if __name__ == "__main__":
+    unittest.main()
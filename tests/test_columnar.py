@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_columnar
+    ~~~~~~~~~~~~~~~~~~
+
+    This module contains the columnar export unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import importlib.util
+import math
+import os
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.columnar import ColumnarExporter
+from bromelia.columnar import ColumnSpec
+from bromelia.columnar import get_histogram
+from bromelia.columnar import match_answers
+from bromelia.constants import *
+from bromelia.exceptions import DiameterAvpError
+from bromelia.messages import DeviceWatchdogAnswer
+from bromelia.messages import DeviceWatchdogRequest
+from bromelia.pcap import Flow
+from bromelia.pcap import TraceRecord
+
+
+has_numpy = importlib.util.find_spec("numpy") is not None
+
+
+class TestColumnarExporter(unittest.TestCase):
+    def setUp(self):
+        self.dwr = DeviceWatchdogRequest(origin_host="client",
+                                         origin_realm="bromelia.org")
+        self.dwa = DeviceWatchdogAnswer(origin_host="server",
+                                        origin_realm="bromelia.org",
+                                        result_code=DIAMETER_SUCCESS)
+        self.dwa.header.hop_by_hop = self.dwr.header.hop_by_hop
+        self.dwa.header.end_to_end = self.dwr.header.end_to_end
+
+        self.exporter = ColumnarExporter({
+                "result_code": "Result-Code",
+                "origin_host": ("Origin-Host", "bytes"),
+                "origin_state_id": ColumnSpec("origin_state_id",
+                                              "Origin-State-Id",
+                                              "uint32",
+                                              7),
+        })
+
+    def test__append(self):
+        self.exporter.append(self.dwr.dump(), timestamp=1.0)
+        self.exporter.append(self.dwa)
+        columns = self.exporter.to_dict()
+
+        self.assertEqual(len(self.exporter), 2)
+        self.assertEqual(list(columns["command_code"]), [280, 280])
+        self.assertEqual(list(columns["flags"]), [0x80, 0x00])
+        self.assertEqual(columns["timestamp"][0], 1.0)
+        self.assertTrue(math.isnan(columns["timestamp"][1]))
+        self.assertEqual(list(columns["result_code"]), [0, 2001])
+        self.assertEqual(list(columns["result_code_present"]), [0, 1])
+        self.assertEqual(list(columns["origin_state_id"]), [7, 7])
+        self.assertEqual(self.exporter.get_bytes("origin_host", 0), b"client")
+        self.assertEqual(self.exporter.get_bytes("origin_host", 1), b"server")
+
+    def test__append__trace_record(self):
+        self.exporter.append(TraceRecord(5.0, None, self.dwr.dump()))
+
+        self.assertEqual(self.exporter.columns["timestamp"][0], 5.0)
+        self.assertEqual(self.exporter.columns["flow"][0], -1)
+
+    def test__append__flows(self):
+        flow = Flow("sctp", "10.0.0.1", 3868, "10.0.0.2", 3868, 1)
+        reverse_flow = Flow("sctp", "10.0.0.2", 3868, "10.0.0.1", 3868, 2)
+
+        self.exporter.append(TraceRecord(1.0, flow, self.dwr.dump()))
+        self.exporter.append(self.dwa, flow=reverse_flow)
+        self.exporter.append(self.dwr, flow=flow._replace(src_port=50000))
+
+        self.assertEqual(list(self.exporter.columns["flow"]), [0, 1, 2])
+        self.assertEqual(self.exporter.flows[0], flow._replace(stream=0))
+        self.assertEqual(self.exporter.flows[1],
+                         reverse_flow._replace(stream=0))
+
+    def test__pool__shared_values(self):
+        exporter = ColumnarExporter(self.exporter.specs, share_values=True)
+        exporter.extend([self.dwr, self.dwr, self.dwa])
+        columns = exporter.to_dict()
+
+        self.assertEqual(columns["pool"], b"clientserver")
+        self.assertEqual(list(columns["origin_host_offset"]), [0, 0, 6])
+        self.assertEqual(list(columns["origin_host_length"]), [6, 6, 6])
+
+    def test__pool__not_shared_values(self):
+        self.exporter.extend([self.dwr, self.dwr, self.dwa])
+        columns = self.exporter.to_dict()
+
+        self.assertEqual(columns["pool"], b"clientclientserver")
+        self.assertEqual(list(columns["origin_host_offset"]), [0, 6, 12])
+        self.assertEqual(self.exporter.pool_offsets, {})
+
+    def test__append__malformed(self):
+        self.exporter.append(b"\x01\x00\x00")
+
+        self.assertEqual(len(self.exporter), 0)
+        self.assertEqual(self.exporter.skipped, 1)
+
+    def test__invalid_column_type(self):
+        with self.assertRaises(DiameterAvpError):
+            ColumnarExporter({"result_code": ("Result-Code", "int128")})
+
+    @unittest.skipUnless(has_numpy, "requires numpy")
+    def test__to_numpy__analytics(self):
+        self.exporter.append(self.dwr, timestamp=1.0)
+        self.exporter.append(self.dwa, timestamp=1.25)
+
+        table, pool = self.exporter.to_numpy()
+        self.assertEqual(table["command_code"].tolist(), [280, 280])
+        self.assertEqual(bytes(pool), b"clientserver")
+
+        histogram = get_histogram(table,
+                                  "result_code",
+                                  table["result_code_present"])
+        self.assertEqual(histogram, {2001: 1})
+
+        requests, answers, latencies = match_answers(table)
+        self.assertEqual(requests.tolist(), [0])
+        self.assertEqual(answers.tolist(), [1])
+        self.assertEqual(latencies.tolist(), [0.25])
+
+    @unittest.skipUnless(has_numpy, "requires numpy")
+    def test__match_answers__flows(self):
+        flow = Flow("tcp", "10.0.0.1", 50000, "10.0.0.2", 3868, 0)
+        other_flow = flow._replace(src_port=50001)
+
+        #: Same identifiers on two connections, answered in reverse order.
+        self.exporter.append(self.dwr, timestamp=1.0, flow=flow)
+        self.exporter.append(self.dwr, timestamp=2.0, flow=other_flow)
+        self.exporter.append(self.dwa, timestamp=2.5, flow=Flow(
+                                        "tcp", "10.0.0.2", 3868,
+                                        "10.0.0.1", 50001, 0))
+        self.exporter.append(self.dwa, timestamp=3.0, flow=Flow(
+                                        "tcp", "10.0.0.2", 3868,
+                                        "10.0.0.1", 50000, 0))
+
+        #: An answer sent on the request flow itself is not matched.
+        self.exporter.append(self.dwa, timestamp=4.0, flow=flow)
+
+        table, _ = self.exporter.to_numpy()
+        requests, answers, latencies = match_answers(table)
+
+        self.assertEqual(sorted(zip(answers.tolist(), requests.tolist())),
+                         [(2, 1), (3, 0)])
+        self.assertEqual(sorted(latencies.tolist()), [0.5, 2.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_loadgen
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter load generator unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import socket
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps import CcRequestNumberAVP
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import DiameterAssociationError
+from bromelia.messages import DisconnectPeerRequest as DPR
+from bromelia.loadgen import LatencyHistogram
+from bromelia.loadgen import LoadConnection
+from bromelia.loadgen import LoadGenerator
+from bromelia.loadgen import LoadStats
+from bromelia.loadgen import create_templates
+from bromelia.testing import create_pcrf
+
+
+class TestRequestTemplate(unittest.TestCase):
+    def test__render(self):
+        templates = create_templates("gx",
+                                     "pgw.bromelia.org",
+                                     "bromelia.org",
+                                     "bromelia.org")
+        stream = templates[1].render(hop_by_hop=10,
+                                     end_to_end=20,
+                                     session_number=123,
+                                     cc_request_number=2)
+
+        ccr = DiameterMessage.load(stream)[0]
+        self.assertEqual(ccr.header.hop_by_hop, (10).to_bytes(4, "big"))
+        self.assertEqual(ccr.header.end_to_end, (20).to_bytes(4, "big"))
+        self.assertTrue(ccr.session_id_avp.data.startswith(
+                                        b"pgw.bromelia.org;000000000123;"))
+        self.assertEqual(ccr.cc_request_type_avp.data,
+                         CC_REQUEST_TYPE_UPDATE_REQUEST)
+        self.assertEqual(ccr.cc_request_number_avp.data,
+                         CcRequestNumberAVP(2).data)
+
+    def test__create_templates__gy(self):
+        templates = create_templates("gy",
+                                     "pgw.bromelia.org",
+                                     "bromelia.org",
+                                     "bromelia.org")
+        ccr_i, ccr_u, ccr_t = [DiameterMessage.load(template.stream)[0]
+                                                for template in templates]
+
+        self.assertTrue(ccr_i.has_avp("multiple_services_credit_control_avp"))
+        self.assertTrue(ccr_u.has_avp("multiple_services_credit_control_avp"))
+        self.assertFalse(ccr_t.has_avp("multiple_services_credit_control_avp"))
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test__get_percentile(self):
+        histogram = LatencyHistogram()
+        for latency in range(1, 101):
+            histogram.record(latency / 1000)
+
+        self.assertEqual(len(histogram), 100)
+        self.assertAlmostEqual(histogram.get_percentile(50), 0.050, delta=0.005)
+        self.assertAlmostEqual(histogram.get_percentile(99), 0.099, delta=0.009)
+        self.assertEqual(histogram.get_percentile(100), 0.1)
+        self.assertAlmostEqual(histogram.get_mean(), 0.0505)
+
+    def test__get_percentile__empty(self):
+        self.assertEqual(LatencyHistogram().get_percentile(99), 0.0)
+
+    def test__merge(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.001)
+
+        other = LatencyHistogram()
+        other.record(0.002)
+        other.record(0.004)
+
+        histogram.merge(other)
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.max, 0.004)
+        self.assertEqual(sum([count for _, count in histogram.get_rows()]), 3)
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def setUp(self):
+        self.pcrf = create_pcrf(port=3910)
+        self.pcrf.start()
+
+    def tearDown(self):
+        self.pcrf.close()
+
+    def create_load_generator(self, **kwargs):
+        return LoadGenerator(application="gx",
+                             duration=0.5,
+                             interval=0.25,
+                             peer_host_name="pcrf.bromelia.org",
+                             peer_port=3910,
+                             transport_type=DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK,
+                             output=None,
+                             **kwargs)
+
+    def test__run__open_loop(self):
+        total = self.create_load_generator(mode="open",
+                                           tps=200,
+                                           sessions=10,
+                                           updates=2,
+                                           connections=2).run()
+
+        self.assertGreater(total["sent"], 50)
+        self.assertEqual(total["answered"], total["sent"])
+        self.assertEqual(total["errors"], 0)
+        self.assertEqual(total["timeouts"], 0)
+        self.assertEqual(len(total["histogram"]), total["answered"])
+        self.assertEqual(self.pcrf.received[(16777238, 272)], total["sent"])
+
+    def test__run__closed_loop(self):
+        total = self.create_load_generator(mode="closed",
+                                           tps=0,
+                                           sessions=5).run()
+
+        self.assertGreater(total["answered"], 0)
+        self.assertEqual(total["errors"], 0)
+
+    def test__invalid_options(self):
+        with self.assertRaises(DiameterAssociationError):
+            LoadGenerator(application="s6a")
+
+        with self.assertRaises(DiameterAssociationError):
+            LoadGenerator(mode="open", tps=0)
+
+        with self.assertRaises(DiameterAssociationError):
+            LoadGenerator(processes=2,
+                          transport_type=DIAMETER_AGENT_TRANSPORT_TYPE_LOOPBACK)
+
+
+class TestLoadConnection(unittest.TestCase):
+    def setUp(self):
+        options = LoadGenerator(application="gx", output=None).options
+        self.connection = LoadConnection(0, options, LoadStats())
+        self.connection.sock, self.peer_sock = socket.socketpair()
+        self.peer_sock.settimeout(5)
+
+    def tearDown(self):
+        self.connection.sock.close()
+        self.peer_sock.close()
+
+    def test__handle_answer__dpr(self):
+        dpr = DPR(origin_host="pcrf.bromelia.org",
+                  origin_realm="bromelia.org")
+        self.connection.handle_answer(dpr.dump(), 0)
+
+        dpa = DiameterMessage.load(self.peer_sock.recv(4096))[0]
+        self.assertEqual(dpa.header.command_code, DISCONNECT_PEER_MESSAGE)
+        self.assertFalse(dpa.header.is_request())
+        self.assertEqual(dpa.header.hop_by_hop, dpr.header.hop_by_hop)
+        self.assertTrue(self.connection._disconnected.is_set())
+        self.assertTrue(self.connection._stop_threads.is_set())
+
+    def test__recv_answers__invalid_message_length(self):
+        stream = bytearray(DPR().dump())
+        stream[1:4] = (12).to_bytes(3, byteorder="big")
+        self.peer_sock.sendall(bytes(stream))
+
+        self.connection._recv_answers()
+
+        self.assertTrue(self.connection._disconnected.is_set())
+        self.assertTrue(self.connection._stop_threads.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
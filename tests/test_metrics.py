@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_metrics
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the metrics registry and Prometheus export
+    unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.bromelia import Worker
+from bromelia._internal_utils import _convert_config_to_connection_obj
+from bromelia.avps import ExperimentalResultAVP
+from bromelia.avps import ExperimentalResultCodeAVP
+from bromelia.avps import VendorIdAVP
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import AVPParsingError
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.lib.etsi_3gpp_gx import CCA
+from bromelia.metrics import DIRECTION_IN
+from bromelia.metrics import DIRECTION_OUT
+from bromelia.metrics import MetricsRegistry
+from bromelia.metrics import MetricsServer
+from bromelia.metrics import get_metrics_registry
+from bromelia.metrics import get_result_class
+from bromelia.proxy import DiameterBaseProxy
+from bromelia.setup import DiameterAssociation
+from tests.helpers import MockTransport
+from tests.helpers import create_ccr
+from tests.helpers import get_config
+
+
+def create_cca(ccr, result_code=DIAMETER_SUCCESS):
+    cca = CCA(session_id="pgw.bromelia.org;1;1",
+              origin_host="pcrf.bromelia.org",
+              origin_realm="bromelia.org",
+              result_code=result_code,
+              cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+              cc_request_number=0)
+    cca.header.hop_by_hop = ccr.header.hop_by_hop
+    cca.header.end_to_end = ccr.header.end_to_end
+    return cca
+
+
+class TestGetResultClass(unittest.TestCase):
+    def test__result_code(self):
+        ccr = create_ccr()
+
+        self.assertEqual(get_result_class(create_cca(ccr).dump()), "2xxx")
+        self.assertEqual(get_result_class(create_cca(ccr,
+                                            DIAMETER_UNABLE_TO_COMPLY).dump()),
+                         "5xxx")
+
+    def test__experimental_result_code(self):
+        cca = CCA(session_id="pgw.bromelia.org;1;1",
+                  origin_host="pcrf.bromelia.org",
+                  origin_realm="bromelia.org",
+                  result_code=None,
+                  cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+                  cc_request_number=0)
+        cca.append(ExperimentalResultAVP([
+                            VendorIdAVP(VENDOR_ID_3GPP),
+                            ExperimentalResultCodeAVP(
+                                    DIAMETER_ERROR_USER_UNKNOWN)
+        ]))
+
+        self.assertEqual(get_result_class(cca.dump()), "5xxx")
+
+    def test__no_result_code(self):
+        self.assertEqual(get_result_class(create_ccr().dump()), "")
+
+    def test__invalid_avp_length(self):
+        stream = create_cca(create_ccr()).dump()
+
+        with self.assertRaises(AVPParsingError):
+            get_result_class(stream[:24] + b"\x00\x00\x00\x04" + stream[28:])
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.001, 0.01, 0.1))
+
+    def test__count_message(self):
+        ccr = create_ccr()
+        cca = create_cca(ccr)
+
+        self.registry.count_message("pcrf", ccr, DIRECTION_OUT)
+        self.registry.count_message("pcrf", ccr, DIRECTION_OUT)
+        self.registry.count_message("pcrf", cca, DIRECTION_IN)
+        self.registry.count_message("pcrf",
+                                    DiameterMessage.load(cca.dump(),
+                                                         lazy=True)[0],
+                                    DIRECTION_IN)
+
+        counters = self.registry.collect().counters
+        self.assertEqual(counters[("pcrf",
+                                   DIAMETER_APPLICATION_Gx,
+                                   CC_MESSAGE,
+                                   DIRECTION_OUT,
+                                   "")], 2)
+        self.assertEqual(counters[("pcrf",
+                                   DIAMETER_APPLICATION_Gx,
+                                   CC_MESSAGE,
+                                   DIRECTION_IN,
+                                   "2xxx")], 2)
+
+    def test__count_message__decoded_answer_is_not_dumped(self):
+        cca = create_cca(create_ccr(), DIAMETER_UNABLE_TO_COMPLY)
+        experimental_cca = CCA(result_code=None)
+        experimental_cca.append(ExperimentalResultAVP([
+                            VendorIdAVP(VENDOR_ID_3GPP),
+                            ExperimentalResultCodeAVP(
+                                    DIAMETER_ERROR_USER_UNKNOWN)
+        ]))
+
+        for msg in (cca, experimental_cca):
+            msg.dump = None
+            self.registry.count_message("pcrf", msg, DIRECTION_IN)
+
+        counters = self.registry.collect().counters
+        self.assertEqual(counters[("pcrf",
+                                   DIAMETER_APPLICATION_Gx,
+                                   CC_MESSAGE,
+                                   DIRECTION_IN,
+                                   "5xxx")], 2)
+
+    def test__observe_latency(self):
+        for latency in (0.0005, 0.001, 0.05, 2):
+            self.registry.observe_latency("pcrf",
+                                          DIAMETER_APPLICATION_Gx,
+                                          CC_MESSAGE,
+                                          latency)
+
+        histogram = self.registry.collect().latencies[("pcrf",
+                                                       DIAMETER_APPLICATION_Gx,
+                                                       CC_MESSAGE)]
+        self.assertEqual(histogram[:-1], [2, 0, 1, 1])
+        self.assertAlmostEqual(histogram[-1], 2.0515)
+
+    def test__threads(self):
+        ccr = create_ccr()
+
+        def worker():
+            for _ in range(1000):
+                self.registry.count_message("pcrf", ccr, DIRECTION_OUT)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        #: Metrics of finished threads are kept.
+        for _ in range(2):
+            counters = self.registry.collect().counters
+            self.assertEqual(sum(counters.values()), 4000)
+        self.assertEqual(self.registry._threads, [])
+
+    def test__clear(self):
+        self.registry.count_message("pcrf", create_ccr(), DIRECTION_OUT)
+        self.registry.clear()
+
+        self.assertEqual(self.registry.collect().counters, {})
+
+    def test__to_prometheus(self):
+        ccr = create_ccr()
+        self.registry.count_message("pcrf\"1", ccr, DIRECTION_OUT)
+        self.registry.observe_latency("pcrf",
+                                      DIAMETER_APPLICATION_Gx,
+                                      CC_MESSAGE,
+                                      0.005)
+
+        text = self.registry.to_prometheus()
+
+        self.assertIn("# TYPE bromelia_messages_total counter\n", text)
+        self.assertIn("bromelia_messages_total{peer=\"pcrf\\\"1\","\
+                      "application_id=\"16777238\",command_code=\"272\","\
+                      "direction=\"out\",result_class=\"\"} 1\n", text)
+
+        labels = "peer=\"pcrf\",application_id=\"16777238\",command_code=\"272\""
+        self.assertIn(f"bromelia_request_latency_seconds_bucket"\
+                      f"{{{labels},le=\"0.001\"}} 0\n", text)
+        self.assertIn(f"bromelia_request_latency_seconds_bucket"\
+                      f"{{{labels},le=\"0.01\"}} 1\n", text)
+        self.assertIn(f"bromelia_request_latency_seconds_bucket"\
+                      f"{{{labels},le=\"+Inf\"}} 1\n", text)
+        self.assertIn(f"bromelia_request_latency_seconds_count"\
+                      f"{{{labels}}} 1\n", text)
+
+    def test__to_prometheus__unknown_peer(self):
+        ccr = create_ccr()
+        self.registry.count_message("pcrf", ccr, DIRECTION_OUT)
+        self.registry.count_message(None, ccr, DIRECTION_OUT)
+
+        text = self.registry.to_prometheus()
+
+        self.assertIn("bromelia_messages_total{peer=\"\",", text)
+        self.assertIn("bromelia_messages_total{peer=\"pcrf\",", text)
+
+    def test__get_metrics_registry(self):
+        self.assertIs(get_metrics_registry(), get_metrics_registry())
+
+
+class TestDiameterAssociationMetrics(unittest.TestCase):
+    def setUp(self):
+        connection = _convert_config_to_connection_obj(get_config())
+        base = DiameterBaseProxy(connection).get_default_messages()
+
+        self.association = DiameterAssociation(connection, base)
+        self.association.transport = MockTransport()
+        self.association.metrics = self.registry = MetricsRegistry()
+        self.registry.register_association(self.association)
+
+    def test__send_and_answer(self):
+        ccr = create_ccr()
+        self.association.put_message_into_send_queue(ccr)
+        self.association.send_message_from_queue()
+
+        self.assertEqual(self.association.transport.streams, [ccr.dump()])
+
+        self.association.pop_pending_request(ccr.header.hop_by_hop.hex())
+
+        snapshot = self.registry.collect()
+        self.assertEqual(snapshot.counters[("pcrf.bromelia.org",
+                                            DIAMETER_APPLICATION_Gx,
+                                            CC_MESSAGE,
+                                            DIRECTION_OUT,
+                                            "")], 1)
+        self.assertEqual(sum(snapshot.latencies[("pcrf.bromelia.org",
+                                                 DIAMETER_APPLICATION_Gx,
+                                                 CC_MESSAGE)][:-1]),
+                         1)
+        self.assertEqual(self.association.pending_request_times, {})
+
+    def test__gauges(self):
+        self.association._recv_messages.put(create_ccr())
+
+        gauges = self.registry.collect().gauges
+        self.assertEqual(gauges[("recv_queue_depth", "pcrf.bromelia.org")], 1)
+        self.assertEqual(gauges[("send_queue_depth", "pcrf.bromelia.org")], 0)
+
+        del self.association
+        self.assertEqual(self.registry.collect().gauges, {})
+
+    def test__gauges__same_peer(self):
+        connection = _convert_config_to_connection_obj(get_config())
+        base = DiameterBaseProxy(connection).get_default_messages()
+
+        other = DiameterAssociation(connection, base)
+        self.registry.register_association(other)
+
+        self.association._recv_messages.put(create_ccr())
+        other._recv_messages.put(create_ccr())
+        other._recv_messages.put(create_ccr())
+
+        gauges = self.registry.collect().gauges
+        self.assertEqual(gauges[("recv_queue_depth", "pcrf.bromelia.org")], 3)
+
+
+class TestMetricsServer(unittest.TestCase):
+    def test__metrics(self):
+        registry = MetricsRegistry()
+        registry.count_message("pcrf", create_ccr(), DIRECTION_OUT)
+
+        with MetricsServer(registry, port=0) as server:
+            url = f"http://127.0.0.1:{server.port}"
+
+            with urllib.request.urlopen(f"{url}/metrics") as response:
+                self.assertEqual(response.headers["Content-Type"],
+                                 "text/plain; version=0.0.4; charset=utf-8")
+                self.assertIn(b"bromelia_messages_total{peer=\"pcrf\"",
+                              response.read())
+
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"{url}/other")
+
+        self.assertIsNone(server.httpd)
+
+
+class MockApp:
+    def __init__(self, config):
+        self.config = config
+
+
+class TestWorkerMetricsServer(unittest.TestCase):
+    def test__metrics_port(self):
+        _convert_config_to_connection_obj(get_config(METRICS_PORT=9464))
+        _convert_config_to_connection_obj(get_config(METRICS_PORT=None))
+
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(get_config(METRICS_PORT="9464"))
+
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(get_config(METRICS_PORT=70000))
+
+    def test__start_metrics_server(self):
+        worker = Worker.__new__(Worker)
+        worker.app = MockApp(get_config(METRICS_PORT=0))
+        worker.start_metrics_server()
+        self.addCleanup(worker.metrics_server.stop)
+
+        self.assertIs(worker.metrics_server.registry, get_metrics_registry())
+
+        url = f"http://127.0.0.1:{worker.metrics_server.port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            self.assertEqual(response.status, 200)
+
+    def test__start_metrics_server__no_port(self):
+        worker = Worker.__new__(Worker)
+        worker.app = MockApp(get_config())
+        worker.metrics_server = None
+        worker.start_metrics_server()
+
+        self.assertIsNone(worker.metrics_server)
+
+
+if __name__ == "__main__":
+    unittest.main()
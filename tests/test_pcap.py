@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_pcap
+    ~~~~~~~~~~~~~~
+
+    This module contains the offline Diameter trace decoding and pcap
+    writing unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import ipaddress
+import os
+import struct
+import sys
+import tempfile
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.exceptions import DiameterHeaderError
+from bromelia.messages import DeviceWatchdogAnswer
+from bromelia.messages import DeviceWatchdogRequest
+from bromelia.pcap import Flow
+from bromelia.pcap import MAX_SEGMENT_SIZE
+from bromelia.pcap import TraceRecord
+from bromelia.pcap import build_tcp_packet
+from bromelia.pcap import get_checksum
+from bromelia.pcap import get_command
+from bromelia.pcap import iter_decoded
+from bromelia.pcap import iter_messages
+from bromelia.pcap import read_packets
+from bromelia.pcap import write_pcap
+
+
+examples_dir = os.path.join(base_dir, "examples")
+
+CLIENT = ("10.0.0.1", 50000)
+SERVER = ("10.0.0.2", 3868)
+
+
+def ethernet(ip_packet):
+    return b"\x00" * 12 + b"\x08\x00" + ip_packet
+
+
+def ipv4(protocol, src, dst, payload):
+    return struct.pack(">BBHHHBBH4s4s",
+                       0x45, 0, 20 + len(payload), 0, 0, 64, protocol, 0,
+                       ipaddress.IPv4Address(src).packed,
+                       ipaddress.IPv4Address(dst).packed) + payload
+
+
+def tcp(src, dst, seq, payload, flags=0x18):
+    segment = struct.pack(">HHIIBBHHH",
+                          src[1], dst[1], seq, 0, 5 << 4, flags, 65535, 0, 0)
+    return ethernet(ipv4(6, src[0], dst[0], segment + payload))
+
+
+def sctp(src, dst, chunks):
+    packet = struct.pack(">HHII", src[1], dst[1], 1, 0)
+    for tsn, flags, payload in chunks:
+        length = 16 + len(payload)
+        packet += struct.pack(">BBHIHHI", 0, flags, length, tsn, 0, 0, 46)
+        packet += payload + b"\x00" * (-length % 4)
+    return ethernet(ipv4(132, src[0], dst[0], packet))
+
+
+def pcap(frames):
+    data = struct.pack("<IHHiIII", 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)
+    for index, frame in enumerate(frames):
+        data += struct.pack("<IIII", 1000 + index, 500000, len(frame), len(frame))
+        data += frame
+    return data
+
+
+def pcapng(frames):
+    def block(block_type, body):
+        body += b"\x00" * (-len(body) % 4)
+        length = 12 + len(body)
+        return struct.pack("<II", block_type, length) + body + \
+               struct.pack("<I", length)
+
+    #: Interface with microsecond resolution, set through if_tsresol.
+    options = struct.pack("<HHB3x", 9, 1, 6) + struct.pack("<HH", 0, 0)
+    data = block(0x0a0d0d0a, struct.pack("<IHHq", 0x1a2b3c4d, 1, 0, -1))
+    data += block(1, struct.pack("<HHI", 1, 0, 65535) + options)
+
+    for index, frame in enumerate(frames):
+        timestamp = (1000 + index) * 1000000
+        data += block(6, struct.pack("<IIIII",
+                                     0,
+                                     timestamp >> 32,
+                                     timestamp & 0xffffffff,
+                                     len(frame),
+                                     len(frame)) + frame)
+    return data
+
+
+class TestTraceDecoding(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.dwr = DeviceWatchdogRequest(origin_host="client",
+                                         origin_realm="bromelia.org").dump()
+        self.dwa = DeviceWatchdogAnswer(origin_host="server",
+                                        origin_realm="bromelia.org").dump()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, data, name="trace.pcap"):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test__iter_messages__example_traces(self):
+        path = os.path.join(examples_dir, "diameter-app1", "trace.pcap")
+        commands = [(record.message.header.command_code,
+                     record.message.header.is_request())
+                                        for record in iter_messages(path)]
+
+        self.assertEqual(commands, [(b"\x00\x01\x01", True),
+                                    (b"\x00\x01\x01", False),
+                                    (b"\x00\x01\x3c", True),
+                                    (b"\x00\x01\x3c", False),
+                                    (b"\x00\x01\x1a", True),
+                                    (b"\x00\x01\x1a", False)])
+
+    def test__iter_messages__tcp_reassembly(self):
+        stream = self.dwr * 2
+        frames = [
+                tcp(CLIENT, SERVER, 99, b"", flags=0x02),
+                tcp(CLIENT, SERVER, 100, stream[:30]),
+                tcp(CLIENT, SERVER, 100 + 50, stream[50:]),    # out of order
+                tcp(CLIENT, SERVER, 100, stream[:30]),         # retransmission
+                tcp(CLIENT, SERVER, 100 + 30, stream[30:50]),
+                tcp(SERVER, CLIENT, 500, self.dwa),
+        ]
+
+        records = list(iter_messages(self.write(pcap(frames))))
+
+        self.assertEqual([record.data for record in records],
+                         [self.dwr, self.dwr, self.dwa])
+        self.assertEqual(records[0].timestamp, 1004.5)
+        self.assertEqual(records[0].flow.src_port, 50000)
+        self.assertEqual(str(records[2].flow.src_ip_address), "10.0.0.2")
+        self.assertEqual(records[2].message.header.command_code,
+                         b"\x00\x01\x18")
+
+    def test__iter_messages__midstream_capture(self):
+        frames = [
+                tcp(CLIENT, SERVER, 100, self.dwr[10:]),
+                tcp(CLIENT, SERVER, 100 + len(self.dwr) - 10, self.dwr),
+        ]
+
+        records = list(iter_messages(self.write(pcap(frames))))
+
+        self.assertEqual([record.data for record in records], [self.dwr])
+
+    def test__iter_messages__ports(self):
+        frames = [tcp(CLIENT, ("10.0.0.2", 3870), 100, self.dwr)]
+        path = self.write(pcap(frames))
+
+        self.assertEqual(len(list(iter_messages(path, ports=[3868]))), 0)
+        self.assertEqual(len(list(iter_messages(path, ports=[3870]))), 1)
+
+    def test__iter_messages__sctp(self):
+        frames = [
+                sctp(CLIENT, SERVER, [(1, 0x02, self.dwr[:20]),
+                                      (2, 0x01, self.dwr[20:])]),
+                sctp(CLIENT, SERVER, [(2, 0x01, self.dwr[20:]),   # duplicated
+                                      (3, 0x03, self.dwr)]),
+        ]
+
+        records = list(iter_messages(self.write(pcap(frames))))
+
+        self.assertEqual([record.data for record in records],
+                         [self.dwr, self.dwr])
+        self.assertEqual(records[0].flow.protocol, "SCTP")
+
+    def test__iter_messages__pcapng(self):
+        frames = [tcp(CLIENT, SERVER, 100, self.dwr)]
+        path = self.write(pcapng(frames), "trace.pcapng")
+
+        records = list(iter_messages(path))
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0].timestamp, 1000.0)
+        self.assertEqual(records[0].data, self.dwr)
+
+    def test__read_packets__invalid_file(self):
+        path = self.write(b"\x00" * 64)
+
+        with self.assertRaises(DiameterHeaderError):
+            list(read_packets(path))
+
+    def test__iter_decoded(self):
+        frames = [tcp(CLIENT, SERVER, 100 + index * len(self.dwr), self.dwr)
+                                                    for index in range(10)]
+        frames.append(tcp(SERVER, CLIENT, 500, self.dwa))
+
+        commands = list(iter_decoded(self.write(pcap(frames)),
+                                     func=get_command,
+                                     max_workers=2,
+                                     batch_size=3))
+
+        self.assertEqual(commands.count((0, 280, True)), 10)
+        self.assertEqual(commands.count((0, 280, False)), 1)
+
+
+class TestTraceWriting(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "trace.pcap")
+
+        self.dwr = DeviceWatchdogRequest(origin_host="client",
+                                         origin_realm="bromelia.org").dump()
+        self.dwa = DeviceWatchdogAnswer(origin_host="server",
+                                        origin_realm="bromelia.org").dump()
+        self.flow = Flow("TCP", *CLIENT, *SERVER, 0)
+        self.reverse_flow = Flow("TCP", *SERVER, *CLIENT, 0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test__build_tcp_packet__checksums(self):
+        packet = build_tcp_packet(self.flow, 1, 1, self.dwr)
+        self.assertEqual(get_checksum(packet[:20]), 0)
+
+        pseudo_header = struct.pack(">4s4sBBH",
+                                    ipaddress.IPv4Address(CLIENT[0]).packed,
+                                    ipaddress.IPv4Address(SERVER[0]).packed,
+                                    0, 6, len(packet) - 20)
+        self.assertEqual(get_checksum(pseudo_header + packet[20:]), 0)
+
+    def test__write_pcap__read_back(self):
+        records = [
+                    TraceRecord(1.5, self.flow, self.dwr + self.dwr[:10]),
+                    TraceRecord(1.75, self.flow, self.dwr[10:]),
+                    TraceRecord(2.0, self.reverse_flow, self.dwa),
+        ]
+
+        self.assertEqual(write_pcap(self.path, records), 3)
+
+        records = list(iter_messages(self.path))
+        self.assertEqual([record.data for record in records],
+                         [self.dwr, self.dwr, self.dwa])
+        self.assertEqual([record.timestamp for record in records],
+                         [1.5, 1.75, 2.0])
+        self.assertEqual(records[2].flow, Flow("TCP",
+                                               ipaddress.IPv4Address(SERVER[0]),
+                                               SERVER[1],
+                                               ipaddress.IPv4Address(CLIENT[0]),
+                                               CLIENT[1],
+                                               0))
+
+    def test__write_pcap__ipv6(self):
+        flow = Flow("TCP", "2001:db8::1", 50000, "2001:db8::2", 3868, 0)
+        write_pcap(self.path, [TraceRecord(1.0, flow, self.dwr)])
+
+        records = list(iter_messages(self.path))
+        self.assertEqual(records[0].data, self.dwr)
+        self.assertEqual(str(records[0].flow.src_ip_address), "2001:db8::1")
+
+    def test__write_pcap__large_data(self):
+        data = self.dwr * (MAX_SEGMENT_SIZE // len(self.dwr) + 10)
+
+        self.assertEqual(write_pcap(self.path,
+                                    [TraceRecord(1.0, self.flow, data)]), 2)
+        self.assertEqual(b"".join(record.data
+                                    for record in iter_messages(self.path)),
+                         data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_process
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the Diameter messages processing unittests.
+
+    :copyright: (c) 2020 Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia._internal_utils import Connection
+from bromelia._internal_utils import convert_to_3_bytes
+from bromelia._internal_utils import convert_to_4_bytes
+from bromelia._internal_utils import LocalNode
+from bromelia._internal_utils import PeerNode
+from bromelia.avps import *
+from bromelia.base import DiameterRequest
+from bromelia.constants import *
+from bromelia.exceptions import ProcessRequestException
+from bromelia.lib.etsi_3gpp_gx import CCR as GxCCR
+from bromelia.messages import CapabilitiesExchangeAnswer
+from bromelia.messages import CapabilitiesExchangeRequest
+from bromelia.messages import DeviceWatchdogRequest
+from bromelia.messages import DisconnectPeerRequest
+from bromelia.messages import ReAuthRequest
+from bromelia.messages import SessionTerminationAnswer
+from bromelia.messages import SessionTerminationRequest
+from bromelia.process import MessageValidator
+from bromelia.process import MessageValidatorLoader
+from bromelia.process import ProcessCapabilityExchange
+from bromelia.process import ProcessDeviceWatchdog
+from bromelia.process import ProcessDisconnectPeer
+from bromelia.process import process_request
+from bromelia.process import validate_message
+from bromelia.process import validators
+
+
+class MockAssociation:
+    def __init__(self):
+        local_node = LocalNode(host_name="local.bromelia.org",
+                               realm="bromelia.org",
+                               ip_address="127.0.0.1",
+                               port=3868)
+
+        peer_node = PeerNode(host_name="peer.bromelia.org",
+                             realm="bromelia.org",
+                             ip_address="127.0.0.1",
+                             port=3869)
+
+        self.connection = Connection(name="test",
+                                     mode="CLIENT",
+                                     transport_type="TCP",
+                                     local_node=local_node,
+                                     peer_node=peer_node,
+                                     application_ids=[],
+                                     watchdog_timeout=30)
+        self.num_requests = 0
+        self.relay = False
+
+
+class TestMessageValidatorLoader(unittest.TestCase):
+    def test__get_message_class__cer(self):
+        cer = CapabilitiesExchangeRequest(host_ip_address="127.0.0.1")
+
+        self.assertEqual(validators.get_message_class(cer.header),
+                         CapabilitiesExchangeRequest)
+
+    def test__get_message_class__cea(self):
+        cea = CapabilitiesExchangeAnswer(host_ip_address="127.0.0.1")
+
+        self.assertEqual(validators.get_message_class(cea.header),
+                         CapabilitiesExchangeAnswer)
+
+    def test__get_message_class__gx_ccr(self):
+        ccr = GxCCR(destination_realm="bromelia.org")
+
+        self.assertEqual(validators.get_message_class(ccr.header), GxCCR)
+
+    def test__get_message_class__fallback_to_application_id_none(self):
+        rar = ReAuthRequest(destination_realm="bromelia.org",
+                            destination_host="peer.bromelia.org",
+                            re_auth_request_type=RE_AUTH_REQUEST_TYPE_AUTHORIZE_ONLY,
+                            auth_application_id=convert_to_4_bytes(9999))
+
+        self.assertEqual(validators.get_message_class(rar.header),
+                         ReAuthRequest)
+
+    def test__get_message_class__str_and_sta_of_any_application(self):
+        for cls in (SessionTerminationRequest, SessionTerminationAnswer):
+            with self.subTest(cls=cls.__name__):
+                msg = cls()
+                msg.header.application_id = DIAMETER_APPLICATION_S6a_S6d
+
+                self.assertEqual(validators.get_message_class(msg.header), cls)
+
+    def test__get_message_class__unknown_key_is_cached(self):
+        loader = MessageValidatorLoader()
+        dwr = DeviceWatchdogRequest()
+        dwr.header.command_code = convert_to_3_bytes(9999)
+
+        self.assertIsNone(loader.get_message_class(dwr.header))
+
+        loader._get_load_message_classes_dictionary = None
+        self.assertIsNone(loader.get_message_class(dwr.header))
+
+    def test__get_message_class__loaded_later(self):
+        loader = MessageValidatorLoader()
+        dwr = DeviceWatchdogRequest()
+        dwr.header.command_code = convert_to_3_bytes(9998)
+        self.assertIsNone(loader.get_message_class(dwr.header))
+
+        class LoadedLaterRequest(DiameterRequest):
+            command_code = convert_to_3_bytes(9998)
+            application_id = DIAMETER_APPLICATION_DEFAULT
+            mandatory = {}
+
+        self.assertIs(loader.get_message_class(dwr.header),
+                      LoadedLaterRequest)
+
+    def test__get_validator__is_cached(self):
+        dwr = DeviceWatchdogRequest()
+
+        self.assertIs(validators.get_validator(dwr),
+                      validators.get_validator(dwr))
+
+
+class TestMessageValidator(unittest.TestCase):
+    def test__validate__valid_message(self):
+        dwr = DeviceWatchdogRequest()
+        validation = MessageValidator(DeviceWatchdogRequest).validate(dwr)
+
+        self.assertTrue(validation.is_valid)
+        self.assertEqual(validation.missing_avps, [])
+        self.assertEqual(validation.invalid_avps, [])
+        self.assertEqual(validation.unsupported_avps, [])
+
+    def test__validate__missing_mandatory_avp(self):
+        dwr = DeviceWatchdogRequest()
+        dwr.pop("origin_realm_avp")
+
+        validation = MessageValidator(DeviceWatchdogRequest).validate(dwr)
+
+        self.assertFalse(validation.is_valid)
+        self.assertEqual(validation.missing_avps, ["origin_realm"])
+
+    def test__validate__unsupported_avp_with_mandatory_bit(self):
+        dwr = DeviceWatchdogRequest()
+        dwr.append(SessionIdAVP("bromelia.org;1;1"))
+
+        validation = MessageValidator(DeviceWatchdogRequest).validate(dwr)
+
+        self.assertTrue(validation.is_valid)
+        self.assertEqual(len(validation.unsupported_avps), 1)
+        self.assertEqual(validation.unsupported_avps[0].code,
+                         SESSION_ID_AVP_CODE)
+
+    def test__validate__checks(self):
+        dwr = DeviceWatchdogRequest(origin_host="peer.bromelia.org")
+        checks = {
+                    "origin_host": lambda avp: avp.data == b"other.bromelia.org"
+        }
+
+        validation = MessageValidator(DeviceWatchdogRequest).validate(dwr,
+                                                                      checks)
+
+        self.assertFalse(validation.is_valid)
+        self.assertEqual(validation.invalid_avps, ["origin_host"])
+
+    def test__validate_message__gx_ccr(self):
+        ccr = GxCCR(destination_realm="bromelia.org")
+        validation = validate_message(ccr)
+
+        self.assertTrue(validation.is_valid)
+
+    def test__validate_message__gx_ccr__missing_mandatory_avp(self):
+        ccr = GxCCR(destination_realm="bromelia.org")
+        ccr.pop("cc_request_number_avp")
+
+        validation = validate_message(ccr)
+
+        self.assertFalse(validation.is_valid)
+        self.assertEqual(validation.missing_avps, ["cc_request_number"])
+
+
+class TestProcessBaseMessages(unittest.TestCase):
+    def setUp(self):
+        self.association = MockAssociation()
+
+    def test__process_capability_exchange__valid_cer(self):
+        cer = CapabilitiesExchangeRequest(origin_host="peer.bromelia.org",
+                                          origin_realm="bromelia.org",
+                                          host_ip_address="127.0.0.1")
+
+        self.assertTrue(ProcessCapabilityExchange(self.association, cer).is_valid)
+
+    def test__process_capability_exchange__cer_from_unknown_peer(self):
+        cer = CapabilitiesExchangeRequest(origin_host="other.bromelia.org",
+                                          origin_realm="bromelia.org",
+                                          host_ip_address="127.0.0.1")
+        processor = ProcessCapabilityExchange(self.association, cer)
+
+        self.assertFalse(processor.is_valid)
+        self.assertEqual(processor.validation.invalid_avps, ["origin_host"])
+
+    def test__process_device_watchdog__valid_dwr(self):
+        dwr = DeviceWatchdogRequest(origin_host="peer.bromelia.org",
+                                    origin_realm="bromelia.org")
+
+        self.assertTrue(ProcessDeviceWatchdog(self.association, dwr).is_valid)
+
+    def test__process_device_watchdog__dwr_missing_origin_realm(self):
+        dwr = DeviceWatchdogRequest(origin_host="peer.bromelia.org",
+                                    origin_realm="bromelia.org")
+        dwr.pop("origin_realm_avp")
+
+        self.assertFalse(ProcessDeviceWatchdog(self.association, dwr).is_valid)
+
+    def test__process_disconnect_peer__valid_dpr(self):
+        dpr = DisconnectPeerRequest(origin_host="peer.bromelia.org",
+                                    origin_realm="bromelia.org")
+
+        self.assertTrue(ProcessDisconnectPeer(self.association, dpr).is_valid)
+
+
+class TestProcessRequest(unittest.TestCase):
+    def setUp(self):
+        self.association = MockAssociation()
+
+    def test__process_request__destination_host_of_local_node(self):
+        ccr = GxCCR(destination_realm="bromelia.org",
+                    destination_host="local.bromelia.org")
+        process_request(self.association, ccr)
+
+        self.assertEqual(self.association.num_requests, 1)
+
+    def test__process_request__destination_host_of_another_node(self):
+        ccr = GxCCR(destination_realm="bromelia.org",
+                    destination_host="other.bromelia.org")
+
+        with self.assertRaises(ProcessRequestException):
+            process_request(self.association, ccr)
+
+    def test__process_request__destination_realm_of_another_realm(self):
+        ccr = GxCCR(destination_realm="other.org")
+
+        with self.assertRaises(ProcessRequestException):
+            process_request(self.association, ccr)
+
+    def test__process_request__without_destination_avps(self):
+        dwr = DeviceWatchdogRequest()
+        process_request(self.association, dwr)
+
+        self.assertEqual(self.association.num_requests, 1)
+
+    def test__process_request__relay(self):
+        self.association.relay = True
+
+        ccr = GxCCR(destination_realm="other.org")
+        process_request(self.association, ccr)
+
+        self.assertEqual(self.association.num_requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
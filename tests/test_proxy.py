@@ -19,6 +19,9 @@ base_dir = os.path.dirname(testing_dir)
 sys.path.insert(0, base_dir)
 
 from bromelia._internal_utils import _convert_config_to_connection_obj
+from bromelia._internal_utils import Connection
+from bromelia._internal_utils import LocalNode
+from bromelia._internal_utils import PeerNode
 from bromelia.avps import *
 from bromelia.constants import *
 from bromelia.messages import CapabilitiesExchangeAnswer
@@ -27,7 +30,10 @@ from bromelia.messages import DeviceWatchdogAnswer
 from bromelia.messages import DeviceWatchdogRequest
 from bromelia.messages import DisconnectPeerAnswer
 from bromelia.messages import DisconnectPeerRequest
+from bromelia.base import DiameterMessage
+from bromelia.exceptions import DiameterMessageError
 from bromelia.proxy import DiameterBaseProxy
+from bromelia.proxy import MessageTemplate
 
 
 # @unittest.SkipTest
@@ -3912,5 +3918,117 @@ class TestDiameterBaseProxyWithTwoApplicationsId(unittest.TestCase):
         self.assertIsNone(cer.avps[7].avps[1].get_padding_length())
 
 
+class TestMessageTemplate(unittest.TestCase):
+    def setUp(self):
+        self.hop_by_hop = bytes.fromhex("01020304")
+        self.end_to_end = bytes.fromhex("05060708")
+
+    def test__message_template__invalid_message(self):
+        with self.assertRaises(DiameterMessageError) as cm:
+            MessageTemplate(b"")
+
+        self.assertEqual(cm.exception.args[0], "invalid message. It MUST be a "\
+                                               "DiameterMessage subclass "\
+                                               "object to be used as template")
+
+    def test__message_template__create__answer(self):
+        dwa = DeviceWatchdogAnswer(origin_host="server.network",
+                                   origin_realm="network")
+        template = MessageTemplate(dwa)
+
+        answer = template.create(hop_by_hop=self.hop_by_hop,
+                                 end_to_end=self.end_to_end)
+
+        self.assertTrue(isinstance(answer, DeviceWatchdogAnswer))
+        self.assertEqual(answer.header.hop_by_hop, self.hop_by_hop)
+        self.assertEqual(answer.header.end_to_end, self.end_to_end)
+        self.assertEqual(answer.dump()[12:20], self.hop_by_hop + self.end_to_end)
+
+        #: Template message must be kept untouched
+        self.assertNotEqual(dwa.header.hop_by_hop, self.hop_by_hop)
+        self.assertEqual(dwa.dump(), template.stream)
+
+        dwa.header.hop_by_hop = self.hop_by_hop
+        dwa.header.end_to_end = self.end_to_end
+        self.assertEqual(answer.dump(), dwa.dump())
+
+    def test__message_template__create__request_with_new_identifiers(self):
+        template = MessageTemplate(DeviceWatchdogRequest())
+
+        dwr_1 = template.create()
+        dwr_2 = template.create()
+
+        self.assertTrue(isinstance(dwr_1, DeviceWatchdogRequest))
+        self.assertNotEqual(dwr_1.header.hop_by_hop, dwr_2.header.hop_by_hop)
+        self.assertNotEqual(dwr_1.header.end_to_end, dwr_2.header.end_to_end)
+        self.assertEqual(dwr_1.dump()[12:16], dwr_1.header.hop_by_hop)
+        self.assertEqual(dwr_1.dump()[16:20], dwr_1.header.end_to_end)
+
+    def test__message_template__create__origin_state_id(self):
+        dwr = DeviceWatchdogRequest(origin_state_id=1)
+        template = MessageTemplate(dwr)
+
+        request = template.create(origin_state_id=10)
+        loaded = DiameterMessage.load(request.dump())[0]
+
+        self.assertEqual(request.origin_state_id_avp.data, bytes.fromhex("0000000a"))
+        self.assertEqual(loaded.origin_state_id_avp.data, bytes.fromhex("0000000a"))
+        self.assertEqual(dwr.origin_state_id_avp.data, bytes.fromhex("00000001"))
+
+    def test__message_template__create__origin_state_id_not_found(self):
+        template = MessageTemplate(DeviceWatchdogRequest())
+
+        with self.assertRaises(DiameterMessageError) as cm:
+            template.create(origin_state_id=10)
+
+        self.assertEqual(cm.exception.args[0], "template does not have "\
+                                               "Origin-State-Id AVP")
+
+
+class TestBaseMessagesTemplates(unittest.TestCase):
+    def setUp(self):
+        local_node = LocalNode(host_name="client.network",
+                               realm="network",
+                               ip_address="127.0.0.1",
+                               port=3868)
+        peer_node = PeerNode(host_name="server.network",
+                             realm="network",
+                             ip_address="127.0.0.1",
+                             port=3868)
+        connection = Connection(name="test",
+                                mode="CLIENT",
+                                transport_type="TCP",
+                                local_node=local_node,
+                                peer_node=peer_node,
+                                application_ids=[],
+                                watchdog_timeout=30)
+        self.base = DiameterBaseProxy(connection).get_default_messages()
+
+    def test__base_messages__get_template__is_cached(self):
+        self.assertIs(self.base.get_template("dwa"),
+                      self.base.get_template("dwa"))
+
+    def test__base_messages__get_template__base_message_replaced(self):
+        template = self.base.get_template("dwa")
+        self.base.dwa = DeviceWatchdogAnswer(origin_host="other.network",
+                                             origin_realm="network")
+
+        self.assertIsNot(self.base.get_template("dwa"), template)
+        self.assertIs(self.base.get_template("dwa").message, self.base.dwa)
+
+    def test__base_messages__create_message(self):
+        cea_1 = self.base.create_message("cea", 
+                                         hop_by_hop=bytes.fromhex("00000001"),
+                                         end_to_end=bytes.fromhex("00000002"))
+        cea_2 = self.base.create_message("cea", 
+                                         hop_by_hop=bytes.fromhex("00000003"),
+                                         end_to_end=bytes.fromhex("00000004"))
+
+        self.assertEqual(cea_1.header.hop_by_hop, bytes.fromhex("00000001"))
+        self.assertEqual(cea_2.header.hop_by_hop, bytes.fromhex("00000003"))
+        self.assertEqual(cea_1.dump()[20:], self.base.cea.dump()[20:])
+        self.assertEqual(cea_2.dump()[20:], self.base.cea.dump()[20:])
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
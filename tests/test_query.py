@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_query
+    ~~~~~~~~~~~~~~~
+
+    This module contains the AVP path queries unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps import *
+from bromelia.base import DiameterAVP
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import DiameterAvpError
+from bromelia.lib.etsi_3gpp_gy.messages import CreditControlRequest as CCR
+from bromelia.lib.etsi_3gpp_s6a import ULA
+from bromelia.query import AvpPath
+from bromelia.query import PathStep
+from bromelia.query import find
+from bromelia.query import find_all
+
+
+def create_used_service_unit(cc_total_octets):
+    return DiameterAVP(code=446, data=CcTotalOctetsAVP(cc_total_octets).dump())
+
+
+class TestAvpPath(unittest.TestCase):
+    def setUp(self):
+        msccs = [MultipleServicesCreditControlAVP([
+                                    RatingGroupAVP(index),
+                                    create_used_service_unit(index * 1024)
+                 ]) for index in range(3)]
+
+        self.ccr = CCR(session_id="pgw.bromelia.org;1;1",
+                       destination_realm="bromelia.org",
+                       cc_request_type=CC_REQUEST_TYPE_UPDATE_REQUEST,
+                       cc_request_number=1,
+                       subscription_id=[
+                                    SubscriptionIdTypeAVP(END_USER_E164),
+                                    SubscriptionIdDataAVP("5511123456789")
+                       ])
+        for mscc in msccs:
+            self.ccr.append(mscc)
+
+        self.stream = self.ccr.dump()
+
+    def test__compile__steps(self):
+        path = AvpPath.compile("Subscription-Id/subscription_id_data")
+
+        self.assertEqual(path.steps, (PathStep(443, None, None),
+                                      PathStep(444, None, None)))
+
+    def test__compile__vendor_id_wildcard_and_index(self):
+        path = AvpPath.compile("Subscription-Data/*[1]/1032:10415")
+
+        self.assertEqual(path.steps, (PathStep(1400, 10415, None),
+                                      PathStep(None, None, 1),
+                                      PathStep(1032, 10415, None)))
+
+    def test__compile__name_from_definitions(self):
+        path = AvpPath.compile("Used-Service-Unit")
+
+        self.assertEqual(path.steps, (PathStep(446, None, None),))
+
+    def test__compile__is_cached(self):
+        self.assertIs(AvpPath.compile("Session-Id"),
+                      AvpPath.compile("Session-Id"))
+
+    def test__compile__unknown_avp_name(self):
+        with self.assertRaises(DiameterAvpError):
+            AvpPath.compile("Unknown-AVP-Name")
+
+    def test__compile__invalid_step(self):
+        with self.assertRaises(DiameterAvpError):
+            AvpPath.compile("Session-Id[x]")
+
+    def test__find(self):
+        self.assertEqual(find(self.stream,
+                              "Subscription-Id/Subscription-Id-Data"),
+                         b"5511123456789")
+
+    def test__find__not_found(self):
+        self.assertIsNone(find(self.stream, "Destination-Host"))
+
+    def test__find_all__repeated_avps(self):
+        cc_total_octets = find_all(self.stream,
+                                   "Multiple-Services-Credit-Control/"\
+                                   "Used-Service-Unit/CC-Total-Octets")
+
+        self.assertEqual(cc_total_octets, [CcTotalOctetsAVP(0).data,
+                                           CcTotalOctetsAVP(1024).data,
+                                           CcTotalOctetsAVP(2048).data])
+
+    def test__find_all__index(self):
+        self.assertEqual(find_all(self.stream,
+                                  "Multiple-Services-Credit-Control[1]/"\
+                                  "Rating-Group"),
+                         [RatingGroupAVP(1).data])
+
+    def test__find_all__wildcard_skips_non_grouped_avps(self):
+        self.assertEqual(find_all(self.stream, "*/Rating-Group"),
+                         [RatingGroupAVP(index).data for index in range(3)])
+
+    def test__find_all__matches_full_decode(self):
+        ccr = DiameterMessage.load(self.stream)[0]
+
+        self.assertEqual(find_all(self.stream, "Session-Id"),
+                         [ccr.session_id_avp.data])
+
+    def test__find_all__offset(self):
+        stream = DiameterMessage().dump() + self.stream
+
+        self.assertEqual(find_all(stream, "Session-Id"), [])
+        self.assertEqual(find_all(stream, "Session-Id", offset=20),
+                         [self.ccr.session_id_avp.data])
+
+    def test__find_all__diameter_message(self):
+        self.assertEqual(find(self.ccr, "CC-Request-Number"),
+                         self.ccr.cc_request_number_avp.data)
+
+    def test__find_all__vendor_id(self):
+        ula = ULA(ula_flags=1)
+
+        self.assertEqual(find(ula, "ULA-Flags"), ula.ula_flags_avp.data)
+        self.assertIsNone(find(ula, "1406"))
+        self.assertEqual(find(ula, "1406:10415"), ula.ula_flags_avp.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
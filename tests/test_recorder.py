@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_recorder
+    ~~~~~~~~~~~~~~~~~~
+
+    This module contains the flight recorder unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia._internal_utils import _convert_config_to_connection_obj
+from bromelia.avps import SubscriptionIdAVP
+from bromelia.avps import SubscriptionIdDataAVP
+from bromelia.avps import SubscriptionIdTypeAVP
+from bromelia.constants import *
+from bromelia.exceptions import DiameterAssociationError
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.lib.etsi_3gpp_gx import CCA
+from bromelia.pcap import iter_messages
+from bromelia.proxy import DiameterBaseProxy
+from bromelia.recorder import FlightRecorder
+from bromelia.recorder import RingBuffer
+from bromelia.setup import DiameterAssociation
+from tests.helpers import Clock
+from tests.helpers import MockTransport
+from tests.helpers import create_ccr
+from tests.helpers import get_config
+
+
+class OneShotEvent:
+    """Lets DiameterAssociation.recv_message_from_queue() run once."""
+    def __init__(self, association):
+        self.association = association
+
+    def wait(self, timeout=None):
+        return True
+
+    def clear(self):
+        self.association._stop_threads = True
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test__max_entries(self):
+        ring = RingBuffer(max_entries=2, max_bytes=100)
+        for index in range(3):
+            ring.append(index, bytes([index]) * 10)
+
+        self.assertEqual(ring.get_entries(), [(1, b"\x01" * 10),
+                                              (2, b"\x02" * 10)])
+        self.assertEqual(ring.size, 20)
+
+    def test__max_bytes(self):
+        ring = RingBuffer(max_entries=10, max_bytes=25)
+        for index in range(3):
+            ring.append(index, bytes([index]) * 10)
+
+        self.assertEqual(len(ring), 2)
+        self.assertEqual(ring.size, 20)
+
+        #: The last byte stream is kept even if it is larger.
+        ring.append(3, b"\x03" * 30)
+        self.assertEqual(ring.get_entries(), [(3, b"\x03" * 30)])
+
+    def test__clear(self):
+        ring = RingBuffer(max_entries=10, max_bytes=100)
+        ring.append(0, b"\x00")
+        ring.clear()
+
+        self.assertEqual(len(ring), 0)
+        self.assertEqual(ring.size, 0)
+
+
+class TestFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = Clock(1000.0)
+        self.recorder = FlightRecorder(max_entries=10,
+                                       dump_directory=self.directory.name,
+                                       clock=self.clock)
+
+        self.ccr = create_ccr().dump()
+        self.cca = CCA().dump()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self):
+        self.recorder.record_sent(self.ccr)
+        self.clock.now += 0.5
+        self.recorder.record_recv(self.cca)
+
+    def test__get_records(self):
+        self.record()
+
+        records = self.recorder.get_records(("10.0.0.1", 50000),
+                                            ("10.0.0.2", 3868))
+
+        self.assertEqual([record.data for record in records],
+                         [self.ccr, self.cca])
+        self.assertEqual(records[0].flow[1:5], ("10.0.0.1", 50000,
+                                                "10.0.0.2", 3868))
+        self.assertEqual(records[1].flow[1:5], ("10.0.0.2", 3868,
+                                                "10.0.0.1", 50000))
+
+    def test__get_records__unknown_addresses(self):
+        self.record()
+
+        records = self.recorder.get_records((None, None), ("::1", 3868))
+
+        self.assertEqual(records[0].flow[1:5], ("127.0.0.1", 3868,
+                                                "127.0.0.2", 3868))
+
+    def test__dump(self):
+        self.record()
+        path = os.path.join(self.directory.name, "dump.pcap")
+
+        self.assertEqual(self.recorder.dump(path), 2)
+
+        records = list(iter_messages(path))
+        self.assertEqual([record.data for record in records],
+                         [self.ccr, self.cca])
+        self.assertEqual([record.timestamp for record in records],
+                         [1000.0, 1000.5])
+        self.assertEqual(self.recorder.get_stats().num_of_dumps, 1)
+
+    def test__dump_on_error(self):
+        self.record()
+
+        path = self.recorder.dump_on_error("pcrf.bromelia.org/1")
+        self.assertTrue(os.path.basename(path).startswith("pcrf.bromelia."\
+                                                          "org_1-"))
+        self.assertTrue(os.path.exists(path))
+
+        #: Dumps on error are rate limited.
+        self.assertIsNone(self.recorder.dump_on_error("pcrf.bromelia.org"))
+
+        self.clock.now += self.recorder.dump_interval
+        self.assertIsNotNone(self.recorder.dump_on_error("pcrf.bromelia.org"))
+
+    def test__dump_on_error__no_directory(self):
+        self.recorder.dump_directory = None
+        self.assertIsNone(self.recorder.dump_on_error("pcrf.bromelia.org"))
+
+    def test__invalid_limits(self):
+        with self.assertRaises(InvalidConfigValue):
+            FlightRecorder(max_entries=0)
+
+
+class TestDiameterAssociationFlightRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        connection = _convert_config_to_connection_obj(get_config(
+                                        LOCAL_NODE_IP_ADDRESS="10.0.0.1",
+                                        LOCAL_NODE_PORT=50000,
+                                        PEER_NODE_IP_ADDRESS="10.0.0.2"))
+        base = DiameterBaseProxy(connection).get_default_messages()
+
+        self.association = DiameterAssociation(connection, base)
+        self.association.transport = MockTransport()
+        self.association.recorder.dump_directory = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def recv(self, stream):
+        transport = self.association.transport
+        transport._recv_data_stream = stream
+        transport._recv_data_available = OneShotEvent(self.association)
+
+        self.association.recv_message_from_queue()
+
+    def test__send_and_recv(self):
+        ccr = create_ccr()
+        self.association.put_message_into_send_queue(ccr)
+        self.association.send_message_from_queue()
+
+        cca = CCA()
+        self.recv(cca.dump())
+
+        path = os.path.join(self.directory.name, "dump.pcap")
+        self.assertEqual(self.association.dump_flight_recorder(path), 2)
+
+        records = list(iter_messages(path))
+        self.assertEqual([record.data for record in records],
+                         [ccr.dump(), cca.dump()])
+        self.assertEqual(str(records[0].flow.src_ip_address), "10.0.0.1")
+        self.assertEqual(records[0].flow.dst_port, 3868)
+
+    def test__dump_on_error(self):
+        with self.assertLogs("DiameterConnection", level="ERROR"):
+            self.recv(b"\x01\x00\x00\x08" + b"\x00" * 36)
+
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test__dump_on_error__unknown_peer_host_name(self):
+        connection = self.association.connection
+        peer_node = connection.peer_node._replace(host_name=None)
+        self.association.connection = connection._replace(peer_node=peer_node)
+
+        with self.assertLogs("DiameterConnection", level="ERROR"):
+            self.recv(b"\x01\x00\x00\x08" + b"\x00" * 36)
+
+        self.assertTrue(os.listdir(self.directory.name)[0].startswith(
+                                                                "10.0.0.2-"))
+        self.assertTrue(self.association.lock.acquire(blocking=False))
+        self.association.lock.release()
+
+    def test__dump_on_error__grouped_avp(self):
+        stream = bytearray(create_ccr().dump())
+        stream += SubscriptionIdAVP([
+                                SubscriptionIdTypeAVP(END_USER_E164),
+                                SubscriptionIdDataAVP("5511123456789")
+        ]).dump()
+        stream[1:4] = len(stream).to_bytes(3, byteorder="big")
+
+        #: Length field of the inner Subscription-Id-Type AVP, which only
+        #: shows up once the Subscription-Id AVP is decoded.
+        stream[-44 + 15] = 0xff
+
+        with self.assertLogs("DiameterConnection", level="ERROR"):
+            self.recv(bytes(stream))
+
+        self.assertTrue(self.association._recv_messages.empty())
+        self.assertEqual(len(os.listdir(self.directory.name)), 1)
+
+    def test__disabled(self):
+        self.association.recorder = None
+
+        with self.assertRaises(DiameterAssociationError):
+            self.association.dump_flight_recorder("dump.pcap")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,555 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_redirect
+    ~~~~~~~~~~~~~~~~~~
+
+    This module contains the redirect cache unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import queue
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia import Bromelia
+from bromelia.avps import RedirectHostAVP
+from bromelia.avps import RedirectHostUsageAVP
+from bromelia.avps import RedirectMaxCacheTimeAVP
+from bromelia.base import DiameterMessage
+from bromelia.bromelia import Worker
+from bromelia.constants import *
+from bromelia.exceptions import AVPParsingError
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.redirect import RedirectCache
+from bromelia.redirect import RedirectIndication
+from bromelia.redirect import create_redirected_request
+from bromelia.redirect import get_host_from_uri
+from bromelia.redirect import get_redirect_indication
+from bromelia.routing import RelayAgent
+from bromelia.routing import RoutingAvps
+from bromelia.routing import RoutingTable
+from bromelia.routing import create_error_answer
+from bromelia.routing import get_routing_avps
+from tests.helpers import Clock
+from tests.helpers import MockPeer
+
+
+def create_ulr(session_id="mme.bromelia.org;1;1", user_name="123456789012345"):
+    return ULR(session_id=session_id,
+               origin_host="mme.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="epc.bromelia.org",
+               user_name=user_name,
+               visited_plmn_id=bytes.fromhex("27f450"),
+               ulr_flags=3)
+
+
+def create_redirect_answer(request,
+                           hosts,
+                           usage=REDIRECT_HOST_USAGE_REALM_AND_APPLICATION,
+                           max_cache_time=60,
+                           result_code=DIAMETER_REDIRECT_INDICATION):
+    answer = create_error_answer(request,
+                                 result_code,
+                                 "redirect.bromelia.org",
+                                 "epc.bromelia.org")
+
+    for host in hosts:
+        answer.append(RedirectHostAVP(f"aaa://{host}:3868;transport=sctp"))
+
+    if usage is not None:
+        answer.append(RedirectHostUsageAVP(usage))
+
+    if max_cache_time is not None:
+        answer.append(RedirectMaxCacheTimeAVP(max_cache_time))
+
+    return answer
+
+
+def create_success_answer(request):
+    return create_redirect_answer(request, [],
+                                  usage=None,
+                                  max_cache_time=None,
+                                  result_code=DIAMETER_SUCCESS)
+
+
+def create_routing(session_id=b"session",
+                   user_name=b"user",
+                   destination_realm=b"epc.bromelia.org",
+                   destination_host=None):
+    return RoutingAvps(destination_host=destination_host,
+                       destination_realm=destination_realm,
+                       route_records=(),
+                       session_id=session_id,
+                       user_name=user_name)
+
+
+def create_indication(usage, hosts=("hss2.bromelia.org",), max_cache_time=60):
+    return RedirectIndication(hosts=hosts,
+                              usage=int.from_bytes(usage, byteorder="big"),
+                              max_cache_time=max_cache_time)
+
+
+class TestWireFunctions(unittest.TestCase):
+    def test__get_host_from_uri(self):
+        self.assertEqual(get_host_from_uri(b"aaa://hss.bromelia.org:3868;"\
+                                           b"transport=tcp"),
+                         "hss.bromelia.org")
+        self.assertEqual(get_host_from_uri(b"aaas://hss.bromelia.org"),
+                         "hss.bromelia.org")
+        self.assertEqual(get_host_from_uri(b"aaa://hss.bromelia.org;"\
+                                           b"protocol=diameter"),
+                         "hss.bromelia.org")
+
+    def test__get_redirect_indication(self):
+        answer = create_redirect_answer(create_ulr(),
+                                        ["hss2.bromelia.org",
+                                         "hss3.bromelia.org"],
+                                        usage=REDIRECT_HOST_USAGE_ALL_SESSION,
+                                        max_cache_time=30)
+
+        indication = get_redirect_indication(answer.dump())
+        self.assertEqual(indication.hosts, ("hss2.bromelia.org",
+                                            "hss3.bromelia.org"))
+        self.assertEqual(indication.usage, 1)
+        self.assertEqual(indication.max_cache_time, 30)
+
+    def test__get_redirect_indication__defaults(self):
+        answer = create_redirect_answer(create_ulr(),
+                                        ["hss2.bromelia.org"],
+                                        usage=None,
+                                        max_cache_time=None)
+
+        indication = get_redirect_indication(answer.dump())
+        self.assertEqual(indication.usage, 0)
+        self.assertIsNone(indication.max_cache_time)
+
+    def test__get_redirect_indication__not_a_redirect(self):
+        answer = create_redirect_answer(create_ulr(),
+                                        ["hss2.bromelia.org"],
+                                        result_code=DIAMETER_UNABLE_TO_DELIVER)
+        self.assertIsNone(get_redirect_indication(answer.dump()))
+
+        answer = create_redirect_answer(create_ulr(), [])
+        self.assertIsNone(get_redirect_indication(answer.dump()))
+
+        #: Answers without E flag are not looked into.
+        answer = create_redirect_answer(create_ulr(), ["hss2.bromelia.org"])
+        answer.header.set_error_bit(False)
+        self.assertIsNone(get_redirect_indication(answer.dump()))
+
+    def test__get_redirect_indication__invalid_avp_length(self):
+        answer = create_redirect_answer(create_ulr(), ["hss2.bromelia.org"])
+        stream = bytearray(answer.dump())
+        stream[25:28] = (0xFFFF).to_bytes(3, byteorder="big")
+
+        with self.assertRaises(AVPParsingError):
+            get_redirect_indication(bytes(stream))
+
+
+class TestRedirectCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = RedirectCache(clock=self.clock)
+
+    def test__usages(self):
+        tests = [
+            (REDIRECT_HOST_USAGE_ALL_SESSION,
+             create_routing(user_name=b"other"),
+             create_routing(session_id=b"other")),
+            (REDIRECT_HOST_USAGE_ALL_USER,
+             create_routing(session_id=b"other"),
+             create_routing(user_name=b"other")),
+            (REDIRECT_HOST_USAGE_REALM_AND_APPLICATION,
+             create_routing(session_id=b"other"),
+             create_routing(destination_realm=b"other")),
+            (REDIRECT_HOST_USAGE_ALL_REALM,
+             create_routing(session_id=b"other"),
+             create_routing(destination_realm=b"other")),
+            (REDIRECT_HOST_USAGE_ALL_HOST,
+             create_routing(destination_host=b"hss1.bromelia.org"),
+             create_routing(destination_host=b"other")),
+        ]
+
+        for usage, matching, not_matching in tests:
+            with self.subTest(usage=usage):
+                self.cache.clear()
+                routing = create_routing(destination_host=b"hss1.bromelia.org")
+                self.assertTrue(self.cache.add(create_indication(usage),
+                                               routing,
+                                               DIAMETER_APPLICATION_S6a))
+
+                self.assertEqual(self.cache.get(matching,
+                                                DIAMETER_APPLICATION_S6a),
+                                 ("hss2.bromelia.org",))
+                self.assertIsNone(self.cache.get(not_matching,
+                                                 DIAMETER_APPLICATION_S6a))
+
+    def test__usage__realm_and_application(self):
+        self.cache.add(create_indication(
+                                    REDIRECT_HOST_USAGE_REALM_AND_APPLICATION),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+
+        self.assertIsNone(self.cache.get(create_routing(),
+                                         DIAMETER_APPLICATION_Gx))
+
+    def test__usage__all_application(self):
+        self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_APPLICATION),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+
+        self.assertEqual(self.cache.get(create_routing(destination_realm=b"x"),
+                                        DIAMETER_APPLICATION_S6a),
+                         ("hss2.bromelia.org",))
+        self.assertIsNone(self.cache.get(create_routing(),
+                                         DIAMETER_APPLICATION_Gx))
+
+    def test__dont_cache(self):
+        self.assertFalse(self.cache.add(
+                            create_indication(REDIRECT_HOST_USAGE_DONT_CACHE),
+                            create_routing(),
+                            DIAMETER_APPLICATION_S6a))
+        self.assertFalse(self.cache.add(
+                            create_indication(REDIRECT_HOST_USAGE_ALL_REALM,
+                                              max_cache_time=None),
+                            create_routing(),
+                            DIAMETER_APPLICATION_S6a))
+        self.assertFalse(self.cache.add(
+                            create_indication(REDIRECT_HOST_USAGE_ALL_USER),
+                            create_routing(user_name=None),
+                            DIAMETER_APPLICATION_S6a))
+
+        self.assertEqual(len(self.cache), 0)
+
+    def test__precedence(self):
+        self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_REALM,
+                                         hosts=("realm.bromelia.org",)),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+        self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_SESSION,
+                                         hosts=("session.bromelia.org",)),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+
+        self.assertEqual(self.cache.get(create_routing(),
+                                        DIAMETER_APPLICATION_S6a),
+                         ("session.bromelia.org",))
+        self.assertEqual(self.cache.get(create_routing(session_id=b"other"),
+                                        DIAMETER_APPLICATION_S6a),
+                         ("realm.bromelia.org",))
+
+    def test__max_cache_time(self):
+        self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_REALM,
+                                         max_cache_time=10),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+
+        self.clock.now = 9.9
+        self.assertIsNotNone(self.cache.get(create_routing(),
+                                            DIAMETER_APPLICATION_S6a))
+
+        self.clock.now = 10
+        self.assertIsNone(self.cache.get(create_routing(),
+                                         DIAMETER_APPLICATION_S6a))
+        self.assertEqual(len(self.cache), 0)
+
+    def test__purge(self):
+        for index in range(4):
+            self.clock.now = index
+            self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_SESSION,
+                                             max_cache_time=10),
+                           create_routing(session_id=str(index).encode()),
+                           DIAMETER_APPLICATION_S6a)
+
+        self.clock.now = 11.5
+        self.assertEqual(self.cache.purge(), 2)
+        self.assertEqual(len(self.cache), 2)
+
+    def test__max_size(self):
+        cache = RedirectCache(max_size=2, clock=self.clock)
+
+        for session_id in (b"1", b"2", b"3"):
+            cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_SESSION),
+                      create_routing(session_id=session_id),
+                      DIAMETER_APPLICATION_S6a)
+
+            #: Entries used are the last ones to be evicted.
+            cache.get(create_routing(session_id=b"1"), DIAMETER_APPLICATION_S6a)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(create_routing(session_id=b"2"),
+                                    DIAMETER_APPLICATION_S6a))
+
+    def test__remove(self):
+        self.cache.add(create_indication(REDIRECT_HOST_USAGE_ALL_REALM),
+                       create_routing(),
+                       DIAMETER_APPLICATION_S6a)
+
+        self.assertEqual(self.cache.remove("hss2.bromelia.org"), 1)
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestRelayAgentRedirect(unittest.TestCase):
+    def setUp(self):
+        self.mme = MockPeer("mme.bromelia.org")
+        self.redirect = MockPeer("redirect.bromelia.org")
+        self.hss2 = MockPeer("hss2.bromelia.org")
+
+        table = RoutingTable()
+        table.add_route("epc.bromelia.org", ["redirect.bromelia.org"])
+
+        self.agent = RelayAgent(table,
+                                clients=[self.mme, self.redirect, self.hss2])
+
+    def forward(self, ulr):
+        self.agent.handle_message(self.mme,
+                                  DiameterMessage.load(ulr.dump(), lazy=True)[0])
+
+    def redirect_last_request(self, **kwargs):
+        request = DiameterMessage.load(
+                            self.redirect.association.messages[-1].dump())[0]
+        answer = create_redirect_answer(request, ["hss2.bromelia.org"], **kwargs)
+
+        self.agent.handle_message(self.redirect,
+                                  DiameterMessage.load(answer.dump(),
+                                                       lazy=True)[0])
+
+    def test__redirect(self):
+        ulr = create_ulr()
+        self.forward(ulr)
+        self.redirect_last_request()
+
+        #: The request is sent again to the Redirect-Host peer, instead of
+        #: the redirect indication being forwarded back.
+        self.assertEqual(self.mme.association.messages, [])
+        self.assertEqual(len(self.hss2.association.messages), 1)
+
+        request = self.hss2.association.messages[-1]
+        self.assertEqual(request.header.end_to_end, ulr.header.end_to_end)
+        self.assertEqual(get_routing_avps(request.dump()).route_records,
+                         (b"mme.bromelia.org",))
+        self.assertEqual(self.agent.num_redirected_requests, 1)
+
+        #: Later requests within the same scope skip the redirect agent.
+        self.forward(create_ulr(session_id="mme.bromelia.org;1;2"))
+        self.assertEqual(len(self.redirect.association.messages), 1)
+        self.assertEqual(len(self.hss2.association.messages), 2)
+        self.assertEqual(self.agent.redirect_cache.hits, 1)
+
+    def test__redirect__dont_cache(self):
+        self.forward(create_ulr())
+        self.redirect_last_request(usage=REDIRECT_HOST_USAGE_DONT_CACHE)
+        self.assertEqual(len(self.hss2.association.messages), 1)
+
+        self.forward(create_ulr(session_id="mme.bromelia.org;1;2"))
+        self.assertEqual(len(self.redirect.association.messages), 2)
+
+    def test__redirect__expired(self):
+        clock = Clock()
+        self.agent.redirect_cache.clock = clock
+
+        self.forward(create_ulr())
+        self.redirect_last_request(max_cache_time=5)
+
+        clock.now = 5
+        self.forward(create_ulr(session_id="mme.bromelia.org;1;2"))
+        self.assertEqual(len(self.redirect.association.messages), 2)
+
+    def test__redirect__no_redirect_host_peer(self):
+        ulr = create_ulr()
+        self.forward(ulr)
+
+        request = DiameterMessage.load(
+                            self.redirect.association.messages[-1].dump())[0]
+        answer = create_redirect_answer(request, ["hss9.bromelia.org"])
+        self.agent.handle_message(self.redirect,
+                                  DiameterMessage.load(answer.dump(),
+                                                       lazy=True)[0])
+
+        #: The redirect indication goes back to the peer of the request.
+        answer = self.mme.association.messages[-1]
+        self.assertEqual(answer.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(self.agent.num_redirected_requests, 0)
+
+    def test__redirect__only_once(self):
+        ulr = create_ulr()
+        self.forward(ulr)
+        self.redirect_last_request()
+
+        request = DiameterMessage.load(
+                            self.hss2.association.messages[-1].dump())[0]
+        answer = create_redirect_answer(request, ["redirect.bromelia.org"])
+        self.agent.handle_message(self.hss2,
+                                  DiameterMessage.load(answer.dump(),
+                                                       lazy=True)[0])
+
+        answer = self.mme.association.messages[-1]
+        self.assertEqual(answer.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(len(self.redirect.association.messages), 1)
+
+
+class TestSendRequest(unittest.TestCase):
+    """Bromelia objects with a Worker for the redirect agent, which is the
+    one of the S6a Application-Id, and another one for hss2. Peers answer
+    in a thread, as the Worker processes would.
+    """
+    def setUp(self):
+        for name, value in (("associations", dict()),
+                            ("recv_queues", list()),
+                            ("workers", list())):
+            self.addCleanup(setattr, Worker, name, getattr(Worker, name))
+            setattr(Worker, name, value)
+
+        manager = SimpleNamespace(Queue=queue.Queue,
+                                  Event=threading.Event,
+                                  Lock=threading.Lock)
+
+        self.workers = dict()
+        for peer in ("hss2.bromelia.org", "dra.bromelia.org"):
+            config = {"PEER_NODE_HOSTNAME": peer,
+                      "APPLICATIONS": [{"app_id": DIAMETER_APPLICATION_S6a}]}
+            worker = Worker(SimpleNamespace(config=config), manager)
+            worker.is_open.set()
+            self.workers[peer] = worker
+
+        self.app = Bromelia.__new__(Bromelia)
+        self.app.redirect_cache = RedirectCache(clock=Clock())
+        self.app.associations = Worker.associations
+        self.app.workers = Worker.workers
+        self.app.send_threshold = threading.Barrier(1)
+        self.app.answer_threshold = threading.Barrier(1)
+
+        self.requests = list()
+        self.answers = {peer: list() for peer in self.workers}
+
+        self.stop_peers = threading.Event()
+        self.addCleanup(self.stop_peers.set)
+        threading.Thread(target=self.run_peers, daemon=True).start()
+
+    def run_peers(self):
+        while not self.stop_peers.is_set():
+            for peer, worker in self.workers.items():
+                try:
+                    msg = worker.send_queue.get(timeout=0.01)
+                except queue.Empty:
+                    continue
+                worker.send_lock.release()
+
+                while msg.header.hop_by_hop not in worker.pending_answers:
+                    time.sleep(0.001)
+
+                self.requests.append((peer, msg))
+                self.app.handler_pending_answers(self.answers[peer].pop(0)(msg))
+
+    def test__create_redirected_request(self):
+        ulr = create_ulr()
+        request = create_redirected_request(ulr, "hss2.bromelia.org")
+
+        self.assertEqual(request.destination_host_avp.data,
+                         b"hss2.bromelia.org")
+        self.assertEqual(request.header.end_to_end, ulr.header.end_to_end)
+        self.assertNotEqual(request.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertFalse(ulr.has_avp("destination_host_avp"))
+
+        request = create_redirected_request(request, "hss3.bromelia.org")
+        self.assertEqual(request.destination_host_avp.data,
+                         b"hss3.bromelia.org")
+        self.assertEqual(DiameterMessage.load(request.dump())[0].dump(),
+                         request.dump())
+
+    def test__get_worker_by_peer(self):
+        self.assertIs(self.app.get_worker_by_peer("hss2.bromelia.org",
+                                                  DIAMETER_APPLICATION_S6a),
+                      self.workers["hss2.bromelia.org"])
+        self.assertIsNone(self.app.get_worker_by_peer("hss2.bromelia.org",
+                                                      DIAMETER_APPLICATION_Gx))
+        self.assertIsNone(self.app.get_worker_by_peer("hss3.bromelia.org",
+                                                      DIAMETER_APPLICATION_S6a))
+
+    def test__send_request__redirect(self):
+        self.answers["dra.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss3.bromelia.org",
+                                                         "hss2.bromelia.org"]))
+        self.answers["hss2.bromelia.org"].append(create_success_answer)
+
+        ulr = create_ulr()
+        answer = self.app.send_request(ulr)
+
+        self.assertEqual(answer.result_code_avp.data, DIAMETER_SUCCESS)
+        self.assertEqual([peer for peer, _ in self.requests],
+                         ["dra.bromelia.org", "hss2.bromelia.org"])
+
+        _, request = self.requests[1]
+        self.assertEqual(request.destination_host_avp.data,
+                         b"hss2.bromelia.org")
+        self.assertEqual(request.header.end_to_end, ulr.header.end_to_end)
+
+    def test__send_request__cached_redirect(self):
+        self.answers["dra.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss2.bromelia.org"]))
+        self.answers["hss2.bromelia.org"].extend([create_success_answer,
+                                                  create_success_answer])
+
+        self.app.send_request(create_ulr())
+        answer = self.app.send_request(create_ulr(session_id="mme.bromelia.org;1;2"))
+
+        self.assertEqual(answer.result_code_avp.data, DIAMETER_SUCCESS)
+        self.assertEqual([peer for peer, _ in self.requests],
+                         ["dra.bromelia.org",
+                          "hss2.bromelia.org",
+                          "hss2.bromelia.org"])
+
+    def test__send_request__redirect_host_not_connected(self):
+        self.answers["dra.bromelia.org"].extend([
+                lambda msg: create_redirect_answer(msg, ["hss3.bromelia.org"]),
+                create_success_answer
+        ])
+
+        answer = self.app.send_request(create_ulr())
+
+        self.assertEqual(answer.result_code_avp.data, DIAMETER_SUCCESS)
+        self.assertEqual([peer for peer, _ in self.requests],
+                         ["dra.bromelia.org", "dra.bromelia.org"])
+
+        _, request = self.requests[1]
+        self.assertEqual(request.destination_host_avp.data,
+                         b"hss3.bromelia.org")
+
+    def test__send_request__redirect_loop(self):
+        self.answers["dra.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss2.bromelia.org"]))
+        self.answers["hss2.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss2.bromelia.org"]))
+
+        answer = self.app.send_request(create_ulr())
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(answer.result_code_avp.data,
+                         DIAMETER_REDIRECT_INDICATION)
+
+    def test__send_request__max_redirects(self):
+        self.answers["dra.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss2.bromelia.org"]))
+        self.answers["hss2.bromelia.org"].append(
+                lambda msg: create_redirect_answer(msg, ["hss3.bromelia.org"]))
+
+        answer = self.app.send_request(create_ulr(), max_redirects=1)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(answer.result_code_avp.data,
+                         DIAMETER_REDIRECT_INDICATION)
+
+if __name__ == "__main__":
+    unittest.main()
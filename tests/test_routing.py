@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_routing
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the realm routing and Relay agent unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import time
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps import RouteRecordAVP
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import AVPParsingError
+from bromelia.exceptions import DiameterApplicationError
+from bromelia.lib.etsi_3gpp_s6a import ULA
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.routing import ForwardingTable
+from bromelia.routing import RelayAgent
+from bromelia.routing import RoutingTable
+from bromelia.routing import create_error_answer
+from bromelia.routing import forward_answer
+from bromelia.routing import forward_request
+from bromelia.routing import get_routing_avps
+from bromelia.server import DiameterServer
+from bromelia.setup import Diameter
+from tests.helpers import Clock
+from tests.helpers import MockPeer
+
+
+def create_ulr(destination_realm="epc.bromelia.org",
+               destination_host=None,
+               route_record=None):
+    ulr = ULR(session_id="mme.bromelia.org;1;1",
+              origin_host="mme.bromelia.org",
+              origin_realm="bromelia.org",
+              destination_realm=destination_realm,
+              destination_host=destination_host,
+              user_name="123456789012345",
+              visited_plmn_id=bytes.fromhex("27f450"),
+              ulr_flags=3)
+
+    for identity in route_record or []:
+        ulr.append(RouteRecordAVP(identity))
+    return ulr
+
+
+def create_ula(ulr, origin_host="hss.bromelia.org"):
+    ula = ULA(session_id=ulr.session_id_avp.data.decode("utf-8"),
+              origin_host=origin_host,
+              origin_realm="epc.bromelia.org",
+              result_code=DIAMETER_SUCCESS,
+              ula_flags=1)
+    ula.header.hop_by_hop = ulr.header.hop_by_hop
+    ula.header.end_to_end = ulr.header.end_to_end
+    return ula
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestWireFunctions(unittest.TestCase):
+    def test__get_routing_avps(self):
+        ulr = create_ulr(destination_host="hss.bromelia.org",
+                         route_record=["dra1.bromelia.org", "dra2.bromelia.org"])
+
+        routing = get_routing_avps(ulr.dump())
+        self.assertEqual(routing.destination_host, b"hss.bromelia.org")
+        self.assertEqual(routing.destination_realm, b"epc.bromelia.org")
+        self.assertEqual(routing.route_records, (b"dra1.bromelia.org",
+                                                 b"dra2.bromelia.org"))
+
+    def test__get_routing_avps__invalid_avp_length(self):
+        stream = bytearray(create_ulr().dump())
+        stream[25:28] = b"\x00\x00\x04"
+
+        with self.assertRaises(AVPParsingError):
+            get_routing_avps(bytes(stream))
+
+    def test__forward_request(self):
+        ulr = create_ulr()
+        route_record = RouteRecordAVP("mme.bromelia.org")
+
+        stream = forward_request(ulr.dump(), 7, route_record.dump())
+        msg = DiameterMessage.load(stream)[0]
+
+        self.assertEqual(msg.header.hop_by_hop, b"\x00\x00\x00\x07")
+        self.assertEqual(msg.header.end_to_end, ulr.header.end_to_end)
+        self.assertEqual(msg.header.flags, ulr.header.flags)
+        self.assertEqual(len(msg.avps), len(ulr.avps) + 1)
+        self.assertEqual(msg.avps[-1].dump(), route_record.dump())
+        self.assertEqual(stream[20:len(ulr.dump())], ulr.dump()[20:])
+
+    def test__forward_answer(self):
+        ula = create_ula(create_ulr())
+
+        stream = forward_answer(ula.dump(), b"\x00\x00\x00\x09")
+        self.assertEqual(stream[12:16], b"\x00\x00\x00\x09")
+        self.assertEqual(stream[16:], ula.dump()[16:])
+
+    def test__create_error_answer(self):
+        ulr = create_ulr()
+        ulr.header.set_retransmitted_bit(True)
+
+        answer = create_error_answer(ulr,
+                                     DIAMETER_LOOP_DETECTED,
+                                     "dra.bromelia.org",
+                                     "bromelia.org")
+
+        self.assertFalse(answer.header.is_request())
+        self.assertFalse(answer.header.is_retransmitted())
+        self.assertTrue(answer.header.is_error())
+        self.assertTrue(answer.header.is_proxiable())
+        self.assertEqual(answer.header.command_code, ulr.header.command_code)
+        self.assertEqual(answer.header.application_id, ulr.header.application_id)
+        self.assertEqual(answer.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(answer.session_id_avp.data, ulr.session_id_avp.data)
+        self.assertEqual(answer.result_code_avp.data, DIAMETER_LOOP_DETECTED)
+
+
+class TestRoutingTable(unittest.TestCase):
+    def setUp(self):
+        self.table = RoutingTable()
+        self.table.add_route("epc.bromelia.org", ["hss1", "hss2"],
+                             application_id=DIAMETER_APPLICATION_S6a)
+        self.table.add_route("epc.bromelia.org", ["aaa"])
+        self.table.add_route("*", ["dra"], application_id=DIAMETER_APPLICATION_S6a)
+        self.table.add_route("*", ["default"])
+
+    def test__get_route(self):
+        self.assertEqual(self.table.get_route(b"epc.bromelia.org",
+                                              DIAMETER_APPLICATION_S6a).peers,
+                         ("hss1", "hss2"))
+        self.assertEqual(self.table.get_route(b"epc.bromelia.org",
+                                              DIAMETER_APPLICATION_Gx).peers,
+                         ("aaa",))
+        self.assertEqual(self.table.get_route(b"ims.bromelia.org",
+                                              DIAMETER_APPLICATION_S6a).peers,
+                         ("dra",))
+        self.assertEqual(self.table.get_route(b"ims.bromelia.org", 16777238).peers,
+                         ("default",))
+
+    def test__remove_route(self):
+        self.table.remove_route("*")
+        self.assertIsNone(self.table.get_route(b"ims.bromelia.org",
+                                               DIAMETER_APPLICATION_Gx))
+
+        with self.assertRaises(DiameterApplicationError):
+            self.table.remove_route("*")
+
+    def test__add_route__no_peers(self):
+        with self.assertRaises(DiameterApplicationError):
+            self.table.add_route("ims.bromelia.org", [])
+
+    def test__select_peer(self):
+        route = self.table.get_route(b"epc.bromelia.org", DIAMETER_APPLICATION_S6a)
+
+        peers = [self.table.select_peer(route, lambda peer: True)
+                                                        for _ in range(4)]
+        self.assertEqual(peers, ["hss1", "hss2", "hss1", "hss2"])
+
+        peers = [self.table.select_peer(route, lambda peer: peer == "hss2")
+                                                        for _ in range(2)]
+        self.assertEqual(peers, ["hss2", "hss2"])
+
+        self.assertIsNone(self.table.select_peer(route, lambda peer: False))
+
+
+class TestForwardingTable(unittest.TestCase):
+    def test__ttl(self):
+        clock = Clock()
+        table = ForwardingTable(ttl=10, clock=clock)
+
+        table.add(1, "mme", b"\x00\x00\x00\x01")
+        clock.now = 5
+        table.add(2, "mme", b"\x00\x00\x00\x02")
+
+        self.assertEqual(table.pop(1).hop_by_hop, b"\x00\x00\x00\x01")
+        self.assertIsNone(table.pop(1))
+
+        clock.now = 15
+        self.assertIsNone(table.pop(2))
+
+        table.add(3, "mme", b"\x00\x00\x00\x03")
+        clock.now = 30
+        table.add(4, "mme", b"\x00\x00\x00\x04")
+        self.assertEqual(len(table), 1)
+        self.assertEqual(table.expired, 1)
+
+
+class TestRelayAgent(unittest.TestCase):
+    def setUp(self):
+        self.mme = MockPeer("mme.bromelia.org")
+        self.hss1 = MockPeer("hss1.bromelia.org")
+        self.hss2 = MockPeer("hss2.bromelia.org")
+
+        table = RoutingTable()
+        table.add_route("epc.bromelia.org",
+                        ["hss1.bromelia.org", "hss2.bromelia.org"])
+
+        self.agent = RelayAgent(table, clients=[self.mme, self.hss1, self.hss2])
+
+    def forward(self, ulr, peer):
+        self.agent.handle_message(self.mme,
+                                  DiameterMessage.load(ulr.dump(), lazy=True)[0])
+        return DiameterMessage.load(peer.association.messages[-1].dump())[0]
+
+    def test__route_request(self):
+        self.assertTrue(self.mme.relay)
+
+        ulrs = [create_ulr() for _ in range(2)]
+        forwarded = [self.forward(ulrs[0], self.hss1),
+                     self.forward(ulrs[1], self.hss2)]
+
+        for ulr, msg in zip(ulrs, forwarded):
+            self.assertNotEqual(msg.header.hop_by_hop, ulr.header.hop_by_hop)
+            self.assertEqual(msg.header.end_to_end, ulr.header.end_to_end)
+            self.assertEqual(msg.route_record_avp.data, b"mme.bromelia.org")
+
+        self.assertEqual(self.agent.num_forwarded_requests, 2)
+
+    def test__route_request__destination_host(self):
+        ulr = create_ulr(destination_host="hss2.bromelia.org")
+        self.forward(ulr, self.hss2)
+
+        self.assertEqual(self.hss1.association.messages, [])
+
+    def test__route_answer(self):
+        ulr = create_ulr()
+        forwarded = self.forward(ulr, self.hss1)
+
+        ula = create_ula(forwarded)
+        self.agent.handle_message(self.hss1,
+                                  DiameterMessage.load(ula.dump(), lazy=True)[0])
+
+        answer = self.mme.association.messages[-1]
+        self.assertEqual(answer.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(answer.dump()[16:], ula.dump()[16:])
+        self.assertEqual(len(self.agent.forwarding_table), 0)
+
+        #: An answer to no forwarded request is for the local node.
+        self.agent.handle_message(self.hss1, ula)
+        self.assertIs(self.agent.get_message(timeout=0).message, ula)
+
+    def test__route_request__local(self):
+        for ulr in (create_ulr(destination_realm="bromelia.org"),
+                    create_ulr(destination_host="dra.bromelia.org")):
+            self.agent.handle_message(self.mme, ulr)
+
+            incoming = self.agent.get_message(timeout=0)
+            self.assertIs(incoming.peer, self.mme)
+            self.assertIs(incoming.message, ulr)
+
+    def test__route_request__errors(self):
+        requests = [
+                    (create_ulr(route_record=["dra.bromelia.org"]),
+                     DIAMETER_LOOP_DETECTED),
+                    (create_ulr(destination_realm="ims.bromelia.org"),
+                     DIAMETER_REALM_NOT_SERVED)
+        ]
+
+        self.hss1.is_open = self.hss2.is_open = lambda: False
+        requests.append((create_ulr(), DIAMETER_UNABLE_TO_DELIVER))
+
+        for ulr, result_code in requests:
+            self.agent.handle_message(self.mme, ulr)
+
+            answer = self.mme.association.messages[-1]
+            self.assertTrue(answer.header.is_error())
+            self.assertEqual(answer.header.hop_by_hop, ulr.header.hop_by_hop)
+            self.assertEqual(answer.result_code_avp.data, result_code)
+
+        self.assertEqual(self.agent.num_rejected_requests, 3)
+
+    def test__proxy_handler(self):
+        def proxy_handler(msg):
+            msg.user_name_avp.data = "999999999999999"
+            msg.refresh()
+            return msg
+
+        self.agent.proxy_handler = proxy_handler
+        forwarded = self.forward(create_ulr(), self.hss1)
+
+        self.assertEqual(forwarded.user_name_avp.data, b"999999999999999")
+        self.assertEqual(forwarded.route_record_avp.data, b"mme.bromelia.org")
+
+
+def get_client_config(host_name, realm):
+    return {
+            "MODE": "CLIENT",
+            "APPLICATIONS": [{
+                                "vendor_id": VENDOR_ID_3GPP,
+                                "app_id": DIAMETER_APPLICATION_S6a_S6d
+            }],
+            "TRANSPORT_TYPE": "LOOPBACK",
+            "LOCAL_NODE_HOSTNAME": host_name,
+            "LOCAL_NODE_REALM": realm,
+            "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+            "LOCAL_NODE_PORT": 3868,
+            "PEER_NODE_HOSTNAME": "dra.bromelia.org",
+            "PEER_NODE_REALM": "bromelia.org",
+            "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+            "PEER_NODE_PORT": 3941,
+            "WATCHDOG_TIMEOUT": 30
+    }
+
+
+class TestRelayAgentLoopback(unittest.TestCase):
+    def test__relay(self):
+        server = DiameterServer({
+                "APPLICATIONS": [{
+                                    "vendor_id": VENDOR_ID_3GPP,
+                                    "app_id": DIAMETER_APPLICATION_S6a_S6d
+                }],
+                "TRANSPORT_TYPE": "LOOPBACK",
+                "LOCAL_NODE_HOSTNAME": "dra.bromelia.org",
+                "LOCAL_NODE_REALM": "bromelia.org",
+                "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+                "LOCAL_NODE_PORT": 3941
+        })
+
+        table = RoutingTable()
+        table.add_route("epc.bromelia.org", ["hss.bromelia.org"])
+
+        mme = Diameter(config=get_client_config("mme.bromelia.org",
+                                                "bromelia.org"))
+        hss = Diameter(config=get_client_config("hss.bromelia.org",
+                                                "epc.bromelia.org"))
+
+        with RelayAgent(table, server=server) as agent:
+            try:
+                mme.start()
+                hss.start()
+                self.assertTrue(wait_for(lambda: mme.is_open() and \
+                                                 hss.is_open() and \
+                                                 len(server.peers) == 2))
+
+                ulr = create_ulr()
+                mme.send_message(ulr)
+
+                forwarded = hss.get_message()
+                self.assertEqual(forwarded.session_id_avp.data,
+                                 ulr.session_id_avp.data)
+                self.assertEqual(forwarded.route_record_avp.data,
+                                 b"mme.bromelia.org")
+
+                hss.send_message(create_ula(forwarded))
+
+                ula = mme.get_message()
+                self.assertEqual(ula.header.hop_by_hop, ulr.header.hop_by_hop)
+                self.assertEqual(ula.result_code_avp.data, DIAMETER_SUCCESS)
+                self.assertEqual(agent.num_forwarded_answers, 1)
+
+            finally:
+                mme.close()
+                hss.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
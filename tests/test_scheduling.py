@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_scheduling
+    ~~~~~~~~~~~~~~~~~~~~
+
+    This module contains the send queue priority scheduling unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import queue
+import sys
+import threading
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.lib.etsi_3gpp_gx import CCR
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.messages import DeviceWatchdogAnswer
+from bromelia.scheduling import PriorityMessageQueue
+from bromelia.scheduling import get_drmp_priority
+
+
+def create_ccr(drmp=None):
+    return CCR(session_id="pgw.bromelia.org;1;1",
+               origin_host="pgw.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               cc_request_type=CC_REQUEST_TYPE_INITIAL_REQUEST,
+               cc_request_number=0,
+               drmp=drmp)
+
+
+def create_ulr(drmp=None):
+    return ULR(session_id="mme.bromelia.org;1;1",
+               origin_host="mme.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               user_name="123456789012345",
+               visited_plmn_id=bytes.fromhex("27f450"),
+               ulr_flags=3,
+               drmp=drmp)
+
+
+def create_dwa():
+    return DeviceWatchdogAnswer(origin_host="pcrf.bromelia.org",
+                                origin_realm="bromelia.org")
+
+
+def drain(send_queue):
+    msgs = list()
+    while not send_queue.empty():
+        msgs.append(send_queue.get())
+    return msgs
+
+
+class TestGetDrmpPriority(unittest.TestCase):
+    def test__get_drmp_priority(self):
+        ccr = create_ccr(drmp=DRMP_PRIORITY_3)
+
+        self.assertEqual(get_drmp_priority(ccr), 3)
+        self.assertEqual(get_drmp_priority(DiameterMessage.load(ccr.dump(),
+                                                                lazy=True)[0]),
+                         3)
+
+    def test__get_drmp_priority__default(self):
+        ccr = create_ccr()
+
+        self.assertEqual(get_drmp_priority(ccr), 10)
+        self.assertEqual(get_drmp_priority(ccr, default=7), 7)
+        self.assertEqual(get_drmp_priority(DiameterMessage.load(ccr.dump(),
+                                                                lazy=True)[0],
+                                           default=7),
+                         7)
+
+
+class TestPriorityMessageQueue(unittest.TestCase):
+    def setUp(self):
+        self.send_queue = PriorityMessageQueue()
+
+    def test__base_protocol_first(self):
+        ccrs = [create_ccr(drmp=DRMP_PRIORITY_0) for _ in range(3)]
+        dwa = create_dwa()
+
+        for ccr in ccrs:
+            self.send_queue.put(ccr)
+        self.send_queue.put(dwa)
+
+        self.assertEqual(self.send_queue.qsize(), 4)
+        self.assertEqual(drain(self.send_queue), [dwa] + ccrs)
+
+    def test__drmp_priority(self):
+        low = create_ccr(drmp=DRMP_PRIORITY_15)
+        default = create_ccr()
+        high = create_ccr(drmp=DRMP_PRIORITY_2)
+
+        self.send_queue.put(low)
+        self.send_queue.put(default)
+        self.send_queue.put(high)
+
+        self.assertEqual(drain(self.send_queue), [high, default, low])
+
+    def test__weighted_round_robin(self):
+        ccrs = [create_ccr() for _ in range(4)]
+        ulrs = [create_ulr() for _ in range(4)]
+
+        self.send_queue.set_weight(DIAMETER_APPLICATION_Gx, 2)
+        for msg in ccrs + ulrs:
+            self.send_queue.put(msg)
+
+        self.assertEqual(drain(self.send_queue),
+                         ccrs[:2] + ulrs[:1] + ccrs[2:] + ulrs[1:])
+
+    def test__set_weight__invalid(self):
+        with self.assertRaises(InvalidConfigValue):
+            self.send_queue.set_weight(DIAMETER_APPLICATION_Gx, 0)
+
+    def test__requeue(self):
+        ccrs = [create_ccr() for _ in range(2)]
+        ulr = create_ulr()
+
+        self.send_queue.put(ccrs[0])
+        self.send_queue.put(ccrs[1])
+        self.send_queue.put(ulr)
+
+        msg = self.send_queue.get()
+        self.send_queue.requeue(msg)
+
+        self.assertEqual(drain(self.send_queue), [ccrs[0], ulr, ccrs[1]])
+
+    def test__get__empty(self):
+        with self.assertRaises(queue.Empty):
+            self.send_queue.get_nowait()
+
+        with self.assertRaises(queue.Empty):
+            self.send_queue.get(timeout=0.01)
+
+    def test__get__blocking(self):
+        dwa = create_dwa()
+        threading.Timer(0.01, self.send_queue.put, args=(dwa,)).start()
+
+        self.assertIs(self.send_queue.get(timeout=1), dwa)
+        self.assertTrue(self.send_queue.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_server
+    ~~~~~~~~~~~~~~~~
+
+    This module contains the multi-peer Diameter server unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import socket
+import sys
+import time
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.base import DiameterHeader
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.exceptions import DiameterApplicationError
+from bromelia.exceptions import InvalidConfigKey
+from bromelia.lib.etsi_3gpp_s6a import ULA
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.messages import CapabilitiesExchangeRequest as CER
+from bromelia.server import DiameterServer
+from bromelia.server import ShardedServer
+from bromelia.setup import Diameter
+from bromelia.transport import TcpListener
+from bromelia.transport import connect_loopback
+
+
+def recv_message(sock):
+    stream = b""
+    while len(stream) < DIAMETER_HEADER_LENGTH or \
+                        len(stream) < DiameterHeader.peek(stream).length:
+        data = sock.recv(4096)
+        if not data:
+            return None
+        stream += data
+
+    return DiameterMessage.load(stream)[0]
+
+
+def create_cer(host_name):
+    return CER(origin_host=host_name,
+               origin_realm="bromelia.org",
+               host_ip_address="127.0.0.1",
+               vendor_id=VENDOR_ID_DEFAULT,
+               product_name="client")
+
+
+def create_ula(ulr):
+    return ULA(session_id=ulr.session_id_avp.data.decode("utf-8"),
+               origin_host="hss.bromelia.org",
+               origin_realm="bromelia.org",
+               result_code=DIAMETER_SUCCESS,
+               ula_flags=1)
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def get_config(port, transport_type="LOOPBACK"):
+    return {
+            "APPLICATIONS": [{
+                                "vendor_id": VENDOR_ID_3GPP,
+                                "app_id": DIAMETER_APPLICATION_S6a_S6d
+            }],
+            "TRANSPORT_TYPE": transport_type,
+            "LOCAL_NODE_HOSTNAME": "hss.bromelia.org",
+            "LOCAL_NODE_REALM": "bromelia.org",
+            "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+            "LOCAL_NODE_PORT": port,
+    }
+
+
+class TestTcpListener(unittest.TestCase):
+    def test__accept(self):
+        listener = TcpListener("127.0.0.1", 0)
+        listener.start()
+        try:
+            port = listener.sock.getsockname()[1]
+            self.assertIsNone(listener.accept(timeout=0.01))
+
+            clients = [socket.create_connection(("127.0.0.1", port))
+                                                        for _ in range(3)]
+            accepted = [listener.accept(timeout=1) for _ in range(3)]
+
+            self.assertTrue(all(accepted))
+            for sock in clients + accepted:
+                sock.close()
+
+        finally:
+            listener.close()
+
+    @unittest.skipUnless(socket.has_ipv6, "requires IPv6")
+    def test__accept__ipv6(self):
+        listener = TcpListener("::1", 0)
+        listener.start()
+        try:
+            self.assertEqual(listener.sock.family, socket.AF_INET6)
+
+            port = listener.sock.getsockname()[1]
+            client = socket.create_connection(("::1", port))
+            accepted = listener.accept(timeout=1)
+
+            self.assertIsNotNone(accepted)
+            client.close()
+            accepted.close()
+
+        finally:
+            listener.close()
+
+    @unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "requires SO_REUSEPORT")
+    def test__reuse_port(self):
+        listener = TcpListener("127.0.0.1", 0, reuse_port=True)
+        listener.start()
+        other = TcpListener("127.0.0.1",
+                            listener.sock.getsockname()[1],
+                            reuse_port=True)
+        try:
+            other.start()
+        finally:
+            other.close()
+            listener.close()
+
+
+class TestDiameterServer(unittest.TestCase):
+    def test__many_peers(self):
+        with DiameterServer(get_config(3930)) as server:
+            socks = list()
+            for index in range(100):
+                sock = connect_loopback("127.0.0.1", 3930)
+                sock.sendall(create_cer(f"mme{index}.bromelia.org").dump())
+                socks.append(sock)
+
+            for sock in socks:
+                sock.settimeout(5)
+                cea = recv_message(sock)
+                self.assertEqual(cea.header.command_code,
+                                 CAPABILITIES_EXCHANGE_MESSAGE)
+                self.assertEqual(cea.result_code_avp.data, DIAMETER_SUCCESS)
+
+            self.assertTrue(wait_for(lambda: len(server.peers) == 100))
+            self.assertEqual(server.get_peer("mme42.bromelia.org").host_name,
+                             "mme42.bromelia.org")
+
+            for sock in socks:
+                sock.close()
+
+            self.assertTrue(wait_for(lambda: len(server._peers) == 0))
+
+    def test__allowed_peers(self):
+        with DiameterServer(get_config(3931),
+                            allowed_peers=["mme.bromelia.org"]) as server:
+            sock = connect_loopback("127.0.0.1", 3931)
+            sock.settimeout(5)
+            sock.sendall(create_cer("unknown.bromelia.org").dump())
+
+            self.assertIsNone(recv_message(sock))
+            self.assertEqual(len(server.peers), 0)
+
+            with self.assertRaises(DiameterApplicationError):
+                server.get_peer("unknown.bromelia.org")
+
+    def test__max_peers(self):
+        with DiameterServer(get_config(3932), max_peers=1) as server:
+            first = connect_loopback("127.0.0.1", 3932)
+            self.assertTrue(wait_for(lambda: len(server._peers) == 1))
+
+            second = connect_loopback("127.0.0.1", 3932)
+            second.settimeout(5)
+            self.assertEqual(second.recv(4096), b"")
+
+            first.close()
+
+    def test__send_message__diameter_clients(self):
+        server = DiameterServer(get_config(3933))
+        server.start()
+
+        clients = list()
+        for index in range(3):
+            clients.append(Diameter(config={
+                    "MODE": "CLIENT",
+                    "APPLICATIONS": [{
+                                        "vendor_id": VENDOR_ID_3GPP,
+                                        "app_id": DIAMETER_APPLICATION_S6a_S6d
+                    }],
+                    "TRANSPORT_TYPE": "LOOPBACK",
+                    "LOCAL_NODE_HOSTNAME": f"mme{index}.bromelia.org",
+                    "LOCAL_NODE_REALM": "bromelia.org",
+                    "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+                    "LOCAL_NODE_PORT": 3868,
+                    "PEER_NODE_HOSTNAME": "hss.bromelia.org",
+                    "PEER_NODE_REALM": "bromelia.org",
+                    "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+                    "PEER_NODE_PORT": 3933,
+                    "WATCHDOG_TIMEOUT": 30
+            }))
+
+        try:
+            for client in clients:
+                client.start()
+            self.assertTrue(wait_for(lambda: all([client.is_open()
+                                                  for client in clients])))
+
+            for index, client in enumerate(clients):
+                client.send_message(ULR(session_id=f"mme{index};1;1",
+                                        origin_host=f"mme{index}.bromelia.org",
+                                        origin_realm="bromelia.org",
+                                        destination_realm="bromelia.org",
+                                        user_name="123456789012345",
+                                        visited_plmn_id=bytes.fromhex("27f450"),
+                                        ulr_flags=3))
+
+            for _ in clients:
+                incoming = server.get_message(timeout=5)
+                self.assertIsNotNone(incoming)
+
+                ulr = incoming.message
+                self.assertTrue(ulr.session_id_avp.data.startswith(
+                                        incoming.peer.host_name.encode()[:4]))
+                server.send_message(create_ula(ulr), incoming.peer.host_name)
+
+            for index, client in enumerate(clients):
+                ula = client.get_message()
+                self.assertTrue(ula.session_id_avp.data.startswith(
+                                                    f"mme{index};".encode()))
+
+        finally:
+            server.close()
+            self.assertTrue(wait_for(lambda: all([client.is_closed()
+                                                  for client in clients])))
+
+    def test__invalid_config(self):
+        with self.assertRaises(InvalidConfigKey):
+            DiameterServer({"MODE": "CLIENT"})
+
+        with self.assertRaises(DiameterApplicationError):
+            DiameterServer({"TRANSPORT_TYPE": "SCTP"})
+
+        with self.assertRaises(DiameterApplicationError):
+            DiameterServer(get_config(3934), reuse_port=True)
+
+
+def answer_ulr(msg):
+    return create_ula(msg)
+
+
+@unittest.skipUnless(hasattr(socket, "SO_REUSEPORT"), "requires SO_REUSEPORT")
+class TestShardedServer(unittest.TestCase):
+    def test__sharded_server(self):
+        with ShardedServer(get_config(3935, "TCP"), answer_ulr, processes=2):
+            for index in range(4):
+                for _ in range(50):
+                    try:
+                        sock = socket.create_connection(("127.0.0.1", 3935))
+                        break
+                    except ConnectionRefusedError:
+                        time.sleep(0.1)
+
+                sock.settimeout(5)
+                sock.sendall(create_cer(f"mme{index}.bromelia.org").dump())
+                cea = recv_message(sock)
+                self.assertEqual(cea.result_code_avp.data, DIAMETER_SUCCESS)
+
+                ulr = ULR(session_id=f"mme{index};1;1",
+                          origin_host=f"mme{index}.bromelia.org",
+                          origin_realm="bromelia.org",
+                          destination_realm="bromelia.org",
+                          user_name="123456789012345",
+                          visited_plmn_id=bytes.fromhex("27f450"),
+                          ulr_flags=3)
+                sock.sendall(ulr.dump())
+
+                ula = recv_message(sock)
+                self.assertEqual(ula.result_code_avp.data, DIAMETER_SUCCESS)
+                sock.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
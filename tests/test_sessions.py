@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_sessions
+    ~~~~~~~~~~~~~~~~~~
+
+    This module contains the session state store unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import multiprocessing
+import os
+import sys
+import threading
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.avps import AuthGracePeriodAVP
+from bromelia.avps import AuthorizationLifetimeAVP
+from bromelia.avps import SessionIdAVP
+from bromelia.avps import SessionTimeoutAVP
+from bromelia.base import DiameterAnswer
+from bromelia.base import DiameterMessage
+from bromelia.exceptions import DiameterApplicationError
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.sessions import SessionStore
+from bromelia.sessions import SharedMemorySessionStore
+from bromelia.sessions import get_session_lifetime
+from bromelia.sessions import shared_memory
+from bromelia.timers import TimerWheel
+from tests.helpers import Clock
+
+
+def create_answer(*avps):
+    return DiameterAnswer(avps=[SessionIdAVP("pcrf.bromelia.org;1;1")] + \
+                               list(avps))
+
+
+class TestGetSessionLifetime(unittest.TestCase):
+    def test__no_lifetime(self):
+        self.assertIsNone(get_session_lifetime(create_answer()))
+        self.assertIsNone(get_session_lifetime(
+                                    create_answer(SessionTimeoutAVP(0))))
+        self.assertIsNone(get_session_lifetime(
+                            create_answer(AuthorizationLifetimeAVP(0xFFFFFFFF))))
+
+    def test__session_timeout(self):
+        self.assertEqual(get_session_lifetime(
+                                    create_answer(SessionTimeoutAVP(3600))),
+                         3600)
+
+    def test__authorization_lifetime(self):
+        answer = create_answer(AuthorizationLifetimeAVP(600),
+                               AuthGracePeriodAVP(60))
+        self.assertEqual(get_session_lifetime(answer), 660)
+
+        #: The shortest lifetime is used.
+        answer.append(SessionTimeoutAVP(300))
+        self.assertEqual(get_session_lifetime(answer), 300)
+
+    def test__lazy_message(self):
+        answer = create_answer(SessionTimeoutAVP(3600))
+        msg = DiameterMessage.load(answer.dump(), lazy=True)[0]
+        self.assertEqual(get_session_lifetime(msg), 3600)
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.timers = TimerWheel(tick=1, clock=self.clock)
+        self.sessions = SessionStore(timers=self.timers)
+
+    def test__set_and_get(self):
+        self.sessions.set("pgw.bromelia.org;1;1", {"cc_request_number": 0})
+
+        #: Session-Id is looked up the same way as str or bytes.
+        self.assertEqual(self.sessions.get(b"pgw.bromelia.org;1;1"),
+                         {"cc_request_number": 0})
+        self.assertIn("pgw.bromelia.org;1;1", self.sessions)
+        self.assertIsNone(self.sessions.get("pgw.bromelia.org;1;2"))
+        self.assertEqual(len(self.sessions), 1)
+
+    def test__dict_interface(self):
+        self.sessions["pgw.bromelia.org;1;1"] = 1
+        self.assertEqual(self.sessions["pgw.bromelia.org;1;1"], 1)
+
+        del self.sessions["pgw.bromelia.org;1;1"]
+        with self.assertRaises(KeyError):
+            self.sessions["pgw.bromelia.org;1;1"]
+        with self.assertRaises(KeyError):
+            del self.sessions["pgw.bromelia.org;1;1"]
+
+    def test__pop(self):
+        self.sessions.set("pgw.bromelia.org;1;1", 1, lifetime=10)
+
+        self.assertEqual(self.sessions.pop("pgw.bromelia.org;1;1"), 1)
+        self.assertIsNone(self.sessions.pop("pgw.bromelia.org;1;1"))
+        self.assertEqual(len(self.timers), 0)
+
+    def test__lifetime(self):
+        expired = list()
+        self.sessions.on_expire = lambda key, state: expired.append((key, state))
+
+        self.sessions.set("pgw.bromelia.org;1;1", 1, lifetime=10)
+        self.sessions.set("pgw.bromelia.org;1;2", 2)
+
+        self.clock.now = 9
+        self.timers.advance()
+        self.assertEqual(len(self.sessions), 2)
+
+        self.clock.now = 11
+        self.timers.advance()
+        self.assertEqual(len(self.sessions), 1)
+        self.assertEqual(expired, [(b"pgw.bromelia.org;1;1", 1)])
+        self.assertEqual(self.sessions.get_stats().expired, 1)
+
+    def test__lifetime__set_again(self):
+        self.sessions.set("pgw.bromelia.org;1;1", 1, lifetime=10)
+        self.sessions.set("pgw.bromelia.org;1;1", 2, lifetime=20)
+        self.assertEqual(len(self.timers), 1)
+
+        self.clock.now = 11
+        self.timers.advance()
+        self.assertEqual(self.sessions.get("pgw.bromelia.org;1;1"), 2)
+
+    def test__default_lifetime(self):
+        sessions = SessionStore(default_lifetime=10, timers=self.timers)
+        sessions.set("pgw.bromelia.org;1;1", 1)
+
+        self.clock.now = 11
+        self.timers.advance()
+        self.assertEqual(len(sessions), 0)
+
+    def test__touch(self):
+        self.sessions.set("pgw.bromelia.org;1;1", 1, lifetime=10)
+
+        self.clock.now = 5
+        self.timers.advance()
+        self.assertTrue(self.sessions.touch("pgw.bromelia.org;1;1", 10))
+        self.assertFalse(self.sessions.touch("pgw.bromelia.org;1;2", 10))
+
+        self.clock.now = 11
+        self.timers.advance()
+        self.assertIn("pgw.bromelia.org;1;1", self.sessions)
+
+        self.clock.now = 16
+        self.timers.advance()
+        self.assertNotIn("pgw.bromelia.org;1;1", self.sessions)
+
+    def test__max_size(self):
+        sessions = SessionStore(max_size=3, num_shards=1, timers=self.timers)
+
+        for index in range(3):
+            sessions.set(f"pgw.bromelia.org;1;{index}", index, lifetime=10)
+
+        #: Sessions used are the last ones to be evicted.
+        sessions.get("pgw.bromelia.org;1;0")
+        sessions.set("pgw.bromelia.org;1;3", 3)
+
+        self.assertEqual(len(sessions), 3)
+        self.assertNotIn("pgw.bromelia.org;1;1", sessions)
+        self.assertIn("pgw.bromelia.org;1;0", sessions)
+        self.assertEqual(sessions.get_stats().evictions, 1)
+        self.assertEqual(len(self.timers), 2)
+
+    def test__max_memory(self):
+        sessions = SessionStore(max_memory=10000,
+                                num_shards=1,
+                                sizeof=lambda state: len(state),
+                                timers=self.timers)
+
+        for index in range(10):
+            sessions.set(f"pgw.bromelia.org;1;{index}", b"x" * 2000)
+
+        self.assertLessEqual(sessions.get_memory_usage(), 10000)
+        self.assertEqual(len(sessions), 4)
+
+    def test__shards(self):
+        for index in range(1000):
+            self.sessions.set(f"pgw.bromelia.org;1;{index}", index)
+
+        self.assertEqual(len(self.sessions), 1000)
+        self.assertTrue(all(shard.entries for shard in self.sessions.shards))
+
+        self.sessions.clear()
+        self.assertEqual(len(self.sessions), 0)
+
+    def test__threads(self):
+        def worker(thread_id):
+            for index in range(1000):
+                session_id = f"pgw.bromelia.org;{thread_id};{index}"
+                self.sessions.set(session_id, index)
+                assert self.sessions.get(session_id) == index
+
+        threads = [threading.Thread(target=worker, args=(thread_id,))
+                                                for thread_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.sessions), 4000)
+
+    def test__invalid_num_shards(self):
+        with self.assertRaises(InvalidConfigValue):
+            SessionStore(num_shards=0)
+
+
+def set_session_in_other_process(sessions):
+    sessions.set("pgw.bromelia.org;1;1", {"cc_request_number": 1})
+
+
+@unittest.skipIf(shared_memory is None, "Python 3.8 or later is needed")
+class TestSharedMemorySessionStore(unittest.TestCase):
+    def setUp(self):
+        self.sessions = SharedMemorySessionStore(max_size=64,
+                                                 num_shards=4,
+                                                 max_key_size=32,
+                                                 max_value_size=64)
+
+    def tearDown(self):
+        self.sessions.close()
+
+    def test__set_and_get(self):
+        self.sessions.set("pgw.bromelia.org;1;1", {"cc_request_number": 0})
+
+        self.assertEqual(self.sessions.get(b"pgw.bromelia.org;1;1"),
+                         {"cc_request_number": 0})
+        self.assertIn("pgw.bromelia.org;1;1", self.sessions)
+        self.assertIsNone(self.sessions.get("pgw.bromelia.org;1;2"))
+        self.assertEqual(len(self.sessions), 1)
+
+        self.sessions.set("pgw.bromelia.org;1;1", {"cc_request_number": 1})
+        self.assertEqual(self.sessions["pgw.bromelia.org;1;1"],
+                         {"cc_request_number": 1})
+        self.assertEqual(len(self.sessions), 1)
+
+    def test__pop(self):
+        self.sessions.set("pgw.bromelia.org;1;1", 1)
+
+        self.assertEqual(self.sessions.pop("pgw.bromelia.org;1;1"), 1)
+        self.assertIsNone(self.sessions.pop("pgw.bromelia.org;1;1"))
+        self.assertEqual(len(self.sessions), 0)
+
+        with self.assertRaises(KeyError):
+            del self.sessions["pgw.bromelia.org;1;1"]
+
+    def test__lifetime(self):
+        self.sessions.set("pgw.bromelia.org;1;1", 1, lifetime=-1)
+        self.sessions.set("pgw.bromelia.org;1;2", 2, lifetime=3600)
+        self.sessions.set("pgw.bromelia.org;1;3", 3, lifetime=-1)
+
+        self.assertNotIn("pgw.bromelia.org;1;1", self.sessions)
+        self.assertIn("pgw.bromelia.org;1;2", self.sessions)
+
+        self.assertEqual(self.sessions.purge(), 1)
+        self.assertEqual(len(self.sessions), 1)
+
+        self.assertTrue(self.sessions.touch("pgw.bromelia.org;1;2", -1))
+        self.assertNotIn("pgw.bromelia.org;1;2", self.sessions)
+
+    def test__lru_eviction(self):
+        for index in range(200):
+            self.sessions.set(f"pgw.bromelia.org;1;{index}", index)
+
+        self.assertEqual(len(self.sessions), 64)
+        self.assertEqual(self.sessions.get_stats().evictions, 136)
+        self.assertEqual(self.sessions.get("pgw.bromelia.org;1;199"), 199)
+
+    def test__limits(self):
+        with self.assertRaises(DiameterApplicationError):
+            self.sessions.set("pgw.bromelia.org;1;1" * 2, 1)
+
+        with self.assertRaises(DiameterApplicationError):
+            self.sessions.set("pgw.bromelia.org;1;1", b"x" * 64)
+
+    def test__clear(self):
+        for index in range(10):
+            self.sessions.set(f"pgw.bromelia.org;1;{index}", index)
+
+        self.sessions.clear()
+        self.assertEqual(len(self.sessions), 0)
+        self.assertNotIn("pgw.bromelia.org;1;1", self.sessions)
+
+    def test__processes(self):
+        process = multiprocessing.Process(target=set_session_in_other_process,
+                                          args=(self.sessions,))
+        process.start()
+        process.join()
+
+        self.assertEqual(self.sessions.get("pgw.bromelia.org;1;1"),
+                         {"cc_request_number": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,6 +9,7 @@
     :license: MIT, see LICENSE for more details.
 """
 
+import logging
 import unittest
 import os
 import sys
@@ -18,6 +19,10 @@ base_dir = os.path.dirname(testing_dir)
 
 sys.path.insert(0, base_dir)
 
+from bromelia import bromelia
+from bromelia import setup
+from bromelia import statemachine
+from bromelia.base import DiameterMessage
 from bromelia.constants import *
 from bromelia.statemachine import PeerStateMachine
 from bromelia.statemachine import Closed
@@ -28,6 +33,7 @@ from bromelia.statemachine import WaitReturns
 from bromelia.statemachine import WaitConnAckElect
 from bromelia.statemachine import Closing
 from bromelia.setup import DiameterAssociation
+from tests.helpers import create_ccr
 
 
 @unittest.SkipTest
@@ -53,5 +59,27 @@ class TeststatemachineStates(unittest.TestCase):
         self.closed.run()
 
 
+
+class TestMakeLogging(unittest.TestCase):
+    def get_lazy_message(self):
+        return DiameterMessage.load(create_ccr().dump(), lazy=True)[0]
+
+    def test__make_logging(self):
+        for module, logger in ((statemachine, statemachine.open_logger),
+                               (setup, setup.diameter_conn_logger),
+                               (bromelia, bromelia.worker_logger)):
+            with self.subTest(logger=logger.name):
+                level = logger.level
+                self.addCleanup(logger.setLevel, level)
+
+                msg = self.get_lazy_message()
+                logger.setLevel(logging.INFO)
+                module.make_logging(msg)
+                self.assertIn("_pending_stream", msg.__dict__)
+
+                with self.assertLogs(logger, logging.DEBUG):
+                    module.make_logging(msg)
+                self.assertNotIn("_pending_stream", msg.__dict__)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
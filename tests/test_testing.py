@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_testing
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the loopback transport and stand-in peer unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import time
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.base import DiameterHeader
+from bromelia.base import DiameterMessage
+from bromelia.constants import *
+from bromelia.lib.etsi_3gpp_s6a import ULA
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.messages import CapabilitiesExchangeRequest as CER
+from bromelia.setup import Diameter
+from bromelia.testing import CannedAnswer
+from bromelia.testing import create_hss
+from bromelia.transport import connect_loopback
+from bromelia.transport import listen_loopback
+
+
+def recv_message(sock):
+    stream = b""
+    while len(stream) < DIAMETER_HEADER_LENGTH or \
+                        len(stream) < DiameterHeader.peek(stream).length:
+        stream += sock.recv(4096)
+
+    return DiameterMessage.load(stream)[0]
+
+
+def create_ulr(session_id="mme.bromelia.org;1;1"):
+    return ULR(session_id=session_id,
+               origin_host="mme.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               user_name="123456789012345",
+               visited_plmn_id=bytes.fromhex("27f450"),
+               ulr_flags=3)
+
+
+class TestLoopbackTransport(unittest.TestCase):
+    def test__listen_loopback__connect_and_accept(self):
+        listener = listen_loopback("127.0.0.1", 3901)
+        try:
+            local = connect_loopback("127.0.0.1", 3901)
+            remote = listener.accept(timeout=1)
+
+            local.sendall(b"bromelia")
+            self.assertEqual(remote.recv(8), b"bromelia")
+
+            local.close()
+            remote.close()
+
+        finally:
+            listener.close()
+
+    def test__listen_loopback__address_in_use(self):
+        listener = listen_loopback("127.0.0.1", 3902)
+        try:
+            with self.assertRaises(ConnectionError):
+                listen_loopback("127.0.0.1", 3902)
+        finally:
+            listener.close()
+
+    def test__connect_loopback__no_listener(self):
+        with self.assertRaises(ConnectionRefusedError):
+            connect_loopback("127.0.0.1", 3903)
+
+    def test__listener__accept_timeout(self):
+        listener = listen_loopback("127.0.0.1", 3904)
+        try:
+            self.assertIsNone(listener.accept(timeout=0.01))
+        finally:
+            listener.close()
+
+
+class TestCannedAnswer(unittest.TestCase):
+    def test__render__echoes_ids_and_session_id(self):
+        answer = CannedAnswer(ULA(session_id="hss.bromelia.org;0;0",
+                                  ula_flags=1))
+        ulr = create_ulr(session_id="mme.bromelia.org;10;10")
+        stream = answer.render(ulr.dump())
+
+        ula = DiameterMessage.load(stream)[0]
+        self.assertEqual(len(stream), DiameterHeader.peek(stream).length)
+        self.assertEqual(ula.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(ula.header.end_to_end, ulr.header.end_to_end)
+        self.assertEqual(ula.session_id_avp.data, ulr.session_id_avp.data)
+        self.assertEqual(ula.ula_flags_avp.data, ULA(ula_flags=1).ula_flags_avp.data)
+
+
+class TestStandInPeer(unittest.TestCase):
+    def setUp(self):
+        self.hss = create_hss(port=3905)
+        self.hss.start()
+        self.sock = connect_loopback("127.0.0.1", 3905)
+        self.sock.settimeout(5)
+
+    def tearDown(self):
+        self.sock.close()
+        self.hss.close()
+
+    def test__capabilities_exchange(self):
+        cer = CER(origin_host="mme.bromelia.org",
+                  origin_realm="bromelia.org",
+                  host_ip_address="127.0.0.1")
+        self.sock.sendall(cer.dump())
+        cea = recv_message(self.sock)
+
+        self.assertEqual(cea.header.command_code, CAPABILITIES_EXCHANGE_MESSAGE)
+        self.assertEqual(cea.header.hop_by_hop, cer.header.hop_by_hop)
+        self.assertEqual(cea.origin_host_avp.data, b"hss.bromelia.org")
+        self.assertEqual(self.hss.received[(0, 257)], 1)
+
+    def test__route__canned_answer(self):
+        ulr = create_ulr()
+        self.sock.sendall(ulr.dump())
+        ula = recv_message(self.sock)
+
+        self.assertEqual(ula.header.command_code, UPDATE_LOCATION_MESSAGE)
+        self.assertEqual(ula.header.end_to_end, ulr.header.end_to_end)
+        self.assertEqual(ula.session_id_avp.data, ulr.session_id_avp.data)
+        self.assertEqual(ula.result_code_avp.data,
+                         DIAMETER_SUCCESS)
+
+    def test__route__callable(self):
+        def answer(request):
+            return ULA(ula_flags=request.ulr_flags_avp.data[-1])
+
+        self.hss.route(DIAMETER_APPLICATION_S6a_S6d,
+                       UPDATE_LOCATION_MESSAGE,
+                       answer)
+
+        ulr = create_ulr()
+        self.sock.sendall(ulr.dump())
+        ula = recv_message(self.sock)
+
+        self.assertEqual(ula.header.hop_by_hop, ulr.header.hop_by_hop)
+        self.assertEqual(ula.ula_flags_avp.data, ULA(ula_flags=3).ula_flags_avp.data)
+
+    def test__route__latency(self):
+        self.hss.route(DIAMETER_APPLICATION_S6a_S6d,
+                       UPDATE_LOCATION_MESSAGE,
+                       ULA(ula_flags=1),
+                       latency=0.2)
+
+        start = time.monotonic()
+        self.sock.sendall(create_ulr().dump())
+        recv_message(self.sock)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+    def test__unsupported_command(self):
+        self.hss.routes.clear()
+
+        ulr = create_ulr()
+        self.sock.sendall(ulr.dump())
+        answer = recv_message(self.sock)
+
+        self.assertTrue(answer.header.is_error())
+        self.assertEqual(answer.result_code_avp.data,
+                         DIAMETER_COMMAND_UNSUPPORTED)
+        self.assertEqual(self.hss.received[(16777251, 316)], 1)
+
+    def test__invalid_message_length(self):
+        stream = bytearray(create_ulr().dump())
+        stream[1:4] = (12).to_bytes(3, byteorder="big")
+        self.sock.sendall(bytes(stream))
+
+        self.assertEqual(self.sock.recv(4096), b"")
+
+
+class TestDiameterOverLoopback(unittest.TestCase):
+    def test__send_message__stand_in_hss(self):
+        config = {
+                "MODE": "CLIENT",
+                "APPLICATIONS": [{
+                                    "vendor_id": VENDOR_ID_3GPP,
+                                    "app_id": DIAMETER_APPLICATION_S6a_S6d
+                }],
+                "TRANSPORT_TYPE": "LOOPBACK",
+                "LOCAL_NODE_HOSTNAME": "mme.bromelia.org",
+                "LOCAL_NODE_REALM": "bromelia.org",
+                "LOCAL_NODE_IP_ADDRESS": "127.0.0.1",
+                "LOCAL_NODE_PORT": 3868,
+                "PEER_NODE_HOSTNAME": "hss.bromelia.org",
+                "PEER_NODE_REALM": "bromelia.org",
+                "PEER_NODE_IP_ADDRESS": "127.0.0.1",
+                "PEER_NODE_PORT": 3906,
+                "WATCHDOG_TIMEOUT": 30
+        }
+
+        with create_hss(port=3906) as hss:
+            app = Diameter(config=config)
+            with app.context():
+                self.assertTrue(app.is_open())
+
+                ulr = create_ulr()
+                ula = app.send_message(ulr, avoid=False)
+
+            self.assertEqual(ula.session_id_avp.data, ulr.session_id_avp.data)
+            self.assertEqual(ula.result_code_avp.data, DIAMETER_SUCCESS)
+            self.assertEqual(hss.received[(16777251, 316)], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_timers
+    ~~~~~~~~~~~~~~~~
+
+    This module contains the timing wheel and Diameter timers unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia._internal_utils import _convert_config_to_connection_obj
+from bromelia.config import CLOSED
+from bromelia.config import OPEN
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.messages import DeviceWatchdogRequest
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.proxy import DiameterBaseProxy
+from bromelia.setup import DiameterAssociation
+from bromelia.statemachine import PeerStateMachine
+from bromelia.timers import TimerWheel
+from bromelia.timers import get_timer_wheel
+from bromelia.timers import get_watchdog_interval
+from tests.helpers import Clock
+from tests.helpers import MockTransport
+from tests.helpers import get_config
+
+
+class TestTimerWheel(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.wheel = TimerWheel(tick=0.01, wheel_size=8, levels=3,
+                                clock=self.clock)
+        self.fired = list()
+
+    def advance(self, seconds, step=0.01):
+        target = self.clock.now + seconds
+        while self.clock.now < target:
+            self.clock.now = min(self.clock.now + step, target)
+            self.wheel.advance()
+
+    def test__schedule(self):
+        self.wheel.schedule(0.05, self.fired.append, "first")
+        self.wheel.schedule(0.02, self.fired.append, "second")
+
+        self.advance(0.019)
+        self.assertEqual(self.fired, [])
+
+        self.advance(0.05)
+        self.assertEqual(self.fired, ["second", "first"])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test__schedule__cascade(self):
+        #: Beyond the first wheel (0.08s) and the last one (5.12s).
+        delays = [0.07, 0.5, 3.3, 4.99, 12.5, 30.01]
+        for delay in delays:
+            self.wheel.schedule(delay,
+                                lambda delay=delay: self.fired.append((delay, self.clock.now)))
+
+        self.advance(31, step=0.003)
+
+        self.assertEqual([delay for delay, _ in self.fired], delays)
+        for delay, now in self.fired:
+            self.assertGreaterEqual(now, delay - 1e-9)
+            self.assertLess(now, delay + 0.02)
+
+    def test__cancel(self):
+        timer = self.wheel.schedule(1, self.fired.append, "cancelled")
+        self.wheel.schedule(1, self.fired.append, "fired")
+
+        self.assertTrue(timer.cancel())
+        self.assertFalse(timer.cancel())
+        self.assertFalse(timer.is_active())
+        self.assertEqual(len(self.wheel), 1)
+
+        self.advance(2, step=0.1)
+        self.assertEqual(self.fired, ["fired"])
+
+    def test__advance__many_timers(self):
+        timers = [self.wheel.schedule(index / 1000, self.fired.append, index)
+                                                    for index in range(10000)]
+        for timer in timers[::2]:
+            timer.cancel()
+
+        self.advance(11, step=0.05)
+
+        #: Timers expiring in the same tick have no given order.
+        self.assertEqual(sorted(self.fired), list(range(1, 10000, 2)))
+        self.assertEqual([index // 10 for index in self.fired],
+                         [index // 10 for index in range(1, 10000, 2)])
+
+    def test__callback__exception(self):
+        self.wheel.schedule(0.01, lambda: 1 / 0)
+        self.wheel.schedule(0.01, self.fired.append, "fired")
+
+        with self.assertLogs("TimerWheel", level="ERROR"):
+            self.advance(0.02)
+
+        self.assertEqual(self.fired, ["fired"])
+
+    def test__start(self):
+        wheel = TimerWheel(tick=0.001)
+        fired = threading.Event()
+
+        wheel.start()
+        try:
+            wheel.schedule(0.01, fired.set)
+            self.assertTrue(fired.wait(timeout=1))
+        finally:
+            wheel.stop()
+
+    def test__get_timer_wheel(self):
+        self.assertIs(get_timer_wheel(), get_timer_wheel())
+
+    def test__get_watchdog_interval(self):
+        intervals = [get_watchdog_interval(30) for _ in range(100)]
+
+        self.assertTrue(all([28 <= interval <= 32 for interval in intervals]))
+        self.assertGreater(len(set(intervals)), 1)
+        self.assertGreaterEqual(get_watchdog_interval(1), 4)
+
+
+class TestDiameterAssociationTimers(unittest.TestCase):
+    def setUp(self):
+        connection = _convert_config_to_connection_obj(get_config(TX_TIMEOUT=4))
+        base = DiameterBaseProxy(connection).get_default_messages()
+
+        self.clock = Clock()
+        self.association = DiameterAssociation(connection, base)
+        self.association.timers = TimerWheel(clock=self.clock)
+        self.association.transport = MockTransport()
+
+    def advance(self, seconds):
+        self.clock.now += seconds
+        self.association.timers.advance()
+
+    def test__watchdog(self):
+        association = self.association
+
+        association.tracking_events()
+        self.advance(25)
+        association.tracking_events()
+        self.assertTrue(association._send_messages.empty())
+
+        #: A message received meanwhile resets Tw.
+        association.last_recv_time = self.clock.now
+        self.advance(10)
+        association.tracking_events()
+        self.assertTrue(association._send_messages.empty())
+
+        self.advance(25)
+        association.tracking_events()
+        self.assertIsInstance(association._send_messages.get_nowait(),
+                              DeviceWatchdogRequest)
+        self.assertTrue(association.watchdog_pending)
+
+        #: No answer to the DWR.
+        self.advance(33)
+        association.tracking_events()
+        self.assertTrue(association.watchdog_failed)
+
+    def test__watchdog_failure(self):
+        closed = list()
+        association = self.association
+        association.close_callback = lambda: closed.append(True)
+
+        state_machine = PeerStateMachine(association)
+        state_machine.current_state = state_machine.states[OPEN]
+
+        association.tracking_events()
+        association.watchdog_failed = True
+
+        #: A message waiting to be sent does not keep the Open state.
+        association.put_message_into_send_queue(DeviceWatchdogRequest())
+
+        state = state_machine.current_state
+        state.run()
+        state_machine.current_state = state_machine.get_next_state(
+                                                            state.next_state)
+
+        self.assertEqual(state_machine.get_current_state(), CLOSED)
+        self.assertFalse(state_machine.is_running)
+        self.assertIsNone(association.transport)
+        self.assertEqual(closed, [True])
+
+    def test__watchdog_reset_on_open(self):
+        association = self.association
+        state_machine = PeerStateMachine(association)
+
+        association.tracking_events()
+        association.watchdog_pending = True
+        association.watchdog_failed = True
+
+        state_machine.states[OPEN].set_open_state(early_stage=True)
+
+        self.assertIsNone(association.watchdog_timer)
+        self.assertFalse(association.watchdog_pending)
+        self.assertFalse(association.watchdog_failed)
+
+    def test__request_timer(self):
+        timed_out = list()
+        self.association.request_timeout_callback = timed_out.append
+
+        ulrs = [ULR(session_id=f"mme;1;{index}",
+                    origin_host="mme.bromelia.org",
+                    origin_realm="bromelia.org",
+                    destination_realm="bromelia.org",
+                    user_name="123456789012345",
+                    visited_plmn_id=bytes.fromhex("27f450"),
+                    ulr_flags=3) for index in range(2)]
+
+        for ulr in ulrs:
+            key = ulr.header.hop_by_hop.hex()
+            self.association.pending_requests[key] = ulr
+            self.association.start_request_timer(key)
+
+        answered = self.association.pop_pending_request(ulrs[0].header.hop_by_hop.hex())
+        self.assertIs(answered, ulrs[0])
+
+        self.advance(5)
+
+        self.assertEqual(timed_out, [ulrs[1]])
+        self.assertEqual(self.association.num_request_timeouts, 1)
+        self.assertEqual(self.association.pending_requests, {})
+
+    def test__dpa_timer(self):
+        self.association.start_dpa_timer()
+        self.advance(5)
+        self.assertFalse(self.association.dpa_timed_out)
+
+        self.advance(6)
+        self.assertTrue(self.association.dpa_timed_out)
+
+
+class TestTimerConfig(unittest.TestCase):
+    def test__timeouts(self):
+        connection = _convert_config_to_connection_obj(get_config())
+        self.assertIsNone(connection.tx_timeout)
+        self.assertIsNone(connection.tc_timeout)
+
+        connection = _convert_config_to_connection_obj(get_config(TX_TIMEOUT=2.5,
+                                                                  TC_TIMEOUT=30))
+        self.assertEqual(connection.tx_timeout, 2.5)
+        self.assertEqual(connection.tc_timeout, 30)
+
+    def test__timeouts__invalid(self):
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(get_config(TX_TIMEOUT=0))
+
+        with self.assertRaises(InvalidConfigValue):
+            _convert_config_to_connection_obj(get_config(TC_TIMEOUT="30"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_tracing
+    ~~~~~~~~~~~~~~~~~
+
+    This module contains the stage timing unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import os
+import pickle
+import sys
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia._internal_utils import _convert_config_to_connection_obj
+from bromelia.exceptions import InvalidConfigValue
+from bromelia.lib.etsi_3gpp_gx import CCA
+from bromelia.metrics import MetricsRegistry
+from bromelia.proxy import DiameterBaseProxy
+from bromelia.setup import DiameterAssociation
+from bromelia.tracing import STAGE_DECODING
+from bromelia.tracing import STAGE_ENCODING
+from bromelia.tracing import STAGE_FRAMING
+from bromelia.tracing import STAGE_READ
+from bromelia.tracing import STAGE_ROUTE
+from bromelia.tracing import STAGE_SEND_QUEUE
+from bromelia.tracing import MessageTrace
+from bromelia.tracing import Span
+from bromelia.tracing import Tracer
+from bromelia.tracing import get_trace
+from bromelia.tracing import get_tracer
+from bromelia.tracing import set_trace
+from tests.helpers import Clock
+from tests.helpers import MockTransport
+from tests.helpers import create_ccr
+from tests.helpers import get_config
+
+
+class TestMessageTrace(unittest.TestCase):
+    def test__spans(self):
+        trace = MessageTrace(1.0)
+        trace.stamps.append((STAGE_READ, 1.5))
+        trace.stamps.append((STAGE_FRAMING, 3.0))
+
+        self.assertEqual(trace.get_spans(), [Span(STAGE_READ, 1.0, 1.5),
+                                             Span(STAGE_FRAMING, 1.5, 3.0)])
+        self.assertEqual(trace.get_durations(), {STAGE_READ: 0.5,
+                                                 STAGE_FRAMING: 1.5})
+
+    def test__pickled_with_message(self):
+        ccr = create_ccr()
+        trace = MessageTrace(1.0)
+        trace.stamps.append((STAGE_READ, 1.5))
+        set_trace(ccr, trace)
+
+        _ccr = pickle.loads(pickle.dumps(ccr))
+        self.assertEqual(get_trace(_ccr).get_spans(), trace.get_spans())
+        self.assertEqual(_ccr.dump(), ccr.dump())
+
+    def test__no_trace(self):
+        self.assertIsNone(get_trace(create_ccr()))
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.registry = MetricsRegistry(buckets=(1,), stage_buckets=(1, 2))
+        self.tracer = Tracer(sample_rate=3,
+                             registry=self.registry,
+                             clock=self.clock)
+
+    def test__sample_rate(self):
+        traces = [self.tracer.start_trace() for _ in range(9)]
+
+        self.assertEqual(sum(trace is not None for trace in traces), 3)
+        self.assertIsNotNone(traces[2])
+
+    def test__invalid_sample_rate(self):
+        with self.assertRaises(InvalidConfigValue):
+            Tracer(sample_rate=0)
+
+        with self.assertRaises(InvalidConfigValue):
+            self.tracer.enable(sample_rate=1.5)
+
+    def test__enable(self):
+        self.assertFalse(self.tracer.enabled)
+
+        self.tracer.enable(sample_rate=1)
+        self.assertTrue(self.tracer.enabled)
+        self.assertIsNotNone(self.tracer.start_trace())
+
+        self.tracer.disable()
+        self.assertFalse(self.tracer.enabled)
+
+    def test__stamp(self):
+        self.tracer.enable(sample_rate=1)
+        trace = self.tracer.start_trace()
+
+        self.clock.now = 0.5
+        self.tracer.stamp(trace, STAGE_READ)
+        self.tracer.stamp(trace, STAGE_FRAMING, 2.0)
+
+        self.assertEqual(trace.get_durations(), {STAGE_READ: 0.5,
+                                                 STAGE_FRAMING: 1.5})
+
+        stages = self.registry.collect().stages
+        self.assertEqual(stages[STAGE_READ], [1, 0, 0, 0.5])
+        self.assertEqual(stages[STAGE_FRAMING], [0, 1, 0, 1.5])
+
+        text = self.registry.to_prometheus()
+        self.assertIn("bromelia_stage_duration_seconds_bucket"\
+                      "{stage=\"framing\",le=\"2\"} 1\n", text)
+
+    def test__hooks(self):
+        finished = list()
+
+        def hook(trace, msg):
+            finished.append((trace, msg))
+
+        def failing_hook(trace, msg):
+            raise ValueError()
+
+        self.tracer.add_hook(failing_hook)
+        self.tracer.add_hook(hook)
+
+        trace = MessageTrace(0.0)
+        ccr = create_ccr()
+        with self.assertLogs("Tracing", level="ERROR"):
+            self.tracer.finish(trace, ccr)
+
+        self.assertEqual(finished, [(trace, ccr)])
+
+        self.tracer.remove_hook(hook)
+        self.tracer.remove_hook(failing_hook)
+        self.tracer.finish(trace, ccr)
+        self.assertEqual(len(finished), 1)
+
+    def test__get_tracer(self):
+        self.assertIs(get_tracer(), get_tracer())
+        self.assertFalse(get_tracer().enabled)
+
+
+class TestDiameterAssociationTracing(unittest.TestCase):
+    def setUp(self):
+        connection = _convert_config_to_connection_obj(get_config())
+        base = DiameterBaseProxy(connection).get_default_messages()
+
+        self.association = DiameterAssociation(connection, base)
+        self.association.transport = MockTransport()
+
+        self.registry = MetricsRegistry()
+        self.finished = list()
+
+        self.tracer = get_tracer()
+        self.tracer.registry = self.registry
+        self.tracer.add_hook(self.hook)
+        self.tracer.enable(sample_rate=1)
+
+    def tearDown(self):
+        self.tracer.disable()
+        self.tracer.remove_hook(self.hook)
+        self.tracer.registry = None
+
+    def hook(self, trace, msg):
+        self.finished.append((trace, msg))
+
+    def test__load_traced_messages(self):
+        now = self.tracer.clock()
+        self.association.transport._recv_data_times = (now - 0.002,
+                                                       now - 0.001)
+
+        stream = create_ccr().dump()
+        msgs = self.association._load_traced_messages(stream * 2)
+
+        self.assertEqual(len(msgs), 2)
+        self.assertIsNone(self.association.transport._recv_data_times)
+
+        for msg in msgs:
+            trace = get_trace(msg)
+            self.assertEqual([stage for stage, _ in trace.stamps],
+                             [STAGE_READ, STAGE_FRAMING, STAGE_DECODING])
+            self.assertAlmostEqual(trace.start, now - 0.002)
+
+        self.assertEqual(msgs[0].dump(), stream)
+        self.assertEqual(sum(self.registry.collect().stages[STAGE_READ][:-1]),
+                         2)
+
+    def test__load_traced_messages__partial_stream(self):
+        stream = create_ccr().dump()
+
+        self.assertEqual(self.association._load_traced_messages(stream[:30]),
+                         [])
+        msgs = self.association._load_traced_messages(stream[30:])
+
+        self.assertEqual([stage for stage, _ in get_trace(msgs[0]).stamps],
+                         [STAGE_FRAMING, STAGE_DECODING])
+
+    def test__send_answer(self):
+        trace = self.tracer.start_trace()
+        self.tracer.stamp(trace, STAGE_ROUTE)
+
+        cca = CCA(session_id="pgw.bromelia.org;1;1",
+                  origin_host="pcrf.bromelia.org",
+                  origin_realm="bromelia.org")
+        set_trace(cca, trace)
+
+        self.association.put_message_into_send_queue(cca)
+        self.association.send_message_from_queue()
+
+        self.assertEqual(self.association.transport.streams, [cca.dump()])
+        self.assertEqual([stage for stage, _ in trace.stamps],
+                         [STAGE_ROUTE, STAGE_SEND_QUEUE, STAGE_ENCODING])
+        self.assertEqual(self.finished, [(trace, cca)])
+
+    def test__disabled(self):
+        self.tracer.disable()
+
+        cca = CCA()
+        set_trace(cca, MessageTrace(0.0))
+
+        self.association.put_message_into_send_queue(cca)
+        self.association.send_message_from_queue()
+
+        self.assertEqual(self.finished, [])
+        self.assertEqual(self.registry.collect().stages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+    test.test_transport
+    ~~~~~~~~~~~~~~~~~~~
+
+    This module contains the SCTP multi-streaming unittests.
+
+    :copyright: (c) 2020-present Henrique Marques Ribeiro.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+import importlib.util
+import os
+import socket
+import sys
+import threading
+
+testing_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(testing_dir)
+
+sys.path.insert(0, base_dir)
+
+from bromelia.base import DiameterMessage
+from bromelia.lib.etsi_3gpp_s6a import ULR
+from bromelia.messages import DeviceWatchdogRequest
+from bromelia.transport import SctpStreams
+from bromelia.transport import select_stream_by_application
+from bromelia.transport import select_stream_by_session_id
+
+
+def create_ulr(session_id):
+    return ULR(session_id=session_id,
+               origin_host="mme.bromelia.org",
+               origin_realm="bromelia.org",
+               destination_realm="bromelia.org",
+               user_name="123456789012345",
+               visited_plmn_id=bytes.fromhex("27f450"),
+               ulr_flags=3).dump()
+
+
+def has_kernel_sctp():
+    if importlib.util.find_spec("sctp") is None:
+        return False
+
+    try:
+        socket.socket(socket.AF_INET, socket.SOCK_STREAM, 132).close()
+        return True
+    except OSError:
+        return False
+
+
+class TestStreamSelection(unittest.TestCase):
+    def setUp(self):
+        self.dwr = DeviceWatchdogRequest(origin_host="mme.bromelia.org",
+                                         origin_realm="bromelia.org").dump()
+
+    def test__select_stream_by_session_id(self):
+        stream = create_ulr("mme.bromelia.org;1;1")
+        stream_id = select_stream_by_session_id(stream, 0, 8)
+
+        self.assertIn(stream_id, range(1, 8))
+        self.assertEqual(select_stream_by_session_id(self.dwr + stream,
+                                                     len(self.dwr),
+                                                     8),
+                         stream_id)
+        self.assertEqual(select_stream_by_session_id(stream, 0, 1), 0)
+        self.assertEqual(select_stream_by_session_id(self.dwr, 0, 8), 0)
+
+    def test__select_stream_by_session_id__spread(self):
+        stream_ids = set([select_stream_by_session_id(create_ulr(f"mme;1;{index}"), 0, 8)
+                                                        for index in range(50)])
+
+        self.assertGreater(len(stream_ids), 4)
+
+    def test__select_stream_by_application(self):
+        stream = create_ulr("mme.bromelia.org;1;1")
+
+        self.assertEqual(select_stream_by_application(stream, 0, 4),
+                         1 + 16777251 % 3)
+        self.assertEqual(select_stream_by_application(self.dwr, 0, 4), 0)
+
+
+class TestSctpStreams(unittest.TestCase):
+    def test__split(self):
+        streams = SctpStreams(num_streams=4)
+        ulrs = [create_ulr(f"mme;1;{index}") for index in range(20)]
+        dwr = DeviceWatchdogRequest(origin_host="mme.bromelia.org",
+                                    origin_realm="bromelia.org").dump()
+
+        batches = streams.split(dwr + b"".join(ulrs))
+
+        #: Each stream gets a single batch, with its messages in order.
+        self.assertEqual(len(batches), len(set([stream_id for stream_id, _ in batches])))
+        self.assertEqual(batches[0], (0, dwr))
+
+        for stream_id, batch in batches[1:]:
+            expected = [ulr for ulr in ulrs
+                            if select_stream_by_session_id(ulr, 0, 4) == stream_id]
+            self.assertEqual(batch, b"".join(expected))
+
+    def test__split__max_batch_size(self):
+        ulr = create_ulr("mme;1;1")
+        streams = SctpStreams(num_streams=2, max_batch_size=len(ulr) * 2)
+
+        batches = streams.split(ulr * 5)
+
+        self.assertEqual([len(batch) // len(ulr) for _, batch in batches], [2, 2, 1])
+
+    def test__set_num_streams(self):
+        streams = SctpStreams(num_streams=8)
+
+        streams.set_num_streams(4)
+        self.assertEqual(streams.num_streams, 4)
+
+        streams.set_num_streams(16)
+        self.assertEqual(streams.num_streams, 4)
+
+        streams.set_num_streams(0)
+        self.assertEqual(streams.num_streams, 1)
+
+    def test__feed(self):
+        streams = SctpStreams(num_streams=2)
+        first, second = create_ulr("mme;1;1"), create_ulr("mme;1;2")
+
+        self.assertEqual(streams.feed(1, first[:50]), b"")
+        self.assertEqual(streams.feed(2, second[:30]), b"")
+        self.assertEqual(streams.feed(2, second[30:]), second)
+        self.assertEqual(streams.feed(1, first[50:]), first)
+
+    def test__policy__callable(self):
+        streams = SctpStreams(num_streams=3, policy=lambda stream, offset, num_streams: 2)
+
+        self.assertEqual(streams.split(create_ulr("mme;1;1"))[0][0], 2)
+
+
+@unittest.skipUnless(has_kernel_sctp(), "requires pysctp and kernel SCTP")
+class TestSctpMultiStreaming(unittest.TestCase):
+    def test__send_and_recv(self):
+        from bromelia.transport import SctpClient
+        from bromelia.transport import SctpServer
+
+        server = SctpServer("127.0.0.1", 3940, num_streams=4)
+        server.start()
+
+        accepting = threading.Thread(target=server.run)
+        accepting.start()
+
+        client = SctpClient("127.0.0.1", 3940, num_streams=4)
+        client.start()
+        accepting.join(timeout=5)
+
+        try:
+            ulrs = [create_ulr(f"mme;1;{index}") for index in range(10)]
+            client._send_buffer = b"".join(ulrs)
+            client._write()
+
+            self.assertGreater(client.streams.num_streams, 1)
+
+            received = b""
+            while len(received) < len(b"".join(ulrs)):
+                self.assertTrue(server._recv_data_available.wait(timeout=5))
+                server._recv_data_available.clear()
+                received += server._recv_data_stream
+                server._recv_data_stream = b""
+
+            msgs = DiameterMessage.load(received)
+            self.assertEqual(sorted([msg.session_id_avp.data for msg in msgs]),
+                             sorted([f"mme;1;{index}".encode() for index in range(10)]))
+
+        finally:
+            client.close()
+            server.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,8 +18,11 @@ base_dir = os.path.dirname(testing_dir)
 
 sys.path.insert(0, base_dir)
 
+from bromelia.exceptions import DataTypeError
 from bromelia.utils import (convert_to_4_length_bit, decode_from_tbcd,
+                            decode_tbcd, decode_tbcd_batch,
                             encode_to_tbcd, encode_special_chars_to_tbcd,
+                            encode_tbcd, encode_tbcd_batch,
                             get_two_bits, is_special_char,
                             transform_bits)
 
@@ -112,6 +115,121 @@ class TestDecodeFromTbcd(unittest.TestCase):
         self.assertEqual(decoded, "5521999999999")
 
 
+    def test__decode_from_tbcd__3(self):
+        decoded = decode_from_tbcd(bytes.fromhex("551299032876f2"))
+        self.assertEqual(decoded, "5521993082672")
+
+
+class TestEncodeTbcd(unittest.TestCase):
+    def test__encode_tbcd__odd_length(self):
+        encoded = encode_tbcd("5521993082672")
+        self.assertEqual(encoded, bytes.fromhex("551299032876f2"))
+
+    def test__encode_tbcd__even_length(self):
+        encoded = encode_tbcd("55219930826720")
+        self.assertEqual(encoded, bytes.fromhex("55129903287602"))
+
+    def test__encode_tbcd__int(self):
+        encoded = encode_tbcd(5521993082672)
+        self.assertEqual(encoded, bytes.fromhex("551299032876f2"))
+
+    def test__encode_tbcd__imsi(self):
+        encoded = encode_tbcd("724340000000001")
+        self.assertEqual(encoded, bytes.fromhex("27340400000000f1"))
+
+    def test__encode_tbcd__leading_zero(self):
+        encoded = encode_tbcd("0021")
+        self.assertEqual(encoded, bytes.fromhex("0012"))
+
+    def test__encode_tbcd__special_chars(self):
+        encoded = encode_tbcd("*#abc")
+        self.assertEqual(encoded, bytes.fromhex("badcfe"))
+
+        encoded = encode_tbcd("*#ABC")
+        self.assertEqual(encoded, bytes.fromhex("badcfe"))
+
+    def test__encode_tbcd__empty(self):
+        self.assertEqual(encode_tbcd(""), b"")
+
+    def test__encode_tbcd__invalid_digits(self):
+        with self.assertRaises(DataTypeError) as cm:
+            encode_tbcd("55219x")
+        self.assertEqual(cm.exception.args[0], "invalid TBCD digits: '55219x'")
+
+        with self.assertRaises(DataTypeError):
+            encode_tbcd("5521f")
+
+        with self.assertRaises(DataTypeError):
+            encode_tbcd("5521é")
+
+        with self.assertRaises(DataTypeError) as cm:
+            encode_tbcd("5521é".encode("utf-8"))
+        self.assertEqual(cm.exception.args[0],
+                         "invalid TBCD digits: '5521\\xc3\\xa9'")
+
+    def test__encode_tbcd__invalid_type(self):
+        with self.assertRaises(DataTypeError) as cm:
+            encode_tbcd(55.21)
+        self.assertEqual(cm.exception.args[0], "TBCD digits MUST be either "\
+                                               "'str', 'int' or 'bytes'")
+
+
+class TestDecodeTbcd(unittest.TestCase):
+    def test__decode_tbcd__odd_length(self):
+        decoded = decode_tbcd(bytes.fromhex("551299032876f2"))
+        self.assertEqual(decoded, "5521993082672")
+
+    def test__decode_tbcd__even_length(self):
+        decoded = decode_tbcd(bytes.fromhex("55129903287602"))
+        self.assertEqual(decoded, "55219930826720")
+
+    def test__decode_tbcd__special_chars(self):
+        decoded = decode_tbcd(bytes.fromhex("badcfe"))
+        self.assertEqual(decoded, "*#abc")
+
+    def test__decode_tbcd__empty(self):
+        self.assertEqual(decode_tbcd(b""), "")
+
+    def test__decode_tbcd__filler_only(self):
+        self.assertEqual(decode_tbcd(b"\xff"), "")
+        self.assertEqual(decode_tbcd(bytes.fromhex("21ff")), "12")
+
+    def test__decode_tbcd__round_trip(self):
+        for digits in ["1", "12", "123", "724340000000001", "*#0123456789abc"]:
+            self.assertEqual(decode_tbcd(encode_tbcd(digits)), digits)
+
+
+class TestTbcdBatch(unittest.TestCase):
+    def test__encode_tbcd_batch(self):
+        identities = ["5521993082672", "55219930826720", 724340000000001, ""]
+
+        encoded = encode_tbcd_batch(identities)
+        self.assertEqual(encoded, [encode_tbcd(identity) 
+                                                for identity in identities])
+
+    def test__encode_tbcd_batch__invalid_digits(self):
+        with self.assertRaises(DataTypeError):
+            encode_tbcd_batch(["5521993082672", "55x"])
+
+    def test__decode_tbcd_batch(self):
+        identities = ["5521993082672", "55219930826720", "724340000000001", ""]
+
+        decoded = decode_tbcd_batch(encode_tbcd_batch(identities))
+        self.assertEqual(decoded, identities)
+
+    def test__decode_tbcd_batch__filler_only(self):
+        decoded = decode_tbcd_batch([b"\xff", bytes.fromhex("f1")])
+        self.assertEqual(decoded, ["", "1"])
+
+    def test__decode_tbcd_batch__generator(self):
+        streams = (encode_tbcd(str(imsi)) 
+                            for imsi in range(724340000000000, 724340000000100))
+
+        decoded = decode_tbcd_batch(streams)
+        self.assertEqual(decoded, [str(imsi) 
+                            for imsi in range(724340000000000, 724340000000100)])
+
+
 class TestConvertTo4LengthBit(unittest.TestCase):
     def test__convert_to_4_length_bit__0(self):
         self.assertEqual(convert_to_4_length_bit(0), "0000")